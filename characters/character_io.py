@@ -220,15 +220,34 @@ class CharacterIO:
             return character_data
     
     def _get_character_memories(self, character_id: str) -> Optional[Dict[str, Any]]:
-        """Get character memories from the memory system."""
-        try:
-            from memory_new.enhanced.enhanced_memory_system import EnhancedMemorySystem
-            
-            # This would need to be implemented based on your memory system
-            # For now, return None
-            return None
-        except ImportError:
-            return None
+        """Get character memories from the memory system, keyed by user ID."""
+        import sqlite3
+        from memory_new.utils.compression import inflate_row
+        
+        fields = ("user_id", "content", "memory_type", "importance", "timestamp", "context",
+                  "tags", "emotional_valence", "relationship_impact")
+        memories: Dict[str, List[Dict[str, Any]]] = {}
+        pattern = f"enhanced_{character_id}_*.db"
+        # Archived (cold) memories first so each user's list stays chronological
+        db_files = sorted(Path("memory_databases/archive").glob(pattern)) + sorted(Path("memory_databases").glob(pattern))
+        for db_file in db_files:
+            try:
+                with sqlite3.connect(db_file) as conn:
+                    conn.row_factory = sqlite3.Row
+                    rows = conn.execute("""
+                        SELECT * FROM enhanced_memory WHERE character_id = ?
+                        ORDER BY timestamp
+                    """, (character_id,)).fetchall()
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not read memories from {db_file}: {e}")
+                continue
+            for row in rows:
+                memory = inflate_row(dict(row))
+                memory = {key: memory.get(key) for key in fields}
+                memory["context"] = json.loads(memory["context"] or "{}")
+                memory["tags"] = json.loads(memory["tags"] or "[]")
+                memories.setdefault(memory.pop("user_id"), []).append(memory)
+        return memories or None
     
     def _get_character_relationships(self, character_id: str) -> Optional[Dict[str, Any]]:
         """Get character relationships from the relationship system."""
@@ -242,9 +261,22 @@ class CharacterIO:
             return None
     
     def _import_character_memories(self, character_id: str, memories_data: Dict[str, Any]):
-        """Import character memories into the memory system."""
-        # Implementation would depend on your memory system
-        pass
+        """Import character memories into the memory system, one transaction per user."""
+        try:
+            from memory_new.enhanced.enhanced_memory_system import get_enhanced_memory_system
+        except ImportError:
+            return
+        
+        fields = ("content", "memory_type", "importance", "timestamp", "context",
+                  "tags", "emotional_valence", "relationship_impact")
+        for user_id, memories in memories_data.items():
+            records = [
+                {key: memory[key] for key in fields if memory.get(key) is not None}
+                for memory in memories if memory.get("content")
+            ]
+            memory_system = get_enhanced_memory_system(character_id, user_id) if records else None
+            if memory_system is not None:
+                memory_system.batch_store_memories(records)
     
     def _import_character_relationships(self, character_id: str, relationships_data: Dict[str, Any]):
         """Import character relationships into the relationship system."""
@@ -44,11 +44,11 @@ sys.path = [p for p in sys.path if 'phidata-main_live' not in p]
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, Query, Request
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, PlainTextResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Set, Tuple, AsyncIterable, AsyncIterator
 from pathlib import Path
 import sqlite3
 import json
@@ -141,8 +141,19 @@ except ImportError as e:
 ENHANCED_MEMORY_AVAILABLE = False  # Default to False
 MODULAR_MEMORY_AVAILABLE = False  # Default to False
 try:
-    from memory_new.enhanced.enhanced_memory_system import EnhancedMemorySystem, get_enhanced_memory_system
+    from memory_new.enhanced.enhanced_memory_system import (
+        EnhancedMemorySystem, get_enhanced_memory_system, get_memory_registry_stats, cleanup_memory_systems
+    )
     from memory_new.db.connection import get_memory_db_path
+    from memory_new.db import flush_write_buffer, flush_all_write_buffers
+    from memory_new.enhanced.summarization import start_background_summarization, stop_background_summarization
+    from memory_new.enhanced.profile import extract_profile_facts, merge_facts, profile_details
+    from memory_new.enhanced.async_memory import (
+        AsyncMemorySystem, MemoryQueueFull, get_async_memory_system, get_memory_executor, shutdown_memory_executor
+    )
+    from memory_new.enhanced.diary_jobs import DiaryJob, get_diary_job_manager, shutdown_diary_jobs
+    from memory_new.enhanced.facts import diary_facts, empty_diary_facts, extract_memory_facts, memory_facts
+    from memory_new.enhanced.exports import HISTORY_EXPORT_FORMATS, accepts_gzip, encode_chunks, history_export
     MODULAR_MEMORY_AVAILABLE = True
     ENHANCED_MEMORY_AVAILABLE = True
     print("✅ Modular memory system loaded successfully")
@@ -151,6 +162,37 @@ except ImportError as e:
     ENHANCED_MEMORY_AVAILABLE = False
     print(f"⚠️ Modular memory system not available: {e}")
 
+    class MemoryQueueFull(RuntimeError):
+        """Never raised without the memory system; lets handlers name the exception."""
+
+def require_memory_system(character_id: str, user_id: str) -> "EnhancedMemorySystem":
+    """Registry-backed memory system for a pair; raises HTTP 500 when it cannot be opened."""
+    memory_system = get_enhanced_memory_system(character_id, user_id) if ENHANCED_MEMORY_AVAILABLE else None
+    if memory_system is None:
+        raise HTTPException(status_code=500, detail="Enhanced memory system not available")
+    return memory_system
+
+async def require_async_memory_system(character_id: str, user_id: str) -> "AsyncMemorySystem":
+    """Async view of a pair's memory system (calls run on its DB thread); raises HTTP 500 when it cannot be opened."""
+    memory = await get_async_memory_system(character_id, user_id) if ENHANCED_MEMORY_AVAILABLE else None
+    if memory is None:
+        raise HTTPException(status_code=500, detail="Enhanced memory system not available")
+    return memory
+
+async def store_user_message(memory: "AsyncMemorySystem", turn_memories: List[Dict[str, Any]]) -> bool:
+    """Store only the user's message (first of the turn) when the turn's batch could not be stored."""
+    if not memory or not turn_memories:
+        return False
+    try:
+        await memory.store_batch(turn_memories[:1])
+        print(f"✅ User message stored in modular memory system")
+        return True
+    except MemoryQueueFull:
+        raise
+    except Exception as store_error:
+        print(f"⚠️ Failed to store user message in memory: {store_error}")
+        return False
+
 # Import ephemeral memory system
 try:
     # Legacy ephemeral memory import removed - using new modular system
@@ -2238,9 +2280,34 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+@app.exception_handler(MemoryQueueFull)
+async def memory_queue_full_handler(request: Request, exc: MemoryQueueFull):
+    """A full memory shard queue is backpressure: 503 with Retry-After, not a 500."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Memory system busy: {exc}"},
+        headers={"Retry-After": str(getattr(exc, "retry_after", 1))}
+    )
+
 # Mount the ui/ directory as static files
 app.mount("/ui", StaticFiles(directory="ui"), name="ui")
 
+@app.on_event("startup")
+async def start_memory_summarization():
+    """Start rolling old turns into session/weekly/monthly summaries in the background."""
+    if MODULAR_MEMORY_AVAILABLE:
+        start_background_summarization()
+
+@app.on_event("shutdown")
+async def flush_memory_writes_on_shutdown():
+    """Apply group-committed memory writes before the process exits."""
+    if MODULAR_MEMORY_AVAILABLE:
+        stop_background_summarization()
+        shutdown_diary_jobs()
+        shutdown_memory_executor()
+        flush_all_write_buffers()
+        cleanup_memory_systems()
+
 # Include ephemeral memory router if available
 # if EPHEMERAL_MEMORY_AVAILABLE:
 #     app.include_router(ephemeral_router)
@@ -2354,6 +2421,16 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "message": "Dynamic Character Playground is running"}
 
+@app.get("/memory-registry")
+async def memory_registry_stats():
+    """Cached per-pair memory systems (bounds, hit/miss/eviction counters, per-instance footprint) and DB thread queues."""
+    if not ENHANCED_MEMORY_AVAILABLE:
+        raise HTTPException(status_code=500, detail="Enhanced memory system not available")
+    try:
+        return {**get_memory_registry_stats(), "db_threads": get_memory_executor().stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/users")
 async def list_users():
     """Get list of all users by scanning memory databases."""
@@ -2903,11 +2980,10 @@ async def chat_with_character(message: ChatMessage, request: Request):
         
         if ENHANCED_SYSTEMS_AVAILABLE and character_state_persistence and emotional_context_tracker:
             try:
-                # Load or create character state
-                character_state = character_state_persistence.load_state(message.character_id, message.user_id)
+                # Load or create character state (one round trip for a new pair)
+                character_state = character_state_persistence.load_or_create_state(message.character_id, message.user_id)
                 if not character_state:
                     character_state = character_state_persistence.create_default_state(message.character_id, message.user_id)
-                    character_state_persistence.save_state(message.character_id, message.user_id, character_state)
                 
                 # Analyze emotional context of user message
                 user_emotional_context = emotional_context_tracker.analyze_emotional_context(
@@ -3070,9 +3146,9 @@ async def chat_with_character(message: ChatMessage, request: Request):
         memory_context = {}
         
         try:
-            # Use modular memory system
+            # Use modular memory system (async view; its calls run on the pair's DB thread)
             if MODULAR_MEMORY_AVAILABLE:
-                enhanced_memory = get_enhanced_memory_system(message.character_id, message.user_id)
+                enhanced_memory = await get_async_memory_system(message.character_id, message.user_id)
                 print(f"🔧 Using modular memory system for {message.character_id}")
             else:
                 print(f"⚠️ Modular memory system not available")
@@ -3080,8 +3156,10 @@ async def chat_with_character(message: ChatMessage, request: Request):
             # Process message and get expanded context
             if enhanced_memory:
                 try:
-                    personal_details = enhanced_memory.get_personal_details()
+                    personal_details = await enhanced_memory.call("get_personal_details")
                     print(f"📝 Extracted {len(personal_details)} personal details from enhanced memory system")
+                except MemoryQueueFull:
+                    raise
                 except Exception as e:
                     print(f"⚠️ Could not extract personal details: {e}")
             
@@ -3089,31 +3167,33 @@ async def chat_with_character(message: ChatMessage, request: Request):
             if enhanced_memory:
                 try:
                     # Use enhanced memory context with semantic search
-                    memory_context = enhanced_memory.get_memory_context(
-                        character_id=message.character_id,
-                        user_id=message.user_id,
+                    memory_context = await enhanced_memory.get_context(
                         max_memories=10,
                         min_importance=0.3,
                         include_emotional=True,
                         semantic_query=message.message  # Use message as semantic query
                     )
                     print(f"🚀 Using enhanced semantic memory context for {message.character_id}")
+                except MemoryQueueFull:
+                    raise
                 except Exception as e:
                     print(f"⚠️ Could not get enhanced memory context: {e}")
                     # Fallback to basic memory context
                     try:
-                        memory_context = enhanced_memory.get_memory_context(
-                            character_id=message.character_id,
-                            user_id=message.user_id,
+                        memory_context = await enhanced_memory.get_context(
                             max_memories=5,
                             min_importance=0.1,
                             include_emotional=False
                         )
                         print(f"🔄 Fallback to basic memory context")
+                    except MemoryQueueFull:
+                        raise
                     except Exception as fallback_e:
                         print(f"⚠️ Could not get memory context: {fallback_e}")
                         memory_context = {}
             
+        except MemoryQueueFull:
+            raise
         except Exception as e:
             print(f"Enhanced memory system error: {e}")
             # Fallback to basic memory system
@@ -3201,6 +3281,10 @@ async def chat_with_character(message: ChatMessage, request: Request):
             response_content = "I'm sorry, I couldn't generate a response at the moment."
             performance_stats = {"error": True, "response_time": time.time() - start_time}
             
+            # Memories of this turn, written together in one transaction once the response exists
+            enhanced_memory = None
+            turn_memories = []
+            
             try:
                 enhanced_message = message.message
                 if timezone_context and temporal_events:
@@ -3218,7 +3302,9 @@ async def chat_with_character(message: ChatMessage, request: Request):
                 # Add relevant diary context to enhance agent's awareness of past conversations
                 diary_context = ""
                 try:
-                    diary_context = get_relevant_diary_context(
+                    diary_context = await get_memory_executor().run(
+                        agent_key,
+                        get_relevant_diary_context,
                         message.character_id,
                         message.user_id,
                         message.message,
@@ -3232,32 +3318,29 @@ async def chat_with_character(message: ChatMessage, request: Request):
                     print(f"📖 Diary context search error: {e}")
                 
                 # Use modular memory system
-                enhanced_memory = None
                 memory_context = {}
                 if MODULAR_MEMORY_AVAILABLE:
                     try:
-                        # Create or get enhanced memory system
-                        enhanced_memory = get_enhanced_memory_system(message.character_id, message.user_id)
+                        # Create or get enhanced memory system (async view)
+                        enhanced_memory = await get_async_memory_system(message.character_id, message.user_id)
                         if enhanced_memory:
-                            # Store the current message with enhanced emotional context
+                            # Queue the current message with enhanced emotional context
                             user_emotional_valence = 0.0
                             user_relationship_impact = 0.1
                             if user_emotional_context:
                                 user_emotional_valence = 0.5 if user_emotional_context.valence == "positive" else (-0.5 if user_emotional_context.valence == "negative" else 0.0)
                                 user_relationship_impact = user_emotional_context.relationship_impact
                             
-                            enhanced_memory.store_memory(
-                                content=message.message,
-                                memory_type="user_message",
-                                importance=0.6 + (user_emotional_context.intensity * 0.4 if user_emotional_context else 0.0),
-                                emotional_valence=user_emotional_valence,
-                                relationship_impact=user_relationship_impact
-                            )
+                            turn_memories.append({
+                                "content": message.message,
+                                "memory_type": "user_message",
+                                "importance": 0.6 + (user_emotional_context.intensity * 0.4 if user_emotional_context else 0.0),
+                                "emotional_valence": user_emotional_valence,
+                                "relationship_impact": user_relationship_impact
+                            })
                             
                             # Get enhanced memory context
-                            memory_context = enhanced_memory.get_memory_context(
-                                character_id=message.character_id,
-                                user_id=message.user_id,
+                            memory_context = await enhanced_memory.get_context(
                                 max_memories=10,
                                 min_importance=0.3,
                                 include_emotional=True
@@ -3266,7 +3349,8 @@ async def chat_with_character(message: ChatMessage, request: Request):
                             
                             # CRITICAL FIX: Apply memory fix to extract personal details
                             try:
-                                memory_fix_result = apply_memory_fix_to_chat(
+                                memory_fix_result = await enhanced_memory.run(
+                                    apply_memory_fix_to_chat,
                                     character_id=message.character_id,
                                     user_id=message.user_id,
                                     message=message.message,
@@ -3355,29 +3439,16 @@ async def chat_with_character(message: ChatMessage, request: Request):
                                         print(f"📝 No personal details found in memory")
                                 else:
                                     print(f"⚠️ Memory fix failed: {memory_fix_result.get('error', 'Unknown error')}")
+                            except MemoryQueueFull:
+                                raise
                             except Exception as e:
                                 print(f"⚠️ Memory fix error: {e}")
                                 import traceback
                                 traceback.print_exc()
-                            
-                            # Store character response with emotional context (after response is generated)
-                            if response_content and response_content != "I'm sorry, I couldn't generate a response at the moment.":
-                                character_emotional_valence = 0.0
-                                character_relationship_impact = 0.1
-                                if character_emotional_context:
-                                    character_emotional_valence = 0.5 if character_emotional_context.valence == "positive" else (-0.5 if character_emotional_context.valence == "negative" else 0.0)
-                                    character_relationship_impact = character_emotional_context.relationship_impact
-                                
-                                enhanced_memory.store_memory(
-                                    content=response_content,
-                                    memory_type="character_response",
-                                    importance=0.5 + (character_emotional_context.intensity * 0.5 if character_emotional_context else 0.0),
-                                    emotional_valence=character_emotional_valence,
-                                    relationship_impact=character_relationship_impact
-                                )
-                                print(f"✅ Character response stored with emotional context")
                         else:
                             print(f"⚠️ Could not create enhanced memory system")
+                    except MemoryQueueFull:
+                        raise
                     except Exception as e:
                         print(f"⚠️ Modular memory system error: {e}")
                         import traceback
@@ -3522,20 +3593,35 @@ async def chat_with_character(message: ChatMessage, request: Request):
                         response_content = "I'm sorry, I'm having trouble responding right now. Could you try again?"
                         performance_stats = {"error": True, "response_time": time.time() - start_time}
                 
-                # Store the response in memory if modular system is available
+                # Store the user message and response in memory if modular system is available
                 if MODULAR_MEMORY_AVAILABLE and enhanced_memory:
                     try:
-                        enhanced_memory.store_memory(
-                            content=response_content,
-                            memory_type="response",
-                            importance=0.6,
-                            emotional_valence=0.0,
-                            relationship_impact=0.1
-                        )
-                        print(f"✅ Response stored in modular memory system")
+                        character_emotional_valence = 0.0
+                        character_relationship_impact = 0.1
+                        if character_emotional_context:
+                            character_emotional_valence = 0.5 if character_emotional_context.valence == "positive" else (-0.5 if character_emotional_context.valence == "negative" else 0.0)
+                            character_relationship_impact = character_emotional_context.relationship_impact
+                        
+                        turn_memories.append({
+                            "content": response_content,
+                            "memory_type": "response",
+                            "importance": 0.6,
+                            "emotional_valence": character_emotional_valence,
+                            "relationship_impact": character_relationship_impact
+                        })
+                        await enhanced_memory.store_batch(turn_memories)
+                        turn_memories = []
+                        print(f"✅ Turn stored in modular memory system (1 transaction)")
+                    except MemoryQueueFull:
+                        raise
                     except Exception as e:
-                        print(f"⚠️ Failed to store response in memory: {e}")
+                        print(f"⚠️ Failed to store turn in memory: {e}")
+                        # The batch is all or nothing: keep at least the user's message
+                        if await store_user_message(enhanced_memory, turn_memories):
+                            turn_memories = []
                         
+            except MemoryQueueFull:
+                raise
             except Exception as e:
                 print(f"❌ CHAT ENDPOINT ERROR:")
                 print(f"Error type: {type(e).__name__}")
@@ -3546,6 +3632,9 @@ async def chat_with_character(message: ChatMessage, request: Request):
                 traceback.print_exc()
                 print(f"Request data: character_id={message.character_id}, user_id={message.user_id}, message='{message.message}'")
                 
+                # Keep the user's message even though the turn failed
+                await store_user_message(enhanced_memory, turn_memories)
+                
                 response_content = "I'm sorry, I encountered an error. Please try again."
                 performance_stats = {"error": True, "response_time": time.time() - start_time}
         
@@ -3733,6 +3822,8 @@ async def chat_with_character(message: ChatMessage, request: Request):
             "temporal_events": [],
             "timezone_aware": bool(location_data)
         }
+    except MemoryQueueFull:
+        raise
     except Exception as e:
         import traceback
         error_traceback = traceback.format_exc()
@@ -3799,15 +3890,24 @@ load_dotenv()
 # Diary-related functions and endpoints
 def generate_agent_diary_summary(character_id: str, character: dict, user_id: str) -> str:
     """Generate a diary-style memory summary written from the agent's personal perspective."""
+    return "\n".join(iter_agent_diary_sections(character_id, character, user_id))
+
+def iter_agent_diary_sections(character_id: str, character: dict, user_id: str,
+                              progress=None):
+    """Generate the agent diary summary section by section, yielding each as it completes.
+    
+    Sections are newline-joined lines; joining them with newlines gives the
+    whole summary (see generate_agent_diary_summary).
     
-    diary_lines = []
+    Args:
+        progress: Optional callback taking days_done / days_total keywords
+    """
+    
+    section = []
     
     try:
-        # Initialize memory system
-        memory_system = EnhancedMemorySystem(character_id, user_id)
-        
-        # Get ALL memories for comprehensive analysis
-        all_memories = memory_system.get_all_memories_for_summary()
+        # Shared per-pair memory system
+        memory_system = require_memory_system(character_id, user_id)
         
         # Get character details
         character_name = character.get('name', 'Unknown')
@@ -3819,108 +3919,187 @@ def generate_agent_diary_summary(character_id: str, character: dict, user_id: st
         relationship_system = RelationshipSystem()
         relationship_status = relationship_system.get_relationship_status(user_id, character_id)
         
-        # Group memories by date
-        memories_by_date = group_memories_by_date(all_memories)
-        print(f"🔍 DEBUG: Found {len(memories_by_date)} days with memories: {list(memories_by_date.keys())}")
-        
-        # Extract factual information for hashtags
-        factual_data = extract_factual_data_for_diary(all_memories, user_id)
-        
         # Header
-        diary_lines.append("=" * 80)
-        diary_lines.append(f"📖 {character_name}'s Personal Diary")
-        diary_lines.append("=" * 80)
-        diary_lines.append(f"Relationship with: {user_id}")
-        diary_lines.append(f"Current Level: {relationship_status.get('level', 'Unknown')}")
-        diary_lines.append(f"Total Conversations: {relationship_status.get('total_conversations', 0)}")
-        diary_lines.append(f"Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        diary_lines.append("")
+        section.append("=" * 80)
+        section.append(f"📖 {character_name}'s Personal Diary")
+        section.append("=" * 80)
+        section.append(f"Relationship with: {user_id}")
+        section.append(f"Current Level: {relationship_status.get('level', 'Unknown')}")
+        section.append(f"Total Conversations: {relationship_status.get('total_conversations', 0)}")
+        section.append(f"Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        section.append("")
+        yield "\n".join(section)
+        section = []
+        
+        # Per-day entries, regenerated only for days whose memories changed
+        diary_days = build_diary_days(
+            memory_system, character_name, archetype, emotional_tone, user_id, relationship_status,
+            progress=progress
+        )
+        
+        # Factual information for the summary and hashtags, merged from the days
+        factual_data = merge_factual_data([day['facts'] for day in diary_days if day['facts']])
+        # Conversation memories (content, timestamp, importance) for the whole-diary sections
+        conversation_memories = factual_data['actual_conversations']
         
         # Add factual summary section
-        diary_lines.append("📊 FACTUAL SUMMARY")
-        diary_lines.append("-" * 40)
+        section.append("📊 FACTUAL SUMMARY")
+        section.append("-" * 40)
         factual_summary = generate_factual_summary(factual_data, user_id)
-        diary_lines.append(factual_summary)
-        diary_lines.append("")
-        
-        # Generate diary entries for each day
-        for date, day_memories in sorted(memories_by_date.items(), reverse=True):
-            diary_lines.append(f"📅 {date}")
-            diary_lines.append("-" * 40)
+        section.append(factual_summary)
+        section.append("")
+        yield "\n".join(section)
+        section = []
+        
+        # Diary entries for each day, newest first
+        for day in reversed(diary_days):
+            section.append(f"📅 {day['day']}")
+            section.append("-" * 40)
             
-            # Generate diary entry for this day
-            try:
-                diary_entry, entry_hashtags = generate_diary_entry_for_day_v2(
-                    character_name, 
-                    archetype, 
-                    emotional_tone, 
-                    day_memories, 
-                    user_id,
-                    relationship_status
-                )
-                
-                diary_lines.append(diary_entry)
-                diary_lines.append("")
+            if day['error']:
+                section.append(f"Error generating diary entry: {day['error']}")
+                section.append("")
+            else:
+                section.append(day['entry'])
+                section.append("")
                 
                 # Add searchable hashtags for this entry
-                diary_lines.append("🏷️ HASHTAGS")
-                diary_lines.append("-" * 20)
-                if entry_hashtags:
-                    hashtag_text = " ".join(entry_hashtags)
-                    diary_lines.append(hashtag_text)
+                section.append("🏷️ HASHTAGS")
+                section.append("-" * 20)
+                if day['hashtags']:
+                    hashtag_text = " ".join(day['hashtags'])
+                    section.append(hashtag_text)
                 else:
-                    diary_lines.append("No hashtags generated for this day")
-                diary_lines.append("")
-                
-            except Exception as e:
-                print(f"❌ ERROR in diary generation for {date}: {str(e)}")
-                import traceback
-                print(f"❌ TRACEBACK: {traceback.format_exc()}")
-                diary_lines.append(f"Error generating diary entry: {str(e)}")
-                diary_lines.append("")
+                    section.append("No hashtags generated for this day")
+                section.append("")
+            yield "\n".join(section)
+            section = []
         
         # Add relationship insights
-        diary_lines.append("💭 RELATIONSHIP REFLECTIONS")
-        diary_lines.append("-" * 40)
+        section.append("💭 RELATIONSHIP REFLECTIONS")
+        section.append("-" * 40)
         relationship_insights = generate_relationship_insights(
             character_name, 
             user_id, 
-            all_memories, 
+            conversation_memories, 
             relationship_status
         )
-        diary_lines.append(relationship_insights)
-        diary_lines.append("")
+        section.append(relationship_insights)
+        section.append("")
+        yield "\n".join(section)
+        section = []
         
         # Add personal ambitions and desires
-        diary_lines.append("🌟 MY AMBITIONS & DESIRES")
-        diary_lines.append("-" * 40)
+        section.append("🌟 MY AMBITIONS & DESIRES")
+        section.append("-" * 40)
         ambitions_entry = generate_ambitions_entry(
             character_name, 
             archetype, 
             user_id, 
-            all_memories
+            conversation_memories
         )
-        diary_lines.append(ambitions_entry)
-        diary_lines.append("")
+        section.append(ambitions_entry)
+        section.append("")
+        yield "\n".join(section)
+        section = []
         
         # Add hashtag section for easy searching
-        diary_lines.append("🏷️ HASHTAGS FOR SEARCHING")
-        diary_lines.append("-" * 40)
-        hashtags = generate_hashtags_for_diary(factual_data, all_memories, character_name, user_id)
-        diary_lines.append(hashtags)
-        diary_lines.append("")
+        section.append("🏷️ HASHTAGS FOR SEARCHING")
+        section.append("-" * 40)
+        hashtags = generate_hashtags_for_diary(factual_data, conversation_memories, character_name, user_id)
+        section.append(hashtags)
+        section.append("")
         
         # Footer
-        diary_lines.append("=" * 80)
-        diary_lines.append("End of Diary")
-        diary_lines.append("=" * 80)
+        section.append("=" * 80)
+        section.append("End of Diary")
+        section.append("=" * 80)
         
     except Exception as e:
-        diary_lines.append(f"Error generating diary: {str(e)}")
+        section.append(f"Error generating diary: {str(e)}")
         import traceback
-        diary_lines.append(f"Traceback: {traceback.format_exc()}")
+        section.append(f"Traceback: {traceback.format_exc()}")
     
-    return "\n".join(diary_lines)
+    if section:
+        yield "\n".join(section)
+
+# Bump when the day entry generators change, so cached diary days are rebuilt
+DIARY_FORMAT_VERSION = 1
+
+def diary_cache_salt(character_name: str, user_id: str) -> str:
+    """Salt of a pair's cached diary days (generator version and the names the entries mention)."""
+    return f"{DIARY_FORMAT_VERSION}|{character_name}|{user_id}"
+
+def build_diary_days(
+    memory_system,
+    character_name: str,
+    archetype: str,
+    emotional_tone: str,
+    user_id: str,
+    relationship_status: Dict[str, Any],
+    progress=None
+) -> List[Dict[str, Any]]:
+    """Diary parts of every day with memories, oldest first.
+    
+    A day's entry, hashtags and facts depend only on that day's memories, so
+    days whose memory fingerprint matches the cached one are reused as they
+    are; only new or changed days are loaded and regenerated (and cached) by
+    EnhancedMemorySystem.build_diary_days.
+    
+    Args:
+        progress: Optional callback taking days_done / days_total keywords, called per day
+    
+    Returns:
+        list: {'day', 'entry', 'hashtags', 'facts', 'error'} per day
+    """
+    def generate_day(day_memories):
+        facts = extract_factual_data_for_diary(day_memories, user_id)
+        diary_entry, entry_hashtags = generate_diary_entry_for_day_v2(
+            character_name, 
+            archetype, 
+            emotional_tone, 
+            day_memories, 
+            user_id,
+            relationship_status,
+            factual_info=facts
+        )
+        return diary_entry, entry_hashtags, facts
+    
+    days = memory_system.build_diary_days(diary_cache_salt(character_name, user_id), generate_day, progress)
+    for day in days:
+        if day['error']:
+            print(f"❌ ERROR in diary generation for {day['day']}: {day['error']}")
+    regenerated = sum(1 for day in days if not day.pop('cached'))
+    print(f"🔍 DEBUG: Diary has {len(days)} days ({regenerated} regenerated, {len(days) - regenerated} cached)")
+    return days
+
+def merge_factual_data(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-day `extract_factual_data_for_diary` results (oldest day first) into one."""
+    merged = empty_diary_facts()
+    for facts in parts:
+        for topic in facts.get('conversation_topics', []):
+            if topic not in merged['conversation_topics']:
+                merged['conversation_topics'].append(topic)
+        for pet in facts.get('pets', []):
+            if not any(known['name'].lower() == pet['name'].lower() for known in merged['pets']):
+                merged['pets'].append(pet)
+        for member in facts.get('family_members', []):
+            if not any(known['name'].lower() == member['name'].lower() for known in merged['family_members']):
+                merged['family_members'].append(member)
+        for category, values in facts.get('preferences', {}).items():
+            known = merged['preferences'].setdefault(category, [])
+            known.extend(value for value in values if value not in known)
+        merged['personal_info'].update(facts.get('personal_info', {}))
+        for field in ('emotional_patterns', 'actual_conversations', 'dreams_described', 'relationships_mentioned',
+                      'fears_and_anxieties', 'breakthrough_moments', 'therapeutic_insights', 'specific_events',
+                      'quotes_and_sayings'):
+            merged[field].extend(facts.get(field, []))
+    
+    # Deduplicate across days, as within one
+    for field in ('dreams_described', 'relationships_mentioned', 'fears_and_anxieties', 'breakthrough_moments',
+                  'therapeutic_insights', 'specific_events', 'quotes_and_sayings'):
+        merged[field] = [dict(t) for t in {tuple(d.items()) for d in merged[field]}]
+    return merged
 
 def group_memories_by_date(memories: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
     """Group memories by date for diary organization."""
@@ -3954,9 +4133,15 @@ def generate_diary_entry_hashtags(
     agent_responses: List[str], 
     character_name: str, 
     user_id: str, 
-    factual_info: Dict[str, Any]
+    factual_info: Dict[str, Any],
+    user_terms: Optional[Set[str]] = None
 ) -> List[str]:
-    """Generate relevant hashtags for a diary entry based on actual conversation content."""
+    """Generate relevant hashtags for a diary entry based on actual conversation content.
+    
+    Args:
+        user_terms: Keywords of the user messages (the union of their fact
+            bundles' terms); extracted from user_messages when not given
+    """
     hashtags = set()
     
     # Character-based hashtag
@@ -3970,58 +4155,61 @@ def generate_diary_entry_hashtags(
     hashtags.add("#memory")
     
     # Analyze actual user message content for relevant hashtags
-    all_user_content = " ".join(user_messages).lower() if user_messages else ""
+    if user_terms is None:
+        user_terms = set()
+        for message in user_messages or []:
+            user_terms |= extract_memory_facts(message).terms
     
     # Topic-based hashtags from real conversations
-    if 'dream' in all_user_content or 'nightmare' in all_user_content:
+    if 'dream' in user_terms or 'nightmare' in user_terms:
         hashtags.add("#dreams")
         hashtags.add("#dreamanalysis")
     
-    if 'mother' in all_user_content or 'mom' in all_user_content:
+    if 'mother' in user_terms or 'mom' in user_terms:
         hashtags.add("#mother")
         hashtags.add("#familydynamics")
     
-    if 'father' in all_user_content or 'dad' in all_user_content:
+    if 'father' in user_terms or 'dad' in user_terms:
         hashtags.add("#father")
         hashtags.add("#familydynamics")
     
-    if 'family' in all_user_content:
+    if 'family' in user_terms:
         hashtags.add("#family")
         hashtags.add("#relationships")
     
-    if 'work' in all_user_content or 'job' in all_user_content:
+    if 'work' in user_terms or 'job' in user_terms:
         hashtags.add("#work")
         hashtags.add("#dailylife")
     
-    if 'love' in all_user_content or 'relationship' in all_user_content:
+    if 'love' in user_terms or 'relationship' in user_terms:
         hashtags.add("#love")
         hashtags.add("#relationships")
     
-    if 'advice' in all_user_content or 'help' in all_user_content:
+    if 'advice' in user_terms or 'help' in user_terms:
         hashtags.add("#advice")
         hashtags.add("#guidance")
     
-    if 'inspiration' in all_user_content or 'inspire' in all_user_content:
+    if 'inspiration' in user_terms or 'inspire' in user_terms:
         hashtags.add("#inspiration")
         hashtags.add("#motivation")
     
-    if 'natural' in all_user_content:
+    if 'natural' in user_terms:
         hashtags.add("#authenticity")
         hashtags.add("#naturalness")
     
-    if 'warm' in all_user_content or 'weather' in all_user_content:
+    if 'warm' in user_terms or 'weather' in user_terms:
         hashtags.add("#weather")
         hashtags.add("#currentevents")
     
-    if 'swim' in all_user_content or 'swimming' in all_user_content:
+    if 'swim' in user_terms or 'swimming' in user_terms:
         hashtags.add("#swimming")
         hashtags.add("#activities")
     
-    if 'down' in all_user_content or 'tired' in all_user_content:
+    if 'down' in user_terms or 'tired' in user_terms:
         hashtags.add("#emotions")
         hashtags.add("#support")
     
-    if 'encounter' in all_user_content or 'meeting' in all_user_content:
+    if 'encounter' in user_terms or 'meeting' in user_terms:
         hashtags.add("#firstencounters")
         hashtags.add("#socialconnection")
     
@@ -4034,7 +4222,7 @@ def generate_diary_entry_hashtags(
     }
     
     for emotion, indicators in emotional_indicators.items():
-        if any(word in all_user_content for word in indicators):
+        if any(word in user_terms for word in indicators):
             hashtags.add(f"#{emotion}")
     
     # Add passionate tag for Nicholas Cage character
@@ -4074,10 +4262,14 @@ def generate_diary_entry_for_day_v2(
     emotional_tone: str, 
     day_memories: List[Dict[str, Any]], 
     user_id: str,
-    relationship_status: Dict[str, Any]
+    relationship_status: Dict[str, Any],
+    factual_info: Optional[Dict[str, Any]] = None
 ) -> tuple[str, List[str]]:
     """Generate a personal diary entry based on actual conversation content.
     
+    Args:
+        factual_info: The day's `extract_factual_data_for_diary` result, if already extracted
+    
     Returns:
         tuple: (diary_entry_text, hashtags_list)
     """
@@ -4085,39 +4277,29 @@ def generate_diary_entry_for_day_v2(
     # Extract ONLY actual user conversations (not system messages or agent responses)
     actual_user_messages = []
     agent_responses = []
+    user_terms = set()
     
     for memory in day_memories:
         content = memory.get('content', '')
+        # One cached extraction per memory (system line, speaker, keywords)
+        facts = memory_facts(memory)
         # Skip system messages, debug messages, and diary entries
-        if (content.startswith('🔧') or content.startswith('📝') or 
-            content.startswith('🚀') or content.startswith('✅') or 
-            content.startswith('⚠️') or content.startswith('❌') or 
-            content.startswith('🎭') or content.startswith('💭') or 
-            content.startswith('🔍') or content.startswith('🤖') or 
-            content.startswith('📚') or content.startswith('📊') or 
-            content.startswith('🎯') or content.startswith('🔄') or
-            content.startswith('================================================================================') or
-            content.startswith('📖') or len(content) < 10):
+        if facts.system or content.startswith('📖') or len(content) < 10:
             continue
             
-        # Determine if this is a user message or agent response
-        # User messages are typically shorter and more conversational
-        # Agent responses often start with certain patterns or are longer
-        is_agent_response = (
-            content.startswith(('Ah,', 'You know,', 'That sounds', 'I understand', 'Let me', 'Well,', 'Interesting', 'Wow,')) or
-            len(content) > 200 or  # Agent responses tend to be longer
-            'you know' in content.lower() and len(content) > 100
-        )
-        
-        if is_agent_response:
+        # User messages are typically shorter and more conversational; agent
+        # responses often start with certain patterns or are longer
+        if facts.agent:
             agent_responses.append(content)
         else:
             actual_user_messages.append(content)
+            user_terms |= facts.terms
     
     print(f"🔍 DEBUG: Found {len(actual_user_messages)} user messages and {len(agent_responses)} agent responses")
     
     # Extract factual information from actual conversations
-    factual_info = extract_factual_data_for_diary(day_memories, user_id)
+    if factual_info is None:
+        factual_info = extract_factual_data_for_diary(day_memories, user_id)
     
     # Start with a personal, introspective opening
     entry_parts = []
@@ -4137,26 +4319,23 @@ def generate_diary_entry_for_day_v2(
     
     # Add specific observations based on ACTUAL conversation content
     if actual_user_messages:
-        # Analyze the actual content of user messages
-        all_user_content = " ".join(actual_user_messages).lower()
-        
         # Extract real topics mentioned in conversations
         real_topics = []
-        if 'warm' in all_user_content or 'weather' in all_user_content:
+        if 'warm' in user_terms or 'weather' in user_terms:
             real_topics.append('the warm weather')
-        if 'swim' in all_user_content:
+        if 'swim' in user_terms:
             real_topics.append('swimming')
-        if 'inspiration' in all_user_content or 'inspire' in all_user_content:
+        if 'inspiration' in user_terms or 'inspire' in user_terms:
             real_topics.append('inspiration and motivation')
-        if 'natural' in all_user_content:
+        if 'natural' in user_terms:
             real_topics.append('keeping things natural')
-        if 'love' in all_user_content or 'encounter' in all_user_content:
+        if 'love' in user_terms or 'encounter' in user_terms:
             real_topics.append('love and first encounters')
-        if 'advice' in all_user_content:
+        if 'advice' in user_terms:
             real_topics.append('seeking advice')
-        if 'dream' in all_user_content or 'nightmare' in all_user_content:
+        if 'dream' in user_terms or 'nightmare' in user_terms:
             real_topics.append('dreams and their meanings')
-        if 'mother' in all_user_content or 'father' in all_user_content or 'family' in all_user_content:
+        if 'mother' in user_terms or 'father' in user_terms or 'family' in user_terms:
             real_topics.append('family relationships')
         
         # Add real conversation observations
@@ -4171,11 +4350,11 @@ def generate_diary_entry_for_day_v2(
                 entry_parts.append(f"They said: '{clean_message}' - their words stay with me, each conversation building our connection.")
         
         # Emotional tone observations based on actual content
-        if any(word in all_user_content for word in ['down', 'tired', 'tricky']):
+        if any(word in user_terms for word in ['down', 'tired', 'tricky']):
             entry_parts.append("I sense some weariness in their words today. It touches me that they share these honest moments.")
-        elif any(word in all_user_content for word in ['inspiration', 'hope', 'love']):
+        elif any(word in user_terms for word in ['inspiration', 'hope', 'love']):
             entry_parts.append("There's an optimism in their messages that lifts my spirits. Their hope is contagious.")
-        elif any(word in all_user_content for word in ['natural', 'advice']):
+        elif any(word in user_terms for word in ['natural', 'advice']):
             entry_parts.append("They're seeking guidance, looking for genuine connection. I'm honored they trust me with their questions.")
     
     # Enhanced content based on actual factual data
@@ -4199,7 +4378,8 @@ def generate_diary_entry_for_day_v2(
         agent_responses, 
         character_name, 
         user_id, 
-        factual_info
+        factual_info,
+        user_terms
     )
     
     # Join all parts into final entry
@@ -4251,254 +4431,13 @@ def generate_diary_entry_for_day(
         )
 
 def extract_factual_data_for_diary(memories: List[Dict[str, Any]], user_id: str) -> Dict[str, Any]:
-    """Extract detailed factual information from memories for diary generation."""
-    factual_data = {
-        'conversation_topics': [],
-        'family_members': [],
-        'pets': [],
-        'preferences': {
-            'food': [],
-            'music': [],
-            'hobbies': [],
-            'places': []
-        },
-        'personal_info': {},
-        'emotional_patterns': [],
-        'actual_conversations': [],
-        # Enhanced fields for specific content
-        'dreams_described': [],
-        'relationships_mentioned': [],
-        'fears_and_anxieties': [],
-        'breakthrough_moments': [],
-        'therapeutic_insights': [],
-        'specific_events': [],
-        'quotes_and_sayings': []
-    }
+    """Extract detailed factual information from memories for diary generation.
     
-    for memory in memories:
-        content = memory.get('content', '')
-        
-        # Skip system messages and diary entries
-        if (content.startswith('🔧') or content.startswith('📝') or 
-            content.startswith('🚀') or content.startswith('✅') or 
-            content.startswith('⚠️') or content.startswith('❌') or 
-            content.startswith('🎭') or content.startswith('💭') or 
-            content.startswith('🔍') or content.startswith('🤖') or 
-            content.startswith('📚') or content.startswith('📊') or 
-            content.startswith('🎯') or content.startswith('🔄') or
-            content.startswith('================================================================================')):
-            continue
-        
-        # Store actual conversation content
-        if len(content) > 10 and not content.startswith('📖'):
-            factual_data['actual_conversations'].append({
-                'content': content,
-                'timestamp': memory.get('timestamp', ''),
-                'importance': memory.get('importance', 0)
-            })
-        
-        content_lower = content.lower()
-        
-        # ENHANCED: Extract specific dream descriptions
-        if 'dream' in content_lower or 'nightmare' in content_lower:
-            dream_indicators = [
-                'i had a dream', 'i dreamed', 'in my dream', 'dreaming about',
-                'recurring dream', 'strange dream', 'disturbing dream',
-                'i dream about', 'my dreams', 'nightmares about'
-            ]
-            for indicator in dream_indicators:
-                if indicator in content_lower:
-                    # Extract the sentence containing the dream description
-                    sentences = content.split('.')
-                    for sentence in sentences:
-                        if indicator in sentence.lower():
-                            dream_desc = sentence.strip()
-                            if dream_desc and len(dream_desc) > 20:
-                                factual_data['dreams_described'].append({
-                                    'description': dream_desc,
-                                    'type': 'recurring' if 'recurring' in dream_desc.lower() else 'single',
-                                    'emotional_tone': 'disturbing' if any(word in dream_desc.lower() for word in ['disturbing', 'nightmare', 'scary', 'frightening']) else 'neutral'
-                                })
-                    break
-        
-        # ENHANCED: Extract specific relationship mentions
-        relationship_keywords = {
-            'father': ['father', 'dad', 'daddy'],
-            'mother': ['mother', 'mom', 'mommy'],
-            'boss': ['boss', 'supervisor', 'manager'],
-            'partner': ['boyfriend', 'girlfriend', 'partner', 'spouse'],
-            'friend': ['friend', 'buddy', 'pal'],
-            'colleague': ['colleague', 'coworker', 'workmate'],
-            'authority_figure': ['teacher', 'professor', 'authority']
-        }
-        
-        for rel_type, keywords in relationship_keywords.items():
-            for keyword in keywords:
-                if keyword in content_lower:
-                    # Extract context around the relationship mention
-                    words = content.split()
-                    for i, word in enumerate(words):
-                        if keyword in word.lower():
-                            context_start = max(0, i-5)
-                            context_end = min(len(words), i+10)
-                            context = ' '.join(words[context_start:context_end])
-                            
-                            factual_data['relationships_mentioned'].append({
-                                'type': rel_type,
-                                'keyword': keyword,
-                                'context': context,
-                                'emotional_context': 'negative' if any(neg in content_lower for neg in ['strict', 'harsh', 'fear', 'afraid', 'scary']) else 'neutral'
-                            })
-                    break
-        
-        # ENHANCED: Extract fears and anxieties with specifics
-        fear_patterns = [
-            'i have a fear', 'i\'m afraid', 'i fear', 'makes me anxious',
-            'i get nervous', 'terrifies me', 'scares me', 'phobia',
-            'i panic when', 'anxiety about', 'worried about'
-        ]
-        
-        for pattern in fear_patterns:
-            if pattern in content_lower:
-                sentences = content.split('.')
-                for sentence in sentences:
-                    if pattern in sentence.lower():
-                        fear_desc = sentence.strip()
-                        if fear_desc and len(fear_desc) > 10:
-                            factual_data['fears_and_anxieties'].append({
-                                'description': fear_desc,
-                                'trigger': pattern,
-                                'severity': 'high' if any(word in fear_desc.lower() for word in ['terrif', 'panic', 'phobia']) else 'moderate'
-                            })
-                break
-        
-        # ENHANCED: Extract breakthrough moments and insights
-        breakthrough_indicators = [
-            'i understand now', 'it makes sense', 'i realize', 'i see now',
-            'that\'s helpful', 'insight', 'breakthrough', 'aha moment',
-            'now i get it', 'this explains', 'i\'m starting to see'
-        ]
-        
-        for indicator in breakthrough_indicators:
-            if indicator in content_lower:
-                sentences = content.split('.')
-                for sentence in sentences:
-                    if indicator in sentence.lower():
-                        insight = sentence.strip()
-                        if insight and len(insight) > 15:
-                            factual_data['breakthrough_moments'].append({
-                                'insight': insight,
-                                'trigger': indicator,
-                                'emotional_impact': 'positive'
-                            })
-                break
-        
-        # ENHANCED: Extract therapeutic insights from character responses
-        therapeutic_patterns = [
-            'from a psychoanalytic', 'dreams often', 'unconscious mind',
-            'repressed', 'childhood experiences', 'this could represent',
-            'symbolize', 'deeper meaning', 'root of', 'stems from'
-        ]
-        
-        for pattern in therapeutic_patterns:
-            if pattern in content_lower:
-                sentences = content.split('.')
-                for sentence in sentences:
-                    if pattern in sentence.lower():
-                        therapeutic_insight = sentence.strip()
-                        if therapeutic_insight and len(therapeutic_insight) > 20:
-                            factual_data['therapeutic_insights'].append({
-                                'insight': therapeutic_insight,
-                                'type': 'psychoanalytic' if 'psychoanalytic' in therapeutic_insight.lower() else 'general',
-                                'focus': 'dreams' if 'dream' in therapeutic_insight.lower() else 'general'
-                            })
-                break
-        
-        # ENHANCED: Extract specific events and activities
-        event_patterns = [
-            'today i', 'yesterday i', 'we went', 'i did', 'we talked about',
-            'it happened when', 'last time', 'during', 'while i was'
-        ]
-        
-        for pattern in event_patterns:
-            if pattern in content_lower:
-                sentences = content.split('.')
-                for sentence in sentences:
-                    if pattern in sentence.lower():
-                        event = sentence.strip()
-                        if event and len(event) > 15:
-                            factual_data['specific_events'].append({
-                                'event': event,
-                                'timeframe': 'recent' if any(time in event.lower() for time in ['today', 'yesterday', 'recently']) else 'past'
-                            })
-                break
-        
-        # ENHANCED: Extract memorable quotes and sayings
-        if len(content) > 30 and len(content) < 200:
-            # Look for quotable content that contains wisdom or insight
-            quotable_indicators = [
-                'always remember', 'the key is', 'what i learned', 'important thing',
-                'advice', 'wisdom', 'profound', 'meaningful', 'life lesson'
-            ]
-            
-            for indicator in quotable_indicators:
-                if indicator in content_lower:
-                    factual_data['quotes_and_sayings'].append({
-                        'quote': content,
-                        'category': 'wisdom',
-                        'length': len(content)
-                    })
-                    break
-        
-        # Keep existing broad topic extraction for backward compatibility
-        broad_topics = {
-            'mosaic project': ['mosaic'],
-            'Alan Turing': ['alan turing'],
-            'Little Venice': ['little venice'],
-            'swimming': ['swim'],
-            'BBQ': ['bbq'],
-            'rain': ['rain'],
-            'inspiration': ['inspiration'],
-            'spontaneity': ['spontan'],
-            'warm weather': ['warm'],
-            'digital concepts': ['digital'],
-            'dream analysis': ['dream', 'dreams'],
-            'unconscious mind': ['unconscious', 'subconscious'],
-            'family dynamics': ['father', 'mother', 'family'],
-            'authority figures': ['authority', 'boss'],
-            'psychoanalytic theory': ['psychoanalyt', 'analyst'],
-            'repressed emotions': ['repress', 'repressed'],
-            'anxiety analysis': ['anxiety', 'anxious'],
-            'childhood experiences': ['childhood', 'child'],
-            'feelings of confinement': ['trapped', 'confined']
-        }
-        
-        for topic, keywords in broad_topics.items():
-            if any(keyword in content_lower for keyword in keywords) and topic not in factual_data['conversation_topics']:
-                factual_data['conversation_topics'].append(topic)
-        
-        # Extract pets (with deduplication)
-        if 'yuri' in content_lower and not any(pet['name'].lower() == 'yuri' for pet in factual_data['pets']):
-            factual_data['pets'].append({'type': 'dog', 'name': 'yuri'})
-        
-        # Extract family members (but only if actually mentioned and not already added)
-        if 'brother' in content_lower and 'yuri' in content_lower and not any(fam['name'].lower() == 'yuri' for fam in factual_data['family_members']):
-            factual_data['family_members'].append({'relation': 'brother', 'name': 'yuri'})
-        
-        # Extract preferences from actual content (with deduplication)
-        if 'radiohead' in content_lower and 'Radiohead' not in factual_data['preferences']['music']:
-            factual_data['preferences']['music'].append('Radiohead')
-    
-    # Deduplicate all enhanced fields
-    factual_data['dreams_described'] = [dict(t) for t in {tuple(d.items()) for d in factual_data['dreams_described']}]
-    factual_data['relationships_mentioned'] = [dict(t) for t in {tuple(d.items()) for d in factual_data['relationships_mentioned']}]
-    factual_data['fears_and_anxieties'] = [dict(t) for t in {tuple(d.items()) for d in factual_data['fears_and_anxieties']}]
-    factual_data['breakthrough_moments'] = [dict(t) for t in {tuple(d.items()) for d in factual_data['breakthrough_moments']}]
-    factual_data['therapeutic_insights'] = [dict(t) for t in {tuple(d.items()) for d in factual_data['therapeutic_insights']}]
-    factual_data['specific_events'] = [dict(t) for t in {tuple(d.items()) for d in factual_data['specific_events']}]
-    factual_data['quotes_and_sayings'] = [dict(t) for t in {tuple(d.items()) for d in factual_data['quotes_and_sayings']}]
-    
-    return factual_data
+    Folds the memories' cached fact bundles (memory_new.enhanced.facts), so a
+    memory's sentences and keywords are scanned once however many diary and
+    profile builders read it.
+    """
+    return diary_facts(memories)
 
 def generate_factual_summary(factual_data: Dict[str, Any], user_id: str) -> str:
     """Generate an enhanced factual summary for the diary."""
@@ -4660,28 +4599,178 @@ def generate_hashtags_for_diary(factual_data: Dict[str, Any], memories: List[Dic
     return " ".join(hashtags)
 
 def extract_topics_from_memories(memories: List[Dict[str, Any]]) -> List[str]:
-    """Extract conversation topics from memories."""
-    topics = []
+    """Extract conversation topics ("talked about X") from memories."""
+    topics = set()
     for memory in memories:
-        content = memory.get('content', '')
-        # Simple topic extraction
-        if 'talked about' in content:
-            topic_matches = re.findall(r'talked about (\w+)', content)
-            topics.extend(topic_matches)
-    return list(set(topics))
+        topics.update(memory_facts(memory).talked_about)
+    return list(topics)
 
 def extract_user_details_from_memories(memories: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Extract user details from memories."""
-    user_details = {}
-    for memory in memories:
-        content = memory.get('content', '')
-        # Extract basic user information
-        if 'user' in content.lower():
-            # Simple extraction of user details
-            pass
-    return user_details
+    """Extract user details (family, pets, preferences) from memories' fact bundles."""
+    factual_data = extract_factual_data_for_diary(memories, '')
+    return {
+        'family_members': factual_data['family_members'],
+        'pets': factual_data['pets'],
+        'preferences': factual_data['preferences']
+    }
 
 # Diary endpoints
+
+def store_session_diary(memory_system, character_id: str, user_id: str, diary_summary: str) -> List[str]:
+    """Store a generated diary summary as a new session diary entry of the pair.
+    
+    Returns:
+        list: IDs of the stored memories (empty if the store failed)
+    """
+    try:
+        # Create unique session-based diary entry
+        session_timestamp = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
+        session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        # Store as a new session diary entry (always create new), together with
+        # the personal details extracted from it, in a single transaction
+        diary_ids = memory_system.batch_store_memories([{
+            "content": diary_summary,
+            "memory_type": "session_diary",  # Changed from "diary" to "session_diary"
+            "importance": 1.0,
+            "tags": ["diary", "session_summary", "agent_perspective", session_id],
+            "context": {
+                "session_timestamp": session_timestamp,
+                "character_id": character_id,
+                "user_id": user_id,
+                "entry_type": "session_diary",
+                "session_id": session_id
+            }
+        }])
+        print(f"✅ Created new session diary entry for {character_id} and {user_id} at {session_timestamp}")
+        return diary_ids
+        
+    except Exception as memory_error:
+        print(f"⚠️ Warning: Could not store session diary: {memory_error}")
+        # Continue even if memory storage fails - the diary is still generated
+        return []
+
+def run_diary_job(job: "DiaryJob", character_id: str, character: dict, user_id: str, version_prefix: str) -> str:
+    """Diary job body: add the summary sections to the job as they complete, then store the diary.
+    
+    Returns:
+        str: Job version: the version after storing (the stored diary is itself a
+        new memory) if nothing but the diary changed the memories during the
+        build, else the version the diary was built from, so the next request rebuilds
+    """
+    memory_system = require_memory_system(character_id, user_id)
+    built_version = memory_system.get_memory_version()
+    for section in iter_agent_diary_sections(character_id, character, user_id, progress=job.set_progress):
+        job.add_section(section)
+    diary_ids = store_session_diary(memory_system, character_id, user_id, job.text)
+    stored_version = memory_system.get_memory_version()
+    if diary_ids and memory_system.get_memory_version(exclude_ids=diary_ids) == built_version:
+        return f"{version_prefix}|{stored_version}"
+    return f"{version_prefix}|{built_version}"
+
+async def submit_diary_job(character_id: str, character: dict, user_id: str) -> Tuple["DiaryJob", bool]:
+    """Start (or join) the diary job of a pair.
+    
+    The job is versioned by the pair's memories and the character, so
+    concurrent requests share one build and a finished diary is served again
+    until new memories arrive.
+    
+    Returns:
+        tuple: (job, True if this call started it)
+    """
+    memory = await require_async_memory_system(character_id, user_id)
+    memory_version = await memory.call("get_memory_version")
+    character_digest = hashlib.md5(json.dumps(character, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    version_prefix = f"{DIARY_FORMAT_VERSION}|{character_digest}"
+    return get_diary_job_manager().submit(
+        (character_id, user_id), f"{version_prefix}|{memory_version}",
+        lambda job: run_diary_job(job, character_id, character, user_id, version_prefix)
+    )
+
+def streaming_text_download(request: Request, pieces: AsyncIterable[str], filename: str,
+                            media_type: str = "text/plain; charset=utf-8") -> StreamingResponse:
+    """
+    Stream text as a file download, gzip-compressed when the client accepts it.
+    
+    Args:
+        request: The download request (its Accept-Encoding is negotiated)
+        pieces: The text, produced piece by piece
+        filename: Suggested filename for the browser
+        media_type: Content type of the text
+    """
+    compress = accepts_gzip(request.headers.get("accept-encoding"))
+    headers = {"Content-Disposition": f"attachment; filename=\"{filename}\"", "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(encode_chunks(pieces, compress), media_type=media_type, headers=headers)
+
+async def text_pieces(*pieces: str) -> AsyncIterator[str]:
+    """Already built text as a stream of pieces."""
+    for piece in pieces:
+        yield piece
+
+async def diary_download_text(sections: AsyncIterable[str], empty_text: str) -> AsyncIterator[str]:
+    """Diary sections joined by newlines as they arrive, or empty_text if every section is blank."""
+    leading: List[str] = []
+    started = False
+    async for section in sections:
+        if started:
+            yield "\n" + section
+        elif section.strip():
+            leading.append(section)
+            yield "\n".join(leading)
+            started = True
+        else:
+            leading.append(section)
+    if not started:
+        yield empty_text
+
+def find_diary_job(character_id: str, user_id: str, job_id: str) -> "DiaryJob":
+    """Diary job of a pair by id; raises HTTP 404 when unknown, expired or another pair's."""
+    job = get_diary_job_manager().get(job_id) if ENHANCED_MEMORY_AVAILABLE else None
+    if job is None or job.key != (character_id, user_id):
+        raise HTTPException(status_code=404, detail="Diary job not found")
+    return job
+
+@app.post("/characters/{character_id}/diary/{user_id}/jobs")
+async def submit_diary_summary_job(character_id: str, user_id: str):
+    """Start generating the diary summary in the background and return the job to poll or stream.
+    
+    Answers 202 for a new job; 200 with the existing job when an identical one
+    is running or its result is still current.
+    """
+    try:
+        character = generator.load_character(character_id)
+        if not character:
+            raise HTTPException(status_code=404, detail="Character not found")
+        
+        job, created = await submit_diary_job(character_id, character, user_id)
+        return JSONResponse(status_code=202 if created else 200, content={**job.status(), "created": created})
+        
+    except HTTPException:
+        raise
+    except MemoryQueueFull:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/characters/{character_id}/diary/{user_id}/jobs/{job_id}")
+async def get_diary_summary_job(character_id: str, user_id: str, job_id: str):
+    """Poll a diary job: state, sections ready and progress, plus the diary text once done."""
+    job = find_diary_job(character_id, user_id, job_id)
+    return job.status(include_text=job.finished)
+
+@app.get("/characters/{character_id}/diary/{user_id}/jobs/{job_id}/stream")
+async def stream_diary_summary_job(character_id: str, user_id: str, job_id: str):
+    """Stream a diary job's text as plain text, each section sent as soon as it completes."""
+    job = find_diary_job(character_id, user_id, job_id)
+    
+    async def sections():
+        async for section in job.stream():
+            yield section + "\n"
+    
+    return StreamingResponse(sections(), media_type="text/plain; charset=utf-8")
+
 @app.get("/characters/{character_id}/diary/{user_id}/summary")
 async def get_diary_summary(character_id: str, user_id: str):
     """Generate and return a diary summary for a character-user pair."""
@@ -4690,65 +4779,46 @@ async def get_diary_summary(character_id: str, user_id: str):
         if not character:
             raise HTTPException(status_code=404, detail="Character not found")
         
-        # Generate fresh diary summary for THIS SESSION
-        diary_summary = generate_agent_diary_summary(character_id, character, user_id)
-        
-        # Store as a new session-based diary entry (not daily)
-        try:
-            from memory_new.enhanced.enhanced_memory_system import EnhancedMemorySystem
-            from datetime import datetime
-            
-            # Initialize enhanced memory system
-            memory_system = EnhancedMemorySystem(character_id, user_id)
-            
-            # Create unique session-based diary entry
-            session_timestamp = datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
-            session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            
-            # Store as a new session diary entry (always create new)
-            memory_system.store_memory(
-                content=diary_summary,
-                memory_type="session_diary",  # Changed from "diary" to "session_diary"
-                importance=1.0,
-                tags=["diary", "session_summary", "agent_perspective", session_id],
-                context={
-                    "session_timestamp": session_timestamp,
-                    "character_id": character_id,
-                    "user_id": user_id,
-                    "entry_type": "session_diary",
-                    "session_id": session_id
-                }
-            )
-            print(f"✅ Created new session diary entry for {character_id} and {user_id} at {session_timestamp}")
-                
-        except Exception as memory_error:
-            print(f"⚠️ Warning: Could not store session diary: {memory_error}")
-            # Continue even if memory storage fails - the diary is still generated
+        # Built by a diary job (shared with identical requests, reused until new memories arrive)
+        job, _ = await submit_diary_job(character_id, character, user_id)
+        await job.wait()
+        if job.error:
+            raise HTTPException(status_code=500, detail=job.error)
+        diary_summary = job.text
         
         return diary_summary
         
+    except HTTPException:
+        raise
+    except MemoryQueueFull:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/characters/{character_id}/diary-entries/{user_id}")
-async def get_diary_entries(character_id: str, user_id: str, limit: int = 10):
-    """Retrieve session diary entries for a character-user pair."""
+async def get_diary_entries(character_id: str, user_id: str, limit: int = 10,
+                            session_id: Optional[str] = None):
+    """Retrieve session diary entries for a character-user pair (optionally one session's)."""
     try:
-        from memory_new.enhanced.enhanced_memory_system import EnhancedMemorySystem
-        
-        # Initialize enhanced memory system
-        memory_system = EnhancedMemorySystem(character_id, user_id)
-        
-        # Get session diary entries (new format)
-        session_diary_entries = memory_system.get_memories_by_type("session_diary", max_results=limit)
-        
-        # Also get old diary entries for backward compatibility
-        old_diary_entries = memory_system.get_memories_by_type("diary", max_results=limit)
+        # Shared per-pair memory system, driven from its DB thread
+        memory = await require_async_memory_system(character_id, user_id)
         
-        # Combine and sort by timestamp
-        all_entries = session_diary_entries + old_diary_entries
+        if session_id:
+            # Entries of one session, found through the tag index (session ids are tags)
+            all_entries = await memory.call(
+                "get_memories_by_tags", [session_id], max_results=limit, memory_types=["session_diary", "diary"]
+            )
+        else:
+            # Get session diary entries (new format)
+            session_diary_entries = await memory.call("get_memories_by_type", "session_diary", max_results=limit)
+            
+            # Also get old diary entries for backward compatibility
+            old_diary_entries = await memory.call("get_memories_by_type", "diary", max_results=limit)
+            
+            # Combine and sort by timestamp
+            all_entries = session_diary_entries + old_diary_entries
         all_entries.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
         
         # Format the entries for response
@@ -4785,6 +4855,8 @@ async def get_diary_entries(character_id: str, user_id: str, limit: int = 10):
             }
         }
         
+    except MemoryQueueFull:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -4794,22 +4866,13 @@ async def get_diary_entries(character_id: str, user_id: str, limit: int = 10):
 async def search_diary_entries(character_id: str, user_id: str, query: str = Query(..., description="Search term for diary entries")):
     """Search through diary entries for a character-user pair."""
     try:
-        from memory_new.enhanced.enhanced_memory_system import EnhancedMemorySystem
+        # Shared per-pair memory system, driven from its DB thread
+        memory = await require_async_memory_system(character_id, user_id)
         
-        # Initialize enhanced memory system
-        memory_system = EnhancedMemorySystem(character_id, user_id)
-        
-        # Get all diary entries first
-        all_diary_entries = memory_system.get_memories_by_type("diary", max_results=100)
-        
-        # Filter by query (simple text search)
-        matching_entries = []
-        query_lower = query.lower()
-        
-        for entry in all_diary_entries:
-            content = entry.get("content", "").lower()
-            if query_lower in content:
-                matching_entries.append(entry)
+        # Ranked full-text search over diary entries (FTS5 / BM25)
+        matching_entries = await memory.search(
+            query, max_results=100, memory_types=["diary", "session_diary"]
+        )
         
         # Format the entries for response
         formatted_entries = []
@@ -4817,10 +4880,12 @@ async def search_diary_entries(character_id: str, user_id: str, query: str = Que
             formatted_entries.append({
                 "id": entry.get("id"),
                 "content": entry.get("content"),
+                "snippet": entry.get("snippet"),
+                "score": entry.get("rank"),
                 "timestamp": entry.get("timestamp"),
                 "importance": entry.get("importance"),
                 "tags": entry.get("tags"),
-                "context": entry.get("context")
+                "context": entry.get("metadata")
             })
         
         return {
@@ -4831,16 +4896,43 @@ async def search_diary_entries(character_id: str, user_id: str, query: str = Que
             "total_count": len(formatted_entries)
         }
         
+    except MemoryQueueFull:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/characters/{character_id}/memory-search/{user_id}")
+async def search_pair_memories(character_id: str, user_id: str,
+                               query: str = Query(..., description="Search terms"),
+                               limit: int = Query(20, ge=1, le=200),
+                               include_archive: bool = Query(False, description="Also search archived (cold) memories")):
+    """Ranked full-text search over a pair's memories, optionally including the cold archive."""
+    try:
+        memory = await require_async_memory_system(character_id, user_id)
+        results = await memory.search(query, max_results=limit, include_archive=include_archive)
+        return {
+            "character_id": character_id,
+            "user_id": user_id,
+            "search_query": query,
+            "include_archive": include_archive,
+            "results": results,
+            "total_count": len(results)
+        }
+    except HTTPException:
+        raise
+    except MemoryQueueFull:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/characters/{character_id}/diary/{user_id}/download", response_class=PlainTextResponse)
-async def download_latest_diary(character_id: str, user_id: str):
+async def download_latest_diary(character_id: str, user_id: str, request: Request):
     """Return the latest session diary entry for the given character-user pair as plain text.
     The frontend turns this text into a downloadable file, so we avoid creating a
-    temporary file on the server and simply stream the content back.
+    temporary file on the server and simply stream the content back (gzip-compressed
+    when accepted); a diary generated for the download is streamed section by section.
     """
     try:
         character = generator.load_character(character_id)
@@ -4895,33 +4987,32 @@ async def download_latest_diary(character_id: str, user_id: str):
             raise HTTPException(status_code=500, detail="Modular memory system not available")
 
         # Try to get the most recent session diary entry first
-        memory_system = EnhancedMemorySystem(character_id, user_id)
-        session_diary_entries = memory_system.get_memories_by_type("session_diary", max_results=1)
+        memory = await require_async_memory_system(character_id, user_id)
+        session_diary_entries = await memory.call("get_memories_by_type", "session_diary", max_results=1)
         
         if session_diary_entries:
             # Use the most recent session diary
-            diary_content = session_diary_entries[0].get("content", "")
+            diary_sections = text_pieces(session_diary_entries[0].get("content", ""))
             print(f"✅ Using existing session diary entry for {character_id} and {user_id}")
         else:
-            # Generate new session diary if none exists
-            diary_content = generate_agent_diary_summary(character_id, character, user_id)
-            print(f"✅ Generated new session diary for download: {character_id} and {user_id}")
+            # Generate new session diary if none exists (through a diary job, like the summary),
+            # sending its sections as they complete
+            job, _ = await submit_diary_job(character_id, character, user_id)
+            diary_sections = job.stream()
+            print(f"✅ Streaming new session diary for download: {character_id} and {user_id}")
 
-        # Ensure diary content exists and is not empty
-        if not diary_content or diary_content.strip() == "":
-            diary_content = f"📖 Diary Entry for {character.get('name', character_id)}\n\nNo memories available yet. Start a conversation to build this character's diary!"
+        # Sent instead when the diary is empty
+        empty_diary = f"📖 Diary Entry for {character.get('name', character_id)}\n\nNo memories available yet. Start a conversation to build this character's diary!"
 
         # Include a filename suggestion so browsers save it nicely when requested
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         character_name = character.get('name', 'Character').replace(' ', '_').replace('/', '_')
         diary_filename = f"{character_name}_SessionDiary_{user_id}_{timestamp}.txt"
 
-        return PlainTextResponse(
-            content=diary_content,
-            media_type="text/plain",
-            headers={"Content-Disposition": f"attachment; filename=\"{diary_filename}\""}
-        )
+        return streaming_text_download(request, diary_download_text(diary_sections, empty_diary), diary_filename)
         
+    except MemoryQueueFull:
+        raise
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -4982,66 +5073,41 @@ async def get_relationship_status(user_id: str, character_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/characters/{character_id}/conversation-history/{user_id}")
-async def get_conversation_history(character_id: str, user_id: str, limit: int = 20):
-    """Get the actual conversation history between a character and user."""
+async def get_conversation_history(character_id: str, user_id: str, limit: int = 20,
+                                   cursor: Optional[str] = None, memory_type: Optional[str] = None):
+    """
+    Get the actual conversation history between a character and user, newest first.
+    
+    Keyset paginated: pass the returned next_cursor to get the page before it.
+    Optionally only memories of one memory_type.
+    """
     try:
         character = generator.load_character(character_id)
         if not character:
             raise HTTPException(status_code=404, detail="Character not found")
         
-        # Initialize enhanced memory system
-        memory_system = EnhancedMemorySystem(character_id, user_id)
-        
-        # Get all memories and filter for conversation content
-        all_memories = memory_system.get_all_memories_for_summary()
-        
-        # Filter for actual conversation memories (not system memories)
-        conversation_memories = []
-        for memory in all_memories:
-            content = memory.get('content', '')
-            # Look for actual conversation content, not system messages
-            if (len(content) > 10 and 
-                not content.startswith('🔧') and 
-                not content.startswith('📝') and
-                not content.startswith('🚀') and
-                not content.startswith('✅') and
-                not content.startswith('⚠️') and
-                not content.startswith('❌') and
-                not content.startswith('🎭') and
-                not content.startswith('💭') and
-                not content.startswith('🔍') and
-                not content.startswith('🤖') and
-                not content.startswith('📚') and
-                not content.startswith('📊') and
-                not content.startswith('🎯') and
-                not content.startswith('🔄') and
-                not content.startswith('🔧') and
-                not content.startswith('📝') and
-                not content.startswith('🚀') and
-                not content.startswith('✅') and
-                not content.startswith('⚠️') and
-                not content.startswith('❌') and
-                not content.startswith('🎭') and
-                not content.startswith('💭') and
-                not content.startswith('🔍') and
-                not content.startswith('🤖') and
-                not content.startswith('📚') and
-                not content.startswith('📊') and
-                not content.startswith('🎯') and
-                not content.startswith('🔄')):
-                
-                conversation_memories.append({
-                    "timestamp": memory.get("timestamp", ""),
-                    "content": content,
-                    "importance": memory.get("importance", 0),
-                    "memory_type": memory.get("memory_type", "conversation")
-                })
-        
-        # Sort by timestamp (most recent first)
-        conversation_memories.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
+        # Shared per-pair memory system, driven from its DB thread
+        memory = await require_async_memory_system(character_id, user_id)
         
-        # Limit the results
-        conversation_memories = conversation_memories[:limit]
+        # One page of actual conversation memories (system messages are skipped server-side)
+        memory_types = [memory_type] if memory_type else None
+        try:
+            page = await memory.call(
+                "get_memories_page", limit, cursor, memory_types=memory_types, conversation_only=True
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        conversation_memories = [
+            {
+                "id": memory["id"],
+                "timestamp": memory["timestamp"],
+                "content": memory["content"],
+                "importance": memory["importance"] or 0,
+                "memory_type": memory["type"] or "conversation"
+            }
+            for memory in page["memories"]
+        ]
         
         return {
             "character_id": character_id,
@@ -5049,9 +5115,53 @@ async def get_conversation_history(character_id: str, user_id: str, limit: int =
             "character_name": character.get('name', 'Unknown'),
             "conversation_history": conversation_memories,
             "total_count": len(conversation_memories),
-            "total_memories": len(all_memories)
+            "total_memories": await memory.call("count_memories", memory_types),
+            "next_cursor": page["next_cursor"]
         }
         
+    except HTTPException:
+        raise
+    except MemoryQueueFull:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/characters/{character_id}/conversation-history/{user_id}/export")
+async def export_conversation_history(character_id: str, user_id: str, request: Request,
+                                      format: str = Query("jsonl", description="jsonl or txt"),
+                                      memory_type: Optional[str] = None):
+    """
+    Download the whole conversation history between a character and user, oldest first.
+    
+    Streamed page by page (one page in memory at a time), gzip-compressed when
+    the client accepts it: one JSON object per memory (jsonl) or one
+    "[timestamp] content" line per memory (txt). Optionally only memories of
+    one memory_type.
+    """
+    if format not in HISTORY_EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown export format '{format}' (use jsonl or txt)")
+    try:
+        character = generator.load_character(character_id)
+        if not character:
+            raise HTTPException(status_code=404, detail="Character not found")
+        
+        memory = await require_async_memory_system(character_id, user_id)
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        character_name = character.get('name', 'Character').replace(' ', '_').replace('/', '_')
+        export_filename = f"{character_name}_History_{user_id}_{timestamp}.{format}"
+        
+        memory_types = [memory_type] if memory_type else None
+        return streaming_text_download(
+            request, history_export(memory, format, memory_types), export_filename, HISTORY_EXPORT_FORMATS[format]
+        )
+        
+    except HTTPException:
+        raise
+    except MemoryQueueFull:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -5065,22 +5175,21 @@ async def get_user_profile_summary(character_id: str, user_id: str):
         if not character:
             raise HTTPException(status_code=404, detail="Character not found")
         
-        # Initialize enhanced memory system
-        memory_system = EnhancedMemorySystem(character_id, user_id)
+        # Shared per-pair memory system, driven from its DB thread
+        memory = await require_async_memory_system(character_id, user_id)
         
-        # Get all memories for the user
-        all_memories = memory_system.get_all_memories_for_summary()
-        
-        # Extract user information from memories
-        user_info = extract_user_details_from_memories(all_memories)
-        factual_data = extract_factual_data_for_diary(all_memories, user_id)
+        # User details from the materialized profile; facts merged from the cached diary
+        # days (only days changed since the last diary build are read)
+        user_info = profile_details((await memory.call("get_user_profile"))["profile"])
+        day_facts = await memory.call("get_diary_day_facts", diary_cache_salt(character.get('name', 'Unknown'), user_id))
+        factual_data = merge_factual_data(day_facts)
         
         # Get relationship status
         relationship_system = RelationshipSystem()
         relationship_status = relationship_system.get_relationship_status(user_id, character_id)
         
         # Get memory count
-        total_memories = len(all_memories) if all_memories else 0
+        total_memories = await memory.call("count_memories")
         
         # Create status message based on memory count
         if total_memories == 0:
@@ -5111,246 +5220,91 @@ async def get_user_profile_summary(character_id: str, user_id: str):
         
         return profile_summary
         
+    except MemoryQueueFull:
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/characters/{character_id}/user-profile/{user_id}/materialized")
+async def get_materialized_user_profile(character_id: str, user_id: str):
+    """Inspect the write-time user profile (values with confidence and source memory)."""
+    try:
+        memory = await require_async_memory_system(character_id, user_id)
+        stored = await memory.call("get_user_profile")
+        return {
+            "character_id": character_id,
+            "user_id": user_id,
+            **stored
+        }
+    except HTTPException:
+        raise
+    except MemoryQueueFull:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/characters/{character_id}/user-profile/{user_id}/rebuild")
+async def rebuild_materialized_user_profile(character_id: str, user_id: str):
+    """Recompute the write-time user profile from every stored memory."""
+    try:
+        memory = await require_async_memory_system(character_id, user_id)
+        rebuilt = await memory.call("rebuild_user_profile")
+        return {
+            "character_id": character_id,
+            "user_id": user_id,
+            "rebuilt": True,
+            **rebuilt
+        }
+    except HTTPException:
+        raise
+    except MemoryQueueFull:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Memory fix and formatting functions
 def apply_memory_fix_to_chat(character_id: str, user_id: str, message: str, character_data: Dict, original_prompt: str) -> Dict:
-    """Apply memory fix to chat - extract actual personal details from memory"""
+    """Apply memory fix to chat - read the user's materialized profile (maintained at memory-write time)"""
+    failure = {
+        "success": False,
+        "total_memories": 0,
+        "memory_context": "",
+        "personal_details": {}
+    }
     try:
-        # Get memory database path
         memory_db_path = Path(f"memory_databases/enhanced_{character_id}_{user_id}.db")
+        if not memory_db_path.exists() or not ENHANCED_MEMORY_AVAILABLE:
+            return failure
         
-        if not memory_db_path.exists():
-            return {
-                "success": False,
-                "total_memories": 0,
-                "memory_context": "",
-                "personal_details": {}
-            }
-        
-        # Extract personal details from memory database
-        personal_details = {}
-        total_memories = 0
+        memory_system = get_enhanced_memory_system(character_id, user_id)
+        if memory_system is None:
+            return failure
         
         try:
-            import sqlite3
-            with sqlite3.connect(memory_db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Get total memories
-                cursor.execute("SELECT COUNT(*) FROM enhanced_memory")
-                total_memories = cursor.fetchone()[0]
-                
-                # ENHANCED: Extract personal details from memory content with comprehensive patterns
-                cursor.execute("""
-                    SELECT content FROM enhanced_memory 
-                    WHERE content LIKE '%years old%' 
-                       OR content LIKE '%live in%' 
-                       OR content LIKE '%name is%'
-                       OR content LIKE '%sister%'
-                       OR content LIKE '%brother%'
-                       OR content LIKE '%family%'
-                       OR content LIKE '%parents%'
-                       OR content LIKE '%work%'
-                       OR content LIKE '%job%'
-                       OR content LIKE '%ed%'
-                       OR content LIKE '%edward%'
-                       OR content LIKE '%sarah%'
-                       OR content LIKE '%lynne%'
-                       OR content LIKE '%alfredo%'
-                       OR content LIKE '%yuri%'
-                    ORDER BY created_at DESC LIMIT 20
-                """)
-                memories = cursor.fetchall()
-                
-                for memory in memories:
-                    content = memory[0].lower()
-                    
-                    # Extract age
-                    age_match = re.search(r'(\d+)\s*years?\s*old', content)
-                    if age_match and 'age' not in personal_details:
-                        personal_details['age'] = [age_match.group(1)]
-                    
-                    # Extract location
-                    location_match = re.search(r'live\s+in\s+([^,\.]+)', content)
-                    if location_match and 'location' not in personal_details:
-                        personal_details['location'] = [location_match.group(1).strip()]
-                    
-                    # Extract name
-                    name_match = re.search(r'name\s+is\s+([^,\.]+)', content)
-                    if name_match and 'name' not in personal_details:
-                        personal_details['name'] = [name_match.group(1).strip()]
-                    
-                    # ENHANCED: Extract family info with comprehensive patterns
-                    # Sister patterns
-                    sister_patterns = [
-                        r'(?:my\s+)?sister\s+(?:is\s+)?(?:called\s+)?([a-z]+)',
-                        r'([a-z]+)\s+(?:is\s+)?(?:my\s+)?sister',
-                        r'sister\s+([a-z]+)',
-                        r'([a-z]+)\s+sister'
-                    ]
-                    
-                    for pattern in sister_patterns:
-                        sister_match = re.search(pattern, content)
-                        if sister_match:
-                            sister_name = sister_match.group(1).strip()
-                            # Filter out common words that aren't names
-                            if sister_name not in ['is', 'was', 'will', 'can', 'should', 'would', 'the', 'and', 'or', 'your', 'my', 'her', 'his', 'their', 'our']:
-                                if 'sister' not in personal_details:
-                                    personal_details['sister'] = [sister_name]
-                                elif sister_name not in personal_details['sister']:
-                                    personal_details['sister'].append(sister_name)
-                    
-                    # Brother patterns
-                    brother_patterns = [
-                        r'(?:my\s+)?brother\s+(?:is\s+)?(?:called\s+)?([a-z]+)',
-                        r'([a-z]+)\s+(?:is\s+)?(?:my\s+)?brother',
-                        r'brother\s+([a-z]+)',
-                        r'([a-z]+)\s+brother'
-                    ]
-                    
-                    for pattern in brother_patterns:
-                        brother_match = re.search(pattern, content)
-                        if brother_match:
-                            brother_name = brother_match.group(1).strip()
-                            # Filter out common words that aren't names
-                            if brother_name not in ['is', 'was', 'will', 'can', 'should', 'would', 'the', 'and', 'or', 'your', 'my', 'her', 'his', 'their', 'our']:
-                                if 'brother' not in personal_details:
-                                    personal_details['brother'] = [brother_name]
-                                elif brother_name not in personal_details['brother']:
-                                    personal_details['brother'].append(brother_name)
-                    
-                    # Parents patterns
-                    parent_patterns = [
-                        r'(?:my\s+)?parents?\s+(?:are\s+)?(?:called\s+)?([a-z]+)\s+and\s+([a-z]+)',
-                        r'([a-z]+)\s+and\s+([a-z]+)\s+(?:are\s+)?(?:my\s+)?parents?',
-                        r'(?:my\s+)?mom\s+(?:is\s+)?(?:called\s+)?([a-z]+)',
-                        r'(?:my\s+)?dad\s+(?:is\s+)?(?:called\s+)?([a-z]+)',
-                        r'(?:my\s+)?mother\s+(?:is\s+)?(?:called\s+)?([a-z]+)',
-                        r'(?:my\s+)?father\s+(?:is\s+)?(?:called\s+)?([a-z]+)'
-                    ]
-                    
-                    for pattern in parent_patterns:
-                        parent_match = re.search(pattern, content)
-                        if parent_match:
-                            if len(parent_match.groups()) == 2:  # Both parents
-                                mom_name = parent_match.group(1).strip()
-                                dad_name = parent_match.group(2).strip()
-                                if 'parents' not in personal_details:
-                                    personal_details['parents'] = [f"{mom_name} and {dad_name}"]
-                            else:  # Single parent
-                                parent_name = parent_match.group(1).strip()
-                                if 'parents' not in personal_details:
-                                    personal_details['parents'] = [parent_name]
-                    
-                    # Work/Job patterns
-                    work_patterns = [
-                        r'(?:work\s+as|job\s+is|employed\s+as)\s+([^,\.]+)',
-                        r'(?:work\s+at|job\s+at)\s+([^,\.]+)',
-                        r'(?:software\s+engineer|developer|programmer)',
-                        r'(?:google|microsoft|apple|amazon|facebook|meta)'
-                    ]
-                    
-                    for pattern in work_patterns:
-                        work_match = re.search(pattern, content)
-                        if work_match and 'work' not in personal_details:
-                            if work_match.groups():
-                                work_info = work_match.group(1).strip()
-                                # Only add if it's not just a regex pattern
-                                if not work_info.startswith('(?:'):
-                                    personal_details['work'] = [work_info]
-                            else:
-                                # For patterns without groups, check if it's a company name
-                                if 'google' in pattern or 'microsoft' in pattern or 'apple' in pattern:
-                                    personal_details['work'] = ['software engineer']
-                    
-                    # Pet patterns
-                    pet_patterns = [
-                        r'(?:my\s+)?dog\s+(?:is\s+)?(?:called\s+)?([a-z]+)',
-                        r'([a-z]+)\s+(?:is\s+)?(?:my\s+)?dog',
-                        r'(?:my\s+)?pet\s+(?:is\s+)?(?:called\s+)?([a-z]+)',
-                        r'([a-z]+)\s+(?:is\s+)?(?:my\s+)?pet'
-                    ]
-                    
-                    for pattern in pet_patterns:
-                        pet_match = re.search(pattern, content)
-                        if pet_match:
-                            pet_name = pet_match.group(1).strip()
-                            # Filter out common words that aren't names
-                            if pet_name not in ['is', 'was', 'will', 'can', 'should', 'would', 'the', 'and', 'or', 'your', 'my', 'her', 'his', 'their', 'our']:
-                                if 'pet' not in personal_details:
-                                    personal_details['pet'] = [pet_name]
-                
-                # ENHANCED: Also search for specific names mentioned in the conversation
-                cursor.execute("""
-                    SELECT content FROM enhanced_memory 
-                    WHERE content LIKE '%sarah%' 
-                       OR content LIKE '%lynne%' 
-                       OR content LIKE '%alfredo%'
-                       OR content LIKE '%yuri%'
-                       OR content LIKE '%ed%'
-                       OR content LIKE '%edward%'
-                    ORDER BY created_at DESC LIMIT 10
-                """)
-                name_memories = cursor.fetchall()
-                
-                for memory in name_memories:
-                    content = memory[0].lower()
-                    
-                    # Extract specific names mentioned
-                    if 'sarah' in content and 'sarah' not in str(personal_details.get('sister', [])):
-                        if 'sister' not in personal_details:
-                            personal_details['sister'] = ['sarah']
-                        elif 'sarah' not in personal_details['sister']:
-                            personal_details['sister'].append('sarah')
-                    
-                    if 'lynne' in content and 'lynne' not in str(personal_details.get('parents', [])):
-                        if 'parents' not in personal_details:
-                            personal_details['parents'] = ['lynne']
-                        elif 'lynne' not in str(personal_details['parents']):
-                            personal_details['parents'].append('lynne')
-                    
-                    if 'alfredo' in content and 'alfredo' not in str(personal_details.get('parents', [])):
-                        if 'parents' not in personal_details:
-                            personal_details['parents'] = ['alfredo']
-                        elif 'alfredo' not in str(personal_details['parents']):
-                            personal_details['parents'].append('alfredo')
-                    
-                    if 'yuri' in content and 'yuri' not in str(personal_details.get('brother', [])):
-                        if 'brother' not in personal_details:
-                            personal_details['brother'] = ['yuri']
-                        elif 'yuri' not in personal_details['brother']:
-                            personal_details['brother'].append('yuri')
-                
+            # Single primary-key read of the profile row
+            stored = memory_system.get_user_profile()
         except Exception as e:
-            print(f"⚠️ Error extracting personal details: {e}")
-            return {
-                "success": False,
-                "total_memories": 0,
-                "memory_context": "",
-                "personal_details": {}
-            }
+            print(f"⚠️ Error reading user profile: {e}")
+            return failure
         
-        # Create memory context
-        memory_context = {
-            "personal_details": personal_details,
-            "total_memories": total_memories,
+        # The current message is written at the end of the turn, so overlay its facts
+        profile = stored["profile"]
+        current_facts = extract_profile_facts(message)
+        if current_facts:
+            profile = json.loads(json.dumps(profile))
+            merge_facts(profile, current_facts, None, datetime.now().isoformat(), "user_message")
+        
+        return {
+            "personal_details": profile_details(profile),
+            "total_memories": stored["memory_count"],
             "success": True
         }
         
-        return memory_context
-        
     except Exception as e:
         print(f"⚠️ Memory fix error: {e}")
-        return {
-            "success": False,
-            "total_memories": 0,
-            "memory_context": "",
-            "personal_details": {}
-        }
+        return failure
 
 def _format_memory_context_for_agent(memory_context: Dict[str, Any]) -> str:
     """Format memory context for the agent in a natural, in-character way."""
@@ -5538,62 +5492,25 @@ def search_diary_by_hashtags(
         List of dictionaries containing matching diary entries with metadata
     """
     try:
-        from memory_new.enhanced.enhanced_memory_system import EnhancedMemorySystem
-        
-        # Initialize memory system
-        memory_system = EnhancedMemorySystem(f"{character_id}_{user_id}")
-        
-        # Get all diary-related memories
-        all_memories = memory_system.search_memories("diary", limit=100)
-        
-        matching_entries = []
-        
-        for memory in all_memories:
-            content = memory.get('content', '')
-            
-            # Check if this is a diary entry (contains diary markers)
-            if '📅' in content and '🏷️ HASHTAGS' in content:
-                # Extract hashtags from the entry
-                hashtag_section = content.split('🏷️ HASHTAGS')
-                if len(hashtag_section) > 1:
-                    hashtag_text = hashtag_section[1].split('📅')[0] if '📅' in hashtag_section[1] else hashtag_section[1]
-                    entry_hashtags = hashtag_text.strip().split()
-                    
-                    # Check for hashtag matches
-                    matches = []
-                    for search_tag in search_hashtags:
-                        search_tag_clean = search_tag.lower().strip('#')
-                        for entry_tag in entry_hashtags:
-                            entry_tag_clean = entry_tag.lower().strip('#')
-                            if search_tag_clean == entry_tag_clean or search_tag_clean in entry_tag_clean:
-                                matches.append(search_tag)
-                                break
-                    
-                    # If we found matches, add this entry
-                    if matches:
-                        # Extract the diary entry text (everything before hashtags)
-                        entry_text = hashtag_section[0].strip()
-                        
-                        # Extract date if available
-                        date_match = None
-                        if '📅' in entry_text:
-                            date_parts = entry_text.split('📅')
-                            if len(date_parts) > 1:
-                                date_match = date_parts[1].split('\n')[0].strip()
-                        
-                        matching_entries.append({
-                            'date': date_match,
-                            'content': entry_text,
-                            'hashtags': entry_hashtags,
-                            'matched_hashtags': matches,
-                            'match_score': len(matches),
-                            'timestamp': memory.get('timestamp', ''),
-                            'memory_id': memory.get('id', '')
-                        })
-        
-        # Sort by match score (most relevant first) and limit results
-        matching_entries.sort(key=lambda x: x['match_score'], reverse=True)
-        return matching_entries[:limit]
+        # Shared per-pair memory system
+        memory_system = require_memory_system(character_id, user_id)
+        
+        # Diary days indexed by hashtag when they were written; matching and
+        # scoring happen in one indexed query
+        matching_days = memory_system.search_diary_hashtags(search_hashtags, limit=limit)
+        
+        return [
+            {
+                'date': day['day'],
+                'content': day['entry'],
+                'hashtags': day['hashtags'],
+                'matched_hashtags': day['matched_hashtags'],
+                'match_score': day['match_score'],
+                'timestamp': day['updated_at'],
+                'entry_id': day['day']
+            }
+            for day in matching_days
+        ]
         
     except Exception as e:
         print(f"Error searching diary by hashtags: {e}")
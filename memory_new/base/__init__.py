@@ -17,7 +17,8 @@ from .models import (
     MemoryType,
     MemoryContext,
     MemoryQuery,
-    MemoryResult
+    MemoryResult,
+    MemoryStatistics
 )
 
 __all__ = [
@@ -35,5 +36,6 @@ __all__ = [
     'MemoryType',
     'MemoryContext',
     'MemoryQuery',
-    'MemoryResult'
+    'MemoryResult',
+    'MemoryStatistics'
 ]
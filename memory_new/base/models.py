@@ -64,6 +64,8 @@ class MemoryQuery:
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     conversation_id: Optional[str] = None
+    tags: Optional[List[str]] = None
+    match_all_tags: bool = False
 
 
 @dataclass
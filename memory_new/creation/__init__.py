@@ -0,0 +1,14 @@
+"""
+Creation layer for memory system.
+"""
+
+from .creator import (
+    EnhancedMemoryCreator,
+    memory_entry_to_record
+)
+
+__all__ = [
+    # Memory creation
+    'EnhancedMemoryCreator',
+    'memory_entry_to_record'
+]
@@ -0,0 +1,108 @@
+"""
+Memory creation backed by the per-pair enhanced memory databases.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Tuple
+
+from ..base.interfaces import MemoryCreator
+from ..base.models import MemoryEntry, MemoryContext, MemoryResult, MemoryType
+
+logger = logging.getLogger(__name__)
+
+
+def memory_entry_to_record(memory: MemoryEntry) -> Dict[str, Any]:
+    """Convert a MemoryEntry into EnhancedMemorySystem.batch_store_memories input."""
+    memory_type = memory.memory_type.value if isinstance(memory.memory_type, MemoryType) else memory.memory_type
+    context = dict(memory.metadata)
+    if memory.emotional_context:
+        context.setdefault("emotional_context", memory.emotional_context)
+    if memory.conversation_id:
+        context.setdefault("conversation_id", memory.conversation_id)
+    timestamp = memory.timestamp.isoformat() if isinstance(memory.timestamp, datetime) else memory.timestamp
+    return {
+        "content": memory.content,
+        "memory_type": memory_type,
+        "importance": memory.importance_score,
+        "context": context,
+        "tags": list(memory.related_entities) or None,
+        "timestamp": timestamp
+    }
+
+
+class EnhancedMemoryCreator(MemoryCreator):
+    """
+    MemoryCreator writing to enhanced_<character>_<user>.db.
+
+    Every call is a single transaction per character-user pair, including the
+    personal details extracted from the new memories.
+    """
+
+    def _memory_system(self, character_id: str, user_id: str):
+        from ..enhanced.enhanced_memory_system import get_enhanced_memory_system
+        memory_system = get_enhanced_memory_system(character_id, user_id)
+        if memory_system is None:
+            raise RuntimeError(f"Enhanced memory system unavailable for {character_id}_{user_id}")
+        return memory_system
+
+    def create_memory(self, memory: MemoryEntry) -> MemoryResult:
+        """Create a new memory entry."""
+        result = self.batch_create_memories([memory])
+        if result.success:
+            result.data = result.data[0]
+        return result
+
+    def create_memory_from_content(self, content: str, context: MemoryContext,
+                                   memory_type: str = "conversation",
+                                   importance: float = 0.5) -> MemoryResult:
+        """Create a memory from content string."""
+        try:
+            memory_system = self._memory_system(context.character_id, context.user_id)
+            record_context = {"conversation_id": context.conversation_id} if context.conversation_id else None
+            memory_id = memory_system.batch_store_memories([{
+                "content": content,
+                "memory_type": memory_type,
+                "importance": importance,
+                "context": record_context
+            }])[0]
+            return MemoryResult(success=True, data=memory_id)
+        except Exception as e:
+            logger.error(f"❌ Failed to create memory: {e}")
+            return MemoryResult(success=False, error=str(e))
+
+    def batch_create_memories(self, memories: List[MemoryEntry]) -> MemoryResult:
+        """
+        Create multiple memories in a batch.
+
+        Memories are grouped by character-user pair and each group is written
+        with one executemany transaction.
+
+        Returns:
+            MemoryResult whose data is the list of new memory IDs in input order
+        """
+        if not memories:
+            return MemoryResult(success=True, data=[], metadata={"created": 0, "transactions": 0})
+
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for index, memory in enumerate(memories):
+            groups.setdefault((memory.character_id, memory.user_id), []).append(index)
+
+        memory_ids: List[str] = [""] * len(memories)
+        try:
+            for (character_id, user_id), indexes in groups.items():
+                memory_system = self._memory_system(character_id, user_id)
+                created = memory_system.batch_store_memories(
+                    [memory_entry_to_record(memories[i]) for i in indexes]
+                )
+                for index, memory_id in zip(indexes, created):
+                    memory_ids[index] = memory_id
+        except Exception as e:
+            logger.error(f"❌ Failed to batch create memories: {e}")
+            return MemoryResult(success=False, error=str(e), data=[m for m in memory_ids if m])
+
+        return MemoryResult(
+            success=True,
+            data=memory_ids,
+            metadata={"created": len(memory_ids), "transactions": len(groups)}
+        )
@@ -13,7 +13,23 @@ from .schema import (
     create_memory_tables,
     create_indexes,
     migrate_schema,
-    get_schema_version
+    get_schema_version,
+    LIVE_INDEXES,
+    LIVE_SCHEMA_VERSION,
+    conversation_id_sql,
+    get_live_schema_version,
+    pending_live_migrations,
+    migrate_live_schema
+)
+
+from .write_buffer import (
+    WriteBufferSettings,
+    MemoryWriteBuffer,
+    configure_write_buffers,
+    get_write_buffer,
+    flush_write_buffer,
+    flush_all_write_buffers,
+    overlay_pending
 )
 
 __all__ = [
@@ -27,5 +43,22 @@ __all__ = [
     'create_memory_tables',
     'create_indexes',
     'migrate_schema',
-    'get_schema_version'
+    'get_schema_version',
+    
+    # Live pair database indexes
+    'LIVE_INDEXES',
+    'LIVE_SCHEMA_VERSION',
+    'conversation_id_sql',
+    'get_live_schema_version',
+    'pending_live_migrations',
+    'migrate_live_schema',
+    
+    # Group-commit write buffer
+    'WriteBufferSettings',
+    'MemoryWriteBuffer',
+    'configure_write_buffers',
+    'get_write_buffer',
+    'flush_write_buffer',
+    'flush_all_write_buffers',
+    'overlay_pending'
 ]
@@ -2,16 +2,55 @@
 Database schema management for memory system.
 """
 
+import time
 import sqlite3
 import logging
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
 SCHEMA_VERSION = "2.0"
 
 
+def conversation_id_sql(column: str = "context") -> str:
+    """SQL expression of the conversation id stored in a memory's context JSON."""
+    return f"(CASE WHEN json_valid({column}) THEN json_extract({column}, '$.conversation_id') END)"
+
+
+# Secondary indexes of the per-pair databases EnhancedMemorySystem creates.
+# Every read path filters on the pair, so each index leads with it.
+LIVE_INDEXES = {
+    "idx_enhanced_memory_pair_time": ("enhanced_memory", "character_id, user_id, timestamp"),
+    "idx_enhanced_memory_pair_type": ("enhanced_memory", "character_id, user_id, memory_type, timestamp"),
+    # Covers the hybrid ranker's candidate pass (importance, recency, emotion, rollup filter)
+    "idx_enhanced_memory_pair_importance": (
+        "enhanced_memory",
+        "character_id, user_id, importance, timestamp, emotional_valence, summarized, is_identity"
+    ),
+    "idx_enhanced_memory_pair_conversation": (
+        "enhanced_memory", f"character_id, user_id, {conversation_id_sql()}, timestamp"
+    ),
+    "idx_personal_details_pair": ("personal_details", "character_id, user_id, confidence, timestamp"),
+}
+
+# (version, description, statements) of the live databases, applied in order.
+# Each step is its own transaction, so a file in use migrates between chat writes.
+LIVE_SCHEMA_MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "pair-scoped indexes for the memory read paths", [
+        *(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+          for name, (table, columns) in LIVE_INDEXES.items()),
+        # Superseded by the pair-scoped indexes
+        "DROP INDEX IF EXISTS idx_enhanced_memory_time",
+        "DROP INDEX IF EXISTS idx_enhanced_memory_type_time",
+        "DROP INDEX IF EXISTS idx_enhanced_memory_importance",
+        "DROP INDEX IF EXISTS idx_enhanced_memory_conversation",
+    ]),
+]
+LIVE_SCHEMA_VERSION = LIVE_SCHEMA_MIGRATIONS[-1][0]
+_LIVE_VERSION_KEY = "schema_version"
+
+
 def create_memory_tables(conn: sqlite3.Connection) -> bool:
     """Create all memory-related tables."""
     try:
@@ -188,4 +227,60 @@ def get_table_info(conn: sqlite3.Connection, table_name: str) -> List[Dict[str,
         return columns
     except Exception as e:
         logger.error(f"Failed to get table info for {table_name}: {e}")
-        return [] 
\ No newline at end of file
+        return []
+
+
+def get_live_schema_version(conn: sqlite3.Connection) -> int:
+    """Schema version of a pair database (0 before any live migration)."""
+    try:
+        row = conn.execute("SELECT value FROM memory_metadata WHERE key = ?", (_LIVE_VERSION_KEY,)).fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0]) if row else 0
+
+
+def pending_live_migrations(conn: sqlite3.Connection) -> List[Tuple[int, str]]:
+    """(version, description) of the migrations a pair database still needs."""
+    current = get_live_schema_version(conn)
+    return [(version, description) for version, description, _ in LIVE_SCHEMA_MIGRATIONS if version > current]
+
+
+def migrate_live_schema(conn: sqlite3.Connection, target_version: int = LIVE_SCHEMA_VERSION) -> List[int]:
+    """
+    Bring a pair database's indexes up to ``target_version``.
+
+    Safe on files the chat server has open: each step commits on its own
+    (holding the write lock only while its indexes build) and records its
+    version, so an interrupted run resumes where it stopped.
+
+    Args:
+        conn: Connection to a pair database whose tables and columns exist
+        target_version: Last migration to apply
+
+    Returns:
+        Versions applied by this call
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS memory_metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.commit()
+    current = get_live_schema_version(conn)
+    applied = []
+    for version, description, statements in LIVE_SCHEMA_MIGRATIONS:
+        if version <= current or version > target_version:
+            continue
+        started = time.perf_counter()
+        for statement in statements:
+            conn.execute(statement)
+        conn.execute(
+            "INSERT OR REPLACE INTO memory_metadata (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+            (_LIVE_VERSION_KEY, str(version))
+        )
+        conn.commit()
+        applied.append(version)
+        logger.info(f"✅ Schema migration {version} ({description}) applied in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return applied
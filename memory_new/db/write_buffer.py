@@ -0,0 +1,244 @@
+"""
+Group-commit write buffer for the per-pair memory databases.
+
+When enabled (``write_buffer.enabled`` in config/memory_config.json), inserts
+are queued per database file and applied in a single transaction every
+``flush_interval_ms`` or as soon as ``max_buffered_rows`` rows are pending.
+
+Reads see earlier writes without forcing a commit: a reader applies the
+pending statements inside a savepoint on its own connection, reads, and rolls
+the savepoint back (see overlay_pending). Writers and maintenance passes that
+open their own connection call flush_write_buffer() first instead. A failed
+flush raises to whoever asked for it and keeps the rows queued for the next
+attempt; a write is never reported failed after its rows were queued.
+
+The price is durability: a crash loses at most the last flush interval /
+``max_buffered_rows`` rows. Buffers are flushed at interpreter exit and on
+server shutdown.
+"""
+
+import atexit
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from ..utils.config import load_memory_config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WriteBufferSettings:
+    """Group-commit parameters (bounded loss window)."""
+    enabled: bool = False
+    flush_interval_ms: int = 250
+    max_buffered_rows: int = 500
+
+    @classmethod
+    def from_config(cls) -> "WriteBufferSettings":
+        """Build settings from the "write_buffer" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("write_buffer").items() if k in known})
+
+
+class MemoryWriteBuffer:
+    """Pending statements for one database file, applied in one transaction."""
+
+    def __init__(self, db_path: Union[str, Path], settings: WriteBufferSettings):
+        self.db_path = str(db_path)
+        self.settings = settings
+        self._lock = threading.RLock()
+        self._pending: List[Tuple[str, List[tuple]]] = []
+        self._pending_rows = 0
+        self._timer: Optional[threading.Timer] = None
+        self.flushes = 0
+        self.rows_flushed = 0
+
+    @property
+    def pending_rows(self) -> int:
+        """Number of rows waiting for the next flush."""
+        return self._pending_rows
+
+    def add(self, sql: str, rows: List[tuple]):
+        """Queue rows for an executemany statement (see add_statements)."""
+        self.add_statements([(sql, rows)])
+
+    def add_statements(self, statements: List[Tuple[str, List[tuple]]]):
+        """
+        Queue one write made of several executemany statements, all or nothing.
+
+        Consecutive batches of the same statement are merged, so a flush runs
+        one executemany per statement run while preserving write order.
+
+        Raises:
+            Exception: If the buffer is full and flushing it failed; nothing of
+                this write was queued, so the caller may retry it
+        """
+        statements = [(sql, rows) for sql, rows in statements if rows]
+        if not statements:
+            return
+        count = sum(len(rows) for _, rows in statements)
+        with self._lock:
+            if self._pending_rows and self._pending_rows + count > self.settings.max_buffered_rows:
+                # Make room first, so a failure is raised before this write is queued
+                self.flush()
+            for sql, rows in statements:
+                if self._pending and self._pending[-1][0] == sql:
+                    self._pending[-1][1].extend(rows)
+                else:
+                    self._pending.append((sql, list(rows)))
+            self._pending_rows += count
+
+            if self._pending_rows >= self.settings.max_buffered_rows:
+                try:
+                    self.flush()
+                except Exception:
+                    # Queued: retried by the timer or the next write, and raised to readers
+                    self._schedule()
+            else:
+                self._schedule()
+
+    def _schedule(self):
+        """Start the flush timer unless one is running (caller holds the lock)."""
+        if self._timer is None:
+            self._timer = threading.Timer(self.settings.flush_interval_ms / 1000.0, self._timed_flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def pending(self) -> List[Tuple[str, List[tuple]]]:
+        """Snapshot of the queued statements, in write order."""
+        with self._lock:
+            return [(sql, list(rows)) for sql, rows in self._pending]
+
+    def flush(self) -> int:
+        """
+        Apply every pending statement in one transaction.
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return 0
+            pending, rows = self._pending, self._pending_rows
+            self._pending, self._pending_rows = [], 0
+            try:
+                with sqlite3.connect(self.db_path) as conn:
+                    for sql, params in pending:
+                        conn.executemany(sql, params)
+                    conn.commit()
+            except Exception as e:
+                # Keep the rows (ahead of anything queued since) for the next flush
+                self._pending = pending + self._pending
+                self._pending_rows += rows
+                logger.error(f"❌ Failed to flush {rows} buffered memory rows to {self.db_path}: {e}")
+                raise
+            self.flushes += 1
+            self.rows_flushed += rows
+            return rows
+
+    def _timed_flush(self):
+        """Timer callback: flush, and try again after another interval if it fails."""
+        with self._lock:
+            self._timer = None
+            try:
+                self.flush()
+            except Exception:
+                self._schedule()
+
+
+_settings: Optional[WriteBufferSettings] = None
+_buffers: Dict[str, MemoryWriteBuffer] = {}
+_registry_lock = threading.Lock()
+
+
+def configure_write_buffers(**overrides) -> WriteBufferSettings:
+    """
+    Override the configured settings for buffers created from now on.
+
+    Existing buffers are flushed first so no pending write outlives its settings.
+    """
+    global _settings
+    flush_all_write_buffers()
+    with _registry_lock:
+        _settings = replace(WriteBufferSettings.from_config(), **overrides)
+        _buffers.clear()
+        return _settings
+
+
+def get_write_buffer(db_path: Union[str, Path]) -> Optional[MemoryWriteBuffer]:
+    """Buffer for db_path, or None when group commit is disabled."""
+    global _settings
+    with _registry_lock:
+        if _settings is None:
+            _settings = WriteBufferSettings.from_config()
+        if not _settings.enabled:
+            return None
+        key = str(db_path)
+        if key not in _buffers:
+            _buffers[key] = MemoryWriteBuffer(key, _settings)
+        return _buffers[key]
+
+
+def flush_write_buffer(db_path: Union[str, Path]) -> int:
+    """
+    Apply pending writes for one database (call before writing it from another connection).
+
+    Raises:
+        Exception: If the flush failed; the rows stay queued
+    """
+    buffer = _buffers.get(str(db_path))
+    if buffer is None:
+        return 0
+    return buffer.flush()
+
+
+@contextmanager
+def overlay_pending(conn: sqlite3.Connection, db_path: Union[str, Path]) -> Iterator[sqlite3.Connection]:
+    """
+    Read conn with the pending writes of db_path applied, without committing them.
+
+    The pending statements run inside a savepoint that is rolled back after
+    the block, so the block must only read. Rowids match what the flush will
+    assign, as the flush applies the same statements to the same committed
+    state. Without pending writes the block reads conn as is.
+
+    Raises:
+        Exception: If the pending writes cannot be applied (the flush would fail too)
+    """
+    buffer = _buffers.get(str(db_path))
+    pending = buffer.pending() if buffer is not None else []
+    if not pending:
+        yield conn
+        return
+    conn.execute("SAVEPOINT pending_writes")
+    try:
+        for sql, rows in pending:
+            conn.executemany(sql, rows)
+        yield conn
+    finally:
+        conn.execute("ROLLBACK TO pending_writes")
+        conn.execute("RELEASE pending_writes")
+
+
+def flush_all_write_buffers() -> int:
+    """Apply pending writes for every database, e.g. on shutdown."""
+    total = 0
+    for buffer in list(_buffers.values()):
+        try:
+            total += buffer.flush()
+        except Exception:
+            continue
+    if total:
+        logger.info(f"✅ Flushed {total} buffered memory rows")
+    return total
+
+
+atexit.register(flush_all_write_buffers)
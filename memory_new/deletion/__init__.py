@@ -0,0 +1,10 @@
+"""
+Deletion layer for memory system.
+"""
+
+from .deleter import EnhancedMemoryDeleter
+
+__all__ = [
+    # Memory deletion
+    'EnhancedMemoryDeleter'
+]
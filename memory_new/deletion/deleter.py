@@ -0,0 +1,100 @@
+"""
+Memory deletion against the per-pair enhanced memory databases.
+"""
+
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from ..base.interfaces import MemoryDeleter
+from ..base.models import MemoryQuery, MemoryResult
+from ..enhanced.tiering import archive_path
+from ..retrieval.planner import PATH_INDEXES, MemoryQueryPlanner
+from ..retrieval.retriever import pair_memory_system
+
+logger = logging.getLogger(__name__)
+
+# Parameters: character_id, user_id, cutoff timestamp, importance threshold
+CLEAR_OLD_SQL = """
+    DELETE FROM enhanced_memory {indexed}
+    WHERE character_id = ? AND user_id = ? AND timestamp < ?
+      AND COALESCE(importance, 0) < ? AND COALESCE(is_identity, 0) = 0
+"""
+
+
+class EnhancedMemoryDeleter(MemoryDeleter):
+    """
+    MemoryDeleter for the enhanced memory databases.
+
+    Query deletes take the pair from the query; deletes by id or age need the
+    pair given at construction.
+    """
+
+    def __init__(self, character_id: Optional[str] = None, user_id: Optional[str] = None,
+                 planner: Optional[MemoryQueryPlanner] = None):
+        self.character_id = character_id
+        self.user_id = user_id
+        self.planner = planner or MemoryQueryPlanner()
+
+    def delete_memory(self, memory_id: str) -> MemoryResult:
+        """Delete a specific memory (hot, warm or archived)."""
+        try:
+            memory_system = pair_memory_system(self.character_id, self.user_id)
+            if not memory_system.delete_memory(memory_id):
+                return MemoryResult(success=False, error=f"Memory {memory_id} not found")
+            return MemoryResult(success=True, data=memory_id)
+        except Exception as e:
+            logger.error(f"❌ Failed to delete memory {memory_id}: {e}")
+            return MemoryResult(success=False, error=str(e))
+
+    def delete_memories_by_query(self, query: MemoryQuery) -> MemoryResult:
+        """
+        Delete memories matching query criteria.
+
+        Every match is deleted (query.limit is ignored); the matches are
+        selected through the same plan get_memories() would use.
+
+        Returns:
+            MemoryResult whose data is the number of memories deleted
+        """
+        try:
+            plan = self.planner.plan(query, columns="m.id", limited=False)
+            memory_system = pair_memory_system(query.character_id, query.user_id)
+            with memory_system._connect() as conn:
+                deleted = conn.execute(f"DELETE FROM enhanced_memory WHERE id IN ({plan.sql})", plan.params).rowcount
+            memory_system.invalidate_recent_turns()
+            logger.info(f"✅ Deleted {deleted} memories by query ({plan.path} path)")
+            return MemoryResult(success=True, data=deleted, metadata={"path": plan.path, "index": plan.index})
+        except Exception as e:
+            logger.error(f"❌ Failed to delete memories by query: {e}")
+            return MemoryResult(success=False, error=str(e))
+
+    def clear_old_memories(self, days_old: int, min_importance: float = 0.3) -> MemoryResult:
+        """
+        Clear old memories below importance threshold.
+
+        Identity memories are always kept. Archived memories are cleared by the
+        same rule.
+
+        Returns:
+            MemoryResult whose data is the number of memories deleted
+        """
+        cutoff = (datetime.now() - timedelta(days=days_old)).isoformat()
+        try:
+            memory_system = pair_memory_system(self.character_id, self.user_id)
+            params = (self.character_id, self.user_id, cutoff, min_importance)
+            with memory_system._connect() as conn:
+                deleted = conn.execute(
+                    CLEAR_OLD_SQL.format(indexed=f"INDEXED BY {PATH_INDEXES['recent']}"), params
+                ).rowcount
+            memory_system.invalidate_recent_turns()
+            path = archive_path(memory_system.db_path)
+            if path.exists():
+                with sqlite3.connect(path) as archive:
+                    deleted += archive.execute(CLEAR_OLD_SQL.format(indexed=""), params).rowcount
+            logger.info(f"✅ Cleared {deleted} memories older than {days_old} days for {memory_system.memory_key}")
+            return MemoryResult(success=True, data=deleted)
+        except Exception as e:
+            logger.error(f"❌ Failed to clear old memories: {e}")
+            return MemoryResult(success=False, error=str(e))
@@ -0,0 +1,52 @@
+"""
+Memory engine for one character-user pair.
+
+Bundles the concrete implementations of the memory_new.base interfaces over
+the pair's enhanced memory database:
+
+    engine = MemoryEngine("luna", "user_123")
+    engine.initialize()
+    memories = engine.retriever.get_memories(MemoryQuery("user_123", "luna", memory_type=MemoryType.PERSONAL))
+"""
+
+import logging
+from typing import Optional
+
+from .base.interfaces import MemoryStore
+from .base.models import MemoryResult
+from .creation import EnhancedMemoryCreator
+from .deletion import EnhancedMemoryDeleter
+from .formatting import MemoryEntryFormatter
+from .retrieval import EnhancedMemoryRetriever, MemoryQueryPlanner, pair_memory_system
+from .search import EnhancedMemorySearcher
+from .update import EnhancedMemoryUpdater
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryEngine(MemoryStore):
+    """Creator, retriever, searcher, updater, deleter and formatter of one pair."""
+
+    def __init__(self, character_id: str, user_id: str, planner: Optional[MemoryQueryPlanner] = None):
+        self.character_id = character_id
+        self.user_id = user_id
+        self.planner = planner or MemoryQueryPlanner()
+        self.creator = EnhancedMemoryCreator()
+        self.retriever = EnhancedMemoryRetriever(character_id, user_id, self.planner)
+        self.searcher = EnhancedMemorySearcher(self.retriever)
+        self.updater = EnhancedMemoryUpdater(character_id, user_id)
+        self.deleter = EnhancedMemoryDeleter(character_id, user_id, self.planner)
+        self.formatter = MemoryEntryFormatter()
+
+    def initialize(self) -> MemoryResult:
+        """Open (and if needed create or migrate) the pair's database."""
+        try:
+            memory_system = pair_memory_system(self.character_id, self.user_id)
+            return MemoryResult(success=True, data=memory_system.db_path)
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize memory engine for {self.character_id}_{self.user_id}: {e}")
+            return MemoryResult(success=False, error=str(e))
+
+    def is_available(self) -> bool:
+        """Check if the pair's database can be opened."""
+        return self.initialize().success
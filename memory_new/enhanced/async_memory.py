@@ -0,0 +1,268 @@
+"""
+Async facade over the per-pair enhanced memory systems.
+
+EnhancedMemorySystem talks to SQLite synchronously; called from an async route
+handler, every read and commit blocks the event loop. AsyncMemorySystem runs
+those calls on a small set of DB threads instead:
+
+    memory = await get_async_memory_system("luna", "user_123")
+    context = await memory.get_context(max_memories=10, semantic_query=message)
+    await memory.store_batch(turn_memories)
+
+Each pair is pinned to one shard (a single thread with a bounded job queue),
+so a pair's operations run in submission order and never contend for its
+connection, while different pairs proceed in parallel. A full queue is
+backpressure: submitters wait up to ``submit_timeout_ms`` for room and then get
+MemoryQueueFull rather than queueing without bound; the server answers it with
+HTTP 503 and a ``Retry-After`` of ``retry_after`` seconds.
+Settings come from the "async_memory" section of config/memory_config.json.
+"""
+
+import math
+import queue
+import zlib
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, fields
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from ..utils.config import load_memory_config
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryQueueFull(RuntimeError):
+    """A memory shard's job queue stayed full for the whole submit timeout."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        # Whole seconds a client should wait before retrying
+        self.retry_after = retry_after
+
+
+@dataclass
+class AsyncMemorySettings:
+    """DB thread pool parameters."""
+    shards: int = 4
+    max_queue: int = 256
+    submit_timeout_ms: int = 2000
+
+    @classmethod
+    def from_config(cls) -> "AsyncMemorySettings":
+        """Build settings from the "async_memory" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("async_memory").items() if k in known})
+
+
+class MemoryShard:
+    """One DB thread draining a bounded job queue in order."""
+
+    def __init__(self, index: int, max_queue: int):
+        self.index = index
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(max_queue, 1))
+        self.completed = 0
+        self.failed = 0
+        self._thread = threading.Thread(target=self._run, name=f"memory-db-{index}", daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting in the queue."""
+        return self._jobs.qsize()
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Queue a call without blocking.
+
+        Raises:
+            queue.Full: If the queue is at capacity
+        """
+        future: Future = Future()
+        self._jobs.put_nowait((future, fn, args, kwargs))
+        return future
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+                self.completed += 1
+            except BaseException as e:
+                future.set_exception(e)
+                self.failed += 1
+
+    def stop(self, timeout: float = 5.0):
+        """Finish the queued jobs, then end the thread."""
+        self._jobs.put(None)
+        self._thread.join(timeout)
+
+
+class MemoryExecutor:
+    """Pair-sharded DB threads awaited from the event loop."""
+
+    def __init__(self, settings: Optional[AsyncMemorySettings] = None):
+        self.settings = settings or AsyncMemorySettings.from_config()
+        self.shards = [MemoryShard(index, self.settings.max_queue) for index in range(max(self.settings.shards, 1))]
+        self.rejected = 0
+
+    def shard_for(self, key: str) -> MemoryShard:
+        """Shard a pair key is pinned to (stable across processes)."""
+        return self.shards[zlib.crc32(key.encode("utf-8")) % len(self.shards)]
+
+    async def run(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` on the key's shard and await its result.
+
+        Raises:
+            MemoryQueueFull: If the shard had no room within submit_timeout_ms
+        """
+        shard = self.shard_for(key)
+        deadline = time.monotonic() + self.settings.submit_timeout_ms / 1000.0
+        delay = 0.001
+        while True:
+            try:
+                future = shard.submit(fn, *args, **kwargs)
+                break
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    self.rejected += 1
+                    raise MemoryQueueFull(
+                        f"Memory shard {shard.index} is full ({self.settings.max_queue} queued jobs)",
+                        retry_after=max(1, math.ceil(self.settings.submit_timeout_ms / 1000.0))
+                    )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and job counts per shard."""
+        return {
+            "shards": [
+                {"shard": shard.index, "queued": shard.depth, "completed": shard.completed, "failed": shard.failed}
+                for shard in self.shards
+            ],
+            "max_queue": self.settings.max_queue,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self):
+        """Drain and stop every shard."""
+        for shard in self.shards:
+            shard.stop()
+
+
+class AsyncMemorySystem:
+    """
+    Awaitable view of one pair's EnhancedMemorySystem.
+
+    Every call runs on the pair's shard; run() covers anything without a
+    dedicated wrapper (e.g. module functions taking the pair).
+    """
+
+    def __init__(self, memory_system, executor: Optional[MemoryExecutor] = None):
+        self.memory_system = memory_system
+        self.executor = executor or get_memory_executor()
+
+    @property
+    def character_id(self) -> str:
+        return self.memory_system.character_id
+
+    @property
+    def user_id(self) -> str:
+        return self.memory_system.user_id
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call on this pair's DB thread."""
+        return await self.executor.run(self.memory_system.memory_key, fn, *args, **kwargs)
+
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """Run an EnhancedMemorySystem method by name on this pair's DB thread."""
+        return await self.run(getattr(self.memory_system, method), *args, **kwargs)
+
+    async def store(self, content: str, memory_type: str = "conversation", **kwargs) -> Optional[str]:
+        """Store one memory (see EnhancedMemorySystem.store_memory)."""
+        return await self.run(self.memory_system.store_memory, content, memory_type, **kwargs)
+
+    async def store_batch(self, memories: List[Dict[str, Any]]) -> List[str]:
+        """Store several memories in one transaction (see batch_store_memories)."""
+        return await self.run(self.memory_system.batch_store_memories, memories)
+
+    async def get_context(self, max_memories: int = 10, **kwargs) -> Dict[str, Any]:
+        """Ranked memory context of this pair (see get_memory_context)."""
+        return await self.run(
+            self.memory_system.get_memory_context, self.character_id, self.user_id, max_memories, **kwargs
+        )
+
+    async def search(self, query: str, max_results: int = 5, **kwargs) -> List[Dict[str, Any]]:
+        """Full-text search of this pair's memories (see search_memories)."""
+        return await self.run(self.memory_system.search_memories, query, max_results, **kwargs)
+
+    async def stats(self) -> Dict[str, Any]:
+        """Memory statistics of this pair (see get_memory_stats)."""
+        return await self.run(self.memory_system.get_memory_stats)
+
+    async def iter_memories(self, batch_size: int = 200, **filters) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream this pair's history page by page, each page read on its DB thread.
+
+        Only one page is held at a time, and other work on the shard runs
+        between pages.
+
+        Args:
+            batch_size: Rows per page
+            **filters: memory_types, oldest_first, include_summaries or
+                conversation_only (see get_memories_page)
+        """
+        cursor = None
+        while True:
+            page = await self.run(self.memory_system.get_memories_page, batch_size, cursor, **filters)
+            for memory in page["memories"]:
+                yield memory
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+
+
+_executor: Optional[MemoryExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_memory_executor() -> MemoryExecutor:
+    """Process-wide DB thread pool (started on first use)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = MemoryExecutor()
+            logger.info(f"✅ Memory DB threads started ({len(_executor.shards)} shards, "
+                        f"queue {_executor.settings.max_queue})")
+        return _executor
+
+
+def shutdown_memory_executor():
+    """Drain and stop the DB threads (server shutdown)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown()
+        logger.info("✅ Memory DB threads stopped")
+
+
+async def get_async_memory_system(character_id: str, user_id: str) -> Optional[AsyncMemorySystem]:
+    """
+    Async view of a pair's registry-managed memory system, or None if unavailable.
+
+    Opening a pair (schema checks, migrations) also runs on its shard.
+    """
+    from .enhanced_memory_system import get_enhanced_memory_system
+    executor = get_memory_executor()
+    memory_system = await executor.run(f"{character_id}_{user_id}", get_enhanced_memory_system, character_id, user_id)
+    return AsyncMemorySystem(memory_system, executor) if memory_system is not None else None
@@ -0,0 +1,229 @@
+"""
+Maintained memory counters.
+
+One ``memory_counters`` row per (pair, memory_type, tier) holds the number of
+memories, their importance sum and stored content bytes. Triggers on
+enhanced_memory keep the rows current inside the writing transaction (insert,
+replace, update of a counted column, delete), so statistics are a read of a
+handful of rows instead of COUNT/GROUP BY/AVG scans over the whole history.
+
+The archive database of a pair carries its own counters, maintained by the
+same triggers as cold memories are moved in or cleared.
+"""
+
+import sqlite3
+import hashlib
+import logging
+from typing import Any, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_TABLE = "memory_counters"
+
+# Parameters: character_id, user_id (primary-key prefix read)
+COUNTERS_SQL = f"""
+    SELECT memory_type, tier, memory_count, importance_sum, content_bytes FROM {COUNTERS_TABLE}
+    WHERE character_id = ? AND user_id = ? AND memory_count > 0
+"""
+
+# Stored bytes of a row (plain or compressed content), as tier_stats reports them
+_CONTENT_BYTES = "LENGTH(CAST({row}.content AS BLOB)) + COALESCE(LENGTH({row}.compressed_content), 0)"
+
+# Columns whose change moves a row between counters or changes its sums
+_COUNTED_COLUMNS = "character_id, user_id, memory_type, tier, importance, content, compressed_content"
+
+
+def _add_row(row: str) -> str:
+    """Statement adding a trigger row (``new``) to its counter."""
+    return f"""
+        INSERT INTO {COUNTERS_TABLE} (character_id, user_id, memory_type, tier, memory_count,
+                                      importance_sum, content_bytes)
+        VALUES ({row}.character_id, {row}.user_id, {row}.memory_type, COALESCE({row}.tier, 'hot'), 1,
+                COALESCE({row}.importance, 0), {_CONTENT_BYTES.format(row=row)})
+        ON CONFLICT(character_id, user_id, memory_type, tier) DO UPDATE SET
+            memory_count = memory_count + 1,
+            importance_sum = importance_sum + excluded.importance_sum,
+            content_bytes = content_bytes + excluded.content_bytes;
+    """
+
+
+def _subtract_row(row: str) -> str:
+    """Statement removing a trigger row (``old``) from its counter."""
+    return f"""
+        UPDATE {COUNTERS_TABLE} SET
+            memory_count = memory_count - 1,
+            importance_sum = importance_sum - COALESCE({row}.importance, 0),
+            content_bytes = content_bytes - ({_CONTENT_BYTES.format(row=row)})
+        WHERE character_id = {row}.character_id AND user_id = {row}.user_id
+          AND memory_type = {row}.memory_type AND tier = COALESCE({row}.tier, 'hot');
+    """
+
+
+_COUNTERS_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {COUNTERS_TABLE} (
+        character_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        memory_type TEXT NOT NULL,
+        tier TEXT NOT NULL,
+        memory_count INTEGER NOT NULL DEFAULT 0,
+        importance_sum REAL NOT NULL DEFAULT 0,
+        content_bytes INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (character_id, user_id, memory_type, tier)
+    )
+    """,
+    # INSERT OR REPLACE of an existing id removes the old row without firing
+    # delete triggers, so its contribution is taken out here
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_counters_bi BEFORE INSERT ON enhanced_memory
+    WHEN EXISTS (SELECT 1 FROM enhanced_memory WHERE id = new.id) BEGIN
+        UPDATE {COUNTERS_TABLE} SET
+            memory_count = memory_count - 1,
+            importance_sum = importance_sum - (SELECT COALESCE(importance, 0) FROM enhanced_memory WHERE id = new.id),
+            content_bytes = content_bytes - (
+                SELECT {_CONTENT_BYTES.format(row='enhanced_memory')} FROM enhanced_memory WHERE id = new.id
+            )
+        WHERE (character_id, user_id, memory_type, tier) = (
+            SELECT character_id, user_id, memory_type, COALESCE(tier, 'hot') FROM enhanced_memory WHERE id = new.id
+        );
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_counters_ai AFTER INSERT ON enhanced_memory BEGIN
+        {_add_row('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_counters_au AFTER UPDATE OF {_COUNTED_COLUMNS} ON enhanced_memory BEGIN
+        {_subtract_row('old')}
+        {_add_row('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_counters_ad AFTER DELETE ON enhanced_memory BEGIN
+        {_subtract_row('old')}
+    END
+    """,
+]
+
+
+def rebuild_memory_counters(conn: sqlite3.Connection) -> int:
+    """
+    Recompute every counter row from the stored memories (one aggregate scan).
+
+    Args:
+        conn: Database connection (caller commits)
+
+    Returns:
+        Number of memories counted
+    """
+    conn.execute(f"DELETE FROM {COUNTERS_TABLE}")
+    conn.execute(f"""
+        INSERT INTO {COUNTERS_TABLE} (character_id, user_id, memory_type, tier, memory_count,
+                                      importance_sum, content_bytes)
+        SELECT character_id, user_id, memory_type, COALESCE(tier, 'hot'), COUNT(*),
+               COALESCE(SUM(importance), 0), COALESCE(SUM({_CONTENT_BYTES.format(row='enhanced_memory')}), 0)
+        FROM enhanced_memory
+        GROUP BY character_id, user_id, memory_type, COALESCE(tier, 'hot')
+    """)
+    return conn.execute(f"SELECT COALESCE(SUM(memory_count), 0) FROM {COUNTERS_TABLE}").fetchone()[0]
+
+
+def ensure_memory_counters(conn: sqlite3.Connection) -> bool:
+    """
+    Create the counters table and triggers, and fill it on first use.
+
+    Needs the tiering columns of enhanced_memory.
+
+    Args:
+        conn: Pair or archive database connection (caller commits)
+
+    Returns:
+        True if the counters were built by this call
+    """
+    exists = has_memory_counters(conn)
+    for statement in _COUNTERS_DDL:
+        conn.execute(statement)
+    if exists:
+        return False
+    counted = rebuild_memory_counters(conn)
+    logger.info(f"✅ Built memory counters ({counted} memories)")
+    return True
+
+
+def load_memory_counters(conn: sqlite3.Connection, character_id: str, user_id: str) -> Dict[str, Any]:
+    """
+    Counts and sums of a pair from its counter rows.
+
+    Returns:
+        total_memories, type_distribution, importance_sum, average_importance
+        and tiers ({tier: {"memories", "content_bytes"}})
+    """
+    total, importance_sum = 0, 0.0
+    types: Dict[str, int] = {}
+    tiers: Dict[str, Dict[str, int]] = {}
+    for memory_type, tier, count, type_importance, content_bytes in conn.execute(
+        COUNTERS_SQL, (character_id, user_id)
+    ):
+        total += count
+        importance_sum += type_importance
+        types[memory_type] = types.get(memory_type, 0) + count
+        tier_counts = tiers.setdefault(tier, {"memories": 0, "content_bytes": 0})
+        tier_counts["memories"] += count
+        tier_counts["content_bytes"] += content_bytes
+    return {
+        "total_memories": total,
+        "type_distribution": types,
+        "importance_sum": importance_sum,
+        "average_importance": importance_sum / total if total else 0.0,
+        "tiers": tiers
+    }
+
+
+def memory_version(conn: sqlite3.Connection, character_id: str, user_id: str,
+                   exclude_ids: Iterable[str] = ()) -> str:
+    """
+    Token that changes when memories of a pair are added, deleted or rewritten.
+
+    Digest of the memory count and content bytes of each type (tiers
+    combined), read from the counter rows, so it costs the same at any
+    history size. Equal tokens mean the memories are (almost certainly) unchanged.
+
+    Args:
+        conn: Pair database connection
+        character_id: Character of the pair
+        user_id: User of the pair
+        exclude_ids: Memories to leave out, as if they were not stored (a writer
+            comparing against the token read before its own write)
+
+    Returns:
+        Hex digest
+    """
+    types: Dict[str, list] = {}
+    for memory_type, _tier, count, _importance, content_bytes in conn.execute(COUNTERS_SQL, (character_id, user_id)):
+        totals = types.setdefault(memory_type, [0, 0])
+        totals[0] += count
+        totals[1] += content_bytes
+    exclude_ids = list(exclude_ids)
+    if exclude_ids:
+        for memory_type, content_bytes in conn.execute(f"""
+            SELECT m.memory_type, {_CONTENT_BYTES.format(row='m')} FROM enhanced_memory AS m
+            WHERE m.character_id = ? AND m.user_id = ? AND m.id IN ({', '.join('?' for _ in exclude_ids)})
+        """, (character_id, user_id, *exclude_ids)):
+            totals = types.setdefault(memory_type, [0, 0])
+            totals[0] -= 1
+            totals[1] -= content_bytes
+    hasher = hashlib.blake2b(digest_size=16)
+    for memory_type in sorted(types):
+        count, content_bytes = types[memory_type]
+        if count <= 0:
+            continue
+        hasher.update(f"{memory_type}\x1f{count}\x1f{content_bytes}\x1e".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def has_memory_counters(conn: sqlite3.Connection) -> bool:
+    """Whether a database has the counters table (files never opened since it was added do not)."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (COUNTERS_TABLE,)
+    ).fetchone() is not None
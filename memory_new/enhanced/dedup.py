@@ -0,0 +1,291 @@
+"""
+Near-duplicate detection for enhanced memories.
+
+Every memory stores a SimHash ``fingerprint`` (0 when it has no words, which
+is never indexed). Triggers keep its bands in ``memory_fingerprints`` (the
+per-pair fingerprint index), so the candidates for a new memory are found
+with primary-key lookups. A memory of the same type within
+``max_hamming_distance`` bits is merged into instead of inserted: its access
+count goes up and its importance is raised towards the newer copy's. deduplicate_database() applies the same rule to existing
+databases (scripts/memory_maintenance.py --action dedup).
+
+Only facts, diaries and similar memories are merged: conversation turns
+(``skip_memory_types``) are history, and a repeated "ok thanks" is a
+separate turn. Memories shorter than ``min_tokens`` are never merged.
+"""
+
+import sqlite3
+import logging
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..db.write_buffer import flush_write_buffer
+from ..utils.compression import inflate_content
+from ..utils.config import load_memory_config
+from ..utils.fingerprint import (
+    BANDS, FINGERPRINT_MASK, ContentFingerprint,
+    content_fingerprint, fingerprint_bands, fingerprint_tokens
+)
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_TABLE = "memory_fingerprints"
+
+# Columns added to enhanced_memory
+DEDUP_COLUMNS = {
+    "fingerprint": "INTEGER"
+}
+
+
+def _band_rows(row: str) -> str:
+    """SQL VALUES rows of the index entries of the ``new`` row in a trigger."""
+    return ", ".join(
+        f"({band}, ({row}.fingerprint >> {shift}) & {mask}, {row}.memory_type, {row}.id, {row}.fingerprint)"
+        for band, (shift, mask) in enumerate(BANDS)
+    )
+
+
+def _band_match(row: str) -> str:
+    """SQL condition selecting the index entries of the ``old`` row in a trigger."""
+    # ORed equalities use the primary key; a row-value IN list would scan the table
+    return " OR ".join(
+        f"(band = {band} AND value = ({row}.fingerprint >> {shift}) & {mask}"
+        f" AND memory_type = {row}.memory_type AND memory_id = {row}.id)"
+        for band, (shift, mask) in enumerate(BANDS)
+    )
+
+
+# Entries carry the memory type and the full fingerprint, so a lookup is an
+# index range scan with no join back to enhanced_memory
+_FINGERPRINT_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} (
+        band INTEGER NOT NULL,
+        value INTEGER NOT NULL,
+        memory_type TEXT NOT NULL,
+        memory_id TEXT NOT NULL,
+        fingerprint INTEGER NOT NULL,
+        PRIMARY KEY (band, value, memory_type, memory_id)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_fingerprints_ai AFTER INSERT ON enhanced_memory
+    WHEN new.fingerprint BEGIN
+        INSERT OR REPLACE INTO {FINGERPRINT_TABLE} (band, value, memory_type, memory_id, fingerprint)
+        VALUES {_band_rows("new")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_fingerprints_ad AFTER DELETE ON enhanced_memory
+    WHEN old.fingerprint BEGIN
+        DELETE FROM {FINGERPRINT_TABLE} WHERE {_band_match("old")};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_fingerprints_au AFTER UPDATE OF fingerprint, memory_type ON enhanced_memory BEGIN
+        DELETE FROM {FINGERPRINT_TABLE} WHERE old.fingerprint AND ({_band_match("old")});
+        INSERT OR REPLACE INTO {FINGERPRINT_TABLE} (band, value, memory_type, memory_id, fingerprint)
+            SELECT * FROM (VALUES {_band_rows("new")}) WHERE new.fingerprint;
+    END
+    """,
+]
+
+# Parameters: last_accessed, incoming importance, bump, memory id
+MERGE_DUPLICATE_SQL = """
+    UPDATE enhanced_memory
+    SET access_count = COALESCE(access_count, 0) + 1,
+        last_accessed = ?,
+        importance = MIN(1.0, MAX(COALESCE(importance, 0), ?) + ? * (1.0 - MAX(COALESCE(importance, 0), ?)))
+    WHERE id = ?
+"""
+
+
+@dataclass
+class DedupSettings:
+    """Near-duplicate merge rule."""
+    enabled: bool = True
+    # Up to 5 every near-duplicate shares an indexed band; beyond that some are missed
+    max_hamming_distance: int = 5
+    # Shorter texts are never merged
+    min_tokens: int = 6
+    # Fraction of the remaining headroom to 1.0 added to importance per merge
+    importance_bump: float = 0.05
+    # Conversation turns are kept as they were said
+    skip_memory_types: List[str] = field(
+        default_factory=lambda: ["user_message", "response", "character_response", "conversation"]
+    )
+    batch_size: int = 1000
+
+    @classmethod
+    def from_config(cls) -> "DedupSettings":
+        """Build settings from the "dedup" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("dedup").items() if k in known})
+
+    def applies_to(self, memory_type: str, fingerprint: Optional[ContentFingerprint]) -> bool:
+        """Whether a memory of this type and fingerprint may be merged at all."""
+        return (
+            self.enabled and fingerprint is not None and fingerprint.tokens >= self.min_tokens
+            and memory_type not in self.skip_memory_types
+        )
+
+
+def ensure_dedup_columns(conn: sqlite3.Connection) -> List[str]:
+    """
+    Add the fingerprint column, the band index table and its sync triggers.
+
+    Returns:
+        Names of the columns added by this call
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(enhanced_memory)")}
+    added = []
+    for column, definition in DEDUP_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE enhanced_memory ADD COLUMN {column} {definition}")
+            added.append(column)
+    for statement in _FINGERPRINT_DDL:
+        conn.execute(statement)
+    return added
+
+
+def find_near_duplicate(conn: sqlite3.Connection, fingerprint: ContentFingerprint, memory_type: str,
+                        settings: DedupSettings) -> Optional[str]:
+    """
+    Closest stored memory of the same type within the merge distance.
+
+    Callers check settings.applies_to() first.
+
+    Args:
+        conn: Pair database connection
+        fingerprint: Fingerprint of the incoming memory
+        memory_type: Its (final) memory type
+        settings: Merge rule
+
+    Returns:
+        Id of the memory to merge into, or None
+    """
+    bands = fingerprint_bands(fingerprint.value)
+    rows = conn.execute(f"""
+        SELECT memory_id, fingerprint FROM {FINGERPRINT_TABLE}
+        WHERE {' OR '.join('(band = ? AND value = ? AND memory_type = ?)' for _ in bands)}
+    """, [item for band, value in enumerate(bands) for item in (band, value, memory_type)]).fetchall()
+    limit = settings.max_hamming_distance
+    best = None
+    for memory_id, stored in rows:
+        distance = ((fingerprint.value ^ stored) & FINGERPRINT_MASK).bit_count()
+        if distance <= limit and (best is None or distance < best[0]):
+            best = (distance, memory_id)
+            if not distance:
+                break
+    return best[1] if best else None
+
+
+def merge_params(memory_id: str, importance: float, settings: DedupSettings,
+                 now: Optional[datetime] = None) -> Tuple[Any, ...]:
+    """MERGE_DUPLICATE_SQL parameters for folding a copy of ``importance`` into memory_id."""
+    return ((now or datetime.now()).isoformat(), importance, settings.importance_bump, importance, memory_id)
+
+
+def backfill_fingerprints(conn: sqlite3.Connection, batch_size: int = 1000) -> int:
+    """
+    Fingerprint stored memories that have none (commits per batch).
+
+    Returns:
+        Number of memories fingerprinted
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(enhanced_memory)")}
+    compressed = "compressed_content" if "compressed_content" in columns else "NULL"
+    updated = 0
+    while True:
+        # Rows without words get 0 so they are not selected again
+        rows = conn.execute(f"""
+            SELECT id, content, {compressed} FROM enhanced_memory
+            WHERE fingerprint IS NULL LIMIT ?
+        """, (batch_size,)).fetchall()
+        if not rows:
+            return updated
+        values = []
+        for memory_id, content, compressed_content in rows:
+            fingerprint = content_fingerprint(inflate_content(content, compressed_content))
+            values.append((fingerprint.value if fingerprint else 0, memory_id))
+        conn.executemany("UPDATE enhanced_memory SET fingerprint = ? WHERE id = ?", values)
+        conn.commit()
+        updated += len(values)
+
+
+def deduplicate_database(db_path: Union[str, Path], settings: Optional[DedupSettings] = None,
+                         dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Merge near-duplicates already stored in a pair database.
+
+    Memories are visited oldest first; each one within the merge distance of
+    an earlier kept memory of the same type is folded into it (access count
+    and importance) and deleted.
+
+    Args:
+        db_path: Pair database (memory_databases/enhanced_<pair>.db)
+        settings: Merge rule (defaults to the configured one)
+        dry_run: Only count what would be merged (missing fingerprints are still stored)
+
+    Returns:
+        fingerprinted, scanned and merged counts
+    """
+    settings = settings or DedupSettings.from_config()
+    flush_write_buffer(db_path)
+    with sqlite3.connect(db_path) as conn:
+        ensure_dedup_columns(conn)
+        fingerprinted = backfill_fingerprints(conn, settings.batch_size)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(enhanced_memory)")}
+        compressed = "compressed_content" if "compressed_content" in columns else "NULL"
+
+        # (band, value, memory_type) -> kept memories [(id, fingerprint)]
+        kept: Dict[Tuple[int, int, str], List[Tuple[str, int]]] = {}
+        # Exact repeats, the common case, skip the band scan
+        kept_exact: Dict[Tuple[int, str], str] = {}
+        merges: Dict[str, List[float]] = {}
+        duplicates: List[str] = []
+        scanned = 0
+        cursor = conn.execute(f"""
+            SELECT id, content, {compressed}, memory_type, importance, fingerprint
+            FROM enhanced_memory ORDER BY timestamp, rowid
+        """)
+        for memory_id, content, compressed_content, memory_type, importance, stored in cursor:
+            scanned += 1
+            if not stored or memory_type in settings.skip_memory_types:
+                continue
+            tokens = len(fingerprint_tokens(inflate_content(content, compressed_content)))
+            if not settings.applies_to(memory_type, ContentFingerprint(stored, tokens)):
+                continue
+            target = kept_exact.get((stored, memory_type))
+            bands = fingerprint_bands(stored)
+            if target is None:
+                limit = settings.max_hamming_distance
+                for band, value in enumerate(bands) if limit else ():
+                    target = next((
+                        kept_id for kept_id, kept_fingerprint in kept.get((band, value, memory_type), ())
+                        if ((stored ^ kept_fingerprint) & FINGERPRINT_MASK).bit_count() <= limit
+                    ), None)
+                    if target:
+                        break
+            if target is None:
+                kept_exact[(stored, memory_type)] = memory_id
+                for band, value in enumerate(bands):
+                    kept.setdefault((band, value, memory_type), []).append((memory_id, stored))
+                continue
+            merges.setdefault(target, []).append(importance or 0.0)
+            duplicates.append(memory_id)
+
+        if not dry_run and duplicates:
+            now = datetime.now()
+            for target, importances in merges.items():
+                for importance in importances:
+                    conn.execute(MERGE_DUPLICATE_SQL, merge_params(target, importance, settings, now))
+            for start in range(0, len(duplicates), settings.batch_size):
+                batch = duplicates[start:start + settings.batch_size]
+                conn.execute(f"DELETE FROM enhanced_memory WHERE id IN ({', '.join('?' for _ in batch)})", batch)
+            conn.commit()
+    if duplicates:
+        logger.info(f"✅ {'Found' if dry_run else 'Merged'} {len(duplicates)} near-duplicate memories in {db_path}")
+    return {"fingerprinted": fingerprinted, "scanned": scanned, "merged": len(duplicates), "dry_run": dry_run}
@@ -0,0 +1,395 @@
+"""
+Per-day diary entry cache.
+
+The diary summary is built day by day: each day's entry, hashtags and
+extracted facts depend only on that day's memories. ``diary_days`` keeps the
+parts of every generated day together with a fingerprint of the memories they
+were built from (ids and exact content digests, in timestamp order), so a
+diary request regenerates only the days whose memories were added, edited or
+deleted since and assembles the rest from the cache:
+
+    fingerprints = day_fingerprints(conn, "luna", "user_123", SUMMARY_MEMORY_TYPES, salt)
+    cached = load_diary_days(conn, "luna", "user_123")
+    stale = [day for day, key in fingerprints.items() if cached.get(day, {}).get("fingerprint") != key.fingerprint]
+
+Fingerprinting reads ids and ``content_hash`` columns through the pair time
+index; memory content is only loaded for stale days. ``content_hash`` is a
+blake2b digest of the memory's text written with it (the SimHash
+``fingerprint`` survives case, punctuation and many one-word edits, so it
+cannot key a cache). It is unaffected by warm-tier compression; rows without
+one (stored before it existed, or edited by a writer that did not set it) are
+keyed on their stored text until backfill_content_hashes() fills them in.
+
+Each day's hashtags are also indexed in ``diary_hashtags(entry_id, tag)``
+(entry_id is the day), normalized to lowercase without the ``#`` and kept
+current by triggers on diary_days, so the chat path finds past entries on a
+theme with one indexed query that scores the matches in SQL
+(search_diary_hashtags). Settings come from the "diary_cache" section of
+config/memory_config.json.
+"""
+
+import json
+import hashlib
+import sqlite3
+import logging
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+from ..utils.compression import inflate_content
+from ..utils.config import load_memory_config
+from ..utils.fingerprint import content_digest
+
+logger = logging.getLogger(__name__)
+
+DIARY_DAYS_TABLE = "diary_days"
+DIARY_HASHTAGS_TABLE = "diary_hashtags"
+DIARY_HASHTAGS_INDEX = "idx_diary_hashtags_tag"
+
+# Hashtags JSON of a diary_days row, if valid
+_HASHTAG_ARRAY = "CASE WHEN json_valid({row}.hashtags) THEN {row}.hashtags END"
+
+# Normalized hashtags of a trigger row (see normalize_hashtag)
+_ROW_HASHTAGS = f"""
+    SELECT {{row}}.day, lower(trim(value, '#')) FROM json_each({_HASHTAG_ARRAY})
+    WHERE type = 'text' AND trim(value, '#') != ''
+"""
+
+_DIARY_DAYS_DDL = [f"""
+    CREATE TABLE IF NOT EXISTS {DIARY_DAYS_TABLE} (
+        character_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        fingerprint TEXT NOT NULL,
+        memory_count INTEGER NOT NULL DEFAULT 0,
+        entry TEXT NOT NULL,
+        hashtags TEXT NOT NULL DEFAULT '[]',
+        facts TEXT NOT NULL DEFAULT '{{}}',
+        updated_at TEXT,
+        PRIMARY KEY (character_id, user_id, day)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE TABLE IF NOT EXISTS {DIARY_HASHTAGS_TABLE} (
+        entry_id TEXT NOT NULL,
+        tag TEXT NOT NULL,
+        PRIMARY KEY (entry_id, tag)
+    ) WITHOUT ROWID
+    """,
+    # Covers tag (and tag prefix) lookups
+    f"CREATE INDEX IF NOT EXISTS {DIARY_HASHTAGS_INDEX} ON {DIARY_HASHTAGS_TABLE} (tag)",
+    # INSERT OR REPLACE of a cached day removes the old row without firing
+    # delete triggers, so its hashtags are dropped here
+    f"""
+    CREATE TRIGGER IF NOT EXISTS diary_hashtags_bi BEFORE INSERT ON {DIARY_DAYS_TABLE} BEGIN
+        DELETE FROM {DIARY_HASHTAGS_TABLE} WHERE entry_id = new.day;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS diary_hashtags_ai AFTER INSERT ON {DIARY_DAYS_TABLE} BEGIN
+        INSERT OR IGNORE INTO {DIARY_HASHTAGS_TABLE} (entry_id, tag) {_ROW_HASHTAGS.format(row='new')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS diary_hashtags_au AFTER UPDATE OF day, hashtags ON {DIARY_DAYS_TABLE} BEGIN
+        DELETE FROM {DIARY_HASHTAGS_TABLE} WHERE entry_id = old.day;
+        INSERT OR IGNORE INTO {DIARY_HASHTAGS_TABLE} (entry_id, tag) {_ROW_HASHTAGS.format(row='new')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS diary_hashtags_ad AFTER DELETE ON {DIARY_DAYS_TABLE} BEGIN
+        DELETE FROM {DIARY_HASHTAGS_TABLE} WHERE entry_id = old.day;
+    END
+    """,
+]
+
+# Columns added to enhanced_memory
+CONTENT_HASH_COLUMNS = {
+    "content_hash": "TEXT"
+}
+
+# A writer that edits plain text without its digest leaves a stale one behind,
+# so it is cleared (the row is then keyed on its text). Compression (text
+# emptied) and promotion (text restored) do not change the memory.
+_CONTENT_HASH_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS memory_content_hash_au AFTER UPDATE OF content ON enhanced_memory
+    WHEN old.content != '' AND new.content != '' AND new.content IS NOT old.content
+         AND new.content_hash IS old.content_hash BEGIN
+        UPDATE enhanced_memory SET content_hash = NULL WHERE rowid = new.rowid;
+    END
+    """,
+]
+
+# Filled with one placeholder per excluded memory type; parameters: character_id,
+# user_id, excluded types. The stored text stands in for rows without a digest.
+_DAY_KEYS_SQL = """
+    SELECT timestamp, id, COALESCE(
+        content_hash, CASE WHEN compressed_content IS NOT NULL THEN hex(compressed_content) ELSE content END
+    )
+    FROM enhanced_memory INDEXED BY idx_enhanced_memory_pair_time
+    WHERE character_id = ? AND user_id = ? AND memory_type NOT IN ({placeholders})
+    ORDER BY timestamp, rowid
+"""
+
+# Parameters: character_id, user_id
+_LOAD_DIARY_DAYS_SQL = f"""
+    SELECT day, fingerprint, memory_count, entry, hashtags, facts, updated_at
+    FROM {DIARY_DAYS_TABLE} WHERE character_id = ? AND user_id = ?
+"""
+
+# Parameters: character_id, user_id, day, fingerprint, memory_count, entry, hashtags, facts, updated_at
+DIARY_DAY_UPSERT_SQL = f"""
+    INSERT OR REPLACE INTO {DIARY_DAYS_TABLE}
+    (character_id, user_id, day, fingerprint, memory_count, entry, hashtags, facts, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+@dataclass
+class DiaryCacheSettings:
+    """Per-day diary cache parameters."""
+    enabled: bool = True
+
+    @classmethod
+    def from_config(cls) -> "DiaryCacheSettings":
+        """Build settings from the "diary_cache" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("diary_cache").items() if k in known})
+
+
+class DayFingerprint(NamedTuple):
+    """Number of memories of a day and the fingerprint of their ids and contents."""
+    memory_count: int
+    fingerprint: str
+
+
+# Filled with one "(?, ?, ?)" row per searched tag (position, prefix, prefix upper
+# bound; see hashtag_search_params), then character_id, user_id, limit. A tag matches an
+# entry's hashtags equal to it or starting with it (#family: #familydynamics),
+# and entries are scored by how many searched tags they match.
+_HASHTAG_SEARCH_SQL = f"""
+    WITH wanted(position, prefix, upper) AS (VALUES {{rows}})
+    SELECT d.day, d.entry, d.hashtags, d.updated_at,
+           COUNT(DISTINCT wanted.position) AS score, group_concat(DISTINCT wanted.position) AS matched
+    FROM wanted
+    JOIN {DIARY_HASHTAGS_TABLE} AS h INDEXED BY {DIARY_HASHTAGS_INDEX} ON h.tag >= wanted.prefix AND h.tag < wanted.upper
+    JOIN {DIARY_DAYS_TABLE} AS d ON d.character_id = ? AND d.user_id = ? AND d.day = h.entry_id
+    GROUP BY d.day
+    ORDER BY score DESC, d.day DESC
+    LIMIT ?
+"""
+
+
+def ensure_content_hashes(conn: sqlite3.Connection) -> List[str]:
+    """
+    Add the content_hash column and its trigger (needs the tiering columns).
+
+    Returns:
+        Names of the columns added by this call
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(enhanced_memory)")}
+    added = []
+    for column, definition in CONTENT_HASH_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE enhanced_memory ADD COLUMN {column} {definition}")
+            added.append(column)
+    for statement in _CONTENT_HASH_DDL:
+        conn.execute(statement)
+    return added
+
+
+def backfill_content_hashes(conn: sqlite3.Connection, batch_size: int = 1000) -> int:
+    """
+    Digest stored memories that have no content_hash (commits per batch).
+
+    Returns:
+        Number of memories digested
+    """
+    updated = 0
+    while True:
+        rows = conn.execute("""
+            SELECT rowid, content, compressed_content FROM enhanced_memory
+            WHERE content_hash IS NULL LIMIT ?
+        """, (batch_size,)).fetchall()
+        if not rows:
+            return updated
+        conn.executemany(
+            "UPDATE enhanced_memory SET content_hash = ? WHERE rowid = ?",
+            [(content_digest(inflate_content(content, compressed)), rowid) for rowid, content, compressed in rows]
+        )
+        conn.commit()
+        updated += len(rows)
+
+
+def ensure_diary_schema(conn: sqlite3.Connection):
+    """Create the diary day and hashtag tables and triggers, indexing cached days on first use (caller commits)."""
+    ensure_content_hashes(conn)
+    indexed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (DIARY_HASHTAGS_TABLE,)
+    ).fetchone() is not None
+    for statement in _DIARY_DAYS_DDL:
+        conn.execute(statement)
+    if not indexed:
+        conn.execute(f"""
+            INSERT OR IGNORE INTO {DIARY_HASHTAGS_TABLE} (entry_id, tag)
+            SELECT d.day, lower(trim(j.value, '#')) FROM {DIARY_DAYS_TABLE} AS d,
+                   json_each({_HASHTAG_ARRAY.format(row='d')}) AS j
+            WHERE j.type = 'text' AND trim(j.value, '#') != ''
+        """)
+
+
+def hashtag_search_sql(tag_count: int) -> str:
+    """SQL of a search for ``tag_count`` hashtags (parameters: see hashtag_search_params)."""
+    return _HASHTAG_SEARCH_SQL.format(rows=", ".join("(?, ?, ?)" for _ in range(tag_count)))
+
+
+def hashtag_search_params(hashtags: Sequence[str], character_id: str, user_id: str, limit: int) -> List[Any]:
+    """Parameters of hashtag_search_sql(len(hashtags)) (hashtags given normalizable and distinct)."""
+    params: List[Any] = []
+    for position, tag in enumerate(hashtags):
+        prefix = normalize_hashtag(tag)
+        params.extend((position, prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)))
+    return [*params, character_id, user_id, limit]
+
+
+def normalize_hashtag(tag: str) -> str:
+    """Indexed form of a hashtag: lowercase, without the leading/trailing ``#``."""
+    return (tag or "").strip().strip("#").lower()
+
+
+def day_bounds(day: str) -> Tuple[str, str]:
+    """(start, end) timestamps of a YYYY-MM-DD day, for ``timestamp >= ? AND timestamp < ?``."""
+    return day, (datetime.strptime(day, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _valid_day(day: str) -> bool:
+    try:
+        datetime.strptime(day, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+def day_fingerprints(conn: sqlite3.Connection, character_id: str, user_id: str,
+                     exclude_types: Sequence[str], salt: str = "") -> Dict[str, DayFingerprint]:
+    """
+    Fingerprint of each day's memories (one pass over ids and content digests).
+
+    Args:
+        conn: Pair database connection
+        character_id: Character of the pair
+        user_id: User of the pair
+        exclude_types: Memory types the diary does not cover
+        salt: Mixed into every fingerprint (generator version, names the entries mention)
+
+    Returns:
+        {day: DayFingerprint} for every day with memories (days of
+        unparseable timestamps are skipped, as the diary skips them)
+    """
+    hashers: Dict[str, Any] = {}
+    counts: Dict[str, int] = {}
+    sql = _DAY_KEYS_SQL.format(placeholders=", ".join("?" for _ in exclude_types) or "NULL")
+    for timestamp, memory_id, key in conn.execute(sql, (character_id, user_id, *exclude_types)):
+        day = str(timestamp or "")[:10]
+        hasher = hashers.get(day)
+        if hasher is None:
+            if not _valid_day(day):
+                continue
+            hasher = hashers[day] = hashlib.blake2b(salt.encode("utf-8"), digest_size=16)
+            counts[day] = 0
+        hasher.update(f"{memory_id}\x1f{key}\x1e".encode("utf-8"))
+        counts[day] += 1
+    return {day: DayFingerprint(counts[day], hasher.hexdigest()) for day, hasher in hashers.items()}
+
+
+def load_diary_days(conn: sqlite3.Connection, character_id: str, user_id: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Cached diary days of a pair.
+
+    Returns:
+        {day: {"fingerprint", "memory_count", "entry", "hashtags", "facts", "updated_at"}}
+    """
+    days = {}
+    for day, fingerprint, memory_count, entry, hashtags, facts, updated_at in conn.execute(
+        _LOAD_DIARY_DAYS_SQL, (character_id, user_id)
+    ):
+        days[day] = {
+            "fingerprint": fingerprint,
+            "memory_count": memory_count,
+            "entry": entry,
+            "hashtags": json.loads(hashtags) if hashtags else [],
+            "facts": json.loads(facts) if facts else {},
+            "updated_at": updated_at
+        }
+    return days
+
+
+def store_diary_days(conn: sqlite3.Connection, character_id: str, user_id: str,
+                     days: Iterable[Dict[str, Any]], keep_days: Iterable[str]) -> int:
+    """
+    Save generated days and drop cached days that no longer have memories.
+
+    Args:
+        conn: Pair database connection (caller commits)
+        character_id: Character of the pair
+        user_id: User of the pair
+        days: {"day", "fingerprint", "memory_count", "entry", "hashtags", "facts"} per generated day
+        keep_days: Every day that still has memories
+
+    Returns:
+        Number of days saved
+    """
+    now = datetime.now().isoformat()
+    rows = [
+        (character_id, user_id, day["day"], day["fingerprint"], day["memory_count"], day["entry"],
+         json.dumps(list(day["hashtags"])), json.dumps(day["facts"]), now)
+        for day in days
+    ]
+    if rows:
+        conn.executemany(DIARY_DAY_UPSERT_SQL, rows)
+    keep = set(keep_days)
+    vanished = [
+        (character_id, user_id, day) for (day,) in conn.execute(
+            f"SELECT day FROM {DIARY_DAYS_TABLE} WHERE character_id = ? AND user_id = ?", (character_id, user_id)
+        ) if day not in keep
+    ]
+    if vanished:
+        conn.executemany(
+            f"DELETE FROM {DIARY_DAYS_TABLE} WHERE character_id = ? AND user_id = ? AND day = ?", vanished
+        )
+    return len(rows)
+
+
+def search_diary_hashtags(conn: sqlite3.Connection, character_id: str, user_id: str,
+                          hashtags: Sequence[str], limit: int = 3) -> List[Dict[str, Any]]:
+    """
+    Cached diary days matching the most hashtags (one indexed query).
+
+    Args:
+        conn: Pair database connection
+        character_id: Character of the pair
+        user_id: User of the pair
+        hashtags: Hashtags to look for (with or without ``#``)
+        limit: Maximum number of days
+
+    Returns:
+        Best first: {"day", "entry", "hashtags", "updated_at", "match_score",
+        "matched_hashtags"} (the searched hashtags, as given, that matched)
+    """
+    searched = list(dict.fromkeys(tag for tag in hashtags if normalize_hashtag(tag)))
+    if not searched:
+        return []
+    results = []
+    for day, entry, entry_hashtags, updated_at, score, matched in conn.execute(
+        hashtag_search_sql(len(searched)), hashtag_search_params(searched, character_id, user_id, limit)
+    ):
+        results.append({
+            "day": day,
+            "entry": entry,
+            "hashtags": json.loads(entry_hashtags) if entry_hashtags else [],
+            "updated_at": updated_at,
+            "match_score": score,
+            "matched_hashtags": [searched[int(position)] for position in str(matched).split(",")]
+        })
+    return results
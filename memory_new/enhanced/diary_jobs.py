@@ -0,0 +1,296 @@
+"""
+Background diary generation jobs.
+
+Building a pair's diary summary takes seconds for a long relationship, and
+the summary and download routes used to do it inside the request. A diary
+job runs the build on a small worker pool instead; the route returns a job id
+right away, and the client polls the job or streams its text as sections
+complete:
+
+    job, created = get_diary_job_manager().submit(("luna", "user_123"), version, build)
+    job.status()                        # state, sections ready, progress
+    async for section in job.stream():  # sections as they complete
+        ...
+
+``build(job)`` adds sections with job.add_section() and may report progress
+with job.set_progress(). Jobs are keyed by what they build (e.g. the pair)
+and a version of their inputs (e.g. memory_version of the pair): submitting
+a key whose latest job has the same version returns that job, whether it is
+still running (concurrent requests share one build) or done (its text is the
+cached result until new memories change the version). A build that writes
+inputs itself (the diary is stored as a memory) returns their version
+afterwards, and the finished job is matched against that. Finished jobs are
+kept for ``job_ttl_seconds``, at most ``max_jobs`` of them. Settings come from
+the "diary_jobs" section of config/memory_config.json.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+from ..utils.config import load_memory_config
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class DiaryJobSettings:
+    """Diary job pool and retention parameters."""
+    max_workers: int = 2
+    max_jobs: int = 256
+    job_ttl_seconds: int = 3600
+
+    @classmethod
+    def from_config(cls) -> "DiaryJobSettings":
+        """Build settings from the "diary_jobs" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("diary_jobs").items() if k in known})
+
+
+def _wake(waiter: "asyncio.Future"):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class DiaryJob:
+    """
+    One diary build: its state, the sections completed so far and its progress.
+
+    Sections are added from the worker thread; stream() and wait() are
+    awaited on an event loop and woken as sections arrive.
+    """
+
+    def __init__(self, key: Hashable, version: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.version = version
+        self.state = QUEUED
+        self.error: Optional[str] = None
+        self.progress: Dict[str, Any] = {}
+        self.created_at = datetime.now().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.finished_monotonic: Optional[float] = None
+        self._sections: List[str] = []
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future"]] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+    @property
+    def text(self) -> str:
+        """Sections completed so far, joined by newlines (the whole diary once done)."""
+        with self._lock:
+            return "\n".join(self._sections)
+
+    def add_section(self, section: str):
+        """Append a completed section (worker thread)."""
+        with self._lock:
+            self._sections.append(section)
+            self._notify()
+
+    def set_progress(self, **progress):
+        """Record build progress, e.g. days_done / days_total (worker thread)."""
+        with self._lock:
+            self.progress.update(progress)
+
+    def _start(self):
+        with self._lock:
+            self.state = RUNNING
+            self.started_at = datetime.now().isoformat()
+
+    def _finish(self, error: Optional[str] = None):
+        with self._lock:
+            self.state = FAILED if error else DONE
+            self.error = error
+            self.finished_at = datetime.now().isoformat()
+            self.finished_monotonic = time.monotonic()
+            self._notify()
+
+    def _notify(self):
+        """Wake every awaiting reader (caller holds the lock)."""
+        waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass  # The reader's loop is closed
+
+    async def stream(self, start: int = 0) -> AsyncIterator[str]:
+        """
+        Yield the job's sections from index ``start``, waiting for new ones until it finishes.
+
+        A failed job ends the stream after the sections it completed.
+        """
+        position = start
+        while True:
+            waiter = None
+            with self._lock:
+                ready = self._sections[position:]
+                if not ready and not self.finished:
+                    loop = asyncio.get_running_loop()
+                    waiter = loop.create_future()
+                    self._waiters.append((loop, waiter))
+            if waiter is not None:
+                await waiter
+                continue
+            if not ready:
+                return
+            for section in ready:
+                yield section
+            position += len(ready)
+
+    async def wait(self) -> "DiaryJob":
+        """Wait until the job is done or failed."""
+        async for _ in self.stream(len(self._sections)):
+            pass
+        return self
+
+    def status(self, include_text: bool = False) -> Dict[str, Any]:
+        """
+        JSON-ready state of the job.
+
+        Args:
+            include_text: Add the text of the completed sections
+        """
+        with self._lock:
+            status = {
+                "job_id": self.id,
+                "state": self.state,
+                "sections": len(self._sections),
+                "progress": dict(self.progress),
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at
+            }
+            if include_text:
+                status["text"] = "\n".join(self._sections)
+        return status
+
+
+class DiaryJobManager:
+    """Runs diary jobs on a worker pool, sharing jobs with the same key and version."""
+
+    def __init__(self, settings: Optional[DiaryJobSettings] = None, executor: Optional[ThreadPoolExecutor] = None):
+        self.settings = settings or DiaryJobSettings.from_config()
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max(self.settings.max_workers, 1), thread_name_prefix="diary-job"
+        )
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, DiaryJob] = {}
+        self._latest: Dict[Hashable, DiaryJob] = {}
+        self.submitted = 0
+        self.reused = 0
+
+    def submit(self, key: Hashable, version: str,
+               build: Callable[[DiaryJob], Optional[str]]) -> Tuple[DiaryJob, bool]:
+        """
+        Start a job building ``key`` at ``version``, unless one exists.
+
+        Args:
+            key: What the job builds (e.g. (character_id, user_id))
+            version: Version of its inputs; a finished job of an older version is not reused
+            build: Called with the job on a worker thread; adds its sections and
+                returns the version of the inputs after it ran if it changed them
+
+        Returns:
+            (job, True if this call started it); a failed job is retried, not reused
+        """
+        with self._lock:
+            self._prune()
+            latest = self._latest.get(key)
+            if latest is not None and latest.version == version and latest.state != FAILED:
+                self.reused += 1
+                return latest, False
+            job = DiaryJob(key, version)
+            self._jobs[job.id] = job
+            self._latest[key] = job
+            self.submitted += 1
+        self.executor.submit(self._run, job, build)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[DiaryJob]:
+        """Job by id, or None if unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: DiaryJob, build: Callable[[DiaryJob], Optional[str]]):
+        job._start()
+        started = time.perf_counter()
+        try:
+            version = build(job)
+        except Exception as e:
+            logger.error(f"❌ Diary job {job.id} failed: {e}")
+            job._finish(str(e))
+            return
+        if version:
+            with self._lock:
+                job.version = version
+        job._finish()
+        logger.info(f"✅ Diary job {job.id} done in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+    def _prune(self):
+        """Drop finished jobs past their TTL, then the oldest finished ones over max_jobs (caller holds the lock)."""
+        now = time.monotonic()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_monotonic is not None),
+            key=lambda job: job.finished_monotonic
+        )
+        excess = len(self._jobs) - max(self.settings.max_jobs, 1)
+        for job in finished:
+            if excess <= 0 and now - job.finished_monotonic < self.settings.job_ttl_seconds:
+                break
+            del self._jobs[job.id]
+            if self._latest.get(job.key) is job:
+                del self._latest[job.key]
+            excess -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Jobs kept, by state, and how many submissions were served by an existing job."""
+        with self._lock:
+            states: Dict[str, int] = {}
+            for job in self._jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {"jobs": len(self._jobs), "states": states, "submitted": self.submitted, "reused": self.reused}
+
+    def shutdown(self):
+        """Let running jobs finish, drop queued ones, and stop the workers."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+_manager: Optional[DiaryJobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_diary_job_manager() -> DiaryJobManager:
+    """Process-wide diary job manager (started on first use)."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DiaryJobManager()
+            logger.info(f"✅ Diary job workers started ({_manager.settings.max_workers} workers)")
+        return _manager
+
+
+def shutdown_diary_jobs():
+    """Stop the diary job workers (server shutdown)."""
+    global _manager
+    with _manager_lock:
+        manager, _manager = _manager, None
+    if manager is not None:
+        manager.shutdown()
+        logger.info("✅ Diary job workers stopped")
@@ -12,18 +12,267 @@ This module provides advanced memory management capabilities including:
 import sqlite3
 import json
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterator, Set, Callable
 import hashlib
-import re
 from dataclasses import dataclass, asdict
 import os
-import openai
+
+from ..search import ensure_fts_index, build_match_expression, search_fts
+from ..retrieval import (
+    RankingWeights, MemoryRanker, MemoryQueryPlanner, MemoryRecord, cursor_layout, get_memory_ranker
+)
+from ..retrieval.pagination import MAX_PAGE_SIZE, encode_cursor, is_conversation_content
+from ..db.schema import migrate_live_schema
+from ..db.write_buffer import get_write_buffer, flush_write_buffer, overlay_pending
+from ..utils.matcher import KeywordMatcher, PatternMatcher
+from .enrichment import (
+    ENRICHMENT_COLUMNS, enrich_memory,
+    ensure_enrichment_columns, backfill_enrichment
+)
+from .registry import MemorySystemRegistry, deep_sizeof
+from .provisioning import provision_pair_database
+from .recent import RecentTurnBuffer, RecentTurnSettings
+from .counters import COUNTERS_SQL, COUNTERS_TABLE, ensure_memory_counters, load_memory_counters, memory_version
+from .tags import ensure_memory_tags, tagged_memories_sql, unique_tags
+from .diary import (
+    DiaryCacheSettings, DayFingerprint, backfill_content_hashes, day_bounds, day_fingerprints, ensure_diary_schema,
+    hashtag_search_params, hashtag_search_sql, load_diary_days, search_diary_hashtags, store_diary_days
+)
+from .tiering import (
+    RECORD_ACCESS_SQL, archive_path, ensure_tiering_columns, record_access, run_tiering,
+    search_archive, delete_archived_memory, tier_stats
+)
+from .summarization import (
+    AISummarizer, SUMMARY_MEMORY_TYPES, ensure_summary_columns, retrieval_filter
+)
+from .dedup import (
+    DedupSettings, MERGE_DUPLICATE_SQL, backfill_fingerprints, ensure_dedup_columns,
+    find_near_duplicate, merge_params
+)
+from .facts import diary_facts
+from .profile import (
+    PROFILE_UPSERT_SQL, ensure_profile_schema, ensure_profile_table, extract_profile_facts,
+    load_profile, merge_facts, rebuild_profile
+)
+from ..utils.compression import inflate_content
+from ..utils.fingerprint import content_digest, content_fingerprint, hamming_distance
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_INSERT_MEMORY_SQL = f"""
+    INSERT OR REPLACE INTO enhanced_memory 
+    (id, character_id, user_id, content, memory_type, importance, 
+     timestamp, context, tags, emotional_valence, relationship_impact,
+     {', '.join(ENRICHMENT_COLUMNS)}, fingerprint, content_hash)
+    VALUES ({', '.join('?' for _ in range(13 + len(ENRICHMENT_COLUMNS)))})
+"""
+
+_INSERT_PERSONAL_DETAIL_SQL = """
+    INSERT OR REPLACE INTO personal_details 
+    (id, character_id, user_id, detail_type, content, confidence, timestamp, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Read paths, each served by a pair-scoped index (db.schema.LIVE_INDEXES);
+# hot_statements() lists them for the query-plan audit
+_MEMORIES_BY_TYPE_SQL = """
+    SELECT id, content, memory_type, importance, timestamp, 
+           emotional_valence, relationship_impact, tags, context,
+           compressed_content
+    FROM enhanced_memory 
+    WHERE character_id = ? AND user_id = ? AND memory_type = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+"""
+
+# Filled with tagged_memories_sql() and an optional memory type clause; parameters:
+# tags, character_id, user_id, memory types, limit (driven by the tag index)
+_MEMORIES_BY_TAGS_SQL = """
+    SELECT m.id, m.content, m.memory_type, m.importance, m.timestamp, 
+           m.emotional_valence, m.relationship_impact, m.tags, m.context,
+           m.compressed_content
+    FROM {tagged_memories}
+    WHERE m.character_id = ? AND m.user_id = ?{type_clause}
+    ORDER BY m.timestamp DESC
+    LIMIT ?
+"""
+
+# Tags marking identity memories (see enrichment.classify_identity)
+_IDENTITY_TAGS = ("identity", "name")
+
+# Parameters: identity tags, character_id, user_id, limit (records for identity priority)
+_IDENTITY_RECORDS_SQL = f"""
+    SELECT m.rowid AS _rowid, m.* FROM {tagged_memories_sql(len(_IDENTITY_TAGS))}
+    WHERE m.character_id = ? AND m.user_id = ?
+    ORDER BY m.importance DESC, m.timestamp DESC
+    LIMIT ?
+"""
+
+_HISTORY_PLANNER = MemoryQueryPlanner()
+
+# Columns of the history pages (get_memories_page), after the rowid
+_HISTORY_COLUMNS = """
+    m.id, m.content, m.memory_type, m.importance, m.timestamp,
+    m.emotional_valence, m.relationship_impact, m.tags, m.compressed_content
+"""
+
+
+def _listed_memory(row: tuple) -> Dict[str, Any]:
+    """Memory dict of a _MEMORIES_BY_TYPE_SQL / _MEMORIES_BY_TAGS_SQL row"""
+    return {
+        "id": row[0],
+        "content": inflate_content(row[1], row[9]),
+        "type": row[2],
+        "importance": row[3],
+        "timestamp": row[4],
+        "emotional_valence": row[5],
+        "relationship_impact": row[6],
+        "tags": json.loads(row[7]) if row[7] else [],
+        "context": json.loads(row[8]) if row[8] else {},
+    }
+
+
+def _history_memory(row: tuple) -> Tuple[int, Dict[str, Any]]:
+    """(rowid, memory dict) of a history row (rowid followed by _HISTORY_COLUMNS)"""
+    return row[0], {
+        "id": row[1],
+        "content": inflate_content(row[2], row[9]),
+        "type": row[3],
+        "importance": row[4],
+        "timestamp": row[5],
+        "emotional_valence": row[6],
+        "relationship_impact": row[7],
+        "tags": json.loads(row[8]) if row[8] else []
+    }
+
+# Filled with one placeholder per excluded type; parameters: character_id, user_id,
+# day start, day end, excluded types (one day of history, oldest first)
+_DAY_MEMORIES_SQL = f"""
+    SELECT m.rowid, {_HISTORY_COLUMNS} FROM enhanced_memory AS m INDEXED BY idx_enhanced_memory_pair_time
+    WHERE m.character_id = ? AND m.user_id = ? AND m.timestamp >= ? AND m.timestamp < ?
+      AND m.memory_type NOT IN ({{placeholders}})
+    ORDER BY m.timestamp, m.rowid
+"""
+
+# Parameters: memory id (rowid of a row written through the group-commit buffer)
+_MEMORY_ROWID_SQL = "SELECT rowid FROM enhanced_memory WHERE id = ?"
+
+# Filled with "IN" or "NOT IN" and one placeholder per type (reads the maintained counters)
+_TYPED_MEMORY_COUNT_SQL = f"""
+    SELECT COALESCE(SUM(memory_count), 0) FROM {COUNTERS_TABLE}
+    WHERE character_id = ? AND user_id = ? AND memory_type {{operator}} ({{placeholders}})
+"""
+
+_PERSONAL_DETAILS_SQL = """
+    SELECT detail_type, content, confidence, timestamp
+    FROM personal_details 
+    WHERE character_id = ? AND user_id = ?
+    ORDER BY confidence DESC, timestamp DESC
+"""
+
+_RELATIONSHIP_STAGE_SQL = """
+    SELECT stage, trust_level, familiarity, interaction_count,
+           positive_interactions, negative_interactions, last_interaction
+    FROM relationship_stages 
+    WHERE character_id = ? AND user_id = ?
+"""
+
+# Stage of a pair that has not interacted yet
+_INITIAL_RELATIONSHIP_STAGE = {
+    "stage": "stranger",
+    "trust_level": 0.0,
+    "familiarity": 0.0,
+    "interaction_count": 0,
+    "positive_interactions": 0,
+    "negative_interactions": 0,
+    "last_interaction": None
+}
+
+# Emotional keywords with valence scores
+_EMOTIONAL_VALENCE = {
+    # Positive emotions
+    "happy": 0.8, "excited": 0.9, "thrilled": 0.9, "delighted": 0.8,
+    "joy": 0.8, "pleased": 0.7, "wonderful": 0.8, "amazing": 0.8,
+    "fantastic": 0.8, "great": 0.6, "good": 0.5, "nice": 0.5,
+    "love": 0.9, "adore": 0.9, "cherish": 0.8, "care": 0.6,
+    "thankful": 0.7, "grateful": 0.7, "appreciate": 0.6,
+    "hope": 0.6, "wish": 0.4, "dream": 0.5, "aspire": 0.6,
+    
+    # Negative emotions
+    "sad": -0.7, "depressed": -0.8, "melancholy": -0.6, "down": -0.5,
+    "blue": -0.5, "unhappy": -0.6, "disappointed": -0.6, "heartbroken": -0.9,
+    "lonely": -0.7, "angry": -0.8, "mad": -0.7, "furious": -0.9,
+    "irritated": -0.6, "annoyed": -0.5, "frustrated": -0.6, "rage": -0.9,
+    "hate": -0.9, "disgusted": -0.8, "afraid": -0.7, "scared": -0.7,
+    "terrified": -0.9, "anxious": -0.6, "worried": -0.5, "nervous": -0.5,
+    "fearful": -0.7, "panicked": -0.8, "stressed": -0.6,
+    
+    # Neutral/contextual emotions
+    "surprised": 0.2, "shocked": 0.1, "amazed": 0.6, "astonished": 0.5,
+    "stunned": 0.0, "bewildered": -0.2, "confused": -0.3,
+    "understand": 0.3, "feel": 0.2, "relate": 0.4, "sympathize": 0.5,
+    "compassion": 0.6, "care about": 0.5
+}
+
+# Relationship-relevant keywords with impact scores
+_RELATIONSHIP_IMPACT = {
+    # High impact
+    "family": 0.8, "parents": 0.8, "sister": 0.7, "brother": 0.7,
+    "daughter": 0.8, "son": 0.8, "wife": 0.9, "husband": 0.9,
+    "partner": 0.8, "friend": 0.6, "best friend": 0.8,
+    "love": 0.9, "care": 0.7, "trust": 0.8, "believe": 0.6,
+    "miss": 0.6, "remember": 0.5, "think about": 0.5,
+    
+    # Medium impact
+    "work": 0.4, "job": 0.4, "career": 0.5, "profession": 0.4,
+    "hobby": 0.3, "interest": 0.3, "passion": 0.6, "dream": 0.5,
+    "goal": 0.4, "achievement": 0.5, "success": 0.5,
+    
+    # Low impact
+    "weather": 0.1, "food": 0.2, "movie": 0.2, "music": 0.3,
+    "book": 0.2, "game": 0.2, "sport": 0.3
+}
+
+# All keyword lexicons used when storing a memory, matched in one pass
+_MEMORY_KEYWORDS = KeywordMatcher({
+    "emotion": _EMOTIONAL_VALENCE,
+    "relationship": _RELATIONSHIP_IMPACT,
+    # Personal detail priority for importance
+    "personal_critical": ["my name", "i am", "i'm", "call me", "you can call me", "ed", "edward", "edwin", "eddie"],
+    "personal_high": ["i live", "i work", "my family", "my parents", "my sister", "my brother", "my job"],
+    "personal_medium": ["i like", "i love", "i hate", "my favorite", "my hobby", "my interest"],
+    # Content-based tags
+    "tag_family": ["family", "parents", "sister", "brother"],
+    "tag_work": ["work", "job", "career", "profession"],
+    "tag_relationship": ["love", "care", "trust", "relationship"],
+    "tag_personal_interest": ["hobby", "interest", "passion", "dream"],
+    "tag_personal_info": ["i am", "i'm", "my name", "i live"]
+})
+
+# Personal detail patterns that boost importance and memory type
+_PERSONAL_PATTERNS = PatternMatcher({
+    # Name-related patterns (highest priority)
+    "identity": [
+        r"(ed|edward|edwin|eddie)",
+        r"my name is",
+        r"i am \w+",
+        r"i'm \w+",
+        r"call me",
+        r"you can call me",
+        r"my name's"
+    ],
+    # Other personal detail patterns
+    "detail": [
+        r"i live in", r"i work", r"my family", r"my parents", 
+        r"my sister", r"my brother", r"my job", r"i'm from"
+    ]
+})
+
 @dataclass
 class MemoryEntry:
     """Represents a single memory entry"""
@@ -64,6 +313,111 @@ class RelationshipStage:
     positive_interactions: int
     negative_interactions: int
 
+
+def create_pair_schema(conn: sqlite3.Connection):
+    """
+    Create or upgrade every table, column, trigger and index of a pair database
+    
+    Idempotent; existing files are migrated in place. New pairs get a copy of a
+    template built by this function (see provisioning.provision_pair_database).
+    
+    Args:
+        conn: Pair database connection (caller commits)
+    """
+    cursor = conn.cursor()
+    
+    # Create enhanced_memory table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS enhanced_memory (
+            id TEXT PRIMARY KEY,
+            character_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            content TEXT NOT NULL,
+            memory_type TEXT NOT NULL,
+            importance REAL DEFAULT 0.5,
+            timestamp TEXT NOT NULL,
+            context TEXT,
+            tags TEXT,
+            emotional_valence REAL DEFAULT 0.0,
+            relationship_impact REAL DEFAULT 0.0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create personal_details table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS personal_details (
+            id TEXT PRIMARY KEY,
+            character_id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            detail_type TEXT NOT NULL,
+            content TEXT NOT NULL,
+            confidence REAL DEFAULT 0.5,
+            timestamp TEXT NOT NULL,
+            source TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Create relationship_stages table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS relationship_stages (
+            character_id TEXT,
+            user_id TEXT,
+            stage TEXT DEFAULT 'stranger',
+            trust_level REAL DEFAULT 0.0,
+            familiarity REAL DEFAULT 0.0,
+            last_interaction TEXT,
+            interaction_count INTEGER DEFAULT 0,
+            positive_interactions INTEGER DEFAULT 0,
+            negative_interactions INTEGER DEFAULT 0,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (character_id, user_id)
+        )
+    """)
+    
+    # Create memory_metadata table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS memory_metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Write-time enrichment columns (topic, identity flags, emotion summary)
+    ensure_enrichment_columns(conn)
+    backfill_enrichment(conn)
+    
+    # Hot/warm/cold tiering columns (compressed content, access tracking)
+    ensure_tiering_columns(conn)
+    
+    # Per-type/tier counts and sums maintained by triggers (O(1) statistics)
+    ensure_memory_counters(conn)
+    
+    # One row per (memory, tag) maintained by triggers (indexed tag lookups)
+    ensure_memory_tags(conn)
+    
+    # Roll-up flag maintained by the background summarization pipeline
+    ensure_summary_columns(conn)
+    
+    # SimHash fingerprints and their band index (near-duplicate merging)
+    ensure_dedup_columns(conn)
+    
+    # Full-text index kept in sync with enhanced_memory by triggers
+    ensure_fts_index(conn)
+    
+    # Versioned pair-scoped indexes (existing files are migrated in place)
+    migrate_live_schema(conn)
+    
+    # Materialized user profile table (the pair's row is added by the caller)
+    ensure_profile_schema(conn)
+    
+    # Generated diary days, keyed by the content digests of each day's memories
+    ensure_diary_schema(conn)
+
+
 class EnhancedMemorySystem:
     """
     Advanced memory system for character interactions
@@ -75,85 +429,46 @@ class EnhancedMemorySystem:
         self.memory_key = f"{character_id}_{user_id}"
         self.db_path = f"memory_databases/enhanced_{self.memory_key}.db"
         
+        # One connection per instance, opened on first use and closed on eviction
+        self._connection: Optional[sqlite3.Connection] = None
+        self._connection_lock = threading.RLock()
+        
+        # Materialized user profile, loaded on first write (guarded by the connection lock)
+        self._profile: Optional[Dict[str, List[Dict[str, Any]]]] = None
+        
+        # Set when this instance created the pair's database (nothing stored yet)
+        self._provisioned = False
+        
         # Ensure directory exists
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
         # Initialize database
         self._init_database()
         
+        # Demote old, rarely used memories (at most once per configured interval)
+        # and fingerprint memories stored before deduplication, off the request path
+        # (a just-provisioned pair has neither)
+        if not self._provisioned:
+            threading.Thread(target=self._run_maintenance, name=f"memory-maintenance-{self.memory_key}", daemon=True).start()
+        
         # Initialize subsystems
         self._init_subsystems()
         
-        self.relationship_context_assembler = RelationshipContextAssembler()
-        self.emotional_intelligence = EmotionalIntelligence()
-        
         logger.info(f"✅ Enhanced memory system initialized for {self.memory_key}")
     
     def _init_database(self):
-        """Initialize the enhanced memory database"""
+        """Initialize the enhanced memory database (new pairs are cloned from the schema template)"""
         try:
+            if provision_pair_database(self.db_path, self.character_id, self.user_id):
+                self._provisioned = True
+                logger.info(f"✅ Enhanced memory database provisioned: {self.db_path}")
+                return
+            
             with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+                create_pair_schema(conn)
                 
-                # Create enhanced_memory table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS enhanced_memory (
-                        id TEXT PRIMARY KEY,
-                        character_id TEXT NOT NULL,
-                        user_id TEXT NOT NULL,
-                        content TEXT NOT NULL,
-                        memory_type TEXT NOT NULL,
-                        importance REAL DEFAULT 0.5,
-                        timestamp TEXT NOT NULL,
-                        context TEXT,
-                        tags TEXT,
-                        emotional_valence REAL DEFAULT 0.0,
-                        relationship_impact REAL DEFAULT 0.0,
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                # Create personal_details table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS personal_details (
-                        id TEXT PRIMARY KEY,
-                        character_id TEXT NOT NULL,
-                        user_id TEXT NOT NULL,
-                        detail_type TEXT NOT NULL,
-                        content TEXT NOT NULL,
-                        confidence REAL DEFAULT 0.5,
-                        timestamp TEXT NOT NULL,
-                        source TEXT,
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                # Create relationship_stages table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS relationship_stages (
-                        character_id TEXT,
-                        user_id TEXT,
-                        stage TEXT DEFAULT 'stranger',
-                        trust_level REAL DEFAULT 0.0,
-                        familiarity REAL DEFAULT 0.0,
-                        last_interaction TEXT,
-                        interaction_count INTEGER DEFAULT 0,
-                        positive_interactions INTEGER DEFAULT 0,
-                        negative_interactions INTEGER DEFAULT 0,
-                        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                        PRIMARY KEY (character_id, user_id)
-                    )
-                """)
-                
-                # Create memory_metadata table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS memory_metadata (
-                        key TEXT PRIMARY KEY,
-                        value TEXT,
-                        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
+                # Materialized user profile (built from existing memories on first open)
+                ensure_profile_table(conn, self.character_id, self.user_id, archive_path(self.db_path))
                 
                 conn.commit()
                 logger.info(f"✅ Enhanced memory database initialized: {self.db_path}")
@@ -162,16 +477,118 @@ class EnhancedMemorySystem:
             logger.error(f"❌ Failed to initialize enhanced memory database: {e}")
             raise
     
+    def _run_maintenance(self):
+        """Run a tiering pass if the last one is older than the configured interval, then backfill fingerprints and content digests"""
+        try:
+            if run_tiering(self.db_path).get("archived"):
+                # Archived rows leave the history pages the recent buffer mirrors
+                self.invalidate_recent_turns()
+        except Exception as e:
+            logger.warning(f"⚠️ Memory tiering pass failed for {self.memory_key}: {e}")
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                count = backfill_fingerprints(conn)
+                digested = backfill_content_hashes(conn)
+            if count:
+                logger.info(f"✅ Fingerprinted {count} existing memories for {self.memory_key}")
+            if digested:
+                logger.info(f"✅ Digested {digested} memories for the diary cache of {self.memory_key}")
+        except Exception as e:
+            logger.warning(f"⚠️ Memory fingerprint backfill failed for {self.memory_key}: {e}")
+    
     def _init_subsystems(self):
-        """Initialize memory subsystems"""
-        self.personal_details_extractor = PersonalDetailsExtractor()
-        self.relationship_tracker = RelationshipTracker(self.character_id, self.user_id)
-        self.memory_optimizer = MemoryOptimizer()
-        self.context_generator = ContextGenerator()
-        self.summarizer = AISummarizer()
+        """Initialize memory subsystems (stateless helpers are shared by every pair)"""
+        self.personal_details_extractor = _shared_subsystem(PersonalDetailsExtractor)
+        self.relationship_tracker = RelationshipTracker(
+            self.character_id, self.user_id, new_pair=self._provisioned
+        )
+        self.memory_ranker = get_memory_ranker()
+        self.dedup_settings = DedupSettings.from_config()
+        recent_settings = RecentTurnSettings.from_config()
+        self.recent_turns = RecentTurnBuffer(recent_settings.size) if recent_settings.enabled else None
+        if self.recent_turns is not None and self._provisioned:
+            # Nothing stored yet: the empty buffer is the whole history
+            self.recent_turns.load([])
+        self.memory_optimizer = _shared_subsystem(MemoryOptimizer)
+        self.context_generator = _shared_subsystem(ContextGenerator)
+        self.summarizer = _shared_subsystem(AISummarizer)
+        self.relationship_context_assembler = _shared_subsystem(RelationshipContextAssembler)
+        self.emotional_intelligence = _shared_subsystem(EmotionalIntelligence)
         
         logger.info(f"✅ Enhanced memory subsystems initialized for {self.memory_key}")
     
+    @contextmanager
+    def _connect(self, flush: bool = True) -> Iterator[sqlite3.Connection]:
+        """
+        Use this pair's connection to write, after committing any buffered writes
+        
+        The connection is reused across calls and serialized by a per-instance
+        lock; the block runs as one transaction (commit on success, rollback on error).
+        Reads use _read() instead, which does not commit the buffer.
+        
+        Args:
+            flush: Commit buffered writes first (write-path lookups of committed
+                rows skip it so they do not defeat group commit)
+        """
+        if flush:
+            flush_write_buffer(self.db_path)
+        with self._connection_lock:
+            if self._connection is None:
+                self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+            with self._connection as conn:
+                yield conn
+    
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """
+        Use this pair's connection to read, seeing buffered writes (read-your-writes)
+        
+        Buffered writes are applied in a savepoint that is rolled back after
+        the block, so reads never force a group commit; the block must not write.
+        A write that cannot be applied raises here, as its flush would.
+        """
+        with self._connect(flush=False) as conn:
+            with overlay_pending(conn, self.db_path):
+                yield conn
+    
+    def _record_access(self, memory_ids: List[str]):
+        """Bump access statistics of returned memories (through the write buffer when enabled)"""
+        if not memory_ids:
+            return
+        write_buffer = get_write_buffer(self.db_path)
+        if write_buffer is not None:
+            now = datetime.now().isoformat()
+            write_buffer.add(RECORD_ACCESS_SQL, [(now, memory_id) for memory_id in memory_ids])
+            return
+        with self._connect(flush=False) as conn:
+            record_access(conn, memory_ids)
+    
+    def close(self):
+        """Close this pair's database connection (reopened on next use)"""
+        with self._connection_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+    
+    def footprint(self, exclude_ids: Optional[Set[int]] = None) -> Dict[str, Any]:
+        """
+        Approximate memory held by this instance
+        
+        Args:
+            exclude_ids: ids of shared objects not to count (defaults to the shared subsystems)
+        
+        Returns:
+            python_bytes (object graph), connection_open and db_bytes (file size)
+        """
+        if exclude_ids is None:
+            exclude_ids = shared_object_ids()
+        exclude_ids = set(exclude_ids) | {id(self._connection_lock)}
+        return {
+            "python_bytes": deep_sizeof(self, exclude_ids),
+            "connection_open": self._connection is not None,
+            "db_bytes": os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        }
+    
     def store_memory(self, content: str, memory_type: str = "conversation", 
                     importance: float = 0.5, context: Dict[str, Any] = None,
                     tags: List[str] = None, emotional_valence: float = 0.0,
@@ -191,184 +608,265 @@ class EnhancedMemorySystem:
         Returns:
             Memory ID
         """
-        try:
-            memory_id = self._generate_memory_id(content)
-            
-            # Enhanced emotional analysis
-            if emotional_valence == 0.0:  # Only analyze if not provided
-                emotional_valence = self._analyze_emotional_content(content)
-            
-            # Enhanced relationship impact analysis
-            if relationship_impact == 0.0:  # Only analyze if not provided
-                relationship_impact = self._analyze_relationship_impact(content, memory_type)
-            
-            # Enhanced importance calculation
-            if importance == 0.5:  # Only recalculate if using default
-                importance = self._calculate_enhanced_importance(content, emotional_valence, relationship_impact)
-            
-            # CRITICAL: Auto-boost importance for personal details
-            content_lower = content.lower()
-            personal_boost_applied = False
-            
-            # Name-related patterns (highest priority)
-            name_patterns = [
-                r"\b(ed|edward|edwin|eddie)\b",
-                r"my name is",
-                r"i am \w+",
-                r"i'm \w+",
-                r"call me",
-                r"you can call me",
-                r"my name's"
-            ]
-            
-            for pattern in name_patterns:
-                if re.search(pattern, content_lower):
-                    importance = max(importance, 1.0)  # Maximum importance for names
-                    personal_boost_applied = True
-                    memory_type = "personal_identity"  # Mark as identity memory
-                    break
-            
-            # Other personal detail patterns
-            if not personal_boost_applied:
-                personal_patterns = [
-                    r"i live in", r"i work", r"my family", r"my parents", 
-                    r"my sister", r"my brother", r"my job", r"i'm from"
-                ]
-                
-                for pattern in personal_patterns:
-                    if re.search(pattern, content_lower):
-                        importance = max(importance, 0.9)  # High importance for personal details
-                        personal_boost_applied = True
-                        memory_type = "personal_detail"
-                        break
+        return self.batch_store_memories([{
+            "content": content,
+            "memory_type": memory_type,
+            "importance": importance,
+            "context": context,
+            "tags": tags,
+            "emotional_valence": emotional_valence,
+            "relationship_impact": relationship_impact
+        }])[0]
+    
+    def batch_store_memories(self, memories: List[Dict[str, Any]]) -> List[str]:
+        """
+        Store several memories and their extracted personal details in one transaction
+        
+        Args:
+            memories: Dicts with a required "content" key and optional store_memory
+                keyword arguments (memory_type, importance, context, tags,
+                emotional_valence, relationship_impact) plus "timestamp" for
+                imported memories
             
-            # Enhanced tags generation
-            if not tags:
-                tags = self._generate_enhanced_tags(content, memory_type, emotional_valence)
+        Returns:
+            Memory IDs in input order
+        """
+        if not memories:
+            return []
+        try:
+            prepared = []
+            detail_rows = {}
+            seen_ids = set()
+            for memory in memories:
+                row, personal_boost_applied = self._prepare_memory_row(**memory)
+                if row[0] in seen_ids:
+                    # Same content stored twice within one batch
+                    row = (f"{row[0]}_{len(prepared)}",) + row[1:]
+                seen_ids.add(row[0])
+                fingerprint = content_fingerprint(row[3])
+                prepared.append((
+                    row + (fingerprint.value if fingerprint else 0, content_digest(row[3])),
+                    fingerprint, personal_boost_applied
+                ))
+                for detail_row in self._personal_detail_rows(memory["content"]):
+                    detail_rows[detail_row[0]] = detail_row
             
-            # Add personal detail tags if applicable
-            if personal_boost_applied:
-                if "personal_info" not in tags:
-                    tags.append("personal_info")
-                if memory_type == "personal_identity":
-                    tags.append("identity")
-                    tags.append("name")
+            # Profile snapshots must be written in merge order, so deduplication,
+            # merging and writing happen under the connection lock
+            with self._connection_lock:
+                memory_rows, merge_rows, memory_ids, boosted = self._deduplicate(prepared)
+                profile_rows = self._profile_rows(memory_rows)
+                write_buffer = get_write_buffer(self.db_path)
+                if write_buffer is not None:
+                    # Group commit: applied with other pending writes by the buffer,
+                    # queued as a whole or (when a full buffer cannot be flushed) not at all
+                    write_buffer.add_statements([
+                        (_INSERT_MEMORY_SQL, memory_rows),
+                        (MERGE_DUPLICATE_SQL, merge_rows),
+                        (_INSERT_PERSONAL_DETAIL_SQL, list(detail_rows.values())),
+                        (PROFILE_UPSERT_SQL, profile_rows)
+                    ])
+                    rowids = [None] * len(memory_rows)
+                else:
+                    with self._connect() as conn:
+                        cursor = conn.cursor()
+                        rowids = []
+                        for memory_row in memory_rows:
+                            cursor.execute(_INSERT_MEMORY_SQL, memory_row)
+                            rowids.append(cursor.lastrowid)
+                        if merge_rows:
+                            cursor.executemany(MERGE_DUPLICATE_SQL, merge_rows)
+                        if detail_rows:
+                            cursor.executemany(_INSERT_PERSONAL_DETAIL_SQL, list(detail_rows.values()))
+                        if profile_rows:
+                            cursor.executemany(PROFILE_UPSERT_SQL, profile_rows)
+                        conn.commit()
+                self._remember_recent_turns(memory_rows, rowids, merge_rows)
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT OR REPLACE INTO enhanced_memory 
-                    (id, character_id, user_id, content, memory_type, importance, 
-                     timestamp, context, tags, emotional_valence, relationship_impact)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    memory_id,
-                    self.character_id,
-                    self.user_id,
-                    content,
-                    memory_type,
-                    importance,
-                    datetime.now().isoformat(),
-                    json.dumps(context or {}),
-                    json.dumps(tags or []),
-                    emotional_valence,
-                    relationship_impact
-                ))
-                
-                conn.commit()
-                
-                # Extract and store personal details
-                self._extract_and_store_personal_details(content)
-                
+            for row, personal_boost_applied in zip(memory_rows, boosted):
                 # Log if personal boost was applied
                 if personal_boost_applied:
-                    logger.info(f"✅ Stored CRITICAL personal memory (importance: {importance:.2f}): {content[:50]}...")
+                    logger.info(f"✅ Stored CRITICAL personal memory (importance: {row[5]:.2f}): {row[3][:50]}...")
                 else:
-                    logger.info(f"✅ Stored enhanced memory: {content[:50]}...")
-                
-                return memory_id
+                    logger.info(f"✅ Stored enhanced memory: {row[3][:50]}...")
+            for merge_row in merge_rows:
+                logger.info(f"✅ Merged near-duplicate memory into {merge_row[-1]}")
+            
+            return memory_ids
                 
         except Exception as e:
             logger.error(f"❌ Failed to store memory: {e}")
             raise
     
-    def _analyze_emotional_content(self, content: str) -> float:
-        """Analyze emotional content and return valence score (-1.0 to 1.0)"""
-        content_lower = content.lower()
+    def _remember_recent_turns(self, memory_rows: List[tuple], rowids: List[Optional[int]],
+                               merge_rows: List[tuple]):
+        """Mirror a write into the recent-turn buffer (caller holds the connection lock)"""
+        if self.recent_turns is None:
+            return
+        if merge_rows and self.recent_turns.contains(merge_row[-1] for merge_row in merge_rows):
+            # A merge raised the importance of a buffered memory
+            self.recent_turns.invalidate()
+            return
+        self.recent_turns.add(
+            (rowid, {
+                "id": row[0],
+                "content": row[3],
+                "type": row[4],
+                "importance": row[5],
+                "timestamp": row[6],
+                "emotional_valence": row[9],
+                "relationship_impact": row[10],
+                "tags": json.loads(row[8]) if row[8] else []
+            })
+            for row, rowid in zip(memory_rows, rowids)
+        )
+    
+    def invalidate_recent_turns(self):
+        """Drop the recent-turn buffer after an edit or delete (reloaded on next use)"""
+        recent_turns = getattr(self, "recent_turns", None)
+        if recent_turns is not None:
+            recent_turns.invalidate()
+    
+    def _loaded_recent_turns(self) -> Optional[RecentTurnBuffer]:
+        """The recent-turn buffer, filled from the database on first use (None if disabled)"""
+        if self.recent_turns is None or self.recent_turns.loaded:
+            return self.recent_turns
+        plan = _HISTORY_PLANNER.plan_history(
+            self.character_id, self.user_id, self.recent_turns.size, columns=_HISTORY_COLUMNS
+        )
+        with self._read() as conn:
+            # Loaded under the connection lock, so no write slips in between
+            self.recent_turns.load(_history_memory(row) for row in conn.execute(plan.sql, plan.params))
+        return self.recent_turns
+    
+    def _deduplicate(self, prepared: List[tuple]) -> Tuple[List[tuple], List[tuple], List[str], List[bool]]:
+        """
+        Split prepared memories into new rows and merges into near-duplicates
         
-        # Emotional keywords with valence scores
-        emotional_keywords = {
-            # Positive emotions
-            "happy": 0.8, "excited": 0.9, "thrilled": 0.9, "delighted": 0.8,
-            "joy": 0.8, "pleased": 0.7, "wonderful": 0.8, "amazing": 0.8,
-            "fantastic": 0.8, "great": 0.6, "good": 0.5, "nice": 0.5,
-            "love": 0.9, "adore": 0.9, "cherish": 0.8, "care": 0.6,
-            "thankful": 0.7, "grateful": 0.7, "appreciate": 0.6,
-            "hope": 0.6, "wish": 0.4, "dream": 0.5, "aspire": 0.6,
-            
-            # Negative emotions
-            "sad": -0.7, "depressed": -0.8, "melancholy": -0.6, "down": -0.5,
-            "blue": -0.5, "unhappy": -0.6, "disappointed": -0.6, "heartbroken": -0.9,
-            "lonely": -0.7, "angry": -0.8, "mad": -0.7, "furious": -0.9,
-            "irritated": -0.6, "annoyed": -0.5, "frustrated": -0.6, "rage": -0.9,
-            "hate": -0.9, "disgusted": -0.8, "afraid": -0.7, "scared": -0.7,
-            "terrified": -0.9, "anxious": -0.6, "worried": -0.5, "nervous": -0.5,
-            "fearful": -0.7, "panicked": -0.8, "stressed": -0.6,
-            
-            # Neutral/contextual emotions
-            "surprised": 0.2, "shocked": 0.1, "amazed": 0.6, "astonished": 0.5,
-            "stunned": 0.0, "bewildered": -0.2, "confused": -0.3,
-            "understand": 0.3, "feel": 0.2, "relate": 0.4, "sympathize": 0.5,
-            "compassion": 0.6, "care about": 0.5
-        }
+        A memory is merged into an earlier one of this batch or a stored one
+        (committed rows only, so buffered writes are not flushed for the lookup).
+        Caller holds the connection lock.
         
-        # Calculate emotional valence
-        total_score = 0.0
-        keyword_count = 0
+        Args:
+            prepared: (row, fingerprint, personal boost applied) per memory
         
-        for keyword, score in emotional_keywords.items():
-            if keyword in content_lower:
-                total_score += score
-                keyword_count += 1
+        Returns:
+            (rows to insert, MERGE_DUPLICATE_SQL rows, memory id per input, boost flag per inserted row)
+        """
+        settings = self.dedup_settings
+        memory_rows, merge_rows, memory_ids, boosted = [], [], [], []
+        batch = []
+        with self._connect(flush=False) as conn:
+            for row, fingerprint, personal_boost_applied in prepared:
+                target = None
+                if settings.applies_to(row[4], fingerprint):
+                    limit = settings.max_hamming_distance
+                    target = next((
+                        memory_id for memory_id, memory_type, value in batch
+                        if memory_type == row[4] and hamming_distance(value, fingerprint.value) <= limit
+                    ), None) or find_near_duplicate(conn, fingerprint, row[4], settings)
+                if target is not None:
+                    merge_rows.append(merge_params(target, row[5], settings))
+                    memory_ids.append(target)
+                    continue
+                if fingerprint is not None:
+                    batch.append((row[0], row[4], fingerprint.value))
+                memory_rows.append(row)
+                memory_ids.append(row[0])
+                boosted.append(personal_boost_applied)
+        return memory_rows, merge_rows, memory_ids, boosted
+    
+    def _prepare_memory_row(self, content: str, memory_type: str = "conversation", 
+                            importance: float = 0.5, context: Dict[str, Any] = None,
+                            tags: List[str] = None, emotional_valence: float = 0.0,
+                            relationship_impact: float = 0.0,
+                            timestamp: Optional[str] = None) -> Tuple[tuple, bool]:
+        """
+        Analyze a memory and build its enhanced_memory row
+        
+        Returns:
+            (row tuple, whether the personal-detail boost was applied)
+        """
+        memory_id = self._generate_memory_id(content)
+        
+        # One pass over the content for every keyword lexicon
+        scan = _MEMORY_KEYWORDS.scan(content)
+        
+        # Enhanced emotional analysis
+        if emotional_valence == 0.0:  # Only analyze if not provided
+            emotional_valence = self._analyze_emotional_content(content, scan)
+        
+        # Enhanced relationship impact analysis
+        if relationship_impact == 0.0:  # Only analyze if not provided
+            relationship_impact = self._analyze_relationship_impact(content, memory_type, scan)
+        
+        # Enhanced importance calculation
+        if importance == 0.5:  # Only recalculate if using default
+            importance = self._calculate_enhanced_importance(content, emotional_valence, relationship_impact, scan)
+        
+        # CRITICAL: Auto-boost importance for personal details
+        personal_boost_applied = False
+        personal_labels = _PERSONAL_PATTERNS.matching_labels(content.lower())
+        
+        if "identity" in personal_labels:
+            importance = max(importance, 1.0)  # Maximum importance for names
+            personal_boost_applied = True
+            memory_type = "personal_identity"  # Mark as identity memory
+        elif "detail" in personal_labels:
+            importance = max(importance, 0.9)  # High importance for personal details
+            personal_boost_applied = True
+            memory_type = "personal_detail"
+        
+        # Enhanced tags generation
+        if not tags:
+            tags = self._generate_enhanced_tags(content, memory_type, emotional_valence, scan)
+        else:
+            tags = list(tags)
+        
+        # Add personal detail tags if applicable
+        if personal_boost_applied:
+            if "personal_info" not in tags:
+                tags.append("personal_info")
+            if memory_type == "personal_identity":
+                tags.append("identity")
+                tags.append("name")
+        
+        # Content-derived enrichment, persisted so reads never recompute it
+        enrichment = enrich_memory(content, tags)
+        
+        row = (
+            memory_id,
+            self.character_id,
+            self.user_id,
+            content,
+            memory_type,
+            importance,
+            timestamp or datetime.now().isoformat(),
+            json.dumps(context or {}),
+            json.dumps(tags or []),
+            emotional_valence,
+            relationship_impact,
+            *enrichment.values()
+        )
+        return row, personal_boost_applied
+    
+    def _analyze_emotional_content(self, content: str, scan=None) -> float:
+        """Analyze emotional content and return valence score (-1.0 to 1.0)"""
+        if scan is None:
+            scan = _MEMORY_KEYWORDS.scan(content)
+        scores = [_EMOTIONAL_VALENCE[keyword] for keyword in scan.terms_for("emotion")]
         
         # Return average valence, or 0.0 if no emotional keywords found
-        if keyword_count > 0:
-            return max(-1.0, min(1.0, total_score / keyword_count))
+        if scores:
+            return max(-1.0, min(1.0, sum(scores) / len(scores)))
         else:
             return 0.0
     
-    def _analyze_relationship_impact(self, content: str, memory_type: str) -> float:
+    def _analyze_relationship_impact(self, content: str, memory_type: str, scan=None) -> float:
         """Analyze relationship impact of the memory content"""
-        content_lower = content.lower()
-        
-        # Relationship-relevant keywords
-        relationship_keywords = {
-            # High impact
-            "family": 0.8, "parents": 0.8, "sister": 0.7, "brother": 0.7,
-            "daughter": 0.8, "son": 0.8, "wife": 0.9, "husband": 0.9,
-            "partner": 0.8, "friend": 0.6, "best friend": 0.8,
-            "love": 0.9, "care": 0.7, "trust": 0.8, "believe": 0.6,
-            "miss": 0.6, "remember": 0.5, "think about": 0.5,
-            
-            # Medium impact
-            "work": 0.4, "job": 0.4, "career": 0.5, "profession": 0.4,
-            "hobby": 0.3, "interest": 0.3, "passion": 0.6, "dream": 0.5,
-            "goal": 0.4, "achievement": 0.5, "success": 0.5,
-            
-            # Low impact
-            "weather": 0.1, "food": 0.2, "movie": 0.2, "music": 0.3,
-            "book": 0.2, "game": 0.2, "sport": 0.3
-        }
-        
-        # Calculate relationship impact
-        total_impact = 0.0
-        keyword_count = 0
-        
-        for keyword, impact in relationship_keywords.items():
-            if keyword in content_lower:
-                total_impact += impact
-                keyword_count += 1
+        if scan is None:
+            scan = _MEMORY_KEYWORDS.scan(content)
+        impacts = [_RELATIONSHIP_IMPACT[keyword] for keyword in scan.terms_for("relationship")]
         
         # Base impact from memory type
         type_impact = {
@@ -381,13 +879,14 @@ class EnhancedMemorySystem:
         }.get(memory_type, 0.3)
         
         # Combine keyword impact with type impact
-        if keyword_count > 0:
-            keyword_impact = total_impact / keyword_count
+        if impacts:
+            keyword_impact = sum(impacts) / len(impacts)
             return max(0.0, min(1.0, (keyword_impact + type_impact) / 2))
         else:
             return type_impact
     
-    def _calculate_enhanced_importance(self, content: str, emotional_valence: float, relationship_impact: float) -> float:
+    def _calculate_enhanced_importance(self, content: str, emotional_valence: float, relationship_impact: float,
+                                       scan=None) -> float:
         """Calculate enhanced importance based on content analysis"""
         # Base importance factors
         length_factor = min(1.0, len(content) / 200)  # Longer content = more important
@@ -395,49 +894,18 @@ class EnhancedMemorySystem:
         relationship_factor = relationship_impact  # High relationship impact = more important
         
         # Personal detail detection with enhanced priority
-        personal_keywords = {
-            "critical": ["my name", "i am", "i'm", "call me", "you can call me", "ed", "edward", "edwin", "eddie"],
-            "high": ["i live", "i work", "my family", "my parents", "my sister", "my brother", "my job"],
-            "medium": ["i like", "i love", "i hate", "my favorite", "my hobby", "my interest"]
-        }
-        
-        personal_factor = 0.0
-        content_lower = content.lower()
-        
-        # Check for critical personal info (names, identity)
-        for keyword in personal_keywords["critical"]:
-            if keyword in content_lower:
-                personal_factor = 1.0  # Maximum importance for name/identity
-                break
-        
-        # Check for high priority personal info
-        if personal_factor == 0.0:
-            for keyword in personal_keywords["high"]:
-                if keyword in content_lower:
-                    personal_factor = 0.9
-                    break
-        
-        # Check for medium priority personal info
-        if personal_factor == 0.0:
-            for keyword in personal_keywords["medium"]:
-                if keyword in content_lower:
-                    personal_factor = 0.7
-                    break
+        if scan is None:
+            scan = _MEMORY_KEYWORDS.scan(content)
+        personal_factor = {
+            "personal_critical": 1.0,  # Maximum importance for name/identity
+            "personal_high": 0.9,
+            "personal_medium": 0.7,
+            None: 0.0
+        }[scan.first(["personal_critical", "personal_high", "personal_medium"])]
         
         # Special boost for name-related content
-        name_patterns = [
-            r"\b(ed|edward|edwin|eddie)\b",
-            r"my name is",
-            r"i am \w+",
-            r"i'm \w+",
-            r"call me",
-            r"you can call me"
-        ]
-        
-        for pattern in name_patterns:
-            if re.search(pattern, content_lower):
-                personal_factor = max(personal_factor, 1.0)  # Ensure maximum importance
-                break
+        if _PERSONAL_PATTERNS.has(content.lower(), "identity"):
+            personal_factor = max(personal_factor, 1.0)  # Ensure maximum importance
         
         # Calculate weighted importance with enhanced personal factor
         importance = (
@@ -449,7 +917,8 @@ class EnhancedMemorySystem:
         
         return max(0.1, min(1.0, importance))
     
-    def _generate_enhanced_tags(self, content: str, memory_type: str, emotional_valence: float) -> List[str]:
+    def _generate_enhanced_tags(self, content: str, memory_type: str, emotional_valence: float,
+                                scan=None) -> List[str]:
         """Generate enhanced tags for memory categorization"""
         tags = [memory_type]
         
@@ -462,22 +931,11 @@ class EnhancedMemorySystem:
             tags.append("neutral_emotion")
         
         # Content-based tags
-        content_lower = content.lower()
-        
-        if any(word in content_lower for word in ["family", "parents", "sister", "brother"]):
-            tags.append("family")
-        
-        if any(word in content_lower for word in ["work", "job", "career", "profession"]):
-            tags.append("work")
-        
-        if any(word in content_lower for word in ["love", "care", "trust", "relationship"]):
-            tags.append("relationship")
-        
-        if any(word in content_lower for word in ["hobby", "interest", "passion", "dream"]):
-            tags.append("personal_interest")
-        
-        if any(word in content_lower for word in ["i am", "i'm", "my name", "i live"]):
-            tags.append("personal_info")
+        if scan is None:
+            scan = _MEMORY_KEYWORDS.scan(content)
+        for tag in ["family", "work", "relationship", "personal_interest", "personal_info"]:
+            if scan.has(f"tag_{tag}"):
+                tags.append(tag)
         
         return tags
     
@@ -487,6 +945,7 @@ class EnhancedMemorySystem:
         """
         Enhanced memory context retrieval with semantic search and importance ranking
         Returns a dict with keys: 'memories', 'important_memories', 'recent_memories', 'emotional_context', 'relationship_context', 'context_summary'.
+        Ranked memories are read-only MemoryRecord mappings shared by every list (record.to_dict() for a copy).
         """
         try:
             memories = self._get_semantic_memories(
@@ -508,23 +967,30 @@ class EnhancedMemorySystem:
             other_memories = []
             
             for memory in memories:
-                content = memory.get('content', '').lower()
-                tags = memory.get('tags', [])
-                
-                # Check for identity/name memories (highest priority)
-                if any(tag in tags for tag in ['identity', 'name']) or any(pattern in content for pattern in ['my name', 'i am', 'i\'m', 'call me', 'ed', 'edward']):
+                # Identity/personal flags are persisted at write time
+                if memory.get('is_identity'):
                     identity_memories.append(memory)
-                # Check for other personal details
-                elif any(tag in tags for tag in ['personal_info', 'personal_detail']) or any(pattern in content for pattern in ['i live', 'i work', 'my family', 'my job']):
+                elif memory.get('is_personal'):
                     personal_memories.append(memory)
                 else:
                     other_memories.append(memory)
             
+            if len(identity_memories) < 2 and (character_id, user_id) == (self.character_id, self.user_id):
+                # Names outranked by this turn's candidates are still shown first
+                try:
+                    identity_memories += self._identity_records(
+                        2 - len(identity_memories), {memory['id'] for memory in memories}
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ Identity memory lookup failed for {self.memory_key}: {e}")
+            
             # Reorder memories with personal details first
             prioritized_memories = identity_memories + personal_memories + other_memories
             
             important_memories = [m for m in prioritized_memories if m.get('importance', 0) > 0.7][:3]
-            recent_memories = sorted(prioritized_memories, key=lambda x: x.get('timestamp', ''), reverse=True)[:5]
+            recent_memories = self._recent_context_memories(5)
+            if recent_memories is None:
+                recent_memories = self.memory_ranker.rank_records(prioritized_memories, 5, weights=RankingWeights.recency_only())
             emotional_context = self._get_emotional_context(prioritized_memories) if include_emotional else None
             relationship_context = self._get_relationship_context(prioritized_memories)
             
@@ -585,8 +1051,19 @@ class EnhancedMemorySystem:
                 'personal_memories': []
             }
 
+    def _recent_context_memories(self, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Latest conversation memories for "Recent Context", from the recent-turn buffer (None if unavailable)"""
+        try:
+            page = self._recent_page(limit, None, conversation_only=True, with_cursor=False)
+        except Exception as e:
+            logger.warning(f"⚠️ Recent-turn buffer unavailable for {self.memory_key}: {e}")
+            return None
+        if page is None:
+            return None
+        return [{**memory, "memory_type": memory["type"]} for memory in page["memories"]]
+
     def _get_semantic_memories(self, character_id: str, user_id: str, max_memories: int,
-                              min_importance: float, semantic_query: str = None) -> List[Dict[str, Any]]:
+                              min_importance: float, semantic_query: str = None) -> List[MemoryRecord]:
         """
         Get memories using semantic search and importance ranking
         """
@@ -597,151 +1074,32 @@ class EnhancedMemorySystem:
                 logger.warning(f"⚠️ Memory database not found: {db_path}")
                 return []
             
-            with sqlite3.connect(db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                
-                # Build query with semantic relevance if provided
-                if semantic_query:
-                    # Use semantic similarity for relevance
-                    query = """
-                        SELECT *, 
-                               CASE 
-                                   WHEN content LIKE ? THEN 1.0
-                                   WHEN content LIKE ? THEN 0.8
-                                   WHEN content LIKE ? THEN 0.6
-                                   ELSE 0.3
-                               END as relevance_score
-                    FROM enhanced_memory 
-                        WHERE importance >= ?
-                        ORDER BY relevance_score DESC, importance DESC, timestamp DESC
-                        LIMIT ?
-                    """
-                    
-                    # Create semantic variations for better matching
-                    query_words = semantic_query.lower().split()
-                    primary_match = f"%{semantic_query}%"
-                    secondary_match = f"%{'%'.join(query_words[:2])}%" if len(query_words) >= 2 else primary_match
-                    tertiary_match = f"%{query_words[0]}%" if query_words else primary_match
-                    
-                    cursor = conn.execute(query, (primary_match, secondary_match, tertiary_match, min_importance, max_memories))
-                else:
-                    # Standard importance-based retrieval
-                    query = """
-                        SELECT * FROM enhanced_memory 
-                        WHERE importance >= ?
-                        ORDER BY importance DESC, timestamp DESC
-                        LIMIT ?
-                    """
-                    cursor = conn.execute(query, (min_importance, max_memories))
-                
-                memories = []
-                for row in cursor.fetchall():
-                    memory = dict(row)
-                    
-                    # Enhance memory with additional context
-                    memory['emotional_context'] = self._extract_emotional_context(memory.get('content', ''))
-                    memory['relationship_impact'] = self._calculate_relationship_impact(memory.get('content', ''))
-                    memory['topic_category'] = self._categorize_topic(memory.get('content', ''))
-                    
-                    memories.append(memory)
-                
-                logger.info(f"✅ Retrieved {len(memories)} semantic memories for {character_id}_{user_id}")
-                return memories
+            own_pair = db_path == self.db_path
+            if not own_pair:
+                flush_write_buffer(db_path)
+            with (self._read() if own_pair else sqlite3.connect(db_path)) as conn:
+                # Hybrid ranking (BM25 relevance x importance x recency x emotion)
+                # computed in one vectorized pass over the candidate set
+                match = build_match_expression(semantic_query, operator="OR") if semantic_query else None
+                # Old periods that were rolled up are represented by their summaries
+                where = retrieval_filter(self.summarizer.settings) if db_path == self.db_path else None
+                ranked_rows = self.memory_ranker.rank_pair(
+                    conn, max_memories, min_importance, match=match, where=where, pair=(character_id, user_id)
+                )
+                if not own_pair:
+                    record_access(conn, [memory["id"] for memory in ranked_rows])
+            if own_pair:
+                self._record_access([memory["id"] for memory in ranked_rows])
+            
+            # Records expose the write-time enrichment (emotional_context,
+            # identity flags) on access; no per-row dict is built
+            logger.info(f"✅ Retrieved {len(ranked_rows)} semantic memories for {character_id}_{user_id}")
+            return ranked_rows
                 
         except Exception as e:
             logger.error(f"❌ Error in semantic memory retrieval: {e}")
             return []
 
-    def _extract_emotional_context(self, content: str) -> Dict[str, Any]:
-        """
-        Extract emotional context from memory content
-        """
-        try:
-            # Simple emotional analysis
-            content_lower = content.lower()
-            
-            # Positive indicators
-            positive_words = ['happy', 'excited', 'great', 'wonderful', 'amazing', 'love', 'care', 'support']
-            positive_count = sum(1 for word in positive_words if word in content_lower)
-            
-            # Negative indicators  
-            negative_words = ['sad', 'angry', 'worried', 'scared', 'frustrated', 'hate', 'dislike', 'stress']
-            negative_count = sum(1 for word in negative_words if word in content_lower)
-            
-            # Intensity indicators
-            intensity_words = ['very', 'really', 'extremely', 'incredibly', 'so']
-            intensity = sum(1 for word in intensity_words if word in content_lower) * 0.2
-            
-            # Determine emotional valence
-            if positive_count > negative_count:
-                valence = "positive"
-                intensity += positive_count * 0.1
-            elif negative_count > positive_count:
-                valence = "negative"
-                intensity += negative_count * 0.1
-            else:
-                valence = "neutral"
-                intensity = 0.3
-            
-            return {
-                "valence": valence,
-                "intensity": min(1.0, intensity),
-                "positive_indicators": positive_count,
-                "negative_indicators": negative_count
-            }
-            
-        except Exception as e:
-            logger.error(f"❌ Error extracting emotional context: {e}")
-            return {"valence": "neutral", "intensity": 0.3, "positive_indicators": 0, "negative_indicators": 0}
-
-    def _calculate_relationship_impact(self, content: str) -> float:
-        """
-        Calculate relationship impact score for memory content
-        """
-        try:
-            content_lower = content.lower()
-            
-            # Relationship indicators
-            positive_indicators = ['love', 'care', 'trust', 'appreciate', 'miss', 'support', 'understand']
-            negative_indicators = ['hate', 'dislike', 'distrust', 'ignore', 'blame', 'criticize']
-            
-            positive_score = sum(0.2 for word in positive_indicators if word in content_lower)
-            negative_score = sum(-0.2 for word in negative_indicators if word in content_lower)
-            
-            return max(-1.0, min(1.0, positive_score + negative_score))
-                
-        except Exception as e:
-            logger.error(f"❌ Error calculating relationship impact: {e}")
-            return 0.0
-
-    def _categorize_topic(self, content: str) -> str:
-        """
-        Categorize memory topic
-        """
-        try:
-            content_lower = content.lower()
-            
-            # Topic patterns
-            topics = {
-                "family": ["family", "parents", "mom", "dad", "kids", "children", "sister", "brother"],
-                "work": ["work", "job", "career", "boss", "colleague", "office", "project"],
-                "health": ["health", "sick", "illness", "doctor", "hospital", "pain", "medicine"],
-                "relationships": ["relationship", "partner", "boyfriend", "girlfriend", "spouse", "marriage"],
-                "hobbies": ["hobby", "music", "art", "sport", "game", "reading", "writing"],
-                "travel": ["travel", "trip", "vacation", "holiday", "visit", "place", "country"],
-                "emotions": ["feel", "emotion", "mood", "happy", "sad", "angry", "excited"]
-            }
-            
-            for topic, keywords in topics.items():
-                if any(keyword in content_lower for keyword in keywords):
-                    return topic
-            
-            return "general"
-            
-        except Exception as e:
-            logger.error(f"❌ Error categorizing topic: {e}")
-            return "general"
-
     def _get_emotional_context(self, memories: List[Dict[str, Any]]) -> str:
         """
         Generate emotional context summary from memories
@@ -817,75 +1175,102 @@ class EnhancedMemorySystem:
             List of memories with all fields
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._read() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, content, memory_type, importance, timestamp, 
-                           emotional_valence, relationship_impact, tags, context
-                    FROM enhanced_memory 
-                    WHERE character_id = ? AND user_id = ? AND memory_type = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                """, (self.character_id, self.user_id, memory_type, max_results))
-                
-                rows = cursor.fetchall()
-                memories = []
-                
-                for row in rows:
-                    memory = {
-                        "id": row[0],
-                        "content": row[1],
-                        "type": row[2],
-                        "importance": row[3],
-                        "timestamp": row[4],
-                        "emotional_valence": row[5],
-                        "relationship_impact": row[6],
-                        "tags": json.loads(row[7]) if row[7] else [],
-                        "context": json.loads(row[8]) if row[8] else {},
-                    }
-                    memories.append(memory)
+                cursor.execute(_MEMORIES_BY_TYPE_SQL, (self.character_id, self.user_id, memory_type, max_results))
                 
-                return memories
+                return [_listed_memory(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error getting memories by type: {e}")
             return []
+    
+    def get_memories_by_tags(self, tags: List[str], max_results: int = 50, match_all: bool = False,
+                             memory_types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Get memories carrying tags, newest first, through the memory_tags index
+        Args:
+            tags: Tags to look for (exact match)
+            max_results: Maximum number of results
+            match_all: Require every tag instead of any of them
+            memory_types: Optional list of memory types to restrict to
+        Returns:
+            List of memories with the fields of get_memories_by_type
+        """
+        tags = unique_tags(tags)
+        if not tags:
+            return []
+        try:
+            sql = _MEMORIES_BY_TAGS_SQL.format(
+                tagged_memories=tagged_memories_sql(len(tags), match_all),
+                type_clause=f" AND m.memory_type IN ({', '.join('?' for _ in memory_types)})" if memory_types else ""
+            )
+            with self._read() as conn:
+                rows = conn.execute(
+                    sql, [*tags, self.character_id, self.user_id, *(memory_types or []), max_results]
+                ).fetchall()
+            return [_listed_memory(row) for row in rows]
+        except Exception as e:
+            logger.error(f"❌ Failed to get memories by tags {tags}: {e}")
+            return []
+    
+    def _identity_records(self, limit: int, exclude_ids: Set[str]) -> List[MemoryRecord]:
+        """Most important identity memories as records (tag index lookup), skipping exclude_ids"""
+        with self._read() as conn:
+            cursor = conn.execute(
+                _IDENTITY_RECORDS_SQL, [*_IDENTITY_TAGS, self.character_id, self.user_id, limit + len(exclude_ids)]
+            )
+            layout = cursor_layout(cursor)
+            records = [MemoryRecord(row, layout) for row in cursor]
+        records = [record for record in records if record["id"] not in exclude_ids][:limit]
+        self._record_access([record["id"] for record in records])
+        return records
 
-    def search_memories(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    def search_memories(self, query: str, max_results: int = 5,
+                        memory_types: Optional[List[str]] = None,
+                        include_archive: bool = False) -> List[Dict[str, Any]]:
         """
-        Search memories by content
+        Search memories by content using the FTS5 index (BM25 ranked)
         Args:
-            query: Search query
+            query: Search query (each word is prefix-matched)
             max_results: Maximum number of results
+            memory_types: Optional list of memory types to restrict to
+            include_archive: Also search cold memories in the pair's archive database
         Returns:
-            List of matching memories with id, type, tags, context, etc.
+            List of matching memories with id, type, tags, context, snippet, etc.
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT id, content, memory_type, importance, timestamp, 
-                           emotional_valence, relationship_impact, tags, context
-                    FROM enhanced_memory 
-                    WHERE character_id = ? AND user_id = ? 
-                    AND content LIKE ?
-                    ORDER BY importance DESC, timestamp DESC 
-                    LIMIT ?
-                """, (self.character_id, self.user_id, f"%{query}%", max_results))
-                memories = cursor.fetchall()
-                return [
-                    {
-                        "id": memory[0],
-                        "content": memory[1],
-                        "type": memory[2],
-                        "importance": memory[3],
-                        "timestamp": memory[4],
-                        "emotional_valence": memory[5],
-                        "relationship_impact": memory[6],
-                        "tags": json.loads(memory[7]) if memory[7] else [],
-                        "metadata": json.loads(memory[8]) if memory[8] else {},
-                    }
-                    for memory in memories
-                ]
+            match = build_match_expression(query)
+            if not match:
+                return []
+            with self._read() as conn:
+                memories = search_fts(
+                    conn, match, limit=max_results, memory_types=memory_types,
+                    character_id=self.character_id, user_id=self.user_id
+                )
+            self._record_access([memory["id"] for memory in memories])
+            if include_archive:
+                archived = search_archive(
+                    self.db_path, match, limit=max_results, memory_types=memory_types,
+                    character_id=self.character_id, user_id=self.user_id
+                )
+                memories = sorted(memories + archived, key=lambda memory: memory["rank"])[:max_results]
+            return [
+                {
+                    "id": memory["id"],
+                    "content": memory["content"],
+                    "type": memory["memory_type"],
+                    "importance": memory["importance"],
+                    "timestamp": memory["timestamp"],
+                    "emotional_valence": memory["emotional_valence"],
+                    "relationship_impact": memory["relationship_impact"],
+                    "tags": json.loads(memory["tags"]) if memory["tags"] else [],
+                    "metadata": json.loads(memory["context"]) if memory["context"] else {},
+                    "snippet": memory["snippet"],
+                    "rank": memory["rank"],
+                    "tier": memory.get("tier") or "hot",
+                }
+                for memory in memories
+            ]
         except Exception as e:
             logger.error(f"❌ Failed to search enhanced memories: {e}")
             return []
@@ -893,7 +1278,7 @@ class EnhancedMemorySystem:
     def update_memory_importance(self, memory_id: str, new_importance: float):
         """Update the importance of a memory"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     UPDATE enhanced_memory 
@@ -901,6 +1286,7 @@ class EnhancedMemorySystem:
                     WHERE id = ? AND character_id = ? AND user_id = ?
                 """, (new_importance, memory_id, self.character_id, self.user_id))
                 conn.commit()
+                self.invalidate_recent_turns()
                 
         except Exception as e:
             logger.error(f"❌ Failed to update memory importance: {e}")
@@ -908,14 +1294,18 @@ class EnhancedMemorySystem:
     def delete_memory(self, memory_id: str):
         """Delete a memory entry"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     DELETE FROM enhanced_memory 
                     WHERE id = ? AND character_id = ? AND user_id = ?
                 """, (memory_id, self.character_id, self.user_id))
                 conn.commit()
-                return cursor.rowcount > 0
+                self.invalidate_recent_turns()
+                if cursor.rowcount > 0:
+                    return True
+            # Cold memories live in the archive database
+            return delete_archived_memory(self.db_path, memory_id)
                 
         except Exception as e:
             logger.error(f"❌ Failed to delete enhanced memory: {e}")
@@ -925,14 +1315,18 @@ class EnhancedMemorySystem:
                      importance: float = 0.5, confidence: float = 0.8):
         """Update an existing memory"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            fingerprint = content_fingerprint(content)
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     UPDATE enhanced_memory 
-                    SET content = ?, memory_type = ?, importance = ?
+                    SET content = ?, memory_type = ?, importance = ?,
+                        compressed_content = NULL, tier = 'hot', fingerprint = ?, content_hash = ?
                     WHERE id = ? AND character_id = ? AND user_id = ?
-                """, (content, memory_type, importance, memory_id, self.character_id, self.user_id))
+                """, (content, memory_type, importance, fingerprint.value if fingerprint else 0, content_digest(content),
+                      memory_id, self.character_id, self.user_id))
                 conn.commit()
+                self.invalidate_recent_turns()
                 return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"❌ Failed to update memory {memory_id}: {e}")
@@ -943,38 +1337,16 @@ class EnhancedMemorySystem:
         return self.get_all_memories_for_summary()
     
     def get_memory_stats(self) -> Dict[str, Any]:
-        """Get memory statistics"""
+        """Get memory statistics (read from the maintained counters, whatever the history size)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Total memories
-                cursor.execute("""
-                    SELECT COUNT(*) FROM enhanced_memory 
-                    WHERE character_id = ? AND user_id = ?
-                """, (self.character_id, self.user_id))
-                total_memories = cursor.fetchone()[0]
-                
-                # Memory types distribution
-                cursor.execute("""
-                    SELECT memory_type, COUNT(*) 
-                    FROM enhanced_memory 
-                    WHERE character_id = ? AND user_id = ?
-                    GROUP BY memory_type
-                """, (self.character_id, self.user_id))
-                type_distribution = dict(cursor.fetchall())
-                
-                # Average importance
-                cursor.execute("""
-                    SELECT AVG(importance) FROM enhanced_memory 
-                    WHERE character_id = ? AND user_id = ?
-                """, (self.character_id, self.user_id))
-                avg_importance = cursor.fetchone()[0] or 0.0
+            with self._read() as conn:
+                counters = load_memory_counters(conn, self.character_id, self.user_id)
                 
                 return {
-                    "total_memories": total_memories,
-                    "type_distribution": type_distribution,
-                    "average_importance": avg_importance,
+                    "total_memories": counters["total_memories"],
+                    "type_distribution": counters["type_distribution"],
+                    "average_importance": counters["average_importance"],
+                    "tiers": tier_stats(conn, self.db_path),
                     "relationship_stage": self.relationship_tracker.get_relationship_stage()
                 }
                 
@@ -982,52 +1354,109 @@ class EnhancedMemorySystem:
             logger.error(f"❌ Failed to get enhanced memory stats: {e}")
             return {"error": str(e)}
     
+    def get_memory_version(self, exclude_ids: Optional[List[str]] = None) -> str:
+        """
+        Token that changes when this pair's memories change (reads the counters; see counters.memory_version)
+        
+        Args:
+            exclude_ids: Memories to leave out, e.g. the caller's own write, to
+                check that nothing else changed since an earlier token
+        """
+        with self._read() as conn:
+            return memory_version(conn, self.character_id, self.user_id, exclude_ids or ())
+    
     def _generate_memory_id(self, content: str) -> str:
         """Generate a unique memory ID"""
         timestamp = datetime.now().isoformat()
         content_hash = hashlib.md5(content.encode()).hexdigest()[:8]
         return f"{self.memory_key}_{timestamp}_{content_hash}"
     
-    def _extract_and_store_personal_details(self, content: str):
-        """Extract and store personal details from content"""
+    def _personal_detail_rows(self, content: str) -> List[tuple]:
+        """Extract personal details from content as personal_details rows"""
         try:
             details = self.personal_details_extractor.extract_details(content)
-            
-            for detail in details:
-                detail_id = f"{self.memory_key}_{detail['type']}_{hashlib.md5(detail['content'].encode()).hexdigest()[:8]}"
-                
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO personal_details 
-                        (id, character_id, user_id, detail_type, content, confidence, timestamp, source)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        detail_id,
-                        self.character_id,
-                        self.user_id,
-                        detail['type'],
-                        detail['content'],
-                        detail['confidence'],
-                        datetime.now().isoformat(),
-                        'extraction'
-                    ))
-                    conn.commit()
-                    
         except Exception as e:
             logger.error(f"❌ Failed to extract personal details: {e}")
+            return []
+        
+        timestamp = datetime.now().isoformat()
+        return [
+            (
+                f"{self.memory_key}_{detail['type']}_{hashlib.md5(detail['content'].encode()).hexdigest()[:8]}",
+                self.character_id,
+                self.user_id,
+                detail['type'],
+                detail['content'],
+                detail['confidence'],
+                timestamp,
+                'extraction'
+            )
+            for detail in details
+        ]
+    
+    def _profile_rows(self, memory_rows: List[tuple]) -> List[tuple]:
+        """
+        Merge profile facts of new memory rows into the cached profile
+        
+        Caller holds the connection lock.
+        
+        Returns:
+            The user_profile upsert row if the profile changed, else nothing
+        """
+        if self._profile is None:
+            with self._read() as conn:
+                stored = load_profile(conn, self.character_id, self.user_id)
+            self._profile = stored["profile"] if stored else {}
+        
+        changed = False
+        for row in memory_rows:
+            try:
+                facts = extract_profile_facts(row[3])
+            except Exception as e:
+                logger.error(f"❌ Failed to extract profile facts: {e}")
+                continue
+            changed |= merge_facts(self._profile, facts, row[0], row[6], row[4])
+        if not changed:
+            return []
+        return [(self.character_id, self.user_id, json.dumps(self._profile), datetime.now().isoformat())]
+    
+    def get_user_profile(self) -> Dict[str, Any]:
+        """
+        Materialized profile of this pair (one primary-key read)
+        
+        Returns:
+            profile (field -> values with confidence and source memory),
+            memory_count and updated_at
+        """
+        with self._read() as conn:
+            stored = load_profile(conn, self.character_id, self.user_id)
+        if stored is None:
+            return self.rebuild_user_profile()
+        return stored
+    
+    def rebuild_user_profile(self) -> Dict[str, Any]:
+        """
+        Recompute the profile from every stored memory (archived ones included)
+        
+        Needed after memories are edited or deleted, which the write-time
+        merge never retracts.
+        
+        Returns:
+            The rebuilt profile (see get_user_profile)
+        """
+        with self._connection_lock:
+            with self._connect() as conn:
+                rebuilt = rebuild_profile(conn, self.character_id, self.user_id, archive_path(self.db_path))
+            self._profile = json.loads(json.dumps(rebuilt["profile"]))
+        logger.info(f"✅ Rebuilt user profile for {self.memory_key}")
+        return rebuilt
     
     def _get_personal_details(self) -> List[Dict[str, Any]]:
         """Get stored personal details"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._read() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT detail_type, content, confidence, timestamp
-                    FROM personal_details 
-                    WHERE character_id = ? AND user_id = ?
-                    ORDER BY confidence DESC, timestamp DESC
-                """, (self.character_id, self.user_id))
+                cursor.execute(_PERSONAL_DETAILS_SQL, (self.character_id, self.user_id))
                 
                 details = cursor.fetchall()
                 
@@ -1053,39 +1482,274 @@ class EnhancedMemorySystem:
         """Stub for process_message to avoid attribute errors. Implement as needed."""
         return None
 
-    def get_recent_memories(self, *args, **kwargs):
-        """Stub for get_recent_memories to avoid attribute errors. Implement as needed."""
-        return []
+    def get_recent_memories(self, limit: int = 10, conversation_only: bool = False) -> List[Dict[str, Any]]:
+        """Newest memories first (served from the recent-turn buffer when it holds them)"""
+        try:
+            return self.get_memories_page(limit, conversation_only=conversation_only)["memories"]
+        except Exception as e:
+            logger.error(f"❌ Failed to get recent memories: {e}")
+            return []
+
+    def get_memories_page(self, limit: int = 50, cursor: Optional[str] = None,
+                          memory_types: Optional[List[str]] = None, oldest_first: bool = False,
+                          include_summaries: bool = False,
+                          conversation_only: bool = False) -> Dict[str, Any]:
+        """
+        One keyset page of this pair's history
+        
+        Reads only the page (one index range from the cursor), however long
+        the history is.
+        
+        Args:
+            limit: Page size (at most MAX_PAGE_SIZE)
+            cursor: next_cursor of the previous page (first page if None)
+            memory_types: Only these memory types
+            oldest_first: Oldest first instead of newest first
+            include_summaries: Also return rollup summaries (never when memory_types is given)
+            conversation_only: Skip the status lines the app logs into memory;
+                the page is topped up from further rows
+        Returns:
+            memories (dicts as from get_all_memories_for_summary, plus id) and
+            next_cursor (None on the last page)
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        if cursor is None and not oldest_first and not include_summaries:
+            page = self._recent_page(limit, memory_types, conversation_only)
+            if page is not None:
+                return page
+        exclude_types = () if include_summaries or memory_types else tuple(SUMMARY_MEMORY_TYPES)
+        memories: List[Dict[str, Any]] = []
+        while True:
+            plan = _HISTORY_PLANNER.plan_history(
+                self.character_id, self.user_id, limit, cursor, memory_types=memory_types,
+                exclude_types=exclude_types, oldest_first=oldest_first, columns=_HISTORY_COLUMNS
+            )
+            with self._read() as conn:
+                rows = conn.execute(plan.sql, plan.params).fetchall()
+            for row in rows:
+                rowid, memory = _history_memory(row)
+                cursor = encode_cursor(memory["timestamp"], rowid)
+                if conversation_only and not is_conversation_content(memory["content"]):
+                    continue
+                memories.append(memory)
+                if len(memories) == limit:
+                    return {"memories": memories, "next_cursor": cursor}
+            if len(rows) < limit:
+                return {"memories": memories, "next_cursor": None}
+
+    def _recent_page(self, limit: int, memory_types: Optional[List[str]], conversation_only: bool,
+                     with_cursor: bool = True) -> Optional[Dict[str, Any]]:
+        """First newest-first history page served by the recent-turn buffer (None if it cannot answer)"""
+        # Rollup summaries are written by the background pipeline, not through this instance
+        if memory_types and any(memory_type in SUMMARY_MEMORY_TYPES for memory_type in memory_types):
+            return None
+        recent_turns = self._loaded_recent_turns()
+        if recent_turns is None:
+            return None
+        
+        def accept(memory: Dict[str, Any]) -> bool:
+            if memory_types:
+                if memory["type"] not in memory_types:
+                    return False
+            elif memory["type"] in SUMMARY_MEMORY_TYPES:
+                return False
+            return not conversation_only or is_conversation_content(memory["content"])
+        
+        rows, answered = recent_turns.newest(limit, accept)
+        if not answered:
+            return None
+        next_cursor = None
+        if with_cursor and len(rows) == limit:
+            rowid, memory = rows[-1]
+            if rowid is None:
+                # Written through the group-commit buffer; _read() applies it (same rowid as its flush)
+                with self._read() as conn:
+                    rowid = conn.execute(_MEMORY_ROWID_SQL, (memory["id"],)).fetchone()[0]
+                recent_turns.set_rowid(memory["id"], rowid)
+            next_cursor = encode_cursor(memory["timestamp"], rowid)
+        return {
+            "memories": [{**memory, "tags": list(memory["tags"])} for _, memory in rows],
+            "next_cursor": next_cursor
+        }
+    
+    def iter_memories(self, batch_size: int = MAX_PAGE_SIZE, **filters) -> Iterator[Dict[str, Any]]:
+        """
+        Stream this pair's history page by page (oldest first)
+        
+        Args:
+            batch_size: Rows per page
+            **filters: memory_types, include_summaries or conversation_only (see get_memories_page)
+        """
+        cursor = None
+        while True:
+            page = self.get_memories_page(batch_size, cursor, oldest_first=True, **filters)
+            yield from page["memories"]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return
+
+    def count_memories(self, memory_types: Optional[List[str]] = None) -> int:
+        """Number of memories of the given types (every type but rollup summaries if None)"""
+        types = list(memory_types) if memory_types else list(SUMMARY_MEMORY_TYPES)
+        sql = _TYPED_MEMORY_COUNT_SQL.format(
+            operator="IN" if memory_types else "NOT IN", placeholders=", ".join("?" for _ in types)
+        )
+        try:
+            with self._read() as conn:
+                return conn.execute(sql, (self.character_id, self.user_id, *types)).fetchone()[0]
+        except Exception as e:
+            logger.error(f"❌ Failed to count memories: {e}")
+            return 0
+
+    def get_memories_for_day(self, day: str) -> List[Dict[str, Any]]:
+        """
+        One day of this pair's history, oldest first (the day's share of iter_memories())
+        
+        Args:
+            day: Date as YYYY-MM-DD
+        """
+        sql = _DAY_MEMORIES_SQL.format(placeholders=", ".join("?" for _ in SUMMARY_MEMORY_TYPES))
+        with self._read() as conn:
+            rows = conn.execute(
+                sql, (self.character_id, self.user_id, *day_bounds(day), *SUMMARY_MEMORY_TYPES)
+            ).fetchall()
+        return [_history_memory(row)[1] for row in rows]
+
+    def get_diary_days(self, salt: str = "") -> Tuple[Dict[str, DayFingerprint], Dict[str, Dict[str, Any]]]:
+        """
+        Current fingerprint of every day with memories, and the cached diary days
+        
+        A cached day is current while its fingerprint equals the day's; days
+        whose memories changed need regenerating (see diary.py).
+        
+        Args:
+            salt: Mixed into the fingerprints (generator version, names the entries mention)
+        Returns:
+            ({day: DayFingerprint}, {day: cached day}); no cached days if the cache is disabled
+        """
+        with self._read() as conn:
+            fingerprints = day_fingerprints(conn, self.character_id, self.user_id, SUMMARY_MEMORY_TYPES, salt)
+            if not DiaryCacheSettings.from_config().enabled:
+                return fingerprints, {}
+            return fingerprints, load_diary_days(conn, self.character_id, self.user_id)
+
+    def save_diary_days(self, days: List[Dict[str, Any]], keep_days: List[str]) -> int:
+        """
+        Cache generated diary days and drop days that no longer have memories
+        
+        Args:
+            days: {"day", "fingerprint", "memory_count", "entry", "hashtags", "facts"} per day
+            keep_days: Every day that still has memories
+        Returns:
+            Number of days saved (0 if the cache is disabled or the write failed)
+        """
+        if not DiaryCacheSettings.from_config().enabled:
+            return 0
+        try:
+            with self._connect() as conn:
+                return store_diary_days(conn, self.character_id, self.user_id, days, keep_days)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to cache diary days for {self.memory_key}: {e}")
+            return 0
+
+    def build_diary_days(self, salt: str,
+                         generate_day: Callable[[List[Dict[str, Any]]], Tuple[str, List[str], Dict[str, Any]]],
+                         progress: Optional[Callable[..., None]] = None) -> List[Dict[str, Any]]:
+        """
+        Every diary day, oldest first, regenerating only the days whose memories changed
+
+        Cached days whose fingerprint still matches are reused as they are; the
+        other days are loaded, passed to generate_day and cached.
+
+        Args:
+            salt: See get_diary_days
+            generate_day: Takes one day's memories (get_memories_for_day) and
+                returns (entry, hashtags, facts)
+            progress: Optional callback taking days_done / days_total keywords, called per day
+        Returns:
+            {"day", "entry", "hashtags", "facts", "error", "cached"} per day; a day
+            whose generation raised has entry None and the error message
+        """
+        fingerprints, cached = self.get_diary_days(salt)
+        days = []
+        generated = []
+        for day in sorted(fingerprints):
+            if progress:
+                progress(days_done=len(days), days_total=len(fingerprints))
+            key = fingerprints[day]
+            cached_day = cached.get(day)
+            if cached_day and cached_day["fingerprint"] == key.fingerprint:
+                days.append({"day": day, "entry": cached_day["entry"], "hashtags": cached_day["hashtags"],
+                             "facts": cached_day["facts"], "error": None, "cached": True})
+                continue
+            try:
+                entry, hashtags, facts = generate_day(self.get_memories_for_day(day))
+            except Exception as e:
+                logger.error(f"❌ Failed to generate diary day {day} for {self.memory_key}: {e}", exc_info=True)
+                days.append({"day": day, "entry": None, "hashtags": [], "facts": {}, "error": str(e),
+                             "cached": False})
+                continue
+            days.append({"day": day, "entry": entry, "hashtags": list(hashtags), "facts": facts,
+                         "error": None, "cached": False})
+            generated.append({**days[-1], "fingerprint": key.fingerprint, "memory_count": key.memory_count})
+
+        self.save_diary_days(generated, list(fingerprints))
+        if progress:
+            progress(days_done=len(days), days_total=len(fingerprints))
+        return days
+
+    def get_diary_day_facts(self, salt: str = "") -> List[Dict[str, Any]]:
+        """
+        Factual data of every diary day, oldest first, read from the diary cache where it is current
+        
+        Days with a current cached entry give its facts; only the other days
+        are loaded and folded (facts.diary_facts). Those are not cached, as
+        they have no entry; the next diary build caches them.
+        
+        Args:
+            salt: The diary builder's salt (see get_diary_days), so its cached days match
+        Returns:
+            diary_facts structure per day
+        """
+        fingerprints, cached = self.get_diary_days(salt)
+        day_facts = []
+        for day in sorted(fingerprints):
+            cached_day = cached.get(day)
+            if cached_day and cached_day["fingerprint"] == fingerprints[day].fingerprint:
+                day_facts.append(cached_day["facts"])
+            else:
+                day_facts.append(diary_facts(self.get_memories_for_day(day)))
+        return day_facts
+
+    def search_diary_hashtags(self, hashtags: List[str], limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        Diary days whose hashtags match the most of the given ones (hashtag index)
+        
+        Args:
+            hashtags: Hashtags to look for, e.g. ["#dreams", "#father"]; an entry
+                hashtag matches if it equals or starts with one
+            limit: Maximum number of days
+        Returns:
+            Days, best match first (see diary.search_diary_hashtags)
+        """
+        try:
+            with self._connect(flush=False) as conn:
+                return search_diary_hashtags(conn, self.character_id, self.user_id, hashtags, limit)
+        except Exception as e:
+            logger.error(f"❌ Failed to search diary hashtags: {e}")
+            return []
 
     def get_all_memories_for_summary(self) -> List[Dict[str, Any]]:
         """
         Retrieve all memories for summary extraction (no limit).
+        Prefer iter_memories() or get_memories_page(), which hold one page at a time.
         Returns:
             List of memory dictionaries, ordered by timestamp ascending.
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT content, memory_type, importance, timestamp, 
-                           emotional_valence, relationship_impact, tags
-                    FROM enhanced_memory 
-                    WHERE character_id = ? AND user_id = ?
-                    ORDER BY timestamp ASC
-                """, (self.character_id, self.user_id))
-                memories = cursor.fetchall()
-                return [
-                    {
-                        "content": memory[0],
-                        "type": memory[1],
-                        "importance": memory[2],
-                        "timestamp": memory[3],
-                        "emotional_valence": memory[4],
-                        "relationship_impact": memory[5],
-                        "tags": json.loads(memory[6]) if memory[6] else []
-                    }
-                    for memory in memories
-                ]
+            return list(self.iter_memories())
         except Exception as e:
             logger.error(f"❌ Failed to get all memories for summary: {e}")
         return []
@@ -1118,6 +1782,9 @@ class EnhancedMemorySystem:
 class PersonalDetailsExtractor:
     """Extracts personal details from text content"""
     
+    # Every pattern is compiled once, with word boundaries, on first use
+    _matcher: Optional[PatternMatcher] = None
+    
     def __init__(self):
         self.detail_patterns = {
             "name": [
@@ -1183,47 +1850,46 @@ class PersonalDetailsExtractor:
                 r"i have a (daughter|son) named ([^,\.]+)"
             ]
         }
+        if PersonalDetailsExtractor._matcher is None:
+            PersonalDetailsExtractor._matcher = PatternMatcher(self.detail_patterns)
     
     def extract_details(self, content: str) -> List[Dict[str, Any]]:
         """Extract personal details from content"""
         details = []
         content_lower = content.lower()
         
-        for detail_type, patterns in self.detail_patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, content_lower)
-                for match in matches:
+        for detail_type, match in self._matcher.finditer(content_lower):
+            detail_content = match.group(1)
+            
+            # Special handling for name patterns that might have multiple groups
+            if detail_type == "name" and len(match.groups()) > 1:
+                # For patterns like "name is ed" or "ed is name"
+                if match.group(1) in ['name', 'called', 'call'] and match.group(2) in ['ed', 'edward', 'edwin', 'eddie']:
+                    detail_content = match.group(2)
+                elif match.group(2) in ['name', 'called', 'call'] and match.group(1) in ['ed', 'edward', 'edwin', 'eddie']:
                     detail_content = match.group(1)
-                    
-                    # Special handling for name patterns that might have multiple groups
-                    if detail_type == "name" and len(match.groups()) > 1:
-                        # For patterns like "name is ed" or "ed is name"
-                        if match.group(1) in ['name', 'called', 'call'] and match.group(2) in ['ed', 'edward', 'edwin', 'eddie']:
-                            detail_content = match.group(2)
-                        elif match.group(2) in ['name', 'called', 'call'] and match.group(1) in ['ed', 'edward', 'edwin', 'eddie']:
-                            detail_content = match.group(1)
-                    
-                    if detail_type == "family":
-                        # Handle family members with names
-                        if len(match.groups()) > 1:
-                            detail_content = f"{match.group(1)}: {match.group(2)}"
-                    
-                    # Clean up the extracted content
-                    detail_content = detail_content.strip()
-                    if detail_content:
-                        # Capitalize names properly
-                        if detail_type == "name":
-                            detail_content = detail_content.title()
-                            # Handle "Ed" specifically
-                            if detail_content.lower() in ['ed', 'edward', 'edwin', 'eddie']:
-                                detail_content = "Ed"
-                        
-                        details.append({
-                            "type": detail_type,
-                            "content": detail_content,
-                            "confidence": 0.8,
-                            "source": "pattern_matching"
-                        })
+            
+            if detail_type == "family":
+                # Handle family members with names
+                if len(match.groups()) > 1:
+                    detail_content = f"{match.group(1)}: {match.group(2)}"
+            
+            # Clean up the extracted content
+            detail_content = detail_content.strip()
+            if detail_content:
+                # Capitalize names properly
+                if detail_type == "name":
+                    detail_content = detail_content.title()
+                    # Handle "Ed" specifically
+                    if detail_content.lower() in ['ed', 'edward', 'edwin', 'eddie']:
+                        detail_content = "Ed"
+                
+                details.append({
+                    "type": detail_type,
+                    "content": detail_content,
+                    "confidence": 0.8,
+                    "source": "pattern_matching"
+                })
         
         return details
 
@@ -1231,10 +1897,13 @@ class PersonalDetailsExtractor:
 class RelationshipTracker:
     """Tracks and manages relationship progression"""
     
-    def __init__(self, character_id: str, user_id: str):
+    def __init__(self, character_id: str, user_id: str, new_pair: bool = False):
         self.character_id = character_id
         self.user_id = user_id
         self.db_path = f"memory_databases/enhanced_{character_id}_{user_id}.db"
+        # Last stage read or written (this tracker is the only writer of the pair's row);
+        # a pair provisioned just now has no row to read
+        self._stage: Optional[Dict[str, Any]] = dict(_INITIAL_RELATIONSHIP_STAGE) if new_pair else None
     
     def update_relationship(self, interaction_impact: float):
         """Update relationship based on interaction impact"""
@@ -1285,6 +1954,7 @@ class RelationshipTracker:
                     stage = "close_friend"
                 
                 # Update database
+                last_interaction = datetime.now().isoformat()
                 cursor.execute("""
                     INSERT OR REPLACE INTO relationship_stages 
                     (character_id, user_id, stage, trust_level, familiarity,
@@ -1292,30 +1962,36 @@ class RelationshipTracker:
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, (
                     self.character_id, self.user_id, stage, trust_level, familiarity,
-                    datetime.now().isoformat(), count, pos_count, neg_count
+                    last_interaction, count, pos_count, neg_count
                 ))
                 
                 conn.commit()
+                self._stage = {
+                    "stage": stage,
+                    "trust_level": trust_level,
+                    "familiarity": familiarity,
+                    "interaction_count": count,
+                    "positive_interactions": pos_count,
+                    "negative_interactions": neg_count,
+                    "last_interaction": last_interaction
+                }
                 
         except Exception as e:
             logger.error(f"❌ Failed to update relationship: {e}")
     
     def get_relationship_stage(self) -> Dict[str, Any]:
-        """Get current relationship stage"""
+        """Get current relationship stage (cached until the next update)"""
+        if self._stage is not None:
+            return dict(self._stage)
         try:
             with sqlite3.connect(self.db_path) as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT stage, trust_level, familiarity, interaction_count,
-                           positive_interactions, negative_interactions, last_interaction
-                    FROM relationship_stages 
-                    WHERE character_id = ? AND user_id = ?
-                """, (self.character_id, self.user_id))
+                cursor.execute(_RELATIONSHIP_STAGE_SQL, (self.character_id, self.user_id))
                 
                 result = cursor.fetchone()
                 
                 if result:
-                    return {
+                    self._stage = {
                         "stage": result[0],
                         "trust_level": result[1],
                         "familiarity": result[2],
@@ -1325,15 +2001,8 @@ class RelationshipTracker:
                         "last_interaction": result[6]
                     }
                 else:
-                    return {
-                        "stage": "stranger",
-                        "trust_level": 0.0,
-                        "familiarity": 0.0,
-                        "interaction_count": 0,
-                        "positive_interactions": 0,
-                        "negative_interactions": 0,
-                        "last_interaction": None
-                    }
+                    self._stage = dict(_INITIAL_RELATIONSHIP_STAGE)
+                return dict(self._stage)
                     
         except Exception as e:
             logger.error(f"❌ Failed to get relationship stage: {e}")
@@ -1343,7 +2012,8 @@ class RelationshipTracker:
 class MemoryOptimizer:
     """Optimizes memory storage and retrieval"""
     
-    def __init__(self):
+    def __init__(self, ranker=None):
+        self.ranker = ranker or get_memory_ranker()
         self.optimization_rules = {
             "max_memories_per_type": 100,
             "min_importance_threshold": 0.1,
@@ -1352,20 +2022,11 @@ class MemoryOptimizer:
     
     def optimize_memory_access(self, memories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Optimize memory access patterns"""
-        # Sort by importance and recency
-        sorted_memories = sorted(
+        # Rank by the shared hybrid score, dropping memories below the importance threshold
+        return self.ranker.rank_records(
             memories,
-            key=lambda x: (x.get('importance', 0), x.get('timestamp', '')),
-            reverse=True
+            min_importance=self.optimization_rules['min_importance_threshold']
         )
-        
-        # Apply importance threshold
-        filtered_memories = [
-            memory for memory in sorted_memories
-            if memory.get('importance', 0) >= self.optimization_rules['min_importance_threshold']
-        ]
-        
-        return filtered_memories
 
 
 class ContextGenerator:
@@ -1408,50 +2069,6 @@ class ContextGenerator:
         return " | ".join(summary_parts) if summary_parts else "No context available"
 
 
-class AISummarizer:
-    """Modular AI-powered summarizer for memory sessions and periods."""
-    def __init__(self, model: str = "gpt-4", api_key: Optional[str] = None):
-        self.model = model
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        openai.api_key = self.api_key
-
-    def summarize_session(self, memories: List[Dict[str, Any]]) -> str:
-        """Summarize a session's memories using LLM."""
-        if not memories:
-            return "No memories to summarize."
-        text = "\n".join([m["content"] for m in memories])
-        prompt = f"Summarize the following conversation session in 2-3 sentences, focusing on key topics, emotions, and relationship changes.\n\n{text}"
-        try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[{"role": "system", "content": "You are a helpful AI memory summarizer."},
-                          {"role": "user", "content": prompt}],
-                max_tokens=256,
-                temperature=0.4
-            )
-            return response.choices[0].message["content"].strip()
-        except Exception as e:
-            return f"[ERROR] LLM summarization failed: {e}"
-
-    def consolidate_period(self, summaries: List[str]) -> str:
-        """Consolidate multiple session summaries into a higher-level summary."""
-        if not summaries:
-            return "No summaries to consolidate."
-        text = "\n".join(summaries)
-        prompt = f"Consolidate the following session summaries into a weekly or monthly theme, highlighting relationship progression and emotional trends.\n\n{text}"
-        try:
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[{"role": "system", "content": "You are a helpful AI memory summarizer."},
-                          {"role": "user", "content": prompt}],
-                max_tokens=256,
-                temperature=0.4
-            )
-            return response.choices[0].message["content"].strip()
-        except Exception as e:
-            return f"[ERROR] LLM consolidation failed: {e}"
-
-
 class RelationshipContextAssembler:
     """Modular relationship-aware context assembler."""
     def __init__(self, tracker=None):
@@ -1468,9 +2085,9 @@ class RelationshipContextAssembler:
             relevant = [m for m in memories if m.get("memory_type") in ("personal", "emotion", "relationship")]
         else:
             relevant = [m for m in memories if m.get("memory_type") != "private"]
-        # Sort by importance and recency
-        relevant = sorted(relevant, key=lambda x: (x.get("importance", 0), x.get("timestamp", "")), reverse=True)
-        return "\n".join([m["content"] for m in relevant[:10]])
+        # Rank by the shared hybrid score (importance, recency, emotion)
+        relevant = get_memory_ranker().rank_records(relevant, 10)
+        return "\n".join([m["content"] for m in relevant])
 
 
 class EmotionalIntelligence:
@@ -1503,28 +2120,79 @@ def create_enhanced_memory_system(character_id: str, user_id: str) -> EnhancedMe
     return EnhancedMemorySystem(character_id, user_id)
 
 
-# Global registry for memory systems
-_memory_systems: Dict[str, EnhancedMemorySystem] = {}
+# Stateless helpers shared by every memory system instance
+_shared_subsystems: Dict[type, Any] = {}
+_shared_subsystems_lock = threading.Lock()
+
+
+def _shared_subsystem(cls: type) -> Any:
+    """Process-wide instance of a stateless helper class"""
+    with _shared_subsystems_lock:
+        if cls not in _shared_subsystems:
+            _shared_subsystems[cls] = cls()
+        return _shared_subsystems[cls]
+
+
+def shared_object_ids() -> Set[int]:
+    """ids of objects every instance references (excluded from per-instance footprint)"""
+    return {id(obj) for obj in _shared_subsystems.values()} | {id(get_memory_ranker())}
+
+
+# Global registry for memory systems (LRU/idle bounded, see config "registry")
+_memory_registry = MemorySystemRegistry(EnhancedMemorySystem)
+
+
+def get_memory_registry() -> MemorySystemRegistry:
+    """Registry backing get_enhanced_memory_system()"""
+    return _memory_registry
+
 
 def get_enhanced_memory_system(character_id: str, user_id: str) -> Optional[EnhancedMemorySystem]:
     """Get or create an enhanced memory system instance"""
-    memory_key = f"{character_id}_{user_id}"
-    
-    if memory_key not in _memory_systems:
-        try:
-            _memory_systems[memory_key] = EnhancedMemorySystem(character_id, user_id)
-        except Exception as e:
-            logger.error(f"❌ Failed to create enhanced memory system: {e}")
-            return None
-    
-    return _memory_systems[memory_key]
+    try:
+        return _memory_registry.get(character_id, user_id)
+    except Exception as e:
+        logger.error(f"❌ Failed to create enhanced memory system: {e}")
+        return None
+
+
+def get_memory_registry_stats() -> Dict[str, Any]:
+    """Registry counters plus per-instance memory footprint"""
+    return _memory_registry.stats(shared_object_ids())
 
 
 def cleanup_memory_systems():
     """Clean up memory system instances"""
-    global _memory_systems
-    _memory_systems.clear()
-    logger.info("✅ Enhanced memory systems cleaned up")
+    closed = _memory_registry.close_all()
+    logger.info(f"✅ Enhanced memory systems cleaned up ({closed} closed)")
+
+
+def hot_statements(character_id: str, user_id: str) -> List[Tuple[str, str, List[Any]]]:
+    """
+    (name, sql, params) of EnhancedMemorySystem's per-turn and dashboard reads.
+
+    Used by the query-plan audit (scripts/memory_maintenance.py --action query-audit).
+    """
+    pair = [character_id, user_id]
+    candidates_sql, candidates_params = MemoryRanker.candidate_query(
+        0.3, retrieval_filter(), pair=(character_id, user_id)
+    )
+    return [
+        ("ranker_candidates", candidates_sql, candidates_params),
+        ("memories_by_type", _MEMORIES_BY_TYPE_SQL, [*pair, "conversation", 50]),
+        ("memories_by_tags", _MEMORIES_BY_TAGS_SQL.format(tagged_memories=tagged_memories_sql(2, match_all=True),
+                                                          type_clause=""), ["diary", "session", *pair, 50]),
+        ("identity_records", _IDENTITY_RECORDS_SQL, [*_IDENTITY_TAGS, *pair, 2]),
+        ("day_memories", _DAY_MEMORIES_SQL.format(placeholders=", ".join("?" for _ in SUMMARY_MEMORY_TYPES)),
+         [*pair, *day_bounds(datetime.now().strftime("%Y-%m-%d")), *SUMMARY_MEMORY_TYPES]),
+        ("diary_hashtags", hashtag_search_sql(2), hashtag_search_params(["#dreams", "#family"], *pair, 2)),
+        ("typed_memory_count", _TYPED_MEMORY_COUNT_SQL.format(
+            operator="NOT IN", placeholders=", ".join("?" for _ in SUMMARY_MEMORY_TYPES)
+        ), [*pair, *SUMMARY_MEMORY_TYPES]),
+        ("memory_counters", COUNTERS_SQL, pair),
+        ("personal_details", _PERSONAL_DETAILS_SQL, pair),
+        ("relationship_stage", _RELATIONSHIP_STAGE_SQL, pair),
+    ]
 
 
 # Export main classes and functions
@@ -1536,5 +2204,8 @@ __all__ = [
     'ContextGenerator',
     'create_enhanced_memory_system',
     'get_enhanced_memory_system',
-    'cleanup_memory_systems'
+    'get_memory_registry',
+    'get_memory_registry_stats',
+    'cleanup_memory_systems',
+    'hot_statements'
 ] 
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""
+Write-time enrichment of enhanced memories.
+
+Topic category, identity/personal flags and the emotion summary are pure
+functions of a memory's content (and tags), so they are computed once when the
+memory is stored and persisted as indexed columns. Reads only project them.
+"""
+
+import json
+import sqlite3
+import logging
+from typing import Dict, List, Any, Optional, Sequence
+
+from ..utils.matcher import KeywordMatcher, KeywordScan
+
+logger = logging.getLogger(__name__)
+
+# Columns added to enhanced_memory, in insert order
+ENRICHMENT_COLUMNS = {
+    "topic_category": "TEXT",
+    "is_identity": "INTEGER DEFAULT 0",
+    "is_personal": "INTEGER DEFAULT 0",
+    "emotion_label": "TEXT",
+    "emotion_summary": "TEXT"
+}
+
+_ENRICHMENT_INDEXES = {
+    "idx_enhanced_memory_topic": "topic_category",
+    "idx_enhanced_memory_identity": "is_identity, is_personal",
+    "idx_enhanced_memory_emotion": "emotion_label"
+}
+
+_TOPICS = {
+    "family": ["family", "parents", "mom", "dad", "kids", "children", "sister", "brother"],
+    "work": ["work", "job", "career", "boss", "colleague", "office", "project"],
+    "health": ["health", "sick", "illness", "doctor", "hospital", "pain", "medicine"],
+    "relationships": ["relationship", "partner", "boyfriend", "girlfriend", "spouse", "marriage"],
+    "hobbies": ["hobby", "music", "art", "sport", "game", "reading", "writing"],
+    "travel": ["travel", "trip", "vacation", "holiday", "visit", "place", "country"],
+    "emotions": ["feel", "emotion", "mood", "happy", "sad", "angry", "excited"]
+}
+
+# Every topic_category value (memories matching no topic are "general")
+TOPIC_CATEGORIES = tuple(_TOPICS) + ("general",)
+
+_POSITIVE_WORDS = ['happy', 'excited', 'great', 'wonderful', 'amazing', 'love', 'care', 'support']
+_NEGATIVE_WORDS = ['sad', 'angry', 'worried', 'scared', 'frustrated', 'hate', 'dislike', 'stress']
+_INTENSITY_WORDS = ['very', 'really', 'extremely', 'incredibly', 'so']
+
+_IDENTITY_TAGS = ['identity', 'name']
+_IDENTITY_PATTERNS = ['my name', 'i am', 'i\'m', 'call me', 'ed', 'edward']
+_PERSONAL_TAGS = ['personal_info', 'personal_detail']
+_PERSONAL_PATTERNS = ['i live', 'i work', 'my family', 'my job']
+
+# Every enrichment lexicon, matched in a single pass per memory
+_ENRICHMENT_KEYWORDS = KeywordMatcher({
+    **{f"topic_{topic}": keywords for topic, keywords in _TOPICS.items()},
+    "positive": _POSITIVE_WORDS,
+    "negative": _NEGATIVE_WORDS,
+    "intensity": _INTENSITY_WORDS,
+    "identity": _IDENTITY_PATTERNS,
+    "personal": _PERSONAL_PATTERNS
+})
+
+
+def categorize_topic(content: str, scan: Optional[KeywordScan] = None) -> str:
+    """Categorize memory topic"""
+    if scan is None:
+        scan = _ENRICHMENT_KEYWORDS.scan(content)
+    topic = scan.first(f"topic_{topic}" for topic in _TOPICS)
+    return topic[len("topic_"):] if topic else "general"
+
+
+def extract_emotional_context(content: str, scan: Optional[KeywordScan] = None) -> Dict[str, Any]:
+    """Extract emotional context (valence label, intensity, indicator counts) from memory content"""
+    if scan is None:
+        scan = _ENRICHMENT_KEYWORDS.scan(content)
+
+    positive_count = scan.count("positive")
+    negative_count = scan.count("negative")
+    intensity = scan.count("intensity") * 0.2
+
+    if positive_count > negative_count:
+        valence = "positive"
+        intensity += positive_count * 0.1
+    elif negative_count > positive_count:
+        valence = "negative"
+        intensity += negative_count * 0.1
+    else:
+        valence = "neutral"
+        intensity = 0.3
+
+    return {
+        "valence": valence,
+        "intensity": min(1.0, intensity),
+        "positive_indicators": positive_count,
+        "negative_indicators": negative_count
+    }
+
+
+def classify_identity(content: str, tags: Sequence[str], scan: Optional[KeywordScan] = None) -> Dict[str, bool]:
+    """Flag identity/name memories and other personal-detail memories"""
+    if scan is None:
+        scan = _ENRICHMENT_KEYWORDS.scan(content)
+    is_identity = any(tag in tags for tag in _IDENTITY_TAGS) or scan.has("identity")
+    is_personal = not is_identity and (
+        any(tag in tags for tag in _PERSONAL_TAGS) or scan.has("personal")
+    )
+    return {"is_identity": is_identity, "is_personal": is_personal}
+
+
+def enrich_memory(content: str, tags: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Compute every enrichment column for one memory.
+
+    Returns:
+        Dict keyed by ENRICHMENT_COLUMNS
+    """
+    scan = _ENRICHMENT_KEYWORDS.scan(content)
+    emotion = extract_emotional_context(content, scan)
+    flags = classify_identity(content, tags or [], scan)
+    return {
+        "topic_category": categorize_topic(content, scan),
+        "is_identity": int(flags["is_identity"]),
+        "is_personal": int(flags["is_personal"]),
+        "emotion_label": emotion["valence"],
+        "emotion_summary": json.dumps(emotion)
+    }
+
+
+def project_enrichment(memory: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Expose persisted enrichment on a memory row dict.
+
+    Adds ``emotional_context`` (decoded emotion_summary) and boolean flags.
+    Rows written before enrichment existed are enriched on the fly.
+    """
+    if memory.get("topic_category") is None or memory.get("emotion_summary") is None:
+        tags = memory.get("tags") or []
+        if isinstance(tags, str):
+            try:
+                tags = json.loads(tags)
+            except (ValueError, TypeError):
+                tags = []
+        memory.update(enrich_memory(memory.get("content", ""), tags))
+    memory["emotional_context"] = json.loads(memory["emotion_summary"])
+    memory["is_identity"] = bool(memory.get("is_identity"))
+    memory["is_personal"] = bool(memory.get("is_personal"))
+    return memory
+
+
+def ensure_enrichment_columns(conn: sqlite3.Connection) -> List[str]:
+    """
+    Add missing enrichment columns and their indexes to enhanced_memory.
+
+    Returns:
+        Names of the columns added by this call
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(enhanced_memory)")}
+    added = []
+    for column, definition in ENRICHMENT_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE enhanced_memory ADD COLUMN {column} {definition}")
+            added.append(column)
+    for index_name, columns in _ENRICHMENT_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON enhanced_memory ({columns})")
+    return added
+
+
+def backfill_enrichment(conn: sqlite3.Connection, batch_size: int = 1000) -> int:
+    """
+    Enrich rows that have no persisted enrichment yet.
+
+    All columns are written together, so a NULL topic_category (an indexed
+    lookup) identifies the rows to fill.
+
+    Returns:
+        Number of rows updated
+    """
+    ensure_enrichment_columns(conn)
+    updated = 0
+    while True:
+        rows = conn.execute("""
+            SELECT rowid, content, tags FROM enhanced_memory
+            WHERE topic_category IS NULL
+            LIMIT ?
+        """, (batch_size,)).fetchall()
+        if not rows:
+            break
+        updates = []
+        for rowid, content, tags in rows:
+            try:
+                tag_list = json.loads(tags) if tags else []
+            except (ValueError, TypeError):
+                tag_list = []
+            values = enrich_memory(content or "", tag_list)
+            updates.append((*values.values(), rowid))
+        conn.executemany(f"""
+            UPDATE enhanced_memory
+            SET {', '.join(f'{column} = ?' for column in ENRICHMENT_COLUMNS)}
+            WHERE rowid = ?
+        """, updates)
+        updated += len(updates)
+    if updated:
+        logger.info(f"✅ Backfilled enrichment for {updated} memories")
+    return updated
@@ -0,0 +1,138 @@
+"""
+Streaming text exports: diary downloads and conversation history exports.
+
+The download routes used to build the whole diary or history as one string
+before responding, so a long relationship cost its full size in memory per
+request. These helpers turn an async stream of text pieces (diary job
+sections, history pages read one at a time) into response body chunks of
+about ``chunk_bytes``, gzip-compressed on the fly when the client accepts it:
+
+    compress = accepts_gzip(request.headers.get("accept-encoding"))
+    body = encode_chunks(history_export(memory, "jsonl"), compress)
+    StreamingResponse(body, media_type=HISTORY_EXPORT_FORMATS["jsonl"], ...)
+
+Only one history page (``page_size`` memories) and one output chunk are held
+at a time. Settings come from the "exports" section of
+config/memory_config.json.
+"""
+
+import json
+import zlib
+from dataclasses import dataclass, fields
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional
+
+from ..utils.config import load_memory_config
+
+# Export format -> media type of the response
+HISTORY_EXPORT_FORMATS = {
+    "jsonl": "application/x-ndjson; charset=utf-8",
+    "txt": "text/plain; charset=utf-8"
+}
+
+
+@dataclass
+class ExportSettings:
+    """Page and chunk sizes of streamed exports."""
+    page_size: int = 200
+    chunk_bytes: int = 65536
+    gzip_level: int = 6
+
+    @classmethod
+    def from_config(cls) -> "ExportSettings":
+        """Build settings from the "exports" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("exports").items() if k in known})
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Whether an Accept-Encoding header allows a gzip response.
+
+    gzip (or x-gzip) must be listed, or ``*`` with gzip not refused, and not
+    with ``q=0``.
+    """
+    if not accept_encoding:
+        return False
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+    for name in ("gzip", "x-gzip"):
+        if name in qualities:
+            return qualities[name] > 0
+    return qualities.get("*", 0) > 0
+
+
+async def encode_chunks(pieces: AsyncIterable[str], compress: bool,
+                        settings: Optional[ExportSettings] = None) -> AsyncIterator[bytes]:
+    """
+    Encode streamed text as UTF-8 response chunks, gzip-compressed if ``compress``.
+
+    Pieces are gathered until about ``chunk_bytes`` are pending, so small
+    pieces do not become one tiny write each.
+    """
+    settings = settings or ExportSettings.from_config()
+    compressor = zlib.compressobj(settings.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    pending: List[bytes] = []
+    pending_bytes = 0
+    async for piece in pieces:
+        data = piece.encode("utf-8")
+        pending.append(data)
+        pending_bytes += len(data)
+        if pending_bytes < settings.chunk_bytes:
+            continue
+        chunk = b"".join(pending)
+        pending, pending_bytes = [], 0
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    chunk = b"".join(pending)
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def history_record(memory: Dict[str, Any]) -> Dict[str, Any]:
+    """Exported fields of one history memory (as in the conversation-history route)."""
+    return {
+        "id": memory["id"],
+        "timestamp": memory["timestamp"],
+        "content": memory["content"],
+        "importance": memory["importance"] or 0,
+        "memory_type": memory["type"] or "conversation"
+    }
+
+
+def format_history_line(memory: Dict[str, Any], export_format: str) -> str:
+    """One memory as a line of the export: a JSON object (jsonl) or "[timestamp] content" (txt)."""
+    if export_format == "jsonl":
+        return json.dumps(history_record(memory), ensure_ascii=False, default=str) + "\n"
+    return f"[{memory['timestamp']}] {memory['content']}\n"
+
+
+async def history_export(memory, export_format: str, memory_types: Optional[List[str]] = None,
+                         settings: Optional[ExportSettings] = None) -> AsyncIterator[str]:
+    """
+    A pair's conversation history, oldest first, as export lines.
+
+    Args:
+        memory: AsyncMemorySystem of the pair
+        export_format: A key of HISTORY_EXPORT_FORMATS
+        memory_types: Only these memory types (all but rollup summaries if None)
+        settings: Page size (from config if None)
+    """
+    settings = settings or ExportSettings.from_config()
+    async for row in memory.iter_memories(
+        settings.page_size, memory_types=memory_types, oldest_first=True, conversation_only=True
+    ):
+        yield format_history_line(row, export_format)
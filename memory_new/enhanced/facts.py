@@ -0,0 +1,437 @@
+"""
+Per-memory fact extraction shared by the diary and profile builders.
+
+The diary day entries, their hashtags, the factual summary and the user
+profile summary each walked the same memories, filtered out system lines with
+the same fifteen ``startswith`` checks and ran their own keyword batteries.
+extract_memory_facts() makes one pass over a memory instead: one
+SubstringMatcher scan finds every keyword any of them checks, and the
+sentence and word splits are done once. The result is a MemoryFacts bundle
+the consumers read:
+
+    facts = memory_facts(memory)          # cached by memory id
+    if not facts.system and "dream" in facts.terms:
+        ...
+    factual_data = diary_facts(day_memories)
+
+Bundles are cached by memory id (and a hash of the content, so an edited
+memory is extracted again), so a day's memories are extracted once across its
+entry, hashtags and facts, and again only if they change. Settings come from
+the "fact_extraction" section of config/memory_config.json.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from ..utils.config import load_memory_config
+from ..utils.matcher import SubstringMatcher
+
+# Content of system, debug and diary lines (never part of the conversation)
+SYSTEM_PREFIXES = (
+    '🔧', '📝', '🚀', '✅', '⚠️', '❌', '🎭', '💭', '🔍', '🤖', '📚', '📊', '🎯', '🔄', '=' * 80
+)
+
+# Openings of character responses (the rest are user messages, unless long)
+AGENT_OPENINGS = ('Ah,', 'You know,', 'That sounds', 'I understand', 'Let me', 'Well,', 'Interesting', 'Wow,')
+
+DREAM_INDICATORS = [
+    'i had a dream', 'i dreamed', 'in my dream', 'dreaming about',
+    'recurring dream', 'strange dream', 'disturbing dream',
+    'i dream about', 'my dreams', 'nightmares about'
+]
+
+RELATIONSHIP_KEYWORDS = {
+    'father': ['father', 'dad', 'daddy'],
+    'mother': ['mother', 'mom', 'mommy'],
+    'boss': ['boss', 'supervisor', 'manager'],
+    'partner': ['boyfriend', 'girlfriend', 'partner', 'spouse'],
+    'friend': ['friend', 'buddy', 'pal'],
+    'colleague': ['colleague', 'coworker', 'workmate'],
+    'authority_figure': ['teacher', 'professor', 'authority']
+}
+
+NEGATIVE_RELATIONSHIP_WORDS = ['strict', 'harsh', 'fear', 'afraid', 'scary']
+
+FEAR_PATTERNS = [
+    'i have a fear', 'i\'m afraid', 'i fear', 'makes me anxious',
+    'i get nervous', 'terrifies me', 'scares me', 'phobia',
+    'i panic when', 'anxiety about', 'worried about'
+]
+
+BREAKTHROUGH_INDICATORS = [
+    'i understand now', 'it makes sense', 'i realize', 'i see now',
+    'that\'s helpful', 'insight', 'breakthrough', 'aha moment',
+    'now i get it', 'this explains', 'i\'m starting to see'
+]
+
+THERAPEUTIC_PATTERNS = [
+    'from a psychoanalytic', 'dreams often', 'unconscious mind',
+    'repressed', 'childhood experiences', 'this could represent',
+    'symbolize', 'deeper meaning', 'root of', 'stems from'
+]
+
+EVENT_PATTERNS = [
+    'today i', 'yesterday i', 'we went', 'i did', 'we talked about',
+    'it happened when', 'last time', 'during', 'while i was'
+]
+
+QUOTABLE_INDICATORS = [
+    'always remember', 'the key is', 'what i learned', 'important thing',
+    'advice', 'wisdom', 'profound', 'meaningful', 'life lesson'
+]
+
+BROAD_TOPICS = {
+    'mosaic project': ['mosaic'],
+    'Alan Turing': ['alan turing'],
+    'Little Venice': ['little venice'],
+    'swimming': ['swim'],
+    'BBQ': ['bbq'],
+    'rain': ['rain'],
+    'inspiration': ['inspiration'],
+    'spontaneity': ['spontan'],
+    'warm weather': ['warm'],
+    'digital concepts': ['digital'],
+    'dream analysis': ['dream', 'dreams'],
+    'unconscious mind': ['unconscious', 'subconscious'],
+    'family dynamics': ['father', 'mother', 'family'],
+    'authority figures': ['authority', 'boss'],
+    'psychoanalytic theory': ['psychoanalyt', 'analyst'],
+    'repressed emotions': ['repress', 'repressed'],
+    'anxiety analysis': ['anxiety', 'anxious'],
+    'childhood experiences': ['childhood', 'child'],
+    'feelings of confinement': ['trapped', 'confined']
+}
+
+# Keywords the diary entry and hashtag generators test the day's user messages for
+DIARY_KEYWORDS = [
+    'dream', 'nightmare', 'mother', 'mom', 'father', 'dad', 'family', 'work', 'job', 'love',
+    'relationship', 'advice', 'help', 'inspiration', 'inspire', 'natural', 'warm', 'weather',
+    'swim', 'swimming', 'down', 'tired', 'tricky', 'encounter', 'meeting',
+    'good', 'great', 'happy', 'hope', 'think', 'wonder', 'reflect', 'difficult', 'struggle', 'fear',
+    'share', 'personal', 'private', 'close', 'trust'
+]
+
+_FACT_KEYWORDS = SubstringMatcher(
+    DREAM_INDICATORS + ['dream', 'nightmare']
+    + [keyword for keywords in RELATIONSHIP_KEYWORDS.values() for keyword in keywords]
+    + NEGATIVE_RELATIONSHIP_WORDS + FEAR_PATTERNS + BREAKTHROUGH_INDICATORS + THERAPEUTIC_PATTERNS
+    + EVENT_PATTERNS + QUOTABLE_INDICATORS
+    + [keyword for keywords in BROAD_TOPICS.values() for keyword in keywords]
+    + ['yuri', 'brother', 'radiohead', 'you know'] + DIARY_KEYWORDS
+)
+
+# Terms that make extract_memory_facts split the content into sentences or scan its words
+_SENTENCE_TERMS = frozenset(
+    DREAM_INDICATORS + FEAR_PATTERNS + BREAKTHROUGH_INDICATORS + THERAPEUTIC_PATTERNS + EVENT_PATTERNS
+)
+_RELATIONSHIP_TERMS = frozenset(keyword for keywords in RELATIONSHIP_KEYWORDS.values() for keyword in keywords)
+
+# BROAD_TOPICS inverted: keyword -> topics it marks, and each topic's position for ordering
+_TOPICS_BY_TERM = {
+    keyword: [topic for topic, topic_keywords in BROAD_TOPICS.items() if keyword in topic_keywords]
+    for keywords in BROAD_TOPICS.values() for keyword in keywords
+}
+_TOPIC_ORDER = {topic: position for position, topic in enumerate(BROAD_TOPICS)}
+
+_TALKED_ABOUT = re.compile(r'talked about (\w+)')
+
+# Fact lists of extract_factual_data_for_diary that are deduplicated after merging
+DEDUPLICATED_FIELDS = (
+    'dreams_described', 'relationships_mentioned', 'fears_and_anxieties', 'breakthrough_moments',
+    'therapeutic_insights', 'specific_events', 'quotes_and_sayings'
+)
+
+
+@dataclass
+class FactExtractionSettings:
+    """Size of the per-memory fact cache."""
+    cache_size: int = 50000
+
+    @classmethod
+    def from_config(cls) -> "FactExtractionSettings":
+        """Build settings from the "fact_extraction" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("fact_extraction").items() if k in known})
+
+
+class MemoryFacts(NamedTuple):
+    """What one memory contributes to the diary and profile (see extract_memory_facts)."""
+    system: bool
+    agent: bool
+    terms: FrozenSet[str]
+    facts: Dict[str, Any]
+    talked_about: Tuple[str, ...]
+
+
+def is_system_content(content: str) -> bool:
+    """Whether content is a system, debug or diary line rather than conversation."""
+    return content.startswith(SYSTEM_PREFIXES)
+
+
+def _first_present(candidates: List[str], terms: FrozenSet[str]) -> Optional[str]:
+    if terms.isdisjoint(candidates):
+        return None
+    for candidate in candidates:
+        if candidate in terms:
+            return candidate
+    return None
+
+
+def _sentences_with(sentences: List[Tuple[str, str]], pattern: str, min_length: int) -> List[str]:
+    """Stripped sentences containing pattern, longer than min_length."""
+    found = []
+    for sentence, lower in sentences:
+        if pattern in lower:
+            stripped = sentence.strip()
+            if stripped and len(stripped) > min_length:
+                found.append(stripped)
+    return found
+
+
+def extract_memory_facts(content: str) -> MemoryFacts:
+    """
+    Extract everything the diary and profile builders read from one memory.
+
+    Args:
+        content: Memory content
+
+    Returns:
+        MemoryFacts: ``system`` (a line the diary skips), ``agent`` (reads
+        like a character response), ``terms`` (the keywords it contains,
+        lowercased substrings), ``facts`` (this memory's share of
+        extract_factual_data_for_diary: dreams, relationships, fears,
+        breakthroughs, therapeutic insights, events, quotes, topics, pets,
+        family and music) and ``talked_about`` ("talked about X" topics)
+    """
+    system = is_system_content(content)
+    terms = frozenset(_FACT_KEYWORDS.find(content))
+    agent = (
+        content.startswith(AGENT_OPENINGS) or
+        len(content) > 200 or
+        'you know' in terms and len(content) > 100
+    )
+    talked_about = tuple(_TALKED_ABOUT.findall(content)) if 'talked about' in content else ()
+    if system:
+        return MemoryFacts(True, agent, terms, {}, talked_about)
+
+    facts: Dict[str, Any] = {}
+    sentences = []
+    if not terms.isdisjoint(_SENTENCE_TERMS):
+        sentences = [(sentence, sentence.lower()) for sentence in content.split('.')]
+
+    indicator = _first_present(DREAM_INDICATORS, terms)
+    if indicator:
+        facts['dreams_described'] = [{
+            'description': description,
+            'type': 'recurring' if 'recurring' in description.lower() else 'single',
+            'emotional_tone': 'disturbing' if any(
+                word in description.lower() for word in ['disturbing', 'nightmare', 'scary', 'frightening']
+            ) else 'neutral'
+        } for description in _sentences_with(sentences, indicator, 20)]
+
+    relationships = []
+    words = None
+    for rel_type, keywords in (RELATIONSHIP_KEYWORDS.items() if not terms.isdisjoint(_RELATIONSHIP_TERMS) else ()):
+        keyword = _first_present(keywords, terms)
+        if not keyword:
+            continue
+        if words is None:
+            words = content.split()
+            lowered_words = [word.lower() for word in words]
+            emotional_context = 'negative' if any(
+                negative in terms for negative in NEGATIVE_RELATIONSHIP_WORDS
+            ) else 'neutral'
+        for i, word in enumerate(lowered_words):
+            if keyword in word:
+                relationships.append({
+                    'type': rel_type,
+                    'keyword': keyword,
+                    'context': ' '.join(words[max(0, i - 5):min(len(words), i + 10)]),
+                    'emotional_context': emotional_context
+                })
+    if relationships:
+        facts['relationships_mentioned'] = relationships
+
+    pattern = _first_present(FEAR_PATTERNS, terms)
+    if pattern:
+        facts['fears_and_anxieties'] = [{
+            'description': description,
+            'trigger': pattern,
+            'severity': 'high' if any(word in description.lower() for word in ['terrif', 'panic', 'phobia']) else 'moderate'
+        } for description in _sentences_with(sentences, pattern, 10)]
+
+    indicator = _first_present(BREAKTHROUGH_INDICATORS, terms)
+    if indicator:
+        facts['breakthrough_moments'] = [
+            {'insight': insight, 'trigger': indicator, 'emotional_impact': 'positive'}
+            for insight in _sentences_with(sentences, indicator, 15)
+        ]
+
+    pattern = _first_present(THERAPEUTIC_PATTERNS, terms)
+    if pattern:
+        facts['therapeutic_insights'] = [{
+            'insight': insight,
+            'type': 'psychoanalytic' if 'psychoanalytic' in insight.lower() else 'general',
+            'focus': 'dreams' if 'dream' in insight.lower() else 'general'
+        } for insight in _sentences_with(sentences, pattern, 20)]
+
+    pattern = _first_present(EVENT_PATTERNS, terms)
+    if pattern:
+        facts['specific_events'] = [{
+            'event': event,
+            'timeframe': 'recent' if any(time in event.lower() for time in ['today', 'yesterday', 'recently']) else 'past'
+        } for event in _sentences_with(sentences, pattern, 15)]
+
+    if 30 < len(content) < 200 and _first_present(QUOTABLE_INDICATORS, terms):
+        facts['quotes_and_sayings'] = [{'quote': content, 'category': 'wisdom', 'length': len(content)}]
+
+    topics = sorted({topic for term in terms for topic in _TOPICS_BY_TERM.get(term, ())}, key=_TOPIC_ORDER.__getitem__)
+    if topics:
+        facts['conversation_topics'] = topics
+    if 'yuri' in terms:
+        facts['pets'] = [{'type': 'dog', 'name': 'yuri'}]
+        if 'brother' in terms:
+            facts['family_members'] = [{'relation': 'brother', 'name': 'yuri'}]
+    if 'radiohead' in terms:
+        facts['music'] = ['Radiohead']
+
+    return MemoryFacts(False, agent, terms, {key: value for key, value in facts.items() if value}, talked_about)
+
+
+class FactCache:
+    """LRU of MemoryFacts keyed by memory id and content hash (thread-safe)."""
+
+    def __init__(self, size: int):
+        self.size = max(int(size), 0)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], MemoryFacts]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, memory: Dict[str, Any]) -> MemoryFacts:
+        """Facts of a memory dict (``id`` and ``content``), extracted on a miss."""
+        content = memory.get('content') or ''
+        memory_id = memory.get('id')
+        if not memory_id or not self.size:
+            return extract_memory_facts(content)
+        key = (memory_id, hash(content))
+        with self._lock:
+            facts = self._entries.get(key)
+            if facts is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return facts
+        facts = extract_memory_facts(content)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = facts
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return facts
+
+    def clear(self):
+        """Drop every cached bundle."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cached bundles, hits and misses."""
+        with self._lock:
+            return {"cached": len(self._entries), "size": self.size, "hits": self.hits, "misses": self.misses}
+
+
+_cache: Optional[FactCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_fact_cache() -> FactCache:
+    """Process-wide fact cache (sized from the config on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FactCache(FactExtractionSettings.from_config().cache_size)
+        return _cache
+
+
+def memory_facts(memory: Dict[str, Any]) -> MemoryFacts:
+    """Facts of one memory dict, from the process-wide cache."""
+    return get_fact_cache().get(memory)
+
+
+def empty_diary_facts() -> Dict[str, Any]:
+    """The structure diary_facts() fills (no memories)."""
+    return {
+        'conversation_topics': [],
+        'family_members': [],
+        'pets': [],
+        'preferences': {
+            'food': [],
+            'music': [],
+            'hobbies': [],
+            'places': []
+        },
+        'personal_info': {},
+        'emotional_patterns': [],
+        'actual_conversations': [],
+        # Enhanced fields for specific content
+        'dreams_described': [],
+        'relationships_mentioned': [],
+        'fears_and_anxieties': [],
+        'breakthrough_moments': [],
+        'therapeutic_insights': [],
+        'specific_events': [],
+        'quotes_and_sayings': []
+    }
+
+
+def diary_facts(memories: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Factual data of the diary and profile summaries, folded from the memories' fact bundles.
+
+    Args:
+        memories: Memory dicts (``id``, ``content``, ``timestamp``, ``importance``), oldest first
+
+    Returns:
+        The extract_factual_data_for_diary structure: conversation topics,
+        family, pets, preferences, actual conversations and the enhanced fact
+        lists (deduplicated)
+    """
+    factual_data = empty_diary_facts()
+    for memory in memories:
+        facts = memory_facts(memory)
+        if facts.system:
+            continue
+        content = memory.get('content', '')
+
+        # Store actual conversation content
+        if len(content) > 10 and not content.startswith('📖'):
+            factual_data['actual_conversations'].append({
+                'content': content,
+                'timestamp': memory.get('timestamp', ''),
+                'importance': memory.get('importance', 0)
+            })
+
+        extracted = facts.facts
+        for field in DEDUPLICATED_FIELDS:
+            if field in extracted:
+                factual_data[field].extend(extracted[field])
+        for topic in extracted.get('conversation_topics', ()):
+            if topic not in factual_data['conversation_topics']:
+                factual_data['conversation_topics'].append(topic)
+        if 'pets' in extracted and not any(pet['name'].lower() == 'yuri' for pet in factual_data['pets']):
+            factual_data['pets'].extend(extracted['pets'])
+        if 'family_members' in extracted and not any(
+            member['name'].lower() == 'yuri' for member in factual_data['family_members']
+        ):
+            factual_data['family_members'].extend(extracted['family_members'])
+        for music in extracted.get('music', ()):
+            if music not in factual_data['preferences']['music']:
+                factual_data['preferences']['music'].append(music)
+
+    # Deduplicate all enhanced fields
+    for field in DEDUPLICATED_FIELDS:
+        factual_data[field] = [dict(t) for t in {tuple(d.items()) for d in factual_data[field]}]
+    return factual_data
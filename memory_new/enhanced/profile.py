@@ -0,0 +1,336 @@
+"""
+Materialized user profiles.
+
+Name, age, location, family, work and pets are extracted from each memory as
+it is written and merged into one ``user_profile`` row per pair, keyed by
+(character_id, user_id). Every value keeps a confidence and its provenance
+(source memory, timestamp and extraction rule), so the chat path reads the
+whole profile with a single primary-key lookup instead of re-parsing
+conversation history every turn.
+
+``memory_count`` on the same row is kept current by triggers on
+enhanced_memory, so callers never need a COUNT(*).
+"""
+
+import re
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from ..utils.compression import inflate_content
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TABLE = "user_profile"
+
+PROFILE_FIELDS = ("name", "age", "location", "sister", "brother", "parents", "work", "pet")
+
+# Fields that accumulate several values; the others hold the best current value
+MULTI_VALUED_FIELDS = frozenset({"sister", "brother", "parents"})
+MAX_VALUES_PER_FIELD = 5
+
+# A newer single value replaces the current one unless it is this much less certain
+SUPERSEDE_MARGIN = 0.2
+
+# Derived memories restate what is already in the profile
+SKIPPED_MEMORY_TYPES = frozenset({
+    "diary", "session_diary", "daily_diary",
+    "session_summary", "weekly_summary", "monthly_summary"
+})
+
+# The character's own words are weaker evidence than the user's
+RESPONSE_MEMORY_TYPES = frozenset({"response", "character_response"})
+RESPONSE_CONFIDENCE_FACTOR = 0.5
+
+_PROFILE_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {PROFILE_TABLE} (
+        character_id TEXT NOT NULL,
+        user_id TEXT NOT NULL,
+        profile TEXT NOT NULL DEFAULT '{{}}',
+        memory_count INTEGER NOT NULL DEFAULT 0,
+        updated_at TEXT,
+        PRIMARY KEY (character_id, user_id)
+    )
+    """,
+    # INSERT OR REPLACE of an existing id removes the old row without firing
+    # delete triggers, so it must not count twice
+    f"""
+    CREATE TRIGGER IF NOT EXISTS user_profile_count_bi BEFORE INSERT ON enhanced_memory
+    WHEN EXISTS (SELECT 1 FROM enhanced_memory WHERE id = new.id) BEGIN
+        UPDATE {PROFILE_TABLE} SET memory_count = memory_count - 1
+        WHERE character_id = new.character_id AND user_id = new.user_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS user_profile_count_ai AFTER INSERT ON enhanced_memory BEGIN
+        UPDATE {PROFILE_TABLE} SET memory_count = memory_count + 1
+        WHERE character_id = new.character_id AND user_id = new.user_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS user_profile_count_ad AFTER DELETE ON enhanced_memory BEGIN
+        UPDATE {PROFILE_TABLE} SET memory_count = memory_count - 1
+        WHERE character_id = old.character_id AND user_id = old.user_id;
+    END
+    """,
+]
+
+# Only touches the extracted profile, never the trigger-maintained count
+PROFILE_UPSERT_SQL = f"""
+    INSERT INTO {PROFILE_TABLE} (character_id, user_id, profile, updated_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(character_id, user_id) DO UPDATE SET
+        profile = excluded.profile,
+        updated_at = excluded.updated_at
+"""
+
+_NOT_NAMES = frozenset([
+    'is', 'was', 'will', 'can', 'should', 'would', 'the', 'and', 'or', 'your', 'my',
+    'her', 'his', 'their', 'our', 'a', 'an', 'to', 'of', 'with', 'for', 'older',
+    'younger', 'little', 'big', 'baby', 'half', 'step'
+])
+
+
+class ProfileFact(NamedTuple):
+    """One extracted profile value."""
+    field: str
+    value: str
+    confidence: float
+    rule: str
+
+
+# (field, rule, hint, confidence, pattern); a match's groups become the value
+# (two groups are joined with " and "). A rule only runs when its hint
+# substring occurs in the text, which skips most regexes for most memories.
+_RULES: List[Tuple[str, str, str, float, "re.Pattern"]] = [
+    (field, rule, hint, confidence, re.compile(pattern))
+    for field, rule, hint, confidence, pattern in [
+        ("age", "years_old", "old", 0.9, r'(\d+)\s*years?\s*old'),
+        ("location", "live_in", "live", 0.8, r'live\s+in\s+([^,\.]+)'),
+        ("name", "name_is", "name", 0.9, r'name\s+is\s+([^,\.]+)'),
+        ("sister", "sister_called", "sister", 0.7, r'(?:my\s+)?sister\s+(?:is\s+)?(?:called\s+)?([a-z]+)'),
+        ("sister", "is_my_sister", "sister", 0.7, r'([a-z]+)\s+(?:is\s+)?(?:my\s+)?sister'),
+        ("sister", "sister_name", "sister", 0.5, r'sister\s+([a-z]+)'),
+        ("sister", "name_sister", "sister", 0.4, r'([a-z]+)\s+sister'),
+        ("brother", "brother_called", "brother", 0.7, r'(?:my\s+)?brother\s+(?:is\s+)?(?:called\s+)?([a-z]+)'),
+        ("brother", "is_my_brother", "brother", 0.7, r'([a-z]+)\s+(?:is\s+)?(?:my\s+)?brother'),
+        ("brother", "brother_name", "brother", 0.5, r'brother\s+([a-z]+)'),
+        ("brother", "name_brother", "brother", 0.4, r'([a-z]+)\s+brother'),
+        ("parents", "parents_called", "parent", 0.8, r'(?:my\s+)?parents?\s+(?:are\s+)?(?:called\s+)?([a-z]+)\s+and\s+([a-z]+)'),
+        ("parents", "are_my_parents", "parent", 0.8, r'([a-z]+)\s+and\s+([a-z]+)\s+(?:are\s+)?(?:my\s+)?parents?'),
+        ("parents", "mom_called", "mom", 0.6, r'(?:my\s+)?mom\s+(?:is\s+)?(?:called\s+)?([a-z]+)'),
+        ("parents", "dad_called", "dad", 0.6, r'(?:my\s+)?dad\s+(?:is\s+)?(?:called\s+)?([a-z]+)'),
+        ("parents", "mother_called", "mother", 0.6, r'(?:my\s+)?mother\s+(?:is\s+)?(?:called\s+)?([a-z]+)'),
+        ("parents", "father_called", "father", 0.6, r'(?:my\s+)?father\s+(?:is\s+)?(?:called\s+)?([a-z]+)'),
+        ("work", "work_as", "", 0.8, r'(?:work\s+as|job\s+is|employed\s+as)\s+([^,\.]+)'),
+        ("work", "work_at", "at", 0.7, r'(?:work\s+at|job\s+at)\s+([^,\.]+)'),
+        ("pet", "dog_called", "dog", 0.6, r'(?:my\s+)?dog\s+(?:is\s+)?(?:called\s+)?([a-z]+)'),
+        ("pet", "is_my_dog", "dog", 0.5, r'([a-z]+)\s+(?:is\s+)?(?:my\s+)?dog'),
+        ("pet", "pet_called", "pet", 0.6, r'(?:my\s+)?pet\s+(?:is\s+)?(?:called\s+)?([a-z]+)'),
+        ("pet", "is_my_pet", "pet", 0.5, r'([a-z]+)\s+(?:is\s+)?(?:my\s+)?pet'),
+    ]
+]
+
+# Fields whose captured words must look like names
+_NAME_FIELDS = frozenset({"sister", "brother", "parents", "pet"})
+
+# Big-tech employers imply a software job (weak evidence)
+_EMPLOYER_PATTERN = re.compile(r'\b(?:google|microsoft|apple|amazon|facebook|meta)\b')
+
+# Family members known from earlier conversations, recognised by name alone
+_KNOWN_NAMES = {"sarah": "sister", "lynne": "parents", "alfredo": "parents", "yuri": "brother"}
+_KNOWN_NAME_PATTERN = re.compile(r'\b(' + '|'.join(_KNOWN_NAMES) + r')\b')
+
+
+def extract_profile_facts(content: str) -> List[ProfileFact]:
+    """
+    Extract profile values from one memory.
+
+    Args:
+        content: Memory text (matched case-insensitively; values are lowercased)
+
+    Returns:
+        Facts in rule order (a field may appear more than once)
+    """
+    text = (content or "").lower()
+    facts = []
+    for field, rule, hint, confidence, pattern in _RULES:
+        if hint not in text:
+            continue
+        match = pattern.search(text)
+        if not match:
+            continue
+        groups = [group.strip() for group in match.groups()]
+        if field in _NAME_FIELDS and any(group in _NOT_NAMES for group in groups):
+            continue
+        value = " and ".join(groups)
+        if value:
+            facts.append(ProfileFact(field, value, confidence, rule))
+    if _EMPLOYER_PATTERN.search(text):
+        facts.append(ProfileFact("work", "software engineer", 0.3, "employer"))
+    for name in dict.fromkeys(_KNOWN_NAME_PATTERN.findall(text)):
+        facts.append(ProfileFact(_KNOWN_NAMES[name], name, 0.3, "known_name"))
+    return facts
+
+
+def merge_facts(profile: Dict[str, List[Dict[str, Any]]], facts: Iterable[ProfileFact],
+                memory_id: Optional[str], timestamp: Optional[str],
+                memory_type: str = "conversation") -> bool:
+    """
+    Merge facts from one memory into a profile in place.
+
+    Memories must be merged oldest first: for single-valued fields a newer
+    value replaces the current one unless it is clearly less certain; for
+    multi-valued fields new values are appended (a repeated value keeps its
+    best confidence and that evidence's provenance).
+
+    Args:
+        profile: field -> list of value entries (as stored in user_profile.profile)
+        facts: Facts extracted from the memory
+        memory_id: Source memory id (None for unsaved text)
+        timestamp: Source memory timestamp
+        memory_type: Source memory type (character responses count for less)
+
+    Returns:
+        True if the profile changed
+    """
+    if memory_type in SKIPPED_MEMORY_TYPES:
+        return False
+    factor = RESPONSE_CONFIDENCE_FACTOR if memory_type in RESPONSE_MEMORY_TYPES else 1.0
+    changed = False
+    # Within one memory only the most certain reading of a single-valued field counts
+    decided = set()
+    for fact in sorted(facts, key=lambda fact: -fact.confidence):
+        if fact.field in decided:
+            continue
+        entry = {
+            "value": fact.value,
+            "confidence": round(fact.confidence * factor, 3),
+            "source_memory_id": memory_id,
+            "source_timestamp": timestamp,
+            "rule": fact.rule
+        }
+        values = profile.setdefault(fact.field, [])
+        existing = next((item for item in values if item["value"] == fact.value), None)
+        if fact.field not in MULTI_VALUED_FIELDS:
+            decided.add(fact.field)
+        if existing is not None:
+            if entry["confidence"] > existing["confidence"]:
+                existing.update(entry)
+                changed = True
+        elif fact.field in MULTI_VALUED_FIELDS:
+            # "lynne" adds nothing next to "lynne and alfredo"
+            words = set(fact.value.split())
+            if any(words <= set(item["value"].split()) for item in values):
+                continue
+            if len(values) < MAX_VALUES_PER_FIELD:
+                values.append(entry)
+                changed = True
+        elif not values or entry["confidence"] >= values[0]["confidence"] - SUPERSEDE_MARGIN:
+            values[:] = [entry]
+            changed = True
+    return changed
+
+
+def profile_details(profile: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[str]]:
+    """Flatten a profile to field -> values (the shape the chat prompt builder expects)."""
+    return {field: [item["value"] for item in values] for field, values in profile.items() if values}
+
+
+def ensure_profile_schema(conn: sqlite3.Connection):
+    """Create the profile table and count triggers (no pair row; caller commits)."""
+    for statement in _PROFILE_DDL:
+        conn.execute(statement)
+
+
+def ensure_profile_table(conn: sqlite3.Connection, character_id: str, user_id: str,
+                         archive_db: Optional[Union[str, Path]] = None) -> bool:
+    """
+    Create the profile table and count triggers, and build the pair's profile if missing.
+
+    Args:
+        conn: Pair database connection (caller commits)
+        character_id: Character of the pair
+        user_id: User of the pair
+        archive_db: Archive database also replayed when the profile is built
+
+    Returns:
+        True if the profile was built by this call
+    """
+    ensure_profile_schema(conn)
+    exists = conn.execute(
+        f"SELECT 1 FROM {PROFILE_TABLE} WHERE character_id = ? AND user_id = ?", (character_id, user_id)
+    ).fetchone()
+    if exists:
+        return False
+    profile = rebuild_profile(conn, character_id, user_id, archive_db)
+    logger.info(f"✅ Built user profile for {character_id}_{user_id} "
+                f"({len(profile['profile'])} fields from {profile['memory_count']} memories)")
+    return True
+
+
+def load_profile(conn: sqlite3.Connection, character_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a pair's profile row (primary-key lookup).
+
+    Returns:
+        profile (field -> value entries), memory_count and updated_at, or None
+    """
+    row = conn.execute(
+        f"SELECT profile, memory_count, updated_at FROM {PROFILE_TABLE} WHERE character_id = ? AND user_id = ?",
+        (character_id, user_id)
+    ).fetchone()
+    if row is None:
+        return None
+    return {"profile": json.loads(row[0] or "{}"), "memory_count": row[1], "updated_at": row[2]}
+
+
+def _memory_rows(conn: sqlite3.Connection, character_id: str, user_id: str) -> Iterable[tuple]:
+    """(id, content, memory_type, timestamp) of a pair's memories, oldest first."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(enhanced_memory)")}
+    compressed = "compressed_content" if "compressed_content" in columns else "NULL"
+    cursor = conn.execute(f"""
+        SELECT id, content, {compressed}, memory_type, timestamp FROM enhanced_memory
+        WHERE character_id = ? AND user_id = ?
+        ORDER BY timestamp, rowid
+    """, (character_id, user_id))
+    for memory_id, content, compressed_content, memory_type, timestamp in cursor:
+        yield memory_id, inflate_content(content, compressed_content), memory_type, timestamp
+
+
+def rebuild_profile(conn: sqlite3.Connection, character_id: str, user_id: str,
+                    archive_db: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+    """
+    Recompute a pair's profile and memory count from its stored memories.
+
+    Args:
+        conn: Pair database connection (caller commits)
+        character_id: Character of the pair
+        user_id: User of the pair
+        archive_db: Archive database whose memories are replayed first
+            (they are older than every memory still in the pair database)
+
+    Returns:
+        The rebuilt profile row (see load_profile)
+    """
+    profile: Dict[str, List[Dict[str, Any]]] = {}
+    if archive_db is not None and Path(archive_db).exists():
+        with sqlite3.connect(archive_db) as archive:
+            for memory_id, content, memory_type, timestamp in _memory_rows(archive, character_id, user_id):
+                merge_facts(profile, extract_profile_facts(content), memory_id, timestamp, memory_type)
+    for memory_id, content, memory_type, timestamp in _memory_rows(conn, character_id, user_id):
+        merge_facts(profile, extract_profile_facts(content), memory_id, timestamp, memory_type)
+
+    memory_count = conn.execute(
+        "SELECT COUNT(*) FROM enhanced_memory WHERE character_id = ? AND user_id = ?", (character_id, user_id)
+    ).fetchone()[0]
+    updated_at = datetime.now().isoformat()
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {PROFILE_TABLE} (character_id, user_id, profile, memory_count, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+    """, (character_id, user_id, json.dumps(profile), memory_count, updated_at))
+    return {"profile": profile, "memory_count": memory_count, "updated_at": updated_at}
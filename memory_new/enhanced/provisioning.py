@@ -0,0 +1,121 @@
+"""
+Provisioning of new character-user pair databases.
+
+Opening a pair whose database does not exist yet used to run the whole schema
+setup against the new file: the base tables, enrichment, tiering, counter,
+summary and dedup columns, FTS5 table and triggers, indexes and profile,
+statement by statement, each ALTER and CREATE its own write. A new pair is
+instead cloned from a template built once per process (an in-memory database
+holding the current schema) with the SQLite backup API, its empty profile row
+is added, and the file is moved into place in one step:
+
+    if provision_pair_database(db_path, "luna", "user_123"):
+        ...  # new pair, schema already current
+
+The clone is written to a temporary file and linked to its final name only if
+no other process created the pair meanwhile, so a pair database is never
+overwritten. Settings come from the "provisioning" section of
+config/memory_config.json.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+import time
+from datetime import datetime
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Optional, Union
+
+from ..utils.config import load_memory_config
+from .profile import PROFILE_TABLE
+
+logger = logging.getLogger(__name__)
+
+# Parameters: character_id, user_id, updated_at (a new pair has no memories to build it from)
+_EMPTY_PROFILE_SQL = f"""
+    INSERT INTO {PROFILE_TABLE} (character_id, user_id, profile, memory_count, updated_at)
+    VALUES (?, ?, '{{}}', 0, ?)
+"""
+
+
+@dataclass
+class ProvisioningSettings:
+    """New-pair provisioning parameters."""
+    use_template: bool = True
+
+    @classmethod
+    def from_config(cls) -> "ProvisioningSettings":
+        """Build settings from the "provisioning" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("provisioning").items() if k in known})
+
+
+_settings: Optional[ProvisioningSettings] = None
+_template: Optional[sqlite3.Connection] = None
+_template_lock = threading.Lock()
+
+
+def configure_provisioning(**overrides) -> ProvisioningSettings:
+    """Override the configured settings for pairs provisioned from now on."""
+    global _settings
+    with _template_lock:
+        _settings = replace(ProvisioningSettings.from_config(), **overrides)
+        return _settings
+
+
+def _pair_template() -> sqlite3.Connection:
+    """In-memory database holding the current pair schema (built on first use; caller holds the lock)."""
+    global _template
+    if _template is None:
+        from .enhanced_memory_system import create_pair_schema
+        started = time.perf_counter()
+        template = sqlite3.connect(":memory:", check_same_thread=False)
+        create_pair_schema(template)
+        template.commit()
+        _template = template
+        logger.info(f"✅ Pair database template built in {(time.perf_counter() - started) * 1000:.1f}ms")
+    return _template
+
+
+def provision_pair_database(db_path: Union[str, Path], character_id: str, user_id: str) -> bool:
+    """
+    Create a pair database from the schema template if it does not exist.
+
+    Args:
+        db_path: Pair database file
+        character_id: Character of the pair
+        user_id: User of the pair
+
+    Returns:
+        True if this call created the database (its schema is current and it
+        holds no memories); False if it already existed or templates are disabled
+    """
+    global _settings
+    path = Path(db_path)
+    if path.exists():
+        return False
+    with _template_lock:
+        if _settings is None:
+            _settings = ProvisioningSettings.from_config()
+        if not _settings.use_template:
+            return False
+    staging = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.provisioning")
+    try:
+        target = sqlite3.connect(staging)
+        try:
+            with _template_lock:
+                _pair_template().backup(target)
+            with target:
+                target.execute(_EMPTY_PROFILE_SQL, (character_id, user_id, datetime.now().isoformat()))
+        finally:
+            target.close()
+        # Hard-linking fails if the pair appeared meanwhile, so it is never overwritten
+        os.link(staging, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        if staging.exists():
+            staging.unlink()
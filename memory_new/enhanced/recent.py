@@ -0,0 +1,150 @@
+"""
+Read-your-writes buffer of a pair's most recent memories.
+
+The chat route writes every turn itself and then, on the next turn, reads the
+latest rows back for the "Recent Context" prompt section and the first page
+of the conversation history. RecentTurnBuffer keeps the last ``size``
+memories of one pair in memory instead: filled from the database on first
+use, appended to by every write, dropped (and lazily reloaded) when a memory
+is edited or deleted.
+
+Entries are ordered by (timestamp, rowid) like the keyset pages
+(retrieval.pagination). Rows written through the group-commit buffer have no
+rowid until they are applied; they sort after every stored row with the same
+timestamp, which is where SQLite will put them. Settings come from the
+"recent_turns" section of config/memory_config.json.
+"""
+
+import bisect
+import threading
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..utils.config import load_memory_config
+
+# Stand-in rowid of rows not applied yet (newer than every stored row)
+_PENDING_ROWID = float("inf")
+
+
+@dataclass
+class RecentTurnSettings:
+    """Size of the per-pair buffer of recent memories."""
+    enabled: bool = True
+    size: int = 50
+
+    @classmethod
+    def from_config(cls) -> "RecentTurnSettings":
+        """Build settings from the "recent_turns" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("recent_turns").items() if k in known})
+
+
+class RecentTurnBuffer:
+    """
+    Last ``size`` memories of one pair, oldest first.
+
+    Memories are history-page dicts (see EnhancedMemorySystem.get_memories_page).
+    ``complete`` is True while the buffer holds the pair's whole history, so a
+    short history is served without a trailing database read.
+    """
+
+    def __init__(self, size: int):
+        self.size = max(int(size), 1)
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[str, float]] = []
+        self._entries: List[Tuple[Optional[int], Dict[str, Any]]] = []
+        self.loaded = False
+        self.complete = False
+        self.hits = 0
+        self.loads = 0
+
+    def load(self, rows: Iterable[Tuple[int, Dict[str, Any]]]):
+        """
+        Replace the contents with (rowid, memory) rows read newest first.
+
+        At most ``size`` rows are kept; fewer means the history is complete.
+        """
+        rows = list(rows)[:self.size]
+        with self._lock:
+            self._keys, self._entries = [], []
+            for rowid, memory in reversed(rows):
+                self._keys.append((memory["timestamp"], rowid))
+                self._entries.append((rowid, memory))
+            self.complete = len(rows) < self.size
+            self.loaded = True
+            self.loads += 1
+
+    def add(self, memories: Iterable[Tuple[Optional[int], Dict[str, Any]]]):
+        """Add (rowid or None if pending, memory) rows just written (replacing rows with the same id)."""
+        with self._lock:
+            if not self.loaded:
+                return
+            for rowid, memory in memories:
+                self._remove(memory["id"])
+                key = (memory["timestamp"], _PENDING_ROWID if rowid is None else rowid)
+                position = bisect.bisect_right(self._keys, key)
+                if position == 0 and len(self._entries) >= self.size:
+                    # Older than everything buffered: outside the window
+                    self.complete = False
+                    continue
+                self._keys.insert(position, key)
+                self._entries.insert(position, (rowid, memory))
+            if len(self._entries) > self.size:
+                del self._keys[:-self.size]
+                del self._entries[:-self.size]
+                self.complete = False
+
+    def contains(self, memory_ids: Iterable[str]) -> bool:
+        """Whether any of the memories is buffered."""
+        wanted = set(memory_ids)
+        with self._lock:
+            return any(memory["id"] in wanted for _, memory in self._entries)
+
+    def invalidate(self):
+        """Drop the contents (reloaded on next use)."""
+        with self._lock:
+            self._keys, self._entries = [], []
+            self.loaded = False
+            self.complete = False
+
+    def newest(self, limit: int, accept: Optional[Callable[[Dict[str, Any]], bool]] = None
+               ) -> Tuple[List[Tuple[Optional[int], Dict[str, Any]]], bool]:
+        """
+        Up to ``limit`` accepted memories, newest first.
+
+        Returns:
+            (rowid, memory) rows, and whether they answer the request: True
+            if ``limit`` rows were found or the buffer holds the whole history
+        """
+        with self._lock:
+            found = []
+            for rowid, memory in reversed(self._entries):
+                if accept is None or accept(memory):
+                    found.append((rowid, memory))
+                    if len(found) == limit:
+                        break
+            answered = len(found) == limit or self.complete
+            if answered:
+                self.hits += 1
+            return found, answered
+
+    def set_rowid(self, memory_id: str, rowid: int):
+        """Record the rowid of a row that was pending when it was added."""
+        with self._lock:
+            for index, (current, memory) in enumerate(self._entries):
+                if memory["id"] == memory_id and current is None:
+                    self._entries[index] = (rowid, memory)
+                    self._keys[index] = (memory["timestamp"], rowid)
+                    return
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffered rows, loads and buffer-served reads."""
+        return {"buffered": len(self._entries), "size": self.size, "complete": self.complete,
+                "loads": self.loads, "hits": self.hits}
+
+    def _remove(self, memory_id: str):
+        for index, (_, memory) in enumerate(self._entries):
+            if memory["id"] == memory_id:
+                del self._keys[index]
+                del self._entries[index]
+                return
@@ -0,0 +1,202 @@
+"""
+Bounded registry of per-pair memory system instances.
+
+At most ``max_instances`` instances are kept (least recently used evicted
+first) and instances idle for ``idle_timeout_seconds`` are dropped on the next
+registry access. Evicted instances are closed, which releases their database
+connection; a caller still holding one simply reopens it on next use.
+"""
+
+import sys
+import time
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from ..utils.config import load_memory_config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RegistrySettings:
+    """Registry bounds."""
+    max_instances: int = 64
+    idle_timeout_seconds: float = 900.0
+
+    @classmethod
+    def from_config(cls) -> "RegistrySettings":
+        """Build settings from the "registry" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("registry").items() if k in known})
+
+
+def deep_sizeof(obj: Any, exclude_ids: Optional[Set[int]] = None) -> int:
+    """
+    Approximate bytes held by an object graph.
+
+    Follows containers and instance attributes; modules, classes, functions and
+    any object whose id is in exclude_ids (shared singletons) are not counted.
+    """
+    seen = set(exclude_ids or ())
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(current, "__dict__"):
+            stack.append(vars(current))
+    return total
+
+
+class MemorySystemRegistry:
+    """
+    LRU/idle-bounded map of memory_key -> memory system.
+
+    Args:
+        factory: Called as factory(character_id, user_id) to create an instance.
+            Instances may define close() and footprint().
+        settings: Bounds (defaults to the configured ones)
+    """
+
+    def __init__(self, factory: Callable[[str, str], Any], settings: Optional[RegistrySettings] = None):
+        self.factory = factory
+        self.settings = settings or RegistrySettings.from_config()
+        self._lock = threading.Lock()
+        self._instances: "OrderedDict[str, Any]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, character_id: str, user_id: str) -> Any:
+        """Get or create the instance for a pair (raises whatever the factory raises)."""
+        memory_key = f"{character_id}_{user_id}"
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._pop_idle(now)
+            instance = self._instances.get(memory_key)
+            if instance is not None:
+                self._instances.move_to_end(memory_key)
+                self._last_used[memory_key] = now
+                self.hits += 1
+        self._close(evicted)
+        if instance is not None:
+            return instance
+
+        created = self.factory(character_id, user_id)
+        with self._lock:
+            instance = self._instances.get(memory_key)
+            if instance is None:
+                instance = self._instances[memory_key] = created
+                self.misses += 1
+                created = None
+            self._instances.move_to_end(memory_key)
+            self._last_used[memory_key] = time.monotonic()
+            evicted = self._pop_over_capacity()
+        # Lost a creation race: keep the registered instance
+        self._close([created] if created is not None else [])
+        self._close(evicted)
+        return instance
+
+    def evict(self, memory_key: str) -> bool:
+        """Close and drop one instance."""
+        with self._lock:
+            instance = self._instances.pop(memory_key, None)
+            self._last_used.pop(memory_key, None)
+            if instance is None:
+                return False
+            self.evictions += 1
+        self._close([instance])
+        return True
+
+    def evict_idle(self) -> int:
+        """Close and drop every instance idle longer than the timeout."""
+        with self._lock:
+            evicted = self._pop_idle(time.monotonic())
+        self._close(evicted)
+        return len(evicted)
+
+    def close_all(self) -> int:
+        """Close and drop every instance."""
+        with self._lock:
+            evicted = list(self._instances.values())
+            self._instances.clear()
+            self._last_used.clear()
+        self._close(evicted)
+        return len(evicted)
+
+    def stats(self, exclude_ids: Optional[Set[int]] = None) -> Dict[str, Any]:
+        """
+        Registry counters and per-instance footprint.
+
+        Args:
+            exclude_ids: ids of objects shared by every instance, left out of
+                the per-instance byte counts
+
+        Returns:
+            Settings, hit/miss/eviction counters and one entry per instance
+            (most recently used last)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entries = [(key, instance, self._last_used.get(key, now)) for key, instance in self._instances.items()]
+            counters = {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+        instances: List[Dict[str, Any]] = []
+        for key, instance, last_used in entries:
+            footprint = instance.footprint(exclude_ids) if hasattr(instance, "footprint") else {
+                "python_bytes": deep_sizeof(instance, exclude_ids)
+            }
+            instances.append({"memory_key": key, "idle_seconds": round(now - last_used, 1), **footprint})
+        return {
+            "max_instances": self.settings.max_instances,
+            "idle_timeout_seconds": self.settings.idle_timeout_seconds,
+            "instances_cached": len(instances),
+            "total_python_bytes": sum(entry.get("python_bytes", 0) for entry in instances),
+            **counters,
+            "instances": instances
+        }
+
+    def _pop_idle(self, now: float) -> List[Any]:
+        """Remove idle instances (oldest first); caller holds the lock."""
+        evicted = []
+        for key in list(self._instances):
+            if now - self._last_used.get(key, now) <= self.settings.idle_timeout_seconds:
+                break
+            evicted.append(self._instances.pop(key))
+            self._last_used.pop(key, None)
+        self.evictions += len(evicted)
+        return evicted
+
+    def _pop_over_capacity(self) -> List[Any]:
+        """Remove least recently used instances beyond the bound; caller holds the lock."""
+        evicted = []
+        while len(self._instances) > max(self.settings.max_instances, 1):
+            key, instance = self._instances.popitem(last=False)
+            self._last_used.pop(key, None)
+            evicted.append(instance)
+        self.evictions += len(evicted)
+        return evicted
+
+    @staticmethod
+    def _close(instances: List[Any]):
+        """Close evicted instances outside the registry lock."""
+        for instance in instances:
+            close = getattr(instance, "close", None)
+            if close is None:
+                continue
+            try:
+                close()
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to close evicted memory system: {e}")
+
@@ -0,0 +1,517 @@
+"""
+Background hierarchical summarization of enhanced memories.
+
+Raw turns are rolled up per pair, level by level:
+
+- session: consecutive turns (split on ``session_gap_minutes`` of silence)
+  become one ``session_summary`` memory once the session is closed.
+- week: session summaries older than ``week_rollup_after_days`` become one
+  ``weekly_summary`` per ISO week.
+- month: weekly summaries older than ``month_rollup_after_days`` become one
+  ``monthly_summary`` per calendar month.
+
+Summaries are ordinary enhanced_memory rows (FTS-indexed, ranked like any
+memory). Rolled-up rows are flagged ``summarized``; once older than
+``prefer_summaries_after_days`` retrieval skips them (unless important or
+identity memories) so the candidate set for old periods is a handful of
+summaries instead of every turn.
+
+Summaries are written by the extractive LocalSummarizer unless the config
+opts in to an LLM with ``backend: "openai"``: AISummarizer then sends the
+turns to ``model`` on any OpenAI-compatible endpoint (e.g. a local server via
+``base_url``), at most ``max_concurrency`` calls at a time. An API key in the
+environment alone never sends conversations anywhere.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from ..db.write_buffer import flush_write_buffer
+from ..utils.compression import inflate_content
+from ..utils.config import load_memory_config
+from .enrichment import ENRICHMENT_COLUMNS, enrich_memory
+
+logger = logging.getLogger(__name__)
+
+SESSION_SUMMARY = "session_summary"
+WEEKLY_SUMMARY = "weekly_summary"
+MONTHLY_SUMMARY = "monthly_summary"
+SUMMARY_MEMORY_TYPES = (SESSION_SUMMARY, WEEKLY_SUMMARY, MONTHLY_SUMMARY)
+
+# Columns added to enhanced_memory
+SUMMARY_COLUMNS = {
+    "summarized": "INTEGER DEFAULT 0"
+}
+
+_SUMMARY_INDEXES = {
+    "idx_enhanced_memory_summarized": "summarized, timestamp"
+}
+
+_INSERT_SUMMARY_SQL = f"""
+    INSERT OR REPLACE INTO enhanced_memory
+    (id, character_id, user_id, content, memory_type, importance,
+     timestamp, context, tags, emotional_valence, relationship_impact,
+     {', '.join(ENRICHMENT_COLUMNS)})
+    VALUES ({', '.join('?' for _ in range(11 + len(ENRICHMENT_COLUMNS)))})
+"""
+
+_SYSTEM_PROMPT = "You are a helpful AI memory summarizer."
+
+
+@dataclass
+class SummarizationSettings:
+    """Roll-up boundaries, LLM backend and scheduling."""
+    enabled: bool = True
+    # "local" (extractive, offline) or "openai" (explicit opt-in to a remote LLM)
+    backend: str = "local"
+    model: str = "gpt-4"
+    base_url: Optional[str] = None
+    api_key_env: str = "OPENAI_API_KEY"
+    max_tokens: int = 256
+    temperature: float = 0.4
+    max_concurrency: int = 4
+    interval_seconds: float = 600.0
+    session_gap_minutes: float = 30.0
+    session_closed_after_minutes: float = 60.0
+    max_turns_per_session: int = 200
+    week_rollup_after_days: float = 14.0
+    month_rollup_after_days: float = 60.0
+    prefer_summaries_after_days: float = 14.0
+    keep_raw_min_importance: float = 0.8
+    skip_memory_types: List[str] = field(default_factory=lambda: ["diary", "session_diary", "daily_diary"])
+
+    @classmethod
+    def from_config(cls) -> "SummarizationSettings":
+        """Build settings from the "summarization" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("summarization").items() if k in known})
+
+
+class LocalSummarizer:
+    """
+    Extractive stand-in for the LLM: no network, deterministic output.
+
+    Sessions keep their most important/emotional turns; periods keep the
+    opening sentence of each summary.
+    """
+
+    def __init__(self, max_sentences: int = 3, max_chars: int = 600):
+        self.max_sentences = max_sentences
+        self.max_chars = max_chars
+
+    def session_summary(self, memories: List[Dict[str, Any]]) -> str:
+        """Most salient turns of a session, in conversation order."""
+        salient = sorted(
+            range(len(memories)),
+            key=lambda i: (memories[i].get("importance") or 0) + abs(memories[i].get("emotional_valence") or 0),
+            reverse=True
+        )[:self.max_sentences]
+        picked = " ".join(" ".join(memories[i]["content"].split())[:200] for i in sorted(salient))
+        return f"Session of {len(memories)} turns: {picked}"[:self.max_chars]
+
+    def period_summary(self, summaries: List[str], level: str) -> str:
+        """Opening sentence of each summary in the period."""
+        # Drop the "Session of N turns:" style prefix of nested local summaries
+        openings = [summary.split(": ", 1)[-1].split(". ")[0].rstrip(".") for summary in summaries if summary]
+        return f"{level.capitalize()} of {len(summaries)} summaries: " + "; ".join(openings)[:self.max_chars]
+
+
+class AISummarizer:
+    """
+    Modular AI-powered summarizer for memory sessions and periods.
+
+    Talks to any OpenAI-compatible chat endpoint (``base_url`` points it at a
+    local server) only when the backend is set to "openai"; any other value
+    uses the LocalSummarizer.
+    """
+
+    def __init__(self, model: Optional[str] = None, api_key: Optional[str] = None,
+                 base_url: Optional[str] = None, settings: Optional[SummarizationSettings] = None):
+        self.settings = settings or SummarizationSettings.from_config()
+        self.model = model or self.settings.model
+        self.api_key = api_key or os.getenv(self.settings.api_key_env)
+        self.base_url = base_url or self.settings.base_url
+        self.local = LocalSummarizer()
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def backend(self) -> str:
+        """Resolved backend: "openai" when configured explicitly, "local" otherwise."""
+        return "openai" if self.settings.backend == "openai" else "local"
+
+    def _get_client(self):
+        """OpenAI client, created on first use (thread-safe to share)."""
+        with self._client_lock:
+            if self._client is None:
+                from openai import OpenAI
+                self._client = OpenAI(api_key=self.api_key or "local", base_url=self.base_url)
+            return self._client
+
+    def _complete(self, prompt: str) -> str:
+        """One chat completion; raises on failure."""
+        response = self._get_client().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "system", "content": _SYSTEM_PROMPT},
+                      {"role": "user", "content": prompt}],
+            max_tokens=self.settings.max_tokens,
+            temperature=self.settings.temperature
+        )
+        return (response.choices[0].message.content or "").strip()
+
+    def session_summary(self, memories: List[Dict[str, Any]]) -> str:
+        """Summarize a session's memories (raises if the LLM call fails)."""
+        if self.backend == "local":
+            return self.local.session_summary(memories)
+        text = "\n".join(m["content"] for m in memories)
+        return self._complete(
+            "Summarize the following conversation session in 2-3 sentences, focusing on key topics, "
+            f"emotions, and relationship changes.\n\n{text}"
+        )
+
+    def period_summary(self, summaries: List[str], level: str = "week") -> str:
+        """Consolidate lower-level summaries into one (raises if the LLM call fails)."""
+        if self.backend == "local":
+            return self.local.period_summary(summaries, level)
+        text = "\n".join(summaries)
+        return self._complete(
+            f"Consolidate the following summaries into a {level}ly theme, highlighting relationship "
+            f"progression and emotional trends.\n\n{text}"
+        )
+
+    def summarize_session(self, memories: List[Dict[str, Any]]) -> str:
+        """Summarize a session's memories using LLM."""
+        if not memories:
+            return "No memories to summarize."
+        try:
+            return self.session_summary(memories)
+        except Exception as e:
+            return f"[ERROR] LLM summarization failed: {e}"
+
+    def consolidate_period(self, summaries: List[str]) -> str:
+        """Consolidate multiple session summaries into a higher-level summary."""
+        if not summaries:
+            return "No summaries to consolidate."
+        try:
+            return self.period_summary(summaries)
+        except Exception as e:
+            return f"[ERROR] LLM consolidation failed: {e}"
+
+
+def ensure_summary_columns(conn: sqlite3.Connection) -> List[str]:
+    """
+    Add missing summarization columns and their indexes to enhanced_memory.
+
+    Returns:
+        Names of the columns added by this call
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(enhanced_memory)")}
+    added = []
+    for column, definition in SUMMARY_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE enhanced_memory ADD COLUMN {column} {definition}")
+            added.append(column)
+    for index_name, columns in _SUMMARY_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON enhanced_memory ({columns})")
+    return added
+
+
+def retrieval_filter(settings: Optional[SummarizationSettings] = None,
+                     now: Optional[datetime] = None) -> Tuple[str, List[Any]]:
+    """
+    SQL predicate (and parameters) that drops rolled-up rows of old periods.
+
+    Important and identity memories are always kept.
+    """
+    settings = settings or SummarizationSettings.from_config()
+    cutoff = ((now or datetime.now()) - timedelta(days=settings.prefer_summaries_after_days)).isoformat()
+    return (
+        "NOT (COALESCE(summarized, 0) = 1 AND timestamp < ? AND importance < ? AND COALESCE(is_identity, 0) = 0)",
+        [cutoff, settings.keep_raw_min_importance]
+    )
+
+
+def _parse_time(value: str) -> datetime:
+    """Parse a stored ISO timestamp (naive)."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+def _split_sessions(turns: List[Dict[str, Any]], settings: SummarizationSettings,
+                    now: datetime) -> List[List[Dict[str, Any]]]:
+    """Split time-ordered turns into closed sessions."""
+    gap = timedelta(minutes=settings.session_gap_minutes)
+    sessions: List[List[Dict[str, Any]]] = []
+    for turn in turns:
+        if (not sessions or turn["_time"] - sessions[-1][-1]["_time"] > gap
+                or len(sessions[-1]) >= settings.max_turns_per_session):
+            sessions.append([])
+        sessions[-1].append(turn)
+    closed_before = now - timedelta(minutes=settings.session_closed_after_minutes)
+    if sessions and sessions[-1][-1]["_time"] > closed_before and len(sessions[-1]) < settings.max_turns_per_session:
+        sessions.pop()  # still open
+    return sessions
+
+
+def _week_key(moment: datetime) -> Tuple[datetime, datetime]:
+    """ISO week (Monday 00:00 to next Monday) containing moment."""
+    start = datetime(moment.year, moment.month, moment.day) - timedelta(days=moment.weekday())
+    return start, start + timedelta(days=7)
+
+
+def _month_key(moment: datetime) -> Tuple[datetime, datetime]:
+    """Calendar month containing moment."""
+    start = datetime(moment.year, moment.month, 1)
+    end = datetime(start.year + (start.month == 12), start.month % 12 + 1, 1)
+    return start, end
+
+
+class SummarizationPipeline:
+    """
+    Rolls up one pair database at a time.
+
+    Args:
+        summarizer: Object with session_summary(memories) and
+            period_summary(summaries, level) (defaults to AISummarizer)
+        settings: Boundaries (defaults to the configured ones)
+        executor: Shared pool capping concurrent LLM calls (created with
+            ``max_concurrency`` workers if omitted)
+    """
+
+    def __init__(self, summarizer: Optional[Any] = None, settings: Optional[SummarizationSettings] = None,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.settings = settings or SummarizationSettings.from_config()
+        self.summarizer = summarizer or AISummarizer(settings=self.settings)
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max(self.settings.max_concurrency, 1), thread_name_prefix="memory-summarizer"
+        )
+
+    def _run_batch(self, jobs: List[Callable[[], str]]) -> List[Optional[str]]:
+        """Run LLM jobs on the capped pool; a failed job yields None (retried next pass)."""
+        futures = [self.executor.submit(job) for job in jobs]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result() or None)
+            except Exception as e:
+                logger.warning(f"⚠️ Memory summarization call failed: {e}")
+                results.append(None)
+        return results
+
+    def _load(self, conn: sqlite3.Connection, memory_types: Optional[Sequence[str]],
+              exclude_types: Sequence[str], before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Unsummarized rows of the given types, oldest first."""
+        clauses = ["COALESCE(summarized, 0) = 0"]
+        params: List[Any] = []
+        if memory_types:
+            clauses.append(f"memory_type IN ({', '.join('?' for _ in memory_types)})")
+            params.extend(memory_types)
+        if exclude_types:
+            clauses.append(f"memory_type NOT IN ({', '.join('?' for _ in exclude_types)})")
+            params.extend(exclude_types)
+        if before is not None:
+            clauses.append("timestamp < ?")
+            params.append(before)
+        rows = conn.execute(f"""
+            SELECT id, character_id, user_id, content, compressed_content, importance, timestamp,
+                   COALESCE(emotional_valence, 0.0), COALESCE(relationship_impact, 0.0)
+            FROM enhanced_memory WHERE {' AND '.join(clauses)}
+            ORDER BY timestamp
+        """, params).fetchall()
+        memories = []
+        for row in rows:
+            try:
+                moment = _parse_time(row[6])
+            except (ValueError, TypeError, AttributeError):
+                continue
+            memories.append({
+                "id": row[0], "character_id": row[1], "user_id": row[2],
+                "content": inflate_content(row[3], row[4]), "importance": row[5] or 0.0,
+                "timestamp": row[6], "emotional_valence": row[7], "relationship_impact": row[8],
+                "_time": moment
+            })
+        return memories
+
+    def _write(self, conn: sqlite3.Connection, level: str, memory_type: str,
+               groups: List[Tuple[datetime, datetime, List[Dict[str, Any]]]],
+               texts: List[Optional[str]]) -> int:
+        """Insert summary rows and flag their sources as summarized."""
+        rows, source_ids = [], []
+        for (start, end, members), text in zip(groups, texts):
+            if not text:
+                continue
+            first = members[0]
+            tags = ["summary", level]
+            context = {
+                "level": level,
+                "period_start": start.isoformat(),
+                "period_end": end.isoformat(),
+                "source_count": len(members)
+            }
+            rows.append((
+                f"{first['character_id']}_{first['user_id']}_{level}_{start.isoformat()}",
+                first["character_id"], first["user_id"], text, memory_type,
+                max(0.5, max(m["importance"] for m in members)),
+                members[-1]["timestamp"], json.dumps(context), json.dumps(tags),
+                sum(m["emotional_valence"] for m in members) / len(members),
+                sum(m["relationship_impact"] for m in members) / len(members),
+                *enrich_memory(text, tags).values()
+            ))
+            source_ids.extend(m["id"] for m in members)
+        if not rows:
+            return 0
+        conn.executemany(_INSERT_SUMMARY_SQL, rows)
+        for i in range(0, len(source_ids), 500):
+            chunk = source_ids[i:i + 500]
+            conn.execute(
+                f"UPDATE enhanced_memory SET summarized = 1 WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+            )
+        conn.commit()
+        return len(rows)
+
+    def _rollup_sessions(self, conn: sqlite3.Connection, now: datetime) -> int:
+        """Summarize closed sessions of raw turns."""
+        turns = self._load(conn, None, [*SUMMARY_MEMORY_TYPES, *self.settings.skip_memory_types])
+        sessions = _split_sessions(turns, self.settings, now)
+        groups = [(session[0]["_time"], session[-1]["_time"], session) for session in sessions]
+        texts = self._run_batch([
+            (lambda members=members: self.summarizer.session_summary(members)) for _, _, members in groups
+        ])
+        return self._write(conn, "session", SESSION_SUMMARY, groups, texts)
+
+    def _rollup_periods(self, conn: sqlite3.Connection, level: str, source_type: str, memory_type: str,
+                        period: Callable[[datetime], Tuple[datetime, datetime]], after_days: float,
+                        now: datetime) -> int:
+        """Summarize complete periods of lower-level summaries."""
+        cutoff = now - timedelta(days=after_days)
+        sources = self._load(conn, [source_type], [], before=cutoff.isoformat())
+        periods: Dict[datetime, Tuple[datetime, datetime, List[Dict[str, Any]]]] = {}
+        for source in sources:
+            start, end = period(source["_time"])
+            if end <= cutoff:
+                periods.setdefault(start, (start, end, []))[2].append(source)
+        groups = list(periods.values())
+        texts = self._run_batch([
+            (lambda members=members: self.summarizer.period_summary([m["content"] for m in members], level))
+            for _, _, members in groups
+        ])
+        return self._write(conn, level, memory_type, groups, texts)
+
+    def run(self, db_path: Union[str, Path], now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Roll up one pair database (sessions, then weeks, then months).
+
+        Returns:
+            Number of summaries written per level
+        """
+        now = now or datetime.now()
+        flush_write_buffer(db_path)
+        with sqlite3.connect(db_path) as conn:
+            ensure_summary_columns(conn)
+            results = {
+                "session": self._rollup_sessions(conn, now),
+                "week": self._rollup_periods(
+                    conn, "week", SESSION_SUMMARY, WEEKLY_SUMMARY, _week_key,
+                    self.settings.week_rollup_after_days, now
+                ),
+                "month": self._rollup_periods(
+                    conn, "month", WEEKLY_SUMMARY, MONTHLY_SUMMARY, _month_key,
+                    self.settings.month_rollup_after_days, now
+                )
+            }
+        if any(results.values()):
+            logger.info(
+                f"✅ Summarized {db_path}: {results['session']} sessions, "
+                f"{results['week']} weeks, {results['month']} months"
+            )
+        return results
+
+    def run_all(self, db_files: Sequence[Union[str, Path]], now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Roll up several pair databases; errors are collected per database."""
+        totals: Dict[str, Any] = {"databases": 0, "session": 0, "week": 0, "month": 0, "errors": []}
+        for db_file in db_files:
+            try:
+                for level, count in self.run(db_file, now).items():
+                    totals[level] += count
+                totals["databases"] += 1
+            except Exception as e:
+                totals["errors"].append(f"{db_file}: {e}")
+                logger.error(f"❌ Memory summarization failed for {db_file}: {e}")
+        return totals
+
+
+class SummarizationScheduler:
+    """
+    Daemon thread running the pipeline over every pair database periodically.
+
+    Args:
+        pipeline: Pipeline to run (defaults to one with the configured settings)
+        base_path: Directory containing memory_databases/
+    """
+
+    def __init__(self, pipeline: Optional[SummarizationPipeline] = None, base_path: Union[str, Path] = "."):
+        self.pipeline = pipeline or SummarizationPipeline()
+        self.base_path = Path(base_path)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_results: Optional[Dict[str, Any]] = None
+
+    def run_once(self) -> Dict[str, Any]:
+        """One pass over every enhanced_*.db pair database."""
+        db_files = sorted((self.base_path / "memory_databases").glob("enhanced_*.db"))
+        self.last_results = self.pipeline.run_all(db_files)
+        return self.last_results
+
+    def _loop(self):
+        while not self._stop.wait(self.pipeline.settings.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Background summarization pass failed: {e}")
+
+    def start(self):
+        """Start the background thread (no-op if running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="memory-summarization", daemon=True)
+        self._thread.start()
+        backend = getattr(self.pipeline.summarizer, "backend", "custom")
+        logger.info(
+            f"✅ Background memory summarization every {self.pipeline.settings.interval_seconds:.0f}s ({backend} backend)"
+        )
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread after its current pass."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_scheduler: Optional[SummarizationScheduler] = None
+
+
+def start_background_summarization(base_path: Union[str, Path] = ".") -> Optional[SummarizationScheduler]:
+    """Start the process-wide summarization scheduler if enabled in config."""
+    global _scheduler
+    settings = SummarizationSettings.from_config()
+    if not settings.enabled:
+        return None
+    if _scheduler is None:
+        _scheduler = SummarizationScheduler(SummarizationPipeline(settings=settings), base_path)
+    _scheduler.start()
+    return _scheduler
+
+
+def stop_background_summarization():
+    """Stop the process-wide summarization scheduler."""
+    if _scheduler is not None:
+        _scheduler.stop()
@@ -0,0 +1,158 @@
+"""
+Normalized memory tags.
+
+enhanced_memory.tags holds each memory's tags as JSON text, so a lookup by
+tag (identity memories, personal_info, a diary session id) had to parse
+every row of the pair in Python. ``memory_tags`` holds one (memory_id, tag)
+row per tag instead, indexed by tag, and lookups join from it to the memories
+by primary key:
+
+    SELECT m.* FROM (SELECT memory_id FROM memory_tags INDEXED BY idx_memory_tags_tag
+                     WHERE tag IN (?) GROUP BY memory_id) AS tagged
+    CROSS JOIN enhanced_memory AS m ON m.id = tagged.memory_id
+
+Triggers on enhanced_memory keep it current inside the writing transaction
+(insert, replace, update of the tags, delete), so the JSON column stays the
+record of a memory's tags and the table never needs to be written directly.
+"""
+
+import sqlite3
+import logging
+from typing import List, Sequence
+
+logger = logging.getLogger(__name__)
+
+TAGS_TABLE = "memory_tags"
+TAGS_INDEX = "idx_memory_tags_tag"
+
+# Tags JSON of a row if it is an array (the text items are its tags; anything else has none)
+_TAG_ARRAY = "CASE WHEN json_valid({row}.tags) THEN CASE WHEN json_type({row}.tags) = 'array' THEN {row}.tags END END"
+
+
+def _add_tags(row: str) -> str:
+    """Statement adding the tags of a trigger row (``new``)."""
+    return f"""
+        INSERT OR IGNORE INTO {TAGS_TABLE} (memory_id, tag)
+        SELECT {row}.id, value FROM json_each({_TAG_ARRAY.format(row=row)}) WHERE type = 'text';
+    """
+
+
+_TAGS_DDL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {TAGS_TABLE} (
+        memory_id TEXT NOT NULL,
+        tag TEXT NOT NULL,
+        PRIMARY KEY (memory_id, tag)
+    ) WITHOUT ROWID
+    """,
+    # Covers tag lookups (the secondary index carries the memory id)
+    f"CREATE INDEX IF NOT EXISTS {TAGS_INDEX} ON {TAGS_TABLE} (tag)",
+    # INSERT OR REPLACE of an existing id removes the old row without firing
+    # delete triggers, so its tags are dropped here
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_tags_bi BEFORE INSERT ON enhanced_memory BEGIN
+        DELETE FROM {TAGS_TABLE} WHERE memory_id = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_tags_ai AFTER INSERT ON enhanced_memory BEGIN
+        {_add_tags('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_tags_au AFTER UPDATE OF id, tags ON enhanced_memory BEGIN
+        DELETE FROM {TAGS_TABLE} WHERE memory_id = old.id;
+        {_add_tags('new')}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memory_tags_ad AFTER DELETE ON enhanced_memory BEGIN
+        DELETE FROM {TAGS_TABLE} WHERE memory_id = old.id;
+    END
+    """,
+]
+
+
+def unique_tags(tags: Sequence[str]) -> List[str]:
+    """Requested tags without blanks or repeats, in order."""
+    return list(dict.fromkeys(tag for tag in tags if tag))
+
+
+def tagged_ids_sql(tag_count: int, match_all: bool = False) -> str:
+    """
+    Subquery of the ids of memories carrying the tags (read through the tag index).
+
+    Args:
+        tag_count: Number of distinct tags (one placeholder each)
+        match_all: Require every tag instead of any of them
+
+    Returns:
+        SELECT of distinct memory ids; takes the tags as parameters
+    """
+    sql = (f"SELECT memory_id FROM {TAGS_TABLE} INDEXED BY {TAGS_INDEX} "
+           f"WHERE tag IN ({', '.join('?' for _ in range(tag_count))}) GROUP BY memory_id")
+    if match_all and tag_count > 1:
+        sql += f" HAVING COUNT(*) = {tag_count}"
+    return sql
+
+
+def tagged_memories_sql(tag_count: int, match_all: bool = False, alias: str = "m") -> str:
+    """
+    FROM clause joining the tagged memory ids to enhanced_memory (ids first, then by primary key).
+
+    Args:
+        tag_count: Number of distinct tags (one placeholder each)
+        match_all: Require every tag instead of any of them
+        alias: Alias of enhanced_memory
+
+    Returns:
+        SQL taking the tags as its first parameters
+    """
+    return (f"({tagged_ids_sql(tag_count, match_all)}) AS tagged "
+            f"CROSS JOIN enhanced_memory AS {alias} ON {alias}.id = tagged.memory_id")
+
+
+def rebuild_memory_tags(conn: sqlite3.Connection) -> int:
+    """
+    Recompute every tag row from the stored tags JSON (one pass over enhanced_memory).
+
+    Args:
+        conn: Database connection (caller commits)
+
+    Returns:
+        Number of tag rows
+    """
+    conn.execute(f"DELETE FROM {TAGS_TABLE}")
+    conn.execute(f"""
+        INSERT OR IGNORE INTO {TAGS_TABLE} (memory_id, tag)
+        SELECT m.id, t.value FROM enhanced_memory AS m, json_each({_TAG_ARRAY.format(row='m')}) AS t
+        WHERE t.type = 'text'
+    """)
+    return conn.execute(f"SELECT COUNT(*) FROM {TAGS_TABLE}").fetchone()[0]
+
+
+def ensure_memory_tags(conn: sqlite3.Connection) -> bool:
+    """
+    Create the tags table, index and triggers, and fill it on first use.
+
+    Args:
+        conn: Pair database connection (caller commits)
+
+    Returns:
+        True if the table was built by this call
+    """
+    exists = has_memory_tags(conn)
+    for statement in _TAGS_DDL:
+        conn.execute(statement)
+    if exists:
+        return False
+    tagged = rebuild_memory_tags(conn)
+    logger.info(f"✅ Built memory tag index ({tagged} tags)")
+    return True
+
+
+def has_memory_tags(conn: sqlite3.Connection) -> bool:
+    """Whether a database has the tags table (files never opened since it was added do not)."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TAGS_TABLE,)
+    ).fetchone() is not None
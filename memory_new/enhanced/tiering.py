@@ -0,0 +1,425 @@
+"""
+Hot/warm/cold tiering of enhanced memories.
+
+- hot: recent, important, identity, pinned-type or frequently/recently read
+  memories, stored as plain text.
+- warm: older memories that are rarely read. Their content is
+  zlib-compressed in place (``compressed_content``) and inflated on read;
+  they stay in the pair database and its FTS index.
+- cold: memories older than ``cold_after_days`` move to an archive database
+  (memory_databases/archive/enhanced_<pair>.db) with its own FTS index, which
+  is only searched on demand.
+
+Reads bump ``last_accessed``/``access_count`` and a warm memory that is used
+again is promoted back to hot on the next pass. A pass runs when a pair
+database is opened and the last one is older than ``run_interval_hours``, or
+from scripts/memory_maintenance.py --action tier.
+"""
+
+import sqlite3
+import logging
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from ..db.write_buffer import flush_write_buffer
+from ..search import FTS_TABLE, ensure_fts_index, search_fts
+from ..utils.compression import compress_content, inflate_content, inflate_row
+from ..utils.config import load_memory_config
+from ..utils.fingerprint import content_digest
+from .counters import COUNTERS_TABLE, ensure_memory_counters, has_memory_counters
+from .diary import CONTENT_HASH_COLUMNS, ensure_content_hashes
+from .enrichment import ENRICHMENT_COLUMNS, ensure_enrichment_columns
+
+logger = logging.getLogger(__name__)
+
+# Columns added to enhanced_memory
+TIERING_COLUMNS = {
+    "tier": "TEXT DEFAULT 'hot'",
+    "compressed_content": "BLOB",
+    "last_accessed": "TEXT",
+    "access_count": "INTEGER DEFAULT 0"
+}
+
+_TIERING_INDEXES = {
+    "idx_enhanced_memory_tier": "tier, timestamp"
+}
+
+_LAST_RUN_KEY = "tiering_last_run"
+
+
+@dataclass
+class TieringSettings:
+    """Tier boundaries and pass parameters."""
+    enabled: bool = True
+    warm_after_days: float = 30.0
+    cold_after_days: float = 365.0
+    hot_min_importance: float = 0.7
+    hot_min_access_count: int = 5
+    recent_access_days: float = 14.0
+    hot_memory_types: List[str] = field(default_factory=lambda: [
+        "diary", "session_diary", "daily_diary", "weekly_summary", "monthly_summary"
+    ])
+    compression_level: int = 6
+    min_compress_bytes: int = 128
+    run_interval_hours: float = 24.0
+    batch_size: int = 500
+
+    @classmethod
+    def from_config(cls) -> "TieringSettings":
+        """Build settings from the "tiering" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in load_memory_config("tiering").items() if k in known})
+
+
+def archive_path(db_path: Union[str, Path]) -> Path:
+    """Archive database of a pair database (kept out of the enhanced_*.db glob)."""
+    db_path = Path(db_path)
+    return db_path.parent / "archive" / db_path.name
+
+
+def ensure_tiering_columns(conn: sqlite3.Connection) -> List[str]:
+    """
+    Add missing tiering columns and their indexes to enhanced_memory.
+
+    Returns:
+        Names of the columns added by this call
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(enhanced_memory)")}
+    added = []
+    for column, definition in TIERING_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE enhanced_memory ADD COLUMN {column} {definition}")
+            added.append(column)
+    for index_name, columns in _TIERING_INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON enhanced_memory ({columns})")
+    return added
+
+
+# Parameters: last_accessed, memory id (one row per memory, e.g. through the write buffer)
+RECORD_ACCESS_SQL = """
+    UPDATE enhanced_memory
+    SET access_count = COALESCE(access_count, 0) + 1, last_accessed = ?
+    WHERE id = ?
+"""
+
+
+def record_access(conn: sqlite3.Connection, memory_ids: Sequence[str], now: Optional[datetime] = None):
+    """Bump access statistics of memories returned to a caller."""
+    if not memory_ids:
+        return
+    conn.execute(f"""
+        UPDATE enhanced_memory
+        SET access_count = COALESCE(access_count, 0) + 1, last_accessed = ?
+        WHERE id IN ({', '.join('?' for _ in memory_ids)})
+    """, [(now or datetime.now()).isoformat(), *memory_ids])
+
+
+def _keep_hot(settings: TieringSettings, now: datetime) -> Tuple[str, List[Any]]:
+    """SQL condition (and parameters) for memories that are never demoted."""
+    # COALESCEd so NULLs can never turn the negated condition into NULL
+    clauses = [
+        "COALESCE(importance, 0) >= ?", "COALESCE(is_identity, 0) = 1",
+        "COALESCE(access_count, 0) >= ?", "COALESCE(last_accessed, '') >= ?"
+    ]
+    params: List[Any] = [
+        settings.hot_min_importance,
+        settings.hot_min_access_count,
+        (now - timedelta(days=settings.recent_access_days)).isoformat()
+    ]
+    if settings.hot_memory_types:
+        clauses.append(f"memory_type IN ({', '.join('?' for _ in settings.hot_memory_types)})")
+        params.extend(settings.hot_memory_types)
+    return "(" + " OR ".join(clauses) + ")", params
+
+
+def promote_warm(conn: sqlite3.Connection, settings: TieringSettings, now: datetime) -> int:
+    """
+    Move warm memories that qualify as hot again back to plain text.
+
+    Returns:
+        Number of memories promoted
+    """
+    keep_hot, params = _keep_hot(settings, now)
+    rows = conn.execute(f"""
+        SELECT rowid, content, compressed_content FROM enhanced_memory
+        WHERE tier = 'warm' AND {keep_hot}
+    """, params).fetchall()
+    conn.executemany("""
+        UPDATE enhanced_memory SET content = ?, compressed_content = NULL, tier = 'hot'
+        WHERE rowid = ?
+    """, [(inflate_content(content, compressed), rowid) for rowid, content, compressed in rows])
+    return len(rows)
+
+
+def compress_warm(conn: sqlite3.Connection, settings: TieringSettings, now: datetime) -> int:
+    """
+    Compress hot memories older than ``warm_after_days`` that are not kept hot.
+
+    Short texts (or ones zlib cannot shrink) are marked warm uncompressed so
+    they are not reconsidered every pass. The FTS row of a compressed memory
+    is restored to its plain text, so it stays searchable.
+
+    Returns:
+        Number of memories compressed
+    """
+    keep_hot, params = _keep_hot(settings, now)
+    cutoff = (now - timedelta(days=settings.warm_after_days)).isoformat()
+    compressed_count = 0
+    while True:
+        rows = conn.execute(f"""
+            SELECT rowid, content FROM enhanced_memory
+            WHERE COALESCE(tier, 'hot') = 'hot' AND timestamp < ? AND NOT {keep_hot}
+            LIMIT ?
+        """, [cutoff, *params, settings.batch_size]).fetchall()
+        if not rows:
+            break
+        compressed, plain = [], []
+        for rowid, content in rows:
+            content = content or ""
+            if len(content.encode("utf-8")) >= settings.min_compress_bytes:
+                blob = compress_content(content, settings.compression_level)
+                if len(blob) < len(content.encode("utf-8")):
+                    compressed.append((blob, rowid, content))
+                    continue
+            plain.append((rowid,))
+        # The digest keys the diary cache once the text is emptied (see diary.py)
+        conn.executemany("""
+            UPDATE enhanced_memory SET content = '', compressed_content = ?, tier = 'warm',
+                content_hash = COALESCE(content_hash, ?)
+            WHERE rowid = ?
+        """, [(blob, content_digest(content), rowid) for blob, rowid, content in compressed])
+        # The content trigger re-indexed the emptied text; index the real one
+        conn.executemany(
+            f"UPDATE {FTS_TABLE} SET content = ? WHERE rowid = ?",
+            [(content, rowid) for _, rowid, content in compressed]
+        )
+        conn.executemany("UPDATE enhanced_memory SET tier = 'warm' WHERE rowid = ?", plain)
+        # Commit per batch so concurrent chat writes never wait on the whole pass
+        conn.commit()
+        compressed_count += len(compressed)
+    return compressed_count
+
+
+def open_archive(db_path: Union[str, Path]) -> Path:
+    """
+    Create the archive database of a pair if needed.
+
+    The archive gets the pair's enhanced_memory definition (every added
+    column included) and its own FTS index.
+
+    Returns:
+        Path of the archive database
+    """
+    path = archive_path(db_path)
+    if path.exists():
+        return path
+    with sqlite3.connect(db_path) as conn:
+        ddl = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'enhanced_memory'"
+        ).fetchone()[0]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(path) as archive:
+        archive.execute(ddl.replace("CREATE TABLE enhanced_memory", "CREATE TABLE IF NOT EXISTS enhanced_memory", 1))
+        ensure_enrichment_columns(archive)
+        ensure_tiering_columns(archive)
+        ensure_memory_counters(archive)
+        ensure_fts_index(archive)
+        archive.commit()
+    logger.info(f"✅ Created memory archive: {path}")
+    return path
+
+
+def archive_cold(conn: sqlite3.Connection, db_path: Union[str, Path], settings: TieringSettings,
+                 now: datetime) -> int:
+    """
+    Move memories older than ``cold_after_days`` that are not kept hot to the archive.
+
+    Rows are copied and deleted through an attached archive in one
+    transaction per batch, so a memory is never in both or neither database.
+
+    Returns:
+        Number of memories archived
+    """
+    keep_hot, params = _keep_hot(settings, now)
+    cutoff = (now - timedelta(days=settings.cold_after_days)).isoformat()
+    condition = f"timestamp < ? AND NOT {keep_hot}"
+    if conn.execute(f"SELECT 1 FROM enhanced_memory WHERE {condition} LIMIT 1", [cutoff, *params]).fetchone() is None:
+        return 0
+
+    path = open_archive(db_path)
+    with sqlite3.connect(path) as archive:
+        # Archives created before the counters existed
+        ensure_memory_counters(archive)
+    conn.commit()
+    conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+    try:
+        # Archives created before a column was added to the pair table
+        archive_columns = {row[1] for row in conn.execute("PRAGMA archive.table_info(enhanced_memory)")}
+        columns = [row[1] for row in conn.execute("PRAGMA main.table_info(enhanced_memory)")]
+        for column in columns:
+            if column not in archive_columns:
+                definition = {**ENRICHMENT_COLUMNS, **TIERING_COLUMNS, **CONTENT_HASH_COLUMNS}.get(column, "")
+                conn.execute(f"ALTER TABLE archive.enhanced_memory ADD COLUMN {column} {definition}")
+        insert_sql = f"""
+            INSERT OR REPLACE INTO archive.enhanced_memory ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+        """
+        previous_factory = conn.row_factory
+        conn.row_factory = sqlite3.Row
+        archived = 0
+        try:
+            while True:
+                rows = conn.execute(f"""
+                    SELECT rowid AS _rowid, * FROM main.enhanced_memory WHERE {condition} LIMIT ?
+                """, [cutoff, *params, settings.batch_size]).fetchall()
+                if not rows:
+                    break
+                values, rowids = [], []
+                for row in rows:
+                    memory = dict(row)
+                    rowids.append(memory.pop("_rowid"))
+                    memory = inflate_row(memory)
+                    memory["compressed_content"] = None
+                    memory["tier"] = "cold"
+                    values.append(tuple(memory.get(column) for column in columns))
+                conn.executemany(insert_sql, values)
+                conn.execute(
+                    f"DELETE FROM main.enhanced_memory WHERE rowid IN ({', '.join('?' for _ in rowids)})", rowids
+                )
+                conn.commit()
+                archived += len(rows)
+        finally:
+            conn.row_factory = previous_factory
+    finally:
+        conn.commit()
+        conn.execute("DETACH DATABASE archive")
+    return archived
+
+
+def run_tiering(db_path: Union[str, Path], settings: Optional[TieringSettings] = None,
+                force: bool = False, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Run one tiering pass over a pair database.
+
+    Args:
+        db_path: Pair database (memory_databases/enhanced_<pair>.db)
+        settings: Tier boundaries (defaults to the configured ones)
+        force: Run even if disabled or the last pass is recent
+        now: Reference time (defaults to the current time)
+
+    Returns:
+        promoted/compressed/archived counts, or {"skipped": True}
+    """
+    settings = settings or TieringSettings.from_config()
+    now = now or datetime.now()
+    if not force and not settings.enabled:
+        return {"skipped": True}
+
+    flush_write_buffer(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory_metadata (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        if not force:
+            row = conn.execute("SELECT value FROM memory_metadata WHERE key = ?", (_LAST_RUN_KEY,)).fetchone()
+            if row and row[0] > (now - timedelta(hours=settings.run_interval_hours)).isoformat():
+                return {"skipped": True}
+
+        ensure_enrichment_columns(conn)
+        ensure_tiering_columns(conn)
+        ensure_content_hashes(conn)
+        results = {
+            "promoted": promote_warm(conn, settings, now),
+            "archived": archive_cold(conn, db_path, settings, now),
+            "compressed": compress_warm(conn, settings, now)
+        }
+        conn.execute(
+            "INSERT OR REPLACE INTO memory_metadata (key, value, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+            (_LAST_RUN_KEY, now.isoformat())
+        )
+        conn.commit()
+
+    if any(results.values()):
+        logger.info(
+            f"✅ Tiered {db_path}: {results['promoted']} promoted, "
+            f"{results['compressed']} compressed, {results['archived']} archived"
+        )
+    return results
+
+
+def search_archive(db_path: Union[str, Path], match: str, limit: int = 10,
+                   memory_types: Optional[Sequence[str]] = None,
+                   character_id: Optional[str] = None, user_id: Optional[str] = None,
+                   order_by: str = "rank") -> List[Dict[str, Any]]:
+    """
+    Run search_fts against a pair's archive database.
+
+    Returns:
+        Archived memory rows (``tier`` is "cold"), or [] if nothing was archived
+    """
+    path = archive_path(db_path)
+    if not path.exists():
+        return []
+    with sqlite3.connect(path) as conn:
+        return search_fts(
+            conn, match, limit=limit, memory_types=memory_types,
+            character_id=character_id, user_id=user_id, order_by=order_by
+        )
+
+
+def delete_archived_memory(db_path: Union[str, Path], memory_id: str) -> bool:
+    """Delete one memory from a pair's archive database."""
+    path = archive_path(db_path)
+    if not path.exists():
+        return False
+    with sqlite3.connect(path) as conn:
+        return conn.execute("DELETE FROM enhanced_memory WHERE id = ?", (memory_id,)).rowcount > 0
+
+
+def _tier_totals(conn: sqlite3.Connection) -> List[Tuple[str, int, int]]:
+    """(tier, memories, content bytes) of a database, from its maintained counters when it has them."""
+    if has_memory_counters(conn):
+        return conn.execute(f"""
+            SELECT tier, SUM(memory_count), SUM(content_bytes) FROM {COUNTERS_TABLE} GROUP BY tier
+        """).fetchall()
+    return conn.execute("""
+        SELECT COALESCE(tier, 'hot'), COUNT(*),
+               COALESCE(SUM(LENGTH(CAST(content AS BLOB)) + COALESCE(LENGTH(compressed_content), 0)), 0)
+        FROM enhanced_memory GROUP BY 1
+    """).fetchall()
+
+
+def tier_stats(conn: sqlite3.Connection, db_path: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+    """
+    Memory count and stored content bytes per tier.
+
+    Read from the maintained counters (see counters); databases without
+    them yet are aggregated.
+
+    Args:
+        conn: Open connection to a pair database
+        db_path: The pair database path, to include its archive's count
+
+    Returns:
+        {"hot"|"warm"|"cold": {"memories": n, "content_bytes": n}}
+    """
+    stats = {tier: {"memories": 0, "content_bytes": 0} for tier in ("hot", "warm", "cold")}
+    for tier, count, content_bytes in _tier_totals(conn):
+        stats.setdefault(tier, {"memories": 0, "content_bytes": 0}).update(
+            memories=count, content_bytes=content_bytes
+        )
+    path = archive_path(db_path) if db_path else None
+    if path is not None and path.exists():
+        with sqlite3.connect(path) as archive:
+            totals = _tier_totals(archive)
+        stats["cold"] = {
+            "memories": sum(count for _, count, _ in totals),
+            "content_bytes": sum(content_bytes for _, _, content_bytes in totals)
+        }
+    return stats
@@ -0,0 +1,10 @@
+"""
+Formatting layer for memory system.
+"""
+
+from .formatter import MemoryEntryFormatter
+
+__all__ = [
+    # Memory formatting
+    'MemoryEntryFormatter'
+]
@@ -0,0 +1,84 @@
+"""
+Formatting of MemoryEntry lists for agent prompts.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List
+
+from ..base.interfaces import MemoryFormatter
+from ..base.models import MemoryEntry, MemoryType
+from ..enhanced.profile import extract_profile_facts, merge_facts, profile_details
+
+# Memories with at least this importance are listed in summaries
+KEY_MEMORY_IMPORTANCE = 0.7
+
+
+def _type_name(memory: MemoryEntry) -> str:
+    """Stored type string of a memory."""
+    return memory.memory_type.value if isinstance(memory.memory_type, MemoryType) else str(memory.memory_type)
+
+
+def _timestamp(memory: MemoryEntry) -> str:
+    """ISO timestamp of a memory."""
+    if isinstance(memory.timestamp, datetime):
+        return memory.timestamp.isoformat()
+    return str(memory.timestamp or "")
+
+
+class MemoryEntryFormatter(MemoryFormatter):
+    """Plain-text formatting in the shape the chat prompt builder uses."""
+
+    def __init__(self, max_content_chars: int = 200):
+        self.max_content_chars = max_content_chars
+
+    def _content(self, memory: MemoryEntry) -> str:
+        """Memory text, truncated to max_content_chars."""
+        content = (memory.content or "").strip()
+        if len(content) > self.max_content_chars:
+            return content[:self.max_content_chars].rstrip() + "..."
+        return content
+
+    def format_memory_for_agent(self, memory: MemoryEntry) -> str:
+        """Format a memory for agent consumption, e.g. ``[2024-05-01] (personal) ...``."""
+        return f"[{_timestamp(memory)[:10]}] ({_type_name(memory)}) {self._content(memory)}"
+
+    def format_memory_context(self, memories: List[MemoryEntry]) -> str:
+        """Format a list of memories into context string (one bullet per memory)."""
+        if not memories:
+            return "No relevant memories found."
+        return "\n".join(f"- {self.format_memory_for_agent(memory)}" for memory in memories)
+
+    def format_memory_summary(self, memories: List[MemoryEntry]) -> str:
+        """Format memories into a summary: counts by type, time span and key memories."""
+        if not memories:
+            return "No memories."
+        counts = Counter(_type_name(memory) for memory in memories)
+        timestamps = sorted(_timestamp(memory) for memory in memories)
+        lines = [
+            f"{len(memories)} memories ({', '.join(f'{name}: {count}' for name, count in counts.most_common())})",
+            f"From {timestamps[0][:10]} to {timestamps[-1][:10]}"
+        ]
+        key_memories = sorted(
+            (memory for memory in memories if memory.importance_score >= KEY_MEMORY_IMPORTANCE),
+            key=lambda memory: -memory.importance_score
+        )
+        if key_memories:
+            lines.append("Key memories:")
+            lines.extend(f"- {self._content(memory)}" for memory in key_memories[:5])
+        return "\n".join(lines)
+
+    def format_personal_details(self, memories: List[MemoryEntry]) -> Dict[str, Any]:
+        """
+        Extract and format personal details from memories.
+
+        Uses the same rules and merge policy as the materialized user profile.
+
+        Returns:
+            field -> list of values
+        """
+        profile: Dict[str, List[Dict[str, Any]]] = {}
+        for memory in sorted(memories, key=_timestamp):
+            merge_facts(profile, extract_profile_facts(memory.content), memory.id,
+                        _timestamp(memory), _type_name(memory))
+        return profile_details(profile)
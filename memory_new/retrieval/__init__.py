@@ -0,0 +1,72 @@
+"""
+Retrieval layer for memory system.
+"""
+
+from .ranker import (
+    RankingWeights,
+    MemoryRanker,
+    get_memory_ranker,
+    parse_timestamps
+)
+
+from .records import (
+    MemoryRecord,
+    RecordLayout,
+    record_layout,
+    cursor_layout
+)
+
+from .planner import (
+    PATH_INDEXES,
+    QueryPlan,
+    MemoryQueryPlanner,
+    explain_query_plan,
+    full_scans,
+    audit_query_plans
+)
+
+from .pagination import (
+    MAX_PAGE_SIZE,
+    encode_cursor,
+    decode_cursor,
+    is_conversation_content
+)
+
+from .retriever import (
+    EnhancedMemoryRetriever,
+    memory_record_to_entry,
+    pair_memory_system
+)
+
+__all__ = [
+    # Ranking
+    'RankingWeights',
+    'MemoryRanker',
+    'get_memory_ranker',
+    'parse_timestamps',
+
+    # Compact memory rows
+    'MemoryRecord',
+    'RecordLayout',
+    'record_layout',
+    'cursor_layout',
+
+    # Query planning
+    'PATH_INDEXES',
+    'QueryPlan',
+    'MemoryQueryPlanner',
+    'explain_query_plan',
+    'full_scans',
+    'audit_query_plans',
+
+    # Keyset pagination
+    'MAX_PAGE_SIZE',
+    'encode_cursor',
+    'decode_cursor',
+    'is_conversation_content',
+
+    # Retrieval
+    'EnhancedMemoryRetriever',
+    'memory_record_to_entry',
+    'pair_memory_system'
+]
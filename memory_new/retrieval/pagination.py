@@ -0,0 +1,76 @@
+"""
+Keyset (cursor) pagination over a pair's memories.
+
+Pages are ordered by (timestamp, rowid). SQLite ends every index with the
+rowid, so on the pair-scoped timestamp, type and conversation indexes
+(db.schema.LIVE_INDEXES) a page is one index range read starting at the
+cursor: scrolling back through a long history costs O(page), not O(offset) as
+with LIMIT/OFFSET. MemoryQueryPlanner.plan_page() and plan_history() build the
+page SQL.
+
+A cursor is an opaque string encoding the (timestamp, rowid) of the last row a
+page returned; pass it back to continue after that row.
+"""
+
+import json
+import base64
+import binascii
+from typing import Any, List, Optional, Tuple
+
+# Leading characters of the status lines the app logs into memory (not conversation)
+SYSTEM_MESSAGE_PREFIXES = (
+    "🔧", "📝", "🚀", "✅", "⚠️", "❌", "🎭", "💭", "🔍", "🤖", "📚", "📊", "🎯", "🔄"
+)
+
+# Memories this short are acknowledgements rather than conversation
+MIN_CONVERSATION_CHARS = 10
+
+# Largest page a caller may request
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(timestamp: str, rowid: int) -> str:
+    """Opaque cursor of a row's (timestamp, rowid) position."""
+    raw = json.dumps([timestamp, rowid], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """
+    (timestamp, rowid) position of a cursor.
+
+    Raises:
+        ValueError: If the cursor was not produced by encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, rowid = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid memory cursor: {cursor!r}") from e
+    if not isinstance(timestamp, str) or not isinstance(rowid, int):
+        raise ValueError(f"Invalid memory cursor: {cursor!r}")
+    return timestamp, rowid
+
+
+def keyset_clause(cursor: Optional[str], oldest_first: bool = False, alias: str = "m") -> Tuple[Optional[str], List[Any]]:
+    """
+    WHERE clause and parameters continuing after a cursor (None, [] without one).
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return None, []
+    timestamp, rowid = decode_cursor(cursor)
+    return f"({alias}.timestamp, {alias}.rowid) {'>' if oldest_first else '<'} (?, ?)", [timestamp, rowid]
+
+
+def keyset_ordering(oldest_first: bool = False, alias: str = "m") -> str:
+    """ORDER BY terms matching keyset_clause()."""
+    direction = "ASC" if oldest_first else "DESC"
+    return f"{alias}.timestamp {direction}, {alias}.rowid {direction}"
+
+
+def is_conversation_content(content: Optional[str]) -> bool:
+    """Whether a memory's text is conversation rather than a logged status line."""
+    return bool(content) and len(content) > MIN_CONVERSATION_CHARS and not content.startswith(SYSTEM_MESSAGE_PREFIXES)
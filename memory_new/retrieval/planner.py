@@ -0,0 +1,358 @@
+"""
+Query planning for MemoryQuery lookups against enhanced_memory.
+
+Each MemoryQuery is mapped onto one access path, chosen by the most selective
+filter it carries:
+
+- ``fts``: search text, driven by the FTS5 index (BM25 ranked)
+- ``conversation``: conversation_id, via an index on the context JSON field
+- ``tags``: tags, via the memory_tags tag index joined to the memories by id
+- ``type``: memory_type (plus any date range), via (memory_type, timestamp)
+- ``importance``: a narrow importance range, via (importance, timestamp)
+- ``recent``: everything else, newest first via the timestamp index
+
+plan_page() and plan_history() build keyset pages (see pagination) over the
+same indexes.
+
+The indexes are the pair-scoped ones of the live schema (db.schema.LIVE_INDEXES)
+and the tag index (enhanced.tags). The chosen index is pinned with INDEXED BY
+so plans do not drift with table statistics; the other filters are applied to
+the rows it yields.
+audit_query_plans() runs EXPLAIN QUERY PLAN over the hot queries and reports
+any that scan a table (scripts/memory_maintenance.py --action query-audit).
+"""
+
+import sqlite3
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from ..base.models import MemoryQuery, MemoryType
+from ..db.schema import conversation_id_sql, get_live_schema_version, pending_live_migrations
+from ..enhanced.tags import TAGS_INDEX, tagged_ids_sql, tagged_memories_sql, unique_tags
+from ..search.fts import FTS_TABLE, build_match_expression
+from .pagination import encode_cursor, keyset_clause, keyset_ordering
+
+logger = logging.getLogger(__name__)
+
+# Access path -> pinned index
+PATH_INDEXES = {
+    "conversation": "idx_enhanced_memory_pair_conversation",
+    "tags": TAGS_INDEX,
+    "type": "idx_enhanced_memory_pair_type",
+    "importance": "idx_enhanced_memory_pair_importance",
+    "recent": "idx_enhanced_memory_pair_time",
+    "topic": "idx_enhanced_memory_topic"
+}
+
+# Importance ranges at most this wide are read through the importance index;
+# wider ones are cheaper as a filter on the newest-first scan
+SELECTIVE_IMPORTANCE_RANGE = 0.5
+
+
+@dataclass
+class QueryPlan:
+    """Access path, index and SQL chosen for one MemoryQuery."""
+    path: str
+    index: Optional[str]
+    sql: str
+    params: List[Any] = field(default_factory=list)
+
+
+def memory_type_value(memory_type: Union[MemoryType, str, None]) -> Optional[str]:
+    """Stored memory_type string of a MemoryType (or a raw type string)."""
+    return memory_type.value if isinstance(memory_type, MemoryType) else memory_type
+
+
+class MemoryQueryPlanner:
+    """Maps MemoryQuery filters onto an index or the FTS path."""
+
+    def choose_path(self, query: MemoryQuery, match: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """
+        Pick the access path of a query.
+
+        Args:
+            query: The query
+            match: Its FTS MATCH expression, if it has searchable text
+
+        Returns:
+            (path, pinned index name or None for the FTS path)
+        """
+        if match:
+            return "fts", None
+        if query.conversation_id:
+            path = "conversation"
+        elif query.tags and unique_tags(query.tags):
+            path = "tags"
+        elif query.memory_type:
+            path = "type"
+        elif (not (query.start_date or query.end_date)
+                and query.max_importance - query.min_importance <= SELECTIVE_IMPORTANCE_RANGE):
+            path = "importance"
+        else:
+            path = "recent"
+        return path, PATH_INDEXES[path]
+
+    @staticmethod
+    def _filters(query: MemoryQuery, match: Optional[str], path: str) -> Tuple[List[str], List[Any]]:
+        """WHERE clauses and parameters of a query's filters (the tags path joins its tags instead)."""
+        clauses = ["m.character_id = ?", "m.user_id = ?"]
+        params: List[Any] = [query.character_id, query.user_id]
+        if match:
+            clauses.insert(0, f"{FTS_TABLE} MATCH ?")
+            params.insert(0, match)
+        if query.conversation_id:
+            clauses.append(f"{conversation_id_sql('m.context')} = ?")
+            params.append(query.conversation_id)
+        tags = unique_tags(query.tags or [])
+        if tags and path != "tags":
+            clauses.append(f"m.id IN ({tagged_ids_sql(len(tags), query.match_all_tags)})")
+            params.extend(tags)
+        if query.memory_type:
+            clauses.append("m.memory_type = ?")
+            params.append(memory_type_value(query.memory_type))
+        if query.start_date:
+            clauses.append("m.timestamp >= ?")
+            params.append(query.start_date.isoformat())
+        if query.end_date:
+            clauses.append("m.timestamp <= ?")
+            params.append(query.end_date.isoformat())
+        if query.min_importance > 0.0:
+            clauses.append("m.importance >= ?")
+            params.append(query.min_importance)
+        if query.max_importance < 1.0:
+            clauses.append("m.importance <= ?")
+            params.append(query.max_importance)
+        return clauses, params
+
+    def plan(self, query: MemoryQuery, columns: str = "m.*", limited: bool = True,
+             match: Optional[str] = None) -> QueryPlan:
+        """
+        Build the SQL of a MemoryQuery.
+
+        Args:
+            query: The query
+            columns: Select list over the memory table (aliased ``m``)
+            limited: Apply query.limit (deletes select every match)
+            match: FTS MATCH expression to use instead of the one built from
+                query.search_query (e.g. a phrase search)
+
+        Returns:
+            QueryPlan whose rows are ordered by rank (fts), importance
+            (importance) or newest first (every other path)
+        """
+        if match is None and query.search_query:
+            match = build_match_expression(query.search_query)
+        path, index = self.choose_path(query, match)
+        clauses, params = self._filters(query, match, path)
+
+        if path == "fts":
+            source = (f"{FTS_TABLE} JOIN enhanced_memory AS m "
+                      f"ON m.rowid = {FTS_TABLE}.rowid AND m.id = {FTS_TABLE}.memory_id")
+            ordering = f"bm25({FTS_TABLE}), m.importance DESC"
+        else:
+            source, source_params = _memory_source(path, index, query)
+            params = [*source_params, *params]
+            ordering = "m.importance DESC, m.timestamp DESC" if path == "importance" else "m.timestamp DESC"
+
+        sql = f"SELECT {columns} FROM {source} WHERE {' AND '.join(clauses)} ORDER BY {ordering}"
+        if limited:
+            sql += " LIMIT ?"
+            params.append(query.limit)
+        return QueryPlan(path=path, index=index, sql=sql, params=params)
+
+    def plan_page(self, query: MemoryQuery, cursor: Optional[str] = None) -> QueryPlan:
+        """
+        Build the SQL of one keyset page of a MemoryQuery (newest first).
+
+        Pages continue after ``cursor`` in (timestamp, rowid) order, so only the
+        conversation, tags, type and recent paths can serve them; a narrow importance
+        range is applied as a filter on the recent path instead. The rowid is
+        selected first (as ``page_rowid``) for the next cursor.
+
+        Raises:
+            ValueError: For search queries (ranked, not pageable) or a malformed cursor
+        """
+        if query.search_query:
+            raise ValueError("Search results are ranked by relevance and cannot be paged by cursor")
+        path, index = self.choose_path(query)
+        if path == "importance":
+            path, index = "recent", PATH_INDEXES["recent"]
+        clauses, params = self._filters(query, None, path)
+        clause, keyset_params = keyset_clause(cursor)
+        if clause:
+            clauses.append(clause)
+            params.extend(keyset_params)
+        source, source_params = _memory_source(path, index, query)
+        sql = (f"SELECT m.rowid AS page_rowid, m.* FROM {source} "
+               f"WHERE {' AND '.join(clauses)} ORDER BY {keyset_ordering()} LIMIT ?")
+        return QueryPlan(path=path, index=index, sql=sql, params=[*source_params, *params, query.limit])
+
+    def plan_history(self, character_id: str, user_id: str, limit: int, cursor: Optional[str] = None,
+                     memory_types: Optional[Sequence[str]] = None, exclude_types: Sequence[str] = (),
+                     oldest_first: bool = False, columns: str = "m.*") -> QueryPlan:
+        """
+        Build the SQL of one keyset page of a pair's history.
+
+        A single memory type is read through the type index; anything else
+        through the timestamp index, with the type filters applied to the rows
+        it yields.
+
+        Args:
+            character_id: Character of the pair
+            user_id: User of the pair
+            limit: Maximum number of rows
+            cursor: Continue after this position (first page if None)
+            memory_types: Only these types
+            exclude_types: Never these types
+            oldest_first: Ascending instead of newest first
+            columns: Select list over the memory table (aliased ``m``); the
+                rowid is always selected before it
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        path = "type" if memory_types and len(memory_types) == 1 else "recent"
+        index = PATH_INDEXES[path]
+        clauses = ["m.character_id = ?", "m.user_id = ?"]
+        params: List[Any] = [character_id, user_id]
+        if memory_types:
+            clauses.append(f"m.memory_type IN ({', '.join('?' for _ in memory_types)})")
+            params.extend(memory_types)
+        if exclude_types:
+            clauses.append(f"m.memory_type NOT IN ({', '.join('?' for _ in exclude_types)})")
+            params.extend(exclude_types)
+        clause, keyset_params = keyset_clause(cursor, oldest_first)
+        if clause:
+            clauses.append(clause)
+            params.extend(keyset_params)
+        sql = (f"SELECT m.rowid, {columns} FROM enhanced_memory AS m INDEXED BY {index} "
+               f"WHERE {' AND '.join(clauses)} ORDER BY {keyset_ordering(oldest_first)} LIMIT ?")
+        return QueryPlan(path=path, index=index, sql=sql, params=[*params, limit])
+
+    def plan_topic(self, character_id: str, user_id: str, topic: str, limit: int = 10) -> QueryPlan:
+        """
+        Build the SQL of a lookup by write-time topic category (newest first).
+
+        Args:
+            character_id: Character of the pair
+            user_id: User of the pair
+            topic: A TOPIC_CATEGORIES value
+            limit: Maximum number of rows
+        """
+        index = PATH_INDEXES["topic"]
+        sql = (f"SELECT m.* FROM enhanced_memory AS m INDEXED BY {index} "
+               "WHERE m.topic_category = ? AND m.character_id = ? AND m.user_id = ? "
+               "ORDER BY m.timestamp DESC LIMIT ?")
+        return QueryPlan(path="topic", index=index, sql=sql, params=[topic, character_id, user_id, limit])
+
+
+def _memory_source(path: str, index: str, query: MemoryQuery) -> Tuple[str, List[Any]]:
+    """
+    FROM clause (and its parameters) of an index path.
+
+    The memory table is read through the path's pinned index; the tags path
+    reads the tag index and joins the memories by primary key.
+    """
+    if path == "tags":
+        tags = unique_tags(query.tags)
+        return tagged_memories_sql(len(tags), query.match_all_tags), tags
+    return f"enhanced_memory AS m INDEXED BY {index}", []
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql: str, params: Any = ()) -> List[str]:
+    """Detail lines of EXPLAIN QUERY PLAN for a statement."""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def full_scans(details: List[str]) -> List[str]:
+    """Plan lines that read a whole table without an index (reading a subquery's result or a VALUES list is not one)."""
+    derived = {detail.split()[1] for detail in details if detail.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+    return [
+        detail for detail in details
+        if detail.startswith("SCAN ") and "INDEX" not in detail and not detail.endswith(" CONSTANT ROWS")
+        and detail.split()[1] not in derived
+    ]
+
+
+def hot_queries(character_id: str, user_id: str,
+                now: Optional[datetime] = None) -> List[Tuple[str, MemoryQuery]]:
+    """Representative MemoryQuery shapes issued on the chat path."""
+    now = now or datetime.now()
+    week_ago = now - timedelta(days=7)
+    return [
+        ("recent", MemoryQuery(user_id, character_id)),
+        ("search", MemoryQuery(user_id, character_id, search_query="sister birthday")),
+        ("search_typed", MemoryQuery(user_id, character_id, search_query="job", memory_type=MemoryType.PERSONAL)),
+        ("conversation", MemoryQuery(user_id, character_id, conversation_id="conversation")),
+        ("tags", MemoryQuery(user_id, character_id, tags=["identity", "name"])),
+        ("tags_all", MemoryQuery(user_id, character_id, tags=["diary", "session"], match_all_tags=True,
+                                 memory_type="session_diary")),
+        ("conversation_window", MemoryQuery(user_id, character_id, conversation_id="conversation",
+                                            start_date=week_ago)),
+        ("type", MemoryQuery(user_id, character_id, memory_type=MemoryType.CONVERSATION)),
+        ("type_window", MemoryQuery(user_id, character_id, memory_type=MemoryType.EMOTIONAL,
+                                    start_date=week_ago, end_date=now)),
+        ("important", MemoryQuery(user_id, character_id, min_importance=0.7)),
+        ("important_window", MemoryQuery(user_id, character_id, min_importance=0.7, start_date=week_ago)),
+        ("window", MemoryQuery(user_id, character_id, start_date=week_ago, end_date=now)),
+    ]
+
+
+def audit_query_plans(db_path: Union[str, Path], planner: Optional[MemoryQueryPlanner] = None,
+                      statements: Optional[List[Tuple[str, str, Sequence[Any]]]] = None) -> Dict[str, Any]:
+    """
+    EXPLAIN QUERY PLAN every hot query against a pair database.
+
+    The database is not modified: a file with pending schema migrations is
+    reported as such, and statements pinned to a missing index as errors.
+
+    Args:
+        db_path: Pair database
+        planner: Planner to audit (defaults to MemoryQueryPlanner)
+        statements: Extra (name, sql, params) to audit, e.g.
+            enhanced_memory_system.hot_statements()
+
+    Returns:
+        {"schema_version", "pending_migrations", "queries": [{"name", "path",
+        "index", "plan", "full_scans", "error"}], "full_scans": n, "errors": n}
+    """
+    planner = planner or MemoryQueryPlanner()
+    with sqlite3.connect(db_path) as conn:
+        report: Dict[str, Any] = {
+            "schema_version": get_live_schema_version(conn),
+            "pending_migrations": [version for version, _ in pending_live_migrations(conn)],
+            "queries": [], "full_scans": 0, "errors": 0
+        }
+        row = conn.execute("SELECT character_id, user_id FROM enhanced_memory LIMIT 1").fetchone()
+        character_id, user_id = row or ("character", "user")
+        cursor = encode_cursor(datetime.now().isoformat(), 0)
+        audited = [
+            (name, plan.path, plan.index, plan.sql, plan.params)
+            for name, plan in [(name, planner.plan(query)) for name, query in hot_queries(character_id, user_id)]
+            + [("topic", planner.plan_topic(character_id, user_id, "family")),
+               ("page", planner.plan_page(MemoryQuery(user_id, character_id), cursor)),
+               ("page_type", planner.plan_page(MemoryQuery(user_id, character_id,
+                                                           memory_type=MemoryType.CONVERSATION), cursor)),
+               ("page_tags", planner.plan_page(MemoryQuery(user_id, character_id, tags=["diary"]), cursor)),
+               ("history", planner.plan_history(character_id, user_id, 50, cursor, exclude_types=("summary",))),
+               ("history_type", planner.plan_history(character_id, user_id, 50, cursor,
+                                                     memory_types=("conversation",)))]
+        ]
+        audited += [(name, "statement", None, sql, params) for name, sql, params in statements or []]
+        for name, path, index, sql, params in audited:
+            entry = {"name": name, "path": path, "index": index, "plan": [], "full_scans": [], "error": None}
+            try:
+                entry["plan"] = explain_query_plan(conn, sql, params)
+                entry["full_scans"] = full_scans(entry["plan"])
+            except sqlite3.OperationalError as e:
+                entry["error"] = str(e)
+                report["errors"] += 1
+            report["queries"].append(entry)
+            report["full_scans"] += len(entry["full_scans"])
+    if report["full_scans"] or report["errors"]:
+        logger.warning(f"⚠️ {report['full_scans']} full table scans and {report['errors']} unplannable "
+                       f"hot queries in {db_path} (schema version {report['schema_version']})")
+    return report
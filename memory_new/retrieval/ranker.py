@@ -0,0 +1,278 @@
+"""
+Vectorized hybrid ranking for memories.
+
+Scores a whole candidate set in one NumPy pass:
+
+    score = relevance^a * importance^b * recency^c * (1 + emotion_boost * |valence|)
+
+where recency halves every ``recency_half_life_days``. The exponents come from
+RankingWeights, so setting a weight to 0 removes that factor.
+"""
+
+import sqlite3
+import logging
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..search.fts import FTS_TABLE
+from ..utils.config import load_memory_config
+from .records import MemoryRecord, cursor_layout
+
+logger = logging.getLogger(__name__)
+
+_MIN_FACTOR = 1e-3
+_SECONDS_PER_DAY = 86400.0
+
+
+@dataclass
+class RankingWeights:
+    """Configurable parameters of the ranking function."""
+    relevance_weight: float = 1.0
+    importance_weight: float = 1.0
+    recency_weight: float = 0.5
+    recency_half_life_days: float = 14.0
+    emotion_boost: float = 0.25
+    unmatched_relevance: float = 0.3
+
+    @classmethod
+    def from_config(cls, **overrides) -> "RankingWeights":
+        """Build weights from the "ranking" section of config/memory_config.json."""
+        known = {f.name for f in fields(cls)}
+        values = {k: v for k, v in load_memory_config("ranking").items() if k in known}
+        values.update(overrides)
+        return cls(**values)
+
+    @classmethod
+    def recency_only(cls) -> "RankingWeights":
+        """Newest first, ignoring every other signal."""
+        return cls(relevance_weight=0.0, importance_weight=0.0, recency_weight=1.0, emotion_boost=0.0)
+
+
+def parse_timestamps(values: Sequence[Any]) -> np.ndarray:
+    """Parse ISO timestamps into datetime64[us]; unparseable values become NaT."""
+    try:
+        return np.array(values, dtype="datetime64[us]")
+    except (ValueError, TypeError):
+        parsed = np.empty(len(values), dtype="datetime64[us]")
+        for i, value in enumerate(values):
+            try:
+                if isinstance(value, str):
+                    value = datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+                parsed[i] = np.datetime64(value, "us")
+            except (ValueError, TypeError):
+                parsed[i] = np.datetime64("NaT")
+        return parsed
+
+
+class MemoryRanker:
+    """Single ranking engine shared by every memory retrieval path."""
+
+    def __init__(self, weights: Optional[RankingWeights] = None):
+        self.weights = weights or RankingWeights.from_config()
+
+    def score(self, importance: np.ndarray, timestamps: np.ndarray, valence: np.ndarray,
+              relevance: Optional[np.ndarray] = None, now: Optional[np.datetime64] = None,
+              weights: Optional[RankingWeights] = None) -> np.ndarray:
+        """
+        Compute scores for aligned candidate arrays.
+
+        Args:
+            importance: Importance per memory (0.0 to 1.0)
+            timestamps: datetime64 timestamps per memory
+            valence: Emotional valence per memory (-1.0 to 1.0)
+            relevance: Query relevance per memory (0.0 to 1.0), or None
+            now: Reference time for recency, defaults to the current time
+            weights: Override the ranker's weights for this call
+
+        Returns:
+            Score per memory, higher is better
+        """
+        w = weights or self.weights
+        now = now if now is not None else np.datetime64(datetime.now(), "us")
+
+        age_days = (now - timestamps).astype("timedelta64[us]").astype(np.float64) / 1e6 / _SECONDS_PER_DAY
+        age_days = np.where(np.isnat(timestamps), np.inf, np.maximum(age_days, 0.0))
+        recency = np.maximum(np.exp2(-age_days / w.recency_half_life_days), _MIN_FACTOR)
+
+        scores = np.power(recency, w.recency_weight)
+        if w.importance_weight:
+            scores *= np.power(np.clip(importance, _MIN_FACTOR, None), w.importance_weight)
+        if relevance is not None and w.relevance_weight:
+            scores *= np.power(np.clip(relevance, _MIN_FACTOR, None), w.relevance_weight)
+        if w.emotion_boost:
+            scores *= 1.0 + w.emotion_boost * np.abs(valence)
+        return scores
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: Optional[int]) -> np.ndarray:
+        """Indices of the k best scores, best first (argpartition, then sort only k)."""
+        n = scores.shape[0]
+        if k is None or k >= n:
+            return np.argsort(-scores, kind="stable")
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def rank_records(self, records: List[Dict[str, Any]], k: Optional[int] = None,
+                     weights: Optional[RankingWeights] = None,
+                     min_importance: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Rank already-loaded memory dicts.
+
+        Args:
+            records: Memories (dicts or MemoryRecords) with importance/timestamp/emotional_valence keys
+            k: Number of results (None for all)
+            weights: Override the ranker's weights for this call
+            min_importance: Drop memories below this importance
+
+        Returns:
+            The top k records, best first
+        """
+        if not records:
+            return []
+        importance = np.fromiter((r.get("importance", 0) or 0 for r in records), np.float64, len(records))
+        valence = np.fromiter((r.get("emotional_valence", 0) or 0 for r in records), np.float64, len(records))
+        timestamps = parse_timestamps([r.get("timestamp") or None for r in records])
+        w = weights or self.weights
+        relevance = None
+        if any(r.get("relevance_score") is not None for r in records):
+            relevance = np.fromiter(
+                (w.unmatched_relevance if r.get("relevance_score") is None else r["relevance_score"] for r in records),
+                np.float64, len(records)
+            )
+
+        scores = self.score(importance, timestamps, valence, relevance, weights=w)
+        if min_importance is not None:
+            keep = importance >= min_importance
+            scores = np.where(keep, scores, -np.inf)
+            available = int(np.count_nonzero(keep))
+            k = available if k is None else min(k, available)
+        return [records[i] for i in self.top_k(scores, k)]
+
+    @staticmethod
+    def candidate_query(min_importance: float = 0.0,
+                        where: Optional[Tuple[str, Sequence[Any]]] = None,
+                        pair: Optional[Tuple[str, str]] = None) -> Tuple[str, List[Any]]:
+        """
+        SQL (and parameters) loading the scoring columns of rank_pair's candidates.
+
+        With the pair given it is a range search of the pair importance index,
+        which also covers the columns of summarization.retrieval_filter().
+        """
+        predicate, extra_params = where if where is not None else ("1", ())
+        pair_clause = "character_id = ? AND user_id = ? AND " if pair else ""
+        sql = f"""
+            SELECT rowid, importance, timestamp, COALESCE(emotional_valence, 0.0)
+            FROM enhanced_memory WHERE {pair_clause}importance >= ? AND ({predicate})
+        """
+        return sql, [*(pair or ()), min_importance, *extra_params]
+
+    def rank_pair(self, conn: sqlite3.Connection, k: int, min_importance: float = 0.0,
+                  match: Optional[str] = None,
+                  weights: Optional[RankingWeights] = None,
+                  where: Optional[Tuple[str, Sequence[Any]]] = None,
+                  pair: Optional[Tuple[str, str]] = None) -> List[MemoryRecord]:
+        """
+        Rank a pair database's memories and return the top k full rows.
+
+        Only the scoring columns of the candidate set are loaded; full rows
+        are fetched for the winners alone.
+
+        Args:
+            conn: Open connection to a pair database
+            k: Number of results
+            min_importance: Candidate filter on importance
+            match: Optional FTS5 MATCH expression supplying BM25 relevance
+            weights: Override the ranker's weights for this call
+            where: Extra candidate predicate and its parameters, e.g.
+                summarization.retrieval_filter()
+            pair: (character_id, user_id) of the database, to read the
+                candidates through its index
+
+        Returns:
+            Memory records (read-only mappings of the rows), best first, with
+            ``rank_score`` and ``relevance_score`` keys
+        """
+        w = weights or self.weights
+        rows = conn.execute(*self.candidate_query(min_importance, where, pair)).fetchall()
+        if not rows:
+            return []
+        rowids, importance, timestamps, valence = zip(*rows)
+        rowids = np.array(rowids, dtype=np.int64)
+        importance = np.array(importance, dtype=np.float64)
+        valence = np.array(valence, dtype=np.float64)
+        timestamps = parse_timestamps(timestamps)
+
+        relevance = None
+        if match:
+            relevance = self._bm25_relevance(conn, match, rowids, w.unmatched_relevance)
+
+        scores = self.score(importance, timestamps, valence, relevance, weights=w)
+        best = self.top_k(scores, k)
+        return self._fetch_rows(conn, rowids[best], scores[best],
+                                relevance[best] if relevance is not None else None)
+
+    @staticmethod
+    def _bm25_relevance(conn: sqlite3.Connection, match: str, rowids: np.ndarray,
+                        unmatched: float) -> np.ndarray:
+        """Map BM25 scores onto [unmatched, 1.0] aligned with rowids."""
+        relevance = np.full(rowids.shape[0], unmatched, dtype=np.float64)
+        try:
+            hits = conn.execute(
+                f"SELECT rowid, bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?", (match,)
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠️ FTS relevance unavailable, ranking without it: {e}")
+            return relevance
+        if not hits:
+            return relevance
+        hit_ids, hit_scores = zip(*hits)
+        hit_ids = np.array(hit_ids, dtype=np.int64)
+        strength = -np.array(hit_scores, dtype=np.float64)  # bm25() is lower-is-better
+        top = strength.max()
+        strength = strength / top if top > 0 else np.ones_like(strength)
+
+        order = np.argsort(rowids)
+        positions = np.searchsorted(rowids, hit_ids, sorter=order)
+        positions = np.clip(positions, 0, rowids.shape[0] - 1)
+        found = rowids[order[positions]] == hit_ids
+        relevance[order[positions[found]]] = unmatched + (1.0 - unmatched) * strength[found]
+        return relevance
+
+    @staticmethod
+    def _fetch_rows(conn: sqlite3.Connection, rowids: np.ndarray, scores: np.ndarray,
+                    relevance: Optional[np.ndarray]) -> List[MemoryRecord]:
+        """Load full rows for the ranked rowids as records, preserving rank order."""
+        if rowids.shape[0] == 0:
+            return []
+        ids = rowids.tolist()
+        cursor = conn.execute(
+            f"SELECT rowid AS _rowid, * FROM enhanced_memory WHERE rowid IN ({', '.join('?' for _ in ids)})", ids
+        )
+        layout = cursor_layout(cursor)
+        fetched = {row[0]: row for row in cursor}
+
+        ranked = []
+        for i, rowid in enumerate(ids):
+            row = fetched.get(rowid)
+            if row is None:
+                continue
+            ranked.append(MemoryRecord(
+                row, layout, float(scores[i]), float(relevance[i]) if relevance is not None else None
+            ))
+        return ranked
+
+
+_default_ranker: Optional[MemoryRanker] = None
+
+
+def get_memory_ranker() -> MemoryRanker:
+    """Shared ranker configured from config/memory_config.json."""
+    global _default_ranker
+    if _default_ranker is None:
+        _default_ranker = MemoryRanker()
+    return _default_ranker
@@ -0,0 +1,141 @@
+"""
+Compact memory rows for the retrieval path.
+
+A MemoryRecord wraps the tuple SQLite returns for one enhanced_memory row,
+plus a column layout shared by every row of the query, in place of a
+per-row dict. It reads like the dict the ranker used to build
+(``record["content"]``, ``record.get("is_identity")``, ``dict(record)``),
+including the keys derived from the stored columns:
+
+- ``content``: inflated from ``compressed_content`` for warm rows
+- ``is_identity`` / ``is_personal``: booleans
+- ``emotional_context``: the decoded ``emotion_summary``
+- ``rank_score`` / ``relevance_score``: set by the ranker
+
+Derived values are computed on first access, so a record passed through
+ranking and context assembly costs one tuple and a few slots. to_dict()
+materializes a plain dict where a caller needs one (JSON, mutation).
+"""
+
+import json
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from ..utils.compression import inflate_content
+
+# Stored columns a record does not expose (read through content / the cursor)
+HIDDEN_COLUMNS = frozenset({"_rowid", "compressed_content"})
+
+# Keys every record has beyond its stored columns
+COMPUTED_KEYS = ("emotional_context", "rank_score", "relevance_score")
+
+_BOOLEAN_COLUMNS = frozenset({"is_identity", "is_personal"})
+
+# Enrichment columns; rows stored before enrichment existed are enriched on access
+_ENRICHED_KEYS = frozenset({
+    "topic_category", "emotion_summary", "emotion_label", "is_identity", "is_personal", "emotional_context"
+})
+
+
+class RecordLayout:
+    """Column positions and visible keys of one query's rows (shared by its records)."""
+    __slots__ = ("positions", "keys")
+
+    def __init__(self, names: Sequence[str]):
+        self.positions = {name: index for index, name in enumerate(names)}
+        self.keys = tuple(name for name in names if name not in HIDDEN_COLUMNS) + tuple(
+            key for key in COMPUTED_KEYS if key not in self.positions
+        )
+
+
+@lru_cache(maxsize=64)
+def record_layout(names: Tuple[str, ...]) -> RecordLayout:
+    """Layout of rows with these column names (one instance per distinct SELECT)."""
+    return RecordLayout(names)
+
+
+def cursor_layout(cursor) -> RecordLayout:
+    """Layout of the rows of an executed sqlite3 cursor."""
+    return record_layout(tuple(column[0] for column in cursor.description))
+
+
+class MemoryRecord(Mapping):
+    """Read-only, tuple-backed memory row (see module docstring)."""
+    __slots__ = ("_row", "_layout", "_derived", "rank_score", "relevance_score")
+
+    def __init__(self, row: Sequence[Any], layout: RecordLayout,
+                 rank_score: Optional[float] = None, relevance_score: Optional[float] = None):
+        self._row = row
+        self._layout = layout
+        self._derived: Optional[Dict[str, Any]] = None
+        self.rank_score = rank_score
+        self.relevance_score = relevance_score
+
+    def _stored(self, key: str) -> Any:
+        position = self._layout.positions.get(key)
+        return None if position is None else self._row[position]
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "rank_score":
+            return self.rank_score
+        if key == "relevance_score":
+            return self.relevance_score
+        derived = self._derived
+        if derived is not None and key in derived:
+            return derived[key]
+        if key in _ENRICHED_KEYS and self._unenriched():
+            return self._enrich()[key]
+        if key == "content":
+            content = self._stored("content")
+            if content:
+                return content
+            return self._derive(key, inflate_content(content, self._stored("compressed_content")))
+        if key == "emotional_context":
+            summary = self._stored("emotion_summary")
+            return self._derive(key, json.loads(summary) if summary else {})
+        if key in HIDDEN_COLUMNS or key not in self._layout.positions:
+            raise KeyError(key)
+        value = self._row[self._layout.positions[key]]
+        return bool(value) if key in _BOOLEAN_COLUMNS else value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layout.keys)
+
+    def __len__(self) -> int:
+        return len(self._layout.keys)
+
+    def __repr__(self) -> str:
+        return f"MemoryRecord(id={self._stored('id')!r}, rank_score={self.rank_score!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict of every key (what the ranker returned before records)."""
+        return {key: self[key] for key in self._layout.keys}
+
+    def _derive(self, key: str, value: Any) -> Any:
+        if self._derived is None:
+            self._derived = {}
+        self._derived[key] = value
+        return value
+
+    def _unenriched(self) -> bool:
+        positions = self._layout.positions
+        return ("topic_category" in positions and self._stored("topic_category") is None) or (
+            "emotion_summary" in positions and self._stored("emotion_summary") is None
+        )
+
+    def _enrich(self) -> Dict[str, Any]:
+        """Enrich a row stored before write-time enrichment (what project_enrichment does)."""
+        from ..enhanced.enrichment import enrich_memory
+
+        tags = self._stored("tags") or []
+        if isinstance(tags, str):
+            try:
+                tags = json.loads(tags)
+            except (ValueError, TypeError):
+                tags = []
+        enrichment = enrich_memory(self["content"] or "", tags)
+        for key, value in enrichment.items():
+            self._derive(key, bool(value) if key in _BOOLEAN_COLUMNS else value)
+        self._derive("emotional_context", json.loads(enrichment["emotion_summary"]))
+        return self._derived
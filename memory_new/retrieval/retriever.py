@@ -0,0 +1,270 @@
+"""
+Memory retrieval backed by the per-pair enhanced memory databases.
+"""
+
+import json
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from ..base.interfaces import MemoryRetriever
+from ..base.models import MemoryContext, MemoryEntry, MemoryQuery, MemoryResult, MemoryStatistics, MemoryType
+from ..enhanced.counters import ensure_memory_counters, load_memory_counters
+from ..enhanced.tiering import archive_path, record_access
+from ..utils.compression import inflate_row
+from .pagination import encode_cursor
+from .planner import MemoryQueryPlanner, QueryPlan
+
+logger = logging.getLogger(__name__)
+
+# Parameters: character_id, user_id, character_id, user_id
+TIME_RANGE_SQL = """
+    SELECT (SELECT MIN(timestamp) FROM enhanced_memory WHERE character_id = ? AND user_id = ?),
+           (SELECT MAX(timestamp) FROM enhanced_memory WHERE character_id = ? AND user_id = ?)
+"""
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    """Parse a stored ISO timestamp (naive), or None."""
+    if isinstance(value, datetime) or value is None:
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def _memory_type(value: str) -> Union[MemoryType, str]:
+    """MemoryType of a stored type string (types outside the enum stay strings)."""
+    try:
+        return MemoryType(value)
+    except ValueError:
+        return value
+
+
+def memory_record_to_entry(row: Dict[str, Any]) -> MemoryEntry:
+    """Convert an enhanced_memory row into a MemoryEntry (inverse of memory_entry_to_record)."""
+    row = inflate_row(dict(row))
+    try:
+        context = json.loads(row["context"]) if row.get("context") else {}
+    except (ValueError, TypeError):
+        context = {}
+    try:
+        tags = json.loads(row["tags"]) if row.get("tags") else []
+    except (ValueError, TypeError):
+        tags = []
+    conversation_id = context.pop("conversation_id", None)
+    emotional_context = context.pop("emotional_context", None) or row.get("emotion_label") or ""
+    return MemoryEntry(
+        id=row["id"],
+        content=row.get("content") or "",
+        memory_type=_memory_type(row["memory_type"]),
+        user_id=row["user_id"],
+        character_id=row["character_id"],
+        timestamp=_parse_datetime(row["timestamp"]) or row["timestamp"],
+        importance_score=row.get("importance") if row.get("importance") is not None else 0.5,
+        emotional_context=emotional_context if isinstance(emotional_context, str) else json.dumps(emotional_context),
+        related_entities=tags if isinstance(tags, list) else [],
+        metadata=context if isinstance(context, dict) else {"context": context},
+        conversation_id=conversation_id,
+        last_accessed=_parse_datetime(row.get("last_accessed")),
+        access_count=row.get("access_count") or 0
+    )
+
+
+def pair_memory_system(character_id: Optional[str], user_id: Optional[str]):
+    """Registry-managed EnhancedMemorySystem of a character-user pair."""
+    if not character_id or not user_id:
+        raise ValueError("A character_id and user_id are required for this operation")
+    from ..enhanced.enhanced_memory_system import get_enhanced_memory_system
+    memory_system = get_enhanced_memory_system(character_id, user_id)
+    if memory_system is None:
+        raise RuntimeError(f"Enhanced memory system unavailable for {character_id}_{user_id}")
+    return memory_system
+
+
+def fetch_row(conn: sqlite3.Connection, memory_id: str) -> Optional[Dict[str, Any]]:
+    """One enhanced_memory row by id (primary key lookup), or None."""
+    cursor = conn.execute("SELECT * FROM enhanced_memory WHERE id = ?", (memory_id,))
+    row = cursor.fetchone()
+    return dict(zip([column[0] for column in cursor.description], row)) if row else None
+
+
+def fetch_planned(conn: sqlite3.Connection, plan: QueryPlan) -> List[MemoryEntry]:
+    """Run a QueryPlan and convert its rows."""
+    previous_factory = conn.row_factory
+    conn.row_factory = sqlite3.Row
+    try:
+        return [memory_record_to_entry(dict(row)) for row in conn.execute(plan.sql, plan.params)]
+    finally:
+        conn.row_factory = previous_factory
+
+
+class EnhancedMemoryRetriever(MemoryRetriever):
+    """
+    MemoryRetriever reading enhanced_<character>_<user>.db.
+
+    Queries run the MemoryQueryPlanner's plan on the pair's pooled connection.
+    Lookups by memory id alone need the pair given at construction.
+    """
+
+    def __init__(self, character_id: Optional[str] = None, user_id: Optional[str] = None,
+                 planner: Optional[MemoryQueryPlanner] = None):
+        self.character_id = character_id
+        self.user_id = user_id
+        self.planner = planner or MemoryQueryPlanner()
+
+    def run_plan(self, plan: QueryPlan, character_id: str, user_id: str) -> MemoryResult:
+        """
+        Run a QueryPlan for a pair, bumping access statistics of the returned memories.
+
+        Returns:
+            MemoryResult whose data is a list of MemoryEntry and whose metadata
+            names the access path and index used
+        """
+        try:
+            memory_system = pair_memory_system(character_id, user_id)
+            with memory_system._connect() as conn:
+                memories = fetch_planned(conn, plan)
+                record_access(conn, [memory.id for memory in memories])
+            return MemoryResult(
+                success=True, data=memories,
+                metadata={"path": plan.path, "index": plan.index, "count": len(memories)}
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to query memories ({plan.path} path): {e}")
+            return MemoryResult(success=False, data=[], error=str(e))
+
+    def run_query(self, query: MemoryQuery, match: Optional[str] = None) -> MemoryResult:
+        """
+        Plan and run a query.
+
+        Args:
+            query: The query
+            match: FTS MATCH expression overriding the one built from query.search_query
+        """
+        plan = self.planner.plan(query, match=match)
+        return self.run_plan(plan, query.character_id, query.user_id)
+
+    def get_memories(self, query: MemoryQuery) -> MemoryResult:
+        """Retrieve memories based on query parameters."""
+        return self.run_query(query)
+
+    def get_memories_page(self, query: MemoryQuery, cursor: Optional[str] = None) -> MemoryResult:
+        """
+        One keyset page of the memories matching a query, newest first.
+
+        Browsing does not count as access, so paged memories keep their tier.
+
+        Args:
+            query: The query (query.limit is the page size; search text is not pageable)
+            cursor: next_cursor of the previous page (first page if None)
+
+        Returns:
+            MemoryResult whose data is a list of MemoryEntry and whose metadata
+            holds next_cursor (None on the last page)
+        """
+        try:
+            plan = self.planner.plan_page(query, cursor)
+            memory_system = pair_memory_system(query.character_id, query.user_id)
+            with memory_system._connect() as conn:
+                previous_factory = conn.row_factory
+                conn.row_factory = sqlite3.Row
+                try:
+                    rows = [dict(row) for row in conn.execute(plan.sql, plan.params)]
+                finally:
+                    conn.row_factory = previous_factory
+            next_cursor = None
+            if rows and len(rows) >= query.limit:
+                next_cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["page_rowid"])
+            return MemoryResult(
+                success=True, data=[memory_record_to_entry(row) for row in rows],
+                metadata={"path": plan.path, "index": plan.index, "count": len(rows), "next_cursor": next_cursor}
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to page memories: {e}")
+            return MemoryResult(success=False, data=[], error=str(e))
+
+    def get_memory_by_id(self, memory_id: str) -> MemoryResult:
+        """Retrieve a specific memory by ID (cold memories are read from the pair's archive)."""
+        try:
+            memory_system = pair_memory_system(self.character_id, self.user_id)
+            with memory_system._connect() as conn:
+                row = fetch_row(conn, memory_id)
+            path = archive_path(memory_system.db_path)
+            if row is None and path.exists():
+                with sqlite3.connect(path) as archive:
+                    row = fetch_row(archive, memory_id)
+            if row is None:
+                return MemoryResult(success=False, error=f"Memory {memory_id} not found")
+            return MemoryResult(success=True, data=memory_record_to_entry(row))
+        except Exception as e:
+            logger.error(f"❌ Failed to get memory {memory_id}: {e}")
+            return MemoryResult(success=False, error=str(e))
+
+    def get_memory_context(self, context: MemoryContext, limit: int = 10) -> MemoryResult:
+        """
+        Get memory context for a specific conversation or user.
+
+        The current conversation's memories come first (conversation index),
+        topped up with the pair's most recent memories.
+        """
+        memories: List[MemoryEntry] = []
+        if context.conversation_id:
+            result = self.run_query(MemoryQuery(
+                user_id=context.user_id, character_id=context.character_id,
+                limit=limit, conversation_id=context.conversation_id
+            ))
+            if not result.success:
+                return result
+            memories = result.data
+        if len(memories) < limit:
+            result = self.run_query(MemoryQuery(
+                user_id=context.user_id, character_id=context.character_id, limit=limit
+            ))
+            if not result.success:
+                return result
+            seen = {memory.id for memory in memories}
+            memories += [memory for memory in result.data if memory.id not in seen][:limit - len(memories)]
+        return MemoryResult(success=True, data=memories, metadata={"count": len(memories)})
+
+    def get_memory_statistics(self, user_id: str, character_id: str) -> MemoryStatistics:
+        """Get statistics about stored memories (including archived ones), from the maintained counters."""
+        memory_system = pair_memory_system(character_id, user_id)
+        memory_types: Dict[Union[MemoryType, str], int] = {}
+        importance_sum, total = 0.0, 0
+        oldest, newest = None, None
+        with memory_system._connect() as conn:
+            sources = [conn]
+            path = archive_path(memory_system.db_path)
+            archive = sqlite3.connect(path) if path.exists() else None
+            if archive is not None:
+                ensure_memory_counters(archive)
+                sources.append(archive)
+            try:
+                for source in sources:
+                    counters = load_memory_counters(source, character_id, user_id)
+                    for memory_type, count in counters["type_distribution"].items():
+                        key = _memory_type(memory_type)
+                        memory_types[key] = memory_types.get(key, 0) + count
+                    importance_sum += counters["importance_sum"]
+                    total += counters["total_memories"]
+                    # Two index seeks on the pair's timestamp index
+                    first, last = source.execute(TIME_RANGE_SQL, (character_id, user_id) * 2).fetchone()
+                    oldest = first if oldest is None or (first is not None and first < oldest) else oldest
+                    newest = last if newest is None or (last is not None and last > newest) else newest
+            finally:
+                if archive is not None:
+                    archive.commit()
+                    archive.close()
+        paths = [Path(memory_system.db_path), path]
+        return MemoryStatistics(
+            total_memories=total,
+            memory_types=memory_types,
+            average_importance=importance_sum / total if total else 0.0,
+            oldest_memory=_parse_datetime(oldest),
+            newest_memory=_parse_datetime(newest),
+            total_size_bytes=sum(path.stat().st_size for path in paths if path.exists())
+        )
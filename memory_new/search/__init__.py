@@ -0,0 +1,31 @@
+"""
+Search layer for memory system.
+"""
+
+from .fts import (
+    FTS_TABLE,
+    fts_available,
+    ensure_fts_index,
+    rebuild_fts_index,
+    backfill_database,
+    build_match_expression,
+    build_phrase_expression,
+    search_fts
+)
+
+from .searcher import EnhancedMemorySearcher
+
+__all__ = [
+    # Full-text search
+    'FTS_TABLE',
+    'fts_available',
+    'ensure_fts_index',
+    'rebuild_fts_index',
+    'backfill_database',
+    'build_match_expression',
+    'build_phrase_expression',
+    'search_fts',
+
+    # Search
+    'EnhancedMemorySearcher'
+]
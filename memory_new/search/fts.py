@@ -0,0 +1,205 @@
+"""
+Full-text search over enhanced_memory using SQLite FTS5.
+
+The FTS table mirrors ``enhanced_memory.content`` and is kept in sync by
+triggers, so callers only ever write to ``enhanced_memory``. Rows are keyed by
+the memory table's rowid and carry the memory id so joins can verify both.
+Compressed (warm) memories keep their plain text in the index, so they stay
+searchable in place.
+"""
+
+import re
+import sqlite3
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Union
+
+from ..utils.compression import inflate_content, inflate_row
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "enhanced_memory_fts"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        content,
+        memory_id UNINDEXED,
+        memory_type UNINDEXED,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS enhanced_memory_fts_ai AFTER INSERT ON enhanced_memory BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content, memory_id, memory_type)
+        VALUES (new.rowid, new.content, new.id, new.memory_type);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS enhanced_memory_fts_ad AFTER DELETE ON enhanced_memory BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.rowid;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS enhanced_memory_fts_au AFTER UPDATE OF content, memory_type ON enhanced_memory BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.rowid;
+        INSERT INTO {FTS_TABLE}(rowid, content, memory_id, memory_type)
+        VALUES (new.rowid, new.content, new.id, new.memory_type);
+    END
+    """,
+]
+
+
+def fts_available(conn: sqlite3.Connection) -> bool:
+    """Check whether the FTS table exists in this database."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).fetchone()
+    return row is not None
+
+
+def ensure_fts_index(conn: sqlite3.Connection) -> bool:
+    """
+    Create the FTS table and sync triggers if missing.
+
+    A freshly created index is backfilled from the existing rows so older
+    databases become searchable the first time they are opened.
+
+    Returns:
+        True if the index was created by this call
+    """
+    created = not fts_available(conn)
+    for statement in _FTS_DDL:
+        conn.execute(statement)
+    if created:
+        count = rebuild_fts_index(conn)
+        logger.info(f"✅ Created memory FTS index ({count} rows backfilled)")
+    return created
+
+
+def rebuild_fts_index(conn: sqlite3.Connection) -> int:
+    """
+    Repopulate the FTS table from enhanced_memory.
+
+    Also needed after a VACUUM, which may renumber rowids of tables without an
+    INTEGER PRIMARY KEY.
+
+    Returns:
+        Number of rows indexed
+    """
+    content = "content"
+    if "compressed_content" in {row[1] for row in conn.execute("PRAGMA table_info(enhanced_memory)")}:
+        conn.create_function("inflate_content", 2, inflate_content, deterministic=True)
+        content = "inflate_content(content, compressed_content)"
+    conn.execute(f"DELETE FROM {FTS_TABLE}")
+    cursor = conn.execute(f"""
+        INSERT INTO {FTS_TABLE}(rowid, content, memory_id, memory_type)
+        SELECT rowid, {content}, id, memory_type FROM enhanced_memory
+    """)
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return cursor.rowcount
+
+
+def backfill_database(db_path: Union[str, Path]) -> int:
+    """Create (if needed) and fully rebuild the FTS index of one database file."""
+    with sqlite3.connect(db_path) as conn:
+        for statement in _FTS_DDL:
+            conn.execute(statement)
+        count = rebuild_fts_index(conn)
+        conn.commit()
+        return count
+
+
+def build_match_expression(text: str, prefix: bool = True, operator: str = "AND") -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word is quoted so user input can never inject FTS syntax. With
+    ``prefix`` each term also matches longer words ("sist" -> "sister").
+
+    Args:
+        text: Free-text query
+        prefix: Use prefix queries for each term
+        operator: "AND" or "OR" between terms
+
+    Returns:
+        MATCH expression, or None if the text contains no searchable words
+    """
+    terms = _TOKEN_RE.findall(text.lower())
+    if not terms:
+        return None
+    suffix = "*" if prefix else ""
+    return f" {operator} ".join(f'"{term}"{suffix}' for term in terms)
+
+
+def build_phrase_expression(phrases: Sequence[str], prefix: bool = False) -> Optional[str]:
+    """
+    Build an OR expression of quoted phrases, e.g. ``"years old" OR sister*``.
+
+    Args:
+        phrases: Words or multi-word phrases to match
+        prefix: Allow prefix matches on the last word of each phrase
+
+    Returns:
+        MATCH expression, or None if no phrase contains searchable words
+    """
+    parts = []
+    suffix = "*" if prefix else ""
+    for phrase in phrases:
+        terms = _TOKEN_RE.findall(phrase.lower())
+        if terms:
+            parts.append(f'"{" ".join(terms)}"{suffix}')
+    return " OR ".join(parts) if parts else None
+
+
+def search_fts(conn: sqlite3.Connection, match: str, limit: int = 10,
+               memory_types: Optional[Sequence[str]] = None,
+               character_id: Optional[str] = None, user_id: Optional[str] = None,
+               order_by: str = "rank") -> List[Dict[str, Any]]:
+    """
+    Run a BM25-ranked FTS query joined back to enhanced_memory.
+
+    Args:
+        conn: Open connection to a pair database
+        match: FTS5 MATCH expression (see build_match_expression)
+        limit: Maximum number of rows
+        memory_types: Restrict to these memory types
+        character_id: Restrict to this character
+        user_id: Restrict to this user
+        order_by: "rank" for BM25 relevance, "recent" for newest first
+
+    Returns:
+        Memory rows as dicts with extra ``rank`` and ``snippet`` keys
+    """
+    clauses = [f"{FTS_TABLE} MATCH ?"]
+    params: List[Any] = [match]
+    if memory_types:
+        clauses.append(f"m.memory_type IN ({', '.join('?' for _ in memory_types)})")
+        params.extend(memory_types)
+    if character_id is not None:
+        clauses.append("m.character_id = ?")
+        params.append(character_id)
+    if user_id is not None:
+        clauses.append("m.user_id = ?")
+        params.append(user_id)
+    ordering = "m.timestamp DESC" if order_by == "recent" else "rank, m.importance DESC"
+    params.append(limit)
+
+    previous_factory = conn.row_factory
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(f"""
+            SELECT m.*,
+                   bm25({FTS_TABLE}) AS rank,
+                   snippet({FTS_TABLE}, 0, '[', ']', '…', 12) AS snippet
+            FROM {FTS_TABLE}
+            JOIN enhanced_memory m ON m.rowid = {FTS_TABLE}.rowid AND m.id = {FTS_TABLE}.memory_id
+            WHERE {' AND '.join(clauses)}
+            ORDER BY {ordering}
+            LIMIT ?
+        """, params)
+        return [inflate_row(dict(row)) for row in cursor.fetchall()]
+    finally:
+        conn.row_factory = previous_factory
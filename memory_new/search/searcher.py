@@ -0,0 +1,59 @@
+"""
+Memory search backed by the per-pair enhanced memory databases.
+"""
+
+from typing import TYPE_CHECKING, List, Optional
+
+from ..base.interfaces import MemorySearcher
+from ..base.models import MemoryContext, MemoryQuery, MemoryResult
+from ..enhanced.enrichment import TOPIC_CATEGORIES
+from .fts import build_match_expression, build_phrase_expression
+
+if TYPE_CHECKING:
+    from ..retrieval.retriever import EnhancedMemoryRetriever
+
+
+class EnhancedMemorySearcher(MemorySearcher):
+    """
+    MemorySearcher over the FTS5 index and write-time topic categories.
+
+    Text and entity searches take the planner's FTS path (BM25 ranked);
+    searches for a known topic category use the topic index.
+    """
+
+    def __init__(self, retriever: Optional["EnhancedMemoryRetriever"] = None):
+        if retriever is None:
+            # The retrieval layer imports this package, so bind it lazily
+            from ..retrieval.retriever import EnhancedMemoryRetriever
+            retriever = EnhancedMemoryRetriever()
+        self.retriever = retriever
+
+    def _search(self, match: Optional[str], context: MemoryContext, limit: int) -> MemoryResult:
+        """Run an FTS MATCH expression for the context's pair."""
+        if not match:
+            return MemoryResult(success=True, data=[], metadata={"path": "fts", "count": 0})
+        return self.retriever.run_query(
+            MemoryQuery(user_id=context.user_id, character_id=context.character_id, limit=limit),
+            match=match
+        )
+
+    def search_memories(self, query: str, context: MemoryContext, limit: int = 10) -> MemoryResult:
+        """Search memories by content (each word is prefix-matched)."""
+        return self._search(build_match_expression(query), context, limit)
+
+    def search_by_entities(self, entities: List[str], context: MemoryContext, limit: int = 10) -> MemoryResult:
+        """Search memories mentioning any of the entities (exact phrases)."""
+        return self._search(build_phrase_expression(entities), context, limit)
+
+    def search_by_topic(self, topic: str, context: MemoryContext, limit: int = 10) -> MemoryResult:
+        """
+        Search memories by topic.
+
+        A topic category assigned at write time ("family", "work", ...) is read
+        through the topic index, newest first; any other topic is a phrase search.
+        """
+        category = (topic or "").strip().lower()
+        if category not in TOPIC_CATEGORIES:
+            return self._search(build_phrase_expression([topic or ""]), context, limit)
+        plan = self.retriever.planner.plan_topic(context.character_id, context.user_id, category, limit)
+        return self.retriever.run_plan(plan, context.character_id, context.user_id)
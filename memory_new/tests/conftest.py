@@ -0,0 +1,33 @@
+"""Shared fixtures: each test gets its own working directory and pair database."""
+
+import sqlite3
+
+import pytest
+
+from memory_new.enhanced.enhanced_memory_system import EnhancedMemorySystem
+
+CHARACTER_ID = "luna"
+USER_ID = "tester"
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Temporary working directory (pair databases live under memory_databases/)."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def memory_system(workdir):
+    """A freshly provisioned EnhancedMemorySystem for the test pair."""
+    system = EnhancedMemorySystem(CHARACTER_ID, USER_ID)
+    yield system
+    system.close()
+
+
+@pytest.fixture
+def db(memory_system):
+    """Separate connection to the pair database, for checking what was written."""
+    conn = sqlite3.connect(memory_system.db_path)
+    yield conn
+    conn.close()
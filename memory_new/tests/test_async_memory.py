@@ -0,0 +1,44 @@
+"""Backpressure of the pair-sharded memory executor."""
+
+import asyncio
+import threading
+
+import pytest
+
+from memory_new.enhanced.async_memory import AsyncMemorySettings, MemoryExecutor, MemoryQueueFull
+
+
+@pytest.fixture
+def executor():
+    executor = MemoryExecutor(AsyncMemorySettings(shards=1, max_queue=1, submit_timeout_ms=1500))
+    yield executor
+    executor.shutdown()
+
+
+def test_full_shard_raises_memory_queue_full_with_retry_after(executor):
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    shard = executor.shard_for("luna_tester")
+    running = shard.submit(block)
+    assert started.wait(5)
+    queued = shard.submit(lambda: None)
+
+    try:
+        with pytest.raises(MemoryQueueFull) as excinfo:
+            asyncio.run(executor.run("luna_tester", lambda: None))
+    finally:
+        release.set()
+    running.result(5)
+    queued.result(5)
+
+    assert excinfo.value.retry_after == 2
+    assert executor.rejected == 1
+
+
+def test_runs_once_the_shard_has_room(executor):
+    assert asyncio.run(executor.run("luna_tester", lambda: 42)) == 42
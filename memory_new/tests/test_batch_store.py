@@ -0,0 +1,59 @@
+"""A turn stored with batch_store_memories() is written as a whole or not at all."""
+
+import sqlite3
+
+import pytest
+
+TURN = [
+    {"content": "My name is Ada and I live in Lisbon", "memory_type": "user_message"},
+    {"content": "Lovely to meet you, Ada!", "memory_type": "response"},
+]
+
+
+def count(db, table="enhanced_memory"):
+    return db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_turn_is_stored_in_one_batch(memory_system, db):
+    ids = memory_system.batch_store_memories(TURN)
+
+    assert len(ids) == 2
+    assert count(db) == 2
+    assert count(db, "personal_details") > 0
+
+
+def test_failed_insert_rolls_back_the_whole_turn(memory_system, db):
+    details_before = count(db, "personal_details")
+    db.execute("""
+        CREATE TRIGGER reject_response BEFORE INSERT ON enhanced_memory
+        WHEN new.memory_type = 'response' BEGIN SELECT RAISE(ABORT, 'rejected'); END
+    """)
+    db.commit()
+
+    with pytest.raises(sqlite3.IntegrityError):
+        memory_system.batch_store_memories(TURN)
+
+    # Neither the user's message nor its extracted personal details were kept
+    assert count(db) == 0
+    assert count(db, "personal_details") == details_before
+
+
+def test_invalid_memory_stores_nothing(memory_system, db):
+    with pytest.raises(TypeError):
+        memory_system.batch_store_memories([TURN[0], {"memory_type": "response"}])
+
+    assert count(db) == 0
+
+
+def test_user_message_can_be_stored_alone_after_a_failed_turn(memory_system, db):
+    db.execute("""
+        CREATE TRIGGER reject_response BEFORE INSERT ON enhanced_memory
+        WHEN new.memory_type = 'response' BEGIN SELECT RAISE(ABORT, 'rejected'); END
+    """)
+    db.commit()
+    with pytest.raises(sqlite3.IntegrityError):
+        memory_system.batch_store_memories(TURN)
+
+    memory_system.batch_store_memories(TURN[:1])
+
+    assert db.execute("SELECT content FROM enhanced_memory").fetchall() == [(TURN[0]["content"],)]
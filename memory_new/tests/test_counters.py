@@ -0,0 +1,149 @@
+"""Maintained memory counters agree with the stored memories after every kind of write."""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from memory_new.enhanced.counters import COUNTERS_TABLE
+from memory_new.enhanced.tiering import TieringSettings, archive_path, run_tiering
+
+from .conftest import CHARACTER_ID, USER_ID
+
+NOW = datetime(2026, 10, 1, 12, 0)
+
+# Distinct (never merged as near-duplicates) and long enough for zlib to shrink
+FACTS = [text * 2 for text in (
+    "We spent the whole afternoon repainting the garden fence a pale shade of blue. ",
+    "Her grandmother taught her to bake sourdough bread in a wood-fired oven. ",
+    "The team finally shipped the new billing system after three months of delays. ",
+    "They hiked to the glacier lake and camped under a sky full of shooting stars. ",
+    "His cousin restores vintage motorcycles in a garage behind the bakery. ",
+    "The choir rehearses every Thursday evening in the old church by the river. ",
+)]
+
+
+def recount(conn):
+    """Counter rows recomputed from enhanced_memory."""
+    return {
+        tuple(key): (count, pytest.approx(importance), content_bytes)
+        for *key, count, importance, content_bytes in conn.execute("""
+            SELECT character_id, user_id, memory_type, COALESCE(tier, 'hot'), COUNT(*),
+                   COALESCE(SUM(importance), 0),
+                   COALESCE(SUM(LENGTH(CAST(content AS BLOB)) + COALESCE(LENGTH(compressed_content), 0)), 0)
+            FROM enhanced_memory GROUP BY 1, 2, 3, 4
+        """)
+    }
+
+
+def counters(conn):
+    return {
+        tuple(key): (count, importance, content_bytes)
+        for *key, count, importance, content_bytes in conn.execute(f"""
+            SELECT character_id, user_id, memory_type, tier, memory_count, importance_sum, content_bytes
+            FROM {COUNTERS_TABLE} WHERE memory_count > 0
+        """)
+    }
+
+
+def recount_matches(conn):
+    return recount(conn) == counters(conn)
+
+
+def store_facts(memory_system, count, days_old=0, offset=0):
+    return memory_system.batch_store_memories([
+        {"content": content, "memory_type": "fact", "importance": 0.3,
+         "timestamp": (NOW - timedelta(days=days_old, minutes=i)).isoformat()}
+        for i, content in enumerate(FACTS[offset:offset + count])
+    ])
+
+
+def test_inserts_and_deletes(memory_system, db):
+    ids = store_facts(memory_system, 4)
+    memory_system.store_memory("Nice to see you again today", "conversation")
+
+    assert recount_matches(db)
+    assert memory_system.get_memory_stats()["total_memories"] == 5
+
+    for memory_id in ids[:3]:
+        assert memory_system.delete_memory(memory_id)
+
+    assert recount_matches(db)
+    stats = memory_system.get_memory_stats()
+    assert stats["total_memories"] == 2
+    assert stats["type_distribution"] == {"fact": 1, "conversation": 1}
+
+
+def test_updates_move_rows_between_counters(memory_system, db):
+    first, second = store_facts(memory_system, 2)
+
+    memory_system.update_memory_importance(first, 0.9)
+    memory_system.update_memory(second, "The fence is blue now", memory_type="personal", importance=0.7)
+
+    assert recount_matches(db)
+    assert memory_system.get_memory_stats()["type_distribution"] == {"fact": 1, "personal": 1}
+
+
+def test_insert_or_replace_does_not_double_count(memory_system, db):
+    [memory_id] = store_facts(memory_system, 1)
+    columns = [row[1] for row in db.execute("PRAGMA table_info(enhanced_memory)")]
+    row = db.execute("SELECT * FROM enhanced_memory WHERE id = ?", (memory_id,)).fetchone()
+
+    db.execute(f"INSERT OR REPLACE INTO enhanced_memory ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' for _ in columns)})", row)
+    db.commit()
+
+    assert recount_matches(db)
+    assert memory_system.get_memory_stats()["total_memories"] == 1
+
+
+def test_compression_and_archiving(memory_system, db):
+    store_facts(memory_system, 3, days_old=60)
+    store_facts(memory_system, 2, days_old=400, offset=3)
+    memory_system.store_memory("Nice to see you again today", "conversation")
+    settings = TieringSettings(warm_after_days=30, cold_after_days=365)
+
+    results = run_tiering(memory_system.db_path, settings, force=True, now=NOW)
+
+    assert (results["compressed"], results["archived"]) == (3, 2)
+    assert recount_matches(db)
+    stats = memory_system.get_memory_stats()
+    assert stats["total_memories"] == 4
+    assert {tier: counts["memories"] for tier, counts in stats["tiers"].items() if tier != "cold"} == {
+        "hot": 1, "warm": 3
+    }
+    with sqlite3.connect(archive_path(memory_system.db_path)) as archive:
+        assert recount_matches(archive)
+        assert counters(archive)[(CHARACTER_ID, USER_ID, "fact", "cold")][0] == 2
+
+    # Deleting an archived memory updates the archive's counters
+    archived_id = sqlite3.connect(archive_path(memory_system.db_path)).execute(
+        "SELECT id FROM enhanced_memory LIMIT 1"
+    ).fetchone()[0]
+    assert memory_system.delete_memory(archived_id)
+    with sqlite3.connect(archive_path(memory_system.db_path)) as archive:
+        assert recount_matches(archive)
+        assert counters(archive)[(CHARACTER_ID, USER_ID, "fact", "cold")][0] == 1
+
+
+def test_memory_version_changes_with_deletes(memory_system):
+    ids = store_facts(memory_system, 2)
+    before = memory_system.get_memory_version()
+
+    memory_system.delete_memory(ids[0])
+
+    assert memory_system.get_memory_version() != before
+
+
+def test_memory_version_without_own_write(memory_system):
+    store_facts(memory_system, 2)
+    before = memory_system.get_memory_version()
+
+    [diary] = memory_system.batch_store_memories([{"content": "Dear diary, a quiet day", "memory_type": "session_diary"}])
+
+    assert memory_system.get_memory_version() != before
+    assert memory_system.get_memory_version(exclude_ids=[diary]) == before
+
+    store_facts(memory_system, 1, offset=2)
+
+    assert memory_system.get_memory_version(exclude_ids=[diary]) != before
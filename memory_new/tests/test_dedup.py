@@ -0,0 +1,81 @@
+"""Near-duplicate merging at write time and in deduplicate_database()."""
+
+from memory_new.enhanced.dedup import deduplicate_database
+
+FACT = "The user's favourite painter is Claude Monet and they visit Giverny every spring"
+
+
+def count(db, memory_type=None):
+    if memory_type is None:
+        return db.execute("SELECT COUNT(*) FROM enhanced_memory").fetchone()[0]
+    return db.execute("SELECT COUNT(*) FROM enhanced_memory WHERE memory_type = ?", (memory_type,)).fetchone()[0]
+
+
+def test_conversation_turns_are_never_merged(memory_system, db):
+    ids = [memory_system.store_memory(text, "user_message") for text in [
+        "ok thanks", "ok thanks", "ok thanks",
+        "Hello there, how are you today?", "Hello there, how are you today?"
+    ]]
+
+    assert len(set(ids)) == 5
+    assert count(db) == 5
+
+
+def test_repeated_fact_merges_into_first_copy(memory_system, db):
+    first = memory_system.store_memory(FACT, "fact", importance=0.4)
+    second = memory_system.store_memory(FACT, "fact", importance=0.6)
+
+    assert second == first
+    assert count(db, "fact") == 1
+    access_count, importance = db.execute(
+        "SELECT access_count, importance FROM enhanced_memory WHERE id = ?", (first,)
+    ).fetchone()
+    assert access_count == 1
+    # Raised to the newer copy's importance plus the bump
+    assert 0.6 < importance <= 1.0
+
+
+def test_near_duplicate_within_a_batch_is_merged(memory_system, db):
+    ids = memory_system.batch_store_memories([
+        {"content": FACT, "memory_type": "fact"},
+        {"content": FACT + ".", "memory_type": "fact"},
+    ])
+
+    assert ids[0] == ids[1]
+    assert count(db, "fact") == 1
+
+
+def test_different_types_are_kept_apart(memory_system, db):
+    memory_system.store_memory(FACT, "fact")
+    memory_system.store_memory(FACT, "session_diary")
+
+    assert count(db) == 2
+
+
+def test_short_memories_are_never_merged(memory_system, db):
+    # Below min_tokens, even an identical fingerprint is not merged
+    first = memory_system.store_memory("likes green tea", "fact")
+    second = memory_system.store_memory("likes green tea", "fact")
+
+    assert first != second
+    assert count(db, "fact") == 2
+
+
+def test_deduplicate_database_follows_the_same_rule(memory_system, db):
+    memory_system.dedup_settings.enabled = False
+    memory_system.batch_store_memories(
+        [{"content": FACT, "memory_type": "fact"}] * 3
+        + [{"content": "ok thanks", "memory_type": "user_message"}] * 2
+        + [{"content": "likes green tea", "memory_type": "fact"}] * 2
+    )
+    memory_system.close()
+    assert count(db) == 7
+
+    dry = deduplicate_database(memory_system.db_path, dry_run=True)
+    assert dry["merged"] == 2
+    assert count(db) == 7
+
+    result = deduplicate_database(memory_system.db_path)
+    assert result["merged"] == 2
+    assert count(db) == 5
+    assert count(db, "user_message") == 2
@@ -0,0 +1,173 @@
+"""Cached diary days are regenerated exactly when their day's memories change."""
+
+from datetime import datetime
+
+from memory_new.enhanced.diary import backfill_content_hashes
+from memory_new.enhanced.summarization import WEEKLY_SUMMARY
+from memory_new.enhanced.tiering import TieringSettings, run_tiering
+from memory_new.utils import content_fingerprint
+
+SALT = "2|Luna|tester"
+
+TURNS = {
+    "2026-09-01": ["We talked about the lighthouse trip planned for the weekend",
+                   "The user is nervous about the ferry crossing"],
+    "2026-09-02": ["The user adopted a rescue greyhound called Comet"],
+    "2026-09-03": ["We argued about whether pineapple belongs on pizza"],
+}
+
+
+def store_turns(memory_system, turns=TURNS):
+    ids = {}
+    for day, contents in turns.items():
+        ids[day] = memory_system.batch_store_memories([
+            {"content": content, "memory_type": "conversation", "timestamp": f"{day}T10:{minute:02d}:00"}
+            for minute, content in enumerate(contents)
+        ])
+    return ids
+
+
+def generate_day(memories):
+    """Stand-in for the diary entry generator; records which days it was asked for."""
+    day = memories[0]["timestamp"][:10]
+    generate_day.calls.append(day)
+    return f"{len(memories)} memories", [f"#day{day[-2:]}", "#Diary"], {"generated_for": day}
+
+
+def refresh(memory_system, salt=SALT):
+    """Build the diary through the cache; returns the regenerated days."""
+    generate_day.calls = []
+    days = memory_system.build_diary_days(salt, generate_day)
+    assert [day["day"] for day in days if not day["cached"]] == generate_day.calls
+    return generate_day.calls
+
+
+def test_unchanged_days_are_served_from_the_cache(memory_system):
+    store_turns(memory_system)
+
+    assert refresh(memory_system) == sorted(TURNS)
+    assert refresh(memory_system) == []
+
+
+def test_new_memory_invalidates_only_its_day(memory_system):
+    store_turns(memory_system)
+    refresh(memory_system)
+
+    store_turns(memory_system, {"2026-09-02": ["Comet slept through the thunderstorm"]})
+
+    assert refresh(memory_system) == ["2026-09-02"]
+    _, cached = memory_system.get_diary_days(SALT)
+    assert cached["2026-09-02"]["entry"] == "2 memories"
+
+
+def test_edited_memory_invalidates_its_day(memory_system):
+    ids = store_turns(memory_system)
+    refresh(memory_system)
+
+    memory_system.update_memory(ids["2026-09-03"][0], "We agreed that pineapple belongs on pizza")
+
+    assert refresh(memory_system) == ["2026-09-03"]
+
+
+def test_edit_keeping_the_simhash_invalidates_its_day(memory_system, db):
+    ids = store_turns(memory_system)
+    refresh(memory_system)
+    memory_id = ids["2026-09-02"][0]
+    [old] = db.execute("SELECT content FROM enhanced_memory WHERE id = ?", (memory_id,)).fetchone()
+    new = old.upper() + "!"
+    assert content_fingerprint(new) == content_fingerprint(old)
+
+    memory_system.update_memory(memory_id, new)
+
+    assert refresh(memory_system) == ["2026-09-02"]
+
+
+def test_raw_content_edit_invalidates_its_day(memory_system, db):
+    ids = store_turns(memory_system)
+    refresh(memory_system)
+
+    db.execute("UPDATE enhanced_memory SET content = ? WHERE id = ?",
+               ("The user adopted a rescue greyhound called Comet.", ids["2026-09-02"][0]))
+    db.commit()
+
+    assert refresh(memory_system) == ["2026-09-02"]
+
+
+def test_warm_compression_keeps_the_cache(memory_system, db):
+    store_turns(memory_system, {**TURNS, "2026-09-04": ["We read the ferry timetable out loud twice. " * 6]})
+    db.execute("UPDATE enhanced_memory SET importance = 0.1")
+    db.commit()
+    refresh(memory_system)
+
+    results = run_tiering(memory_system.db_path, TieringSettings(warm_after_days=1, cold_after_days=365),
+                          force=True, now=datetime(2026, 10, 1))
+
+    assert results["compressed"] == 1
+    assert refresh(memory_system) == []
+
+
+def test_backfill_digests_rows_written_before_the_column(memory_system, db):
+    store_turns(memory_system)
+    written = db.execute("SELECT id, content_hash FROM enhanced_memory ORDER BY id").fetchall()
+    db.execute("UPDATE enhanced_memory SET content_hash = NULL")
+    db.commit()
+
+    assert backfill_content_hashes(db, batch_size=2) == len(written)
+    assert db.execute("SELECT id, content_hash FROM enhanced_memory ORDER BY id").fetchall() == written
+
+
+def test_day_facts_are_read_from_current_cached_days(memory_system):
+    store_turns(memory_system)
+    refresh(memory_system)
+
+    store_turns(memory_system, {"2026-09-02": ["Comet slept through the thunderstorm"]})
+    first, changed, last = memory_system.get_diary_day_facts(SALT)
+
+    assert (first, last) == ({"generated_for": "2026-09-01"}, {"generated_for": "2026-09-03"})
+    assert [turn["content"] for turn in changed["actual_conversations"]] == [
+        "The user adopted a rescue greyhound called Comet", "Comet slept through the thunderstorm"
+    ]
+    # Reading facts does not cache the changed day; the next diary build does
+    assert refresh(memory_system) == ["2026-09-02"]
+
+
+def test_importance_changes_keep_the_cache(memory_system):
+    ids = store_turns(memory_system)
+    refresh(memory_system)
+
+    memory_system.update_memory_importance(ids["2026-09-01"][0], 0.95)
+
+    assert refresh(memory_system) == []
+
+
+def test_summaries_do_not_invalidate_days(memory_system):
+    store_turns(memory_system)
+    refresh(memory_system)
+
+    memory_system.batch_store_memories([{
+        "content": "Summary of the week: a lighthouse trip, a new dog and a pizza debate",
+        "memory_type": WEEKLY_SUMMARY, "timestamp": "2026-09-03T23:00:00"
+    }])
+
+    assert refresh(memory_system) == []
+
+
+def test_emptied_day_is_dropped_with_its_hashtags(memory_system):
+    ids = store_turns(memory_system)
+    refresh(memory_system)
+    assert [day["day"] for day in memory_system.search_diary_hashtags(["#day02"])] == ["2026-09-02"]
+
+    memory_system.delete_memory(ids["2026-09-02"][0])
+
+    assert refresh(memory_system) == []
+    _, cached = memory_system.get_diary_days(SALT)
+    assert sorted(cached) == ["2026-09-01", "2026-09-03"]
+    assert memory_system.search_diary_hashtags(["#day02"]) == []
+    assert {day["day"] for day in memory_system.search_diary_hashtags(["diary"], limit=5)} == set(cached)
+
+
+def test_new_salt_regenerates_every_day(memory_system):
+    store_turns(memory_system)
+    refresh(memory_system)
+
+    assert refresh(memory_system, salt="3|Luna|tester") == sorted(TURNS)
@@ -0,0 +1,83 @@
+"""The FTS index follows enhanced_memory through inserts, edits, deletes and warm-tier compression."""
+
+from datetime import datetime, timedelta
+
+from memory_new.enhanced.tiering import TieringSettings, run_tiering
+from memory_new.search import FTS_TABLE, build_match_expression, search_fts
+
+NOW = datetime(2026, 10, 1, 12, 0)
+
+# Long enough (and repetitive enough) for zlib to shrink it
+OLD_STORY = ("Last winter we walked along the harbour at dawn and watched the fishing boats "
+             "come in with their nets full of silver sardines, then ate them grilled at the market. ") * 2
+
+
+def search(db, text):
+    return [row["id"] for row in search_fts(db, build_match_expression(text))]
+
+
+def index_in_sync(db):
+    """Every memory has exactly one index row carrying its id."""
+    return db.execute(f"""
+        SELECT COUNT(*) FROM enhanced_memory m
+        LEFT JOIN {FTS_TABLE} f ON f.rowid = m.rowid AND f.memory_id = m.id
+        WHERE f.rowid IS NULL
+    """).fetchone()[0] == 0 and (
+        db.execute(f"SELECT COUNT(*) FROM {FTS_TABLE}").fetchone()[0]
+        == db.execute("SELECT COUNT(*) FROM enhanced_memory").fetchone()[0]
+    )
+
+
+def test_inserted_memory_is_searchable(memory_system, db):
+    memory_id = memory_system.store_memory("We adopted a ginger kitten called Marmalade", "fact")
+
+    assert search(db, "marmalade") == [memory_id]
+    assert index_in_sync(db)
+
+
+def test_edited_content_is_reindexed(memory_system, db):
+    memory_id = memory_system.store_memory("We adopted a ginger kitten called Marmalade", "fact")
+
+    db.execute("UPDATE enhanced_memory SET content = ? WHERE id = ?",
+               ("We adopted a grey kitten called Pebble", memory_id))
+    db.commit()
+
+    assert search(db, "marmalade") == []
+    assert search(db, "pebble") == [memory_id]
+    assert index_in_sync(db)
+
+
+def test_deleted_memory_leaves_the_index(memory_system, db):
+    kept = memory_system.store_memory("The kitten sleeps on the piano", "fact")
+    deleted = memory_system.store_memory("The kitten chased a moth across the piano", "fact")
+
+    db.execute("DELETE FROM enhanced_memory WHERE id = ?", (deleted,))
+    db.commit()
+
+    assert search(db, "kitten piano") == [kept]
+    assert index_in_sync(db)
+
+
+def test_warm_memories_stay_searchable_through_compression_and_promotion(memory_system, db):
+    [memory_id] = memory_system.batch_store_memories([{
+        "content": OLD_STORY, "memory_type": "fact", "importance": 0.2,
+        "timestamp": (NOW - timedelta(days=90)).isoformat()
+    }])
+    settings = TieringSettings(warm_after_days=30, cold_after_days=365)
+
+    assert run_tiering(memory_system.db_path, settings, force=True, now=NOW)["compressed"] == 1
+    tier, content = db.execute("SELECT tier, content FROM enhanced_memory WHERE id = ?", (memory_id,)).fetchone()
+    assert (tier, content) == ("warm", "")
+    assert search(db, "sardines harbour") == [memory_id]
+    assert index_in_sync(db)
+
+    # Read often enough to be hot again
+    db.execute("UPDATE enhanced_memory SET access_count = ? WHERE id = ?",
+               (settings.hot_min_access_count, memory_id))
+    db.commit()
+
+    assert run_tiering(memory_system.db_path, settings, force=True, now=NOW)["promoted"] == 1
+    tier, content = db.execute("SELECT tier, content FROM enhanced_memory WHERE id = ?", (memory_id,)).fetchone()
+    assert (tier, content) == ("hot", OLD_STORY)
+    assert search(db, "sardines harbour") == [memory_id]
+    assert index_in_sync(db)
@@ -0,0 +1,120 @@
+"""Keyset pages of a pair's history: every row exactly once, in order, across page boundaries."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from memory_new.retrieval.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor
+
+START = datetime(2026, 9, 1, 12, 0)
+
+
+def store_history(memory_system, count, same_timestamp_every=3):
+    """Store count turns; runs of same_timestamp_every turns share one timestamp."""
+    memory_system.batch_store_memories([
+        {
+            "content": f"Turn number {i} of our long conversation",
+            "memory_type": "conversation",
+            "timestamp": (START + timedelta(minutes=i // same_timestamp_every)).isoformat()
+        }
+        for i in range(count)
+    ])
+
+
+def scroll(memory_system, limit, **filters):
+    """Contents of every page, following next_cursor until it is None."""
+    pages, cursor = [], None
+    while True:
+        page = memory_system.get_memories_page(limit, cursor, **filters)
+        pages.append([memory["content"] for memory in page["memories"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def scroll_from(memory_system, limit, cursor):
+    """Contents of the newest-first pages after cursor."""
+    contents = []
+    while cursor is not None:
+        page = memory_system.get_memories_page(limit, cursor)
+        contents.extend(memory["content"] for memory in page["memories"])
+        cursor = page["next_cursor"]
+    return contents
+
+
+def expected_order(db, oldest_first=False):
+    direction = "ASC" if oldest_first else "DESC"
+    return [row[0] for row in db.execute(
+        f"SELECT content FROM enhanced_memory ORDER BY timestamp {direction}, rowid {direction}"
+    )]
+
+
+@pytest.fixture(params=["recent_turns", "database"])
+def pager(request, memory_system):
+    """The memory system, with the first page served by the recent-turn buffer or by the database."""
+    if request.param == "database":
+        memory_system.recent_turns = None
+    return memory_system
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 7, 10, 11])
+def test_pages_cover_every_row_once_across_equal_timestamps(pager, db, limit):
+    store_history(pager, 10)
+
+    pages = scroll(pager, limit)
+
+    assert [content for page in pages for content in page] == expected_order(db)
+    assert all(len(page) == limit for page in pages[:-1])
+    assert len(pages[-1]) <= limit
+
+
+@pytest.mark.parametrize("limit", [1, 3, 4, 10])
+def test_oldest_first_is_the_reverse_order(pager, db, limit):
+    store_history(pager, 10)
+
+    pages = scroll(pager, limit, oldest_first=True)
+
+    assert [content for page in pages for content in page] == expected_order(db, oldest_first=True)
+
+
+def test_exact_multiple_ends_with_an_empty_page(pager):
+    store_history(pager, 6)
+
+    pages = scroll(pager, 3)
+
+    assert [len(page) for page in pages] == [3, 3, 0]
+
+
+def test_rows_written_while_scrolling_do_not_shift_pages(pager, db):
+    store_history(pager, 9)
+    before = expected_order(db)
+
+    first = pager.get_memories_page(4)
+    pager.store_memory("A brand new turn arriving mid-scroll", "conversation")
+    rest = scroll_from(pager, 4, first["next_cursor"])
+
+    assert [memory["content"] for memory in first["memories"]] + rest == before
+
+
+def test_cursor_points_at_the_last_row_returned(pager, db):
+    store_history(pager, 5)
+
+    page = pager.get_memories_page(2)
+
+    timestamp, rowid = decode_cursor(page["next_cursor"])
+    assert db.execute("SELECT content FROM enhanced_memory WHERE rowid = ? AND timestamp = ?",
+                      (rowid, timestamp)).fetchone()[0] == page["memories"][-1]["content"]
+
+
+def test_page_size_is_clamped(pager):
+    store_history(pager, 3)
+
+    assert len(pager.get_memories_page(0)["memories"]) == 1
+    assert len(pager.get_memories_page(MAX_PAGE_SIZE + 100)["memories"]) == 3
+
+
+def test_malformed_cursor_is_rejected(memory_system):
+    with pytest.raises(ValueError):
+        memory_system.get_memories_page(10, "not-a-cursor")
+    with pytest.raises(ValueError):
+        memory_system.get_memories_page(10, encode_cursor("2026-09-01", 1)[:-2] + "!!")
@@ -0,0 +1,67 @@
+"""Every MemoryQuery shape is planned onto an index of a freshly provisioned pair database."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from memory_new.base.models import MemoryQuery, MemoryType
+from memory_new.retrieval.pagination import encode_cursor
+from memory_new.retrieval.planner import (
+    MemoryQueryPlanner, audit_query_plans, explain_query_plan, full_scans
+)
+from memory_new.enhanced.enhanced_memory_system import hot_statements
+
+from .conftest import CHARACTER_ID, USER_ID
+
+NOW = datetime(2026, 10, 1, 12, 0)
+WEEK_AGO = NOW - timedelta(days=7)
+
+QUERY_SHAPES = {
+    "type": (MemoryQuery(USER_ID, CHARACTER_ID, memory_type=MemoryType.CONVERSATION), "type"),
+    "importance_range": (MemoryQuery(USER_ID, CHARACTER_ID, min_importance=0.7), "importance"),
+    "date_range": (MemoryQuery(USER_ID, CHARACTER_ID, start_date=WEEK_AGO, end_date=NOW), "recent"),
+    "conversation_id": (MemoryQuery(USER_ID, CHARACTER_ID, conversation_id="conversation"), "conversation"),
+    "text": (MemoryQuery(USER_ID, CHARACTER_ID, search_query="sister birthday"), "fts"),
+    "tags": (MemoryQuery(USER_ID, CHARACTER_ID, tags=["identity", "name"]), "tags"),
+}
+
+
+def table_scans(plan_lines):
+    """Plan lines reading enhanced_memory without an index."""
+    return [line for line in plan_lines if line.startswith("SCAN enhanced_memory") and "INDEX" not in line]
+
+
+@pytest.fixture
+def planner():
+    return MemoryQueryPlanner()
+
+
+@pytest.mark.parametrize("shape", sorted(QUERY_SHAPES))
+def test_query_shape_uses_an_index(shape, planner, memory_system, db):
+    memory_system.store_memory("My sister's birthday is on the third of May", "personal")
+    query, path = QUERY_SHAPES[shape]
+
+    plan = planner.plan(query)
+    lines = explain_query_plan(db, plan.sql, plan.params)
+
+    assert plan.path == path
+    assert not table_scans(lines), lines
+    assert not full_scans(lines), lines
+
+
+@pytest.mark.parametrize("shape", ["type", "date_range", "conversation_id", "tags"])
+def test_keyset_page_uses_an_index(shape, planner, db):
+    query, _ = QUERY_SHAPES[shape]
+
+    plan = planner.plan_page(query, encode_cursor(NOW.isoformat(), 10))
+    lines = explain_query_plan(db, plan.sql, plan.params)
+
+    assert not table_scans(lines), lines
+
+
+def test_audit_reports_no_full_scans(memory_system):
+    report = audit_query_plans(memory_system.db_path, statements=hot_statements(CHARACTER_ID, USER_ID))
+
+    assert report["pending_migrations"] == []
+    assert report["errors"] == 0, [entry for entry in report["queries"] if entry["error"]]
+    assert report["full_scans"] == 0, [entry for entry in report["queries"] if entry["full_scans"]]
@@ -0,0 +1,97 @@
+"""Ordering of the hybrid memory ranker."""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from memory_new.retrieval.ranker import MemoryRanker, RankingWeights
+from memory_new.search import build_match_expression
+
+NOW = datetime.now()
+
+
+def record(name, importance=0.5, days_old=0, valence=0.0, relevance=None):
+    return {
+        "id": name, "importance": importance, "emotional_valence": valence,
+        "timestamp": (NOW - timedelta(days=days_old)).isoformat(), "relevance_score": relevance
+    }
+
+
+def ids(records):
+    return [r["id"] for r in records]
+
+
+@pytest.fixture
+def ranker():
+    return MemoryRanker(RankingWeights())
+
+
+def test_more_important_ranks_first_at_equal_age(ranker):
+    records = [record("low", 0.2), record("high", 0.9), record("mid", 0.5)]
+
+    assert ids(ranker.rank_records(records)) == ["high", "mid", "low"]
+
+
+def test_older_memories_decay(ranker):
+    records = [record("month", days_old=30), record("today"), record("week", days_old=7)]
+
+    assert ids(ranker.rank_records(records)) == ["today", "week", "month"]
+
+
+def test_emotional_intensity_breaks_ties(ranker):
+    records = [record("neutral"), record("sad", valence=-0.8), record("glad", valence=0.4)]
+
+    assert ids(ranker.rank_records(records)) == ["sad", "glad", "neutral"]
+
+
+def test_relevance_outweighs_a_small_importance_gap(ranker):
+    records = [record("unmatched", 0.6), record("matched", 0.5, relevance=1.0)]
+
+    assert ids(ranker.rank_records(records)) == ["matched", "unmatched"]
+
+
+def test_zero_weight_removes_a_factor(ranker):
+    records = [record("old_important", 1.0, days_old=60), record("new_trivial", 0.1)]
+
+    assert ids(ranker.rank_records(records, weights=RankingWeights.recency_only())) == ["new_trivial", "old_important"]
+    assert ids(ranker.rank_records(records, weights=RankingWeights(recency_weight=0.0))) == [
+        "old_important", "new_trivial"
+    ]
+
+
+def test_min_importance_filters_before_top_k(ranker):
+    records = [record("a", 0.9), record("b", 0.1), record("c", 0.5)]
+
+    assert ids(ranker.rank_records(records, k=5, min_importance=0.4)) == ["a", "c"]
+
+
+def test_top_k_matches_a_full_sort():
+    scores = np.random.default_rng(7).random(1000)
+
+    for k in (0, 1, 10, 999, 1000, 2000):
+        expected = np.argsort(-scores, kind="stable")[:k]
+        assert MemoryRanker.top_k(scores, k).tolist() == expected.tolist()
+
+
+def test_rank_pair_orders_rows_and_uses_bm25(memory_system, db, ranker):
+    contents = {
+        "Grandma grows tomatoes in her greenhouse": 0.5,
+        "The user is training for a marathon in April": 0.8,
+        "The user finished a book about lighthouses": 0.3,
+    }
+    memory_system.batch_store_memories([{"content": content, "memory_type": "fact"} for content in contents])
+    # Override the importance the store heuristics assign
+    db.executemany("UPDATE enhanced_memory SET importance = ? WHERE content = ?",
+                   [(importance, content) for content, importance in contents.items()])
+    db.commit()
+
+    plain = ranker.rank_pair(db, k=3)
+    searched = ranker.rank_pair(db, k=2, match=build_match_expression("tomatoes greenhouse"))
+
+    assert [r["importance"] for r in plain] == [0.8, 0.5, 0.3]
+    scores = [r["rank_score"] for r in plain]
+    assert scores == sorted(scores, reverse=True)
+    assert len(searched) == 2
+    assert "tomatoes" in searched[0]["content"]
+    assert searched[0]["relevance_score"] == 1.0
@@ -0,0 +1,30 @@
+"""Summarization backend selection."""
+
+from memory_new.enhanced.summarization import AISummarizer, SummarizationSettings
+
+
+def test_api_key_alone_does_not_enable_the_remote_backend(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+    assert SummarizationSettings().backend == "local"
+    assert AISummarizer(settings=SummarizationSettings()).backend == "local"
+    assert AISummarizer(settings=SummarizationSettings(backend="auto")).backend == "local"
+
+
+def test_remote_backend_is_an_explicit_opt_in():
+    summarizer = AISummarizer(settings=SummarizationSettings(backend="openai"))
+
+    assert summarizer.backend == "openai"
+
+
+def test_local_backend_summarizes_offline():
+    summarizer = AISummarizer(settings=SummarizationSettings())
+    memories = [
+        {"content": "We talked about the mosaic project.", "importance": 0.9, "emotional_valence": 0.2},
+        {"content": "ok", "importance": 0.1, "emotional_valence": 0.0},
+    ]
+
+    summary = summarizer.summarize_session(memories)
+
+    assert summary.startswith("Session of 2 turns:")
+    assert "mosaic project" in summary
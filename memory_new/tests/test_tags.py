@@ -0,0 +1,84 @@
+"""The memory_tags index agrees with the tags JSON after every kind of write."""
+
+import json
+from datetime import datetime, timedelta
+
+from memory_new.enhanced.tags import TAGS_TABLE
+from memory_new.enhanced.tiering import TieringSettings, run_tiering
+
+NOW = datetime(2026, 10, 1, 12, 0)
+
+
+def indexed_tags(db):
+    return set(db.execute(f"SELECT memory_id, tag FROM {TAGS_TABLE}").fetchall())
+
+
+def stored_tags(db):
+    """(memory_id, tag) pairs recomputed from enhanced_memory.tags."""
+    pairs = set()
+    for memory_id, tags in db.execute("SELECT id, tags FROM enhanced_memory"):
+        try:
+            tags = json.loads(tags) if tags else []
+        except ValueError:
+            continue
+        if isinstance(tags, list):
+            pairs.update((memory_id, tag) for tag in tags if isinstance(tag, str))
+    return pairs
+
+
+def tagged(memory_system, *tags, match_all=False):
+    return {memory["id"] for memory in memory_system.get_memories_by_tags(list(tags), match_all=match_all)}
+
+
+def test_inserts_and_deletes(memory_system, db):
+    garden = memory_system.store_memory("The tulips in the back garden finally bloomed", "fact",
+                                        tags=["garden", "spring"])
+    pets = memory_system.store_memory("The dog learned to open the garden gate by himself", "fact",
+                                      tags=["garden", "dog"])
+
+    assert indexed_tags(db) == stored_tags(db)
+    assert tagged(memory_system, "garden") == {garden, pets}
+    assert tagged(memory_system, "garden", "dog", match_all=True) == {pets}
+
+    memory_system.delete_memory(garden)
+
+    assert indexed_tags(db) == stored_tags(db)
+    assert tagged(memory_system, "garden") == {pets}
+    assert tagged(memory_system, "spring") == set()
+
+
+def test_retagging_and_replacing(memory_system, db):
+    memory_id = memory_system.store_memory("The tulips in the back garden finally bloomed", "fact",
+                                           tags=["garden", "spring"])
+
+    db.execute("UPDATE enhanced_memory SET tags = ? WHERE id = ?", (json.dumps(["flowers"]), memory_id))
+    db.commit()
+    assert indexed_tags(db) == stored_tags(db) == {(memory_id, "flowers")}
+
+    # Malformed or non-array tags JSON carries no tags
+    db.execute("UPDATE enhanced_memory SET tags = ? WHERE id = ?", ('{"garden": true}', memory_id))
+    db.commit()
+    assert indexed_tags(db) == stored_tags(db) == set()
+
+    columns = [row[1] for row in db.execute("PRAGMA table_info(enhanced_memory)")]
+    row = dict(zip(columns, db.execute("SELECT * FROM enhanced_memory WHERE id = ?", (memory_id,)).fetchone()))
+    row["tags"] = json.dumps(["garden", "garden", "tulips"])
+    db.execute(f"INSERT OR REPLACE INTO enhanced_memory ({', '.join(columns)}) "
+               f"VALUES ({', '.join('?' for _ in columns)})", [row[column] for column in columns])
+    db.commit()
+    assert indexed_tags(db) == stored_tags(db) == {(memory_id, "garden"), (memory_id, "tulips")}
+
+
+def test_archived_memories_leave_the_tag_index(memory_system, db):
+    [_, recent] = memory_system.batch_store_memories([
+        {"content": "We went sledding on the hill behind the school", "memory_type": "fact",
+         "importance": 0.2, "tags": ["winter"], "timestamp": (NOW - timedelta(days=400)).isoformat()},
+        {"content": "The first snow of the year covered the car overnight", "memory_type": "fact",
+         "importance": 0.2, "tags": ["winter"], "timestamp": (NOW - timedelta(days=1)).isoformat()},
+    ])
+
+    results = run_tiering(memory_system.db_path, TieringSettings(cold_after_days=365), force=True, now=NOW)
+
+    assert results["archived"] == 1
+    assert indexed_tags(db) == stored_tags(db) == {(recent, "winter")}
+    assert tagged(memory_system, "winter") == {recent}
@@ -0,0 +1,86 @@
+"""Group commit: read-your-writes without flushing, and failure handling."""
+
+import sqlite3
+
+import pytest
+
+from memory_new.db import write_buffer
+from memory_new.db.write_buffer import configure_write_buffers, flush_write_buffer, get_write_buffer
+
+BROKEN_SQL = "INSERT INTO no_such_table VALUES (?)"
+
+
+@pytest.fixture
+def buffered(workdir):
+    """Group commit enabled with a flush interval no test reaches."""
+    configure_write_buffers(enabled=True, flush_interval_ms=60000, max_buffered_rows=100)
+    yield
+    for buffer in write_buffer._buffers.values():
+        # Drop statements a test broke on purpose before the reset flushes them
+        buffer._pending, buffer._pending_rows = [], 0
+    configure_write_buffers()
+
+
+def committed_rows(memory_system):
+    with sqlite3.connect(memory_system.db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM enhanced_memory").fetchone()[0]
+
+
+def test_reads_see_buffered_writes_without_committing_them(buffered, memory_system):
+    memory_system.recent_turns = None  # Read the database, not the recent-turn mirror
+    for text in ["I adopted a dog called Yuri", "We went to Little Venice", "ok thanks"]:
+        memory_system.store_memory(text, "user_message")
+    buffer = get_write_buffer(memory_system.db_path)
+
+    page = memory_system.get_memories_page(10)
+    assert [memory["content"] for memory in page["memories"]][0] == "ok thanks"
+    assert memory_system.count_memories() == 3
+    assert [memory["content"] for memory in memory_system.search_memories("Venice")] == ["We went to Little Venice"]
+
+    assert buffer.flushes == 0
+    assert committed_rows(memory_system) == 0
+
+    assert flush_write_buffer(memory_system.db_path) > 0
+    assert committed_rows(memory_system) == 3
+
+
+def test_cursor_from_buffered_rows_stays_valid_after_flush(buffered, memory_system):
+    memory_system.recent_turns = None
+    for i in range(5):
+        memory_system.store_memory(f"Message number {i} about the mosaic project", "user_message")
+
+    first = memory_system.get_memories_page(2)
+    flush_write_buffer(memory_system.db_path)
+    second = memory_system.get_memories_page(2, first["next_cursor"])
+
+    assert [memory["content"] for memory in first["memories"] + second["memories"]] == [
+        f"Message number {i} about the mosaic project" for i in (4, 3, 2, 1)
+    ]
+
+
+def test_flush_failure_reaches_readers(buffered, memory_system):
+    memory_system.recent_turns = None
+    memory_system.store_memory("Hello there", "user_message")
+    get_write_buffer(memory_system.db_path).add(BROKEN_SQL, [(1,)])
+
+    with pytest.raises(sqlite3.OperationalError):
+        flush_write_buffer(memory_system.db_path)
+    with pytest.raises(sqlite3.OperationalError):
+        memory_system.get_memories_page(10)
+    # The rows stay queued for the next attempt
+    assert get_write_buffer(memory_system.db_path).pending_rows == 2
+
+
+def test_full_buffer_never_raises_after_queueing(buffered, workdir):
+    configure_write_buffers(enabled=True, flush_interval_ms=60000, max_buffered_rows=2)
+    buffer = get_write_buffer(str(workdir / "pair.db"))
+
+    # Queued, then the flush it triggers fails: kept, not raised
+    buffer.add(BROKEN_SQL, [(1,), (2,)])
+    assert buffer.pending_rows == 2
+
+    # No room and the flush fails: raised before anything is queued, so a retry is safe
+    with pytest.raises(sqlite3.OperationalError):
+        buffer.add_statements([("INSERT INTO other VALUES (?)", [(3,)]), (BROKEN_SQL, [(4,)])])
+    assert buffer.pending_rows == 2
+    assert [sql for sql, _ in buffer.pending()] == [BROKEN_SQL]
@@ -0,0 +1,16 @@
+"""
+Update layer for memory system.
+"""
+
+from .updater import (
+    UPDATABLE_FIELDS,
+    EnhancedMemoryUpdater,
+    updated_columns
+)
+
+__all__ = [
+    # Memory updates
+    'UPDATABLE_FIELDS',
+    'EnhancedMemoryUpdater',
+    'updated_columns'
+]
@@ -0,0 +1,128 @@
+"""
+Memory updates against the per-pair enhanced memory databases.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from ..base.interfaces import MemoryUpdater
+from ..base.models import MemoryResult
+from ..enhanced.enrichment import enrich_memory
+from ..enhanced.tiering import record_access
+from ..retrieval.planner import memory_type_value
+from ..retrieval.retriever import fetch_row, pair_memory_system
+from ..utils.compression import inflate_content
+from ..utils.fingerprint import content_digest, content_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# MemoryEntry-style keys accepted by update_memory (aliases map to one column)
+UPDATABLE_FIELDS = {
+    "content", "memory_type", "importance", "importance_score", "context", "metadata",
+    "conversation_id", "tags", "related_entities", "emotional_valence", "relationship_impact"
+}
+
+
+def _json_field(value: Optional[str], default: Any) -> Any:
+    """Decode a JSON column, falling back to ``default``."""
+    try:
+        return json.loads(value) if value else default
+    except (ValueError, TypeError):
+        return default
+
+
+def updated_columns(row: Dict[str, Any], updates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    enhanced_memory column values for applying ``updates`` to a stored row.
+
+    New content resets the row to hot and uncompressed and refreshes its
+    fingerprint and digest; new content or tags refresh the write-time enrichment.
+    """
+    values: Dict[str, Any] = {}
+    if "content" in updates:
+        fingerprint = content_fingerprint(updates["content"])
+        values.update(content=updates["content"], compressed_content=None, tier="hot",
+                      fingerprint=fingerprint.value if fingerprint else 0,
+                      content_hash=content_digest(updates["content"]))
+    if "memory_type" in updates:
+        values["memory_type"] = memory_type_value(updates["memory_type"])
+    importance = updates.get("importance", updates.get("importance_score"))
+    if importance is not None:
+        values["importance"] = min(1.0, max(0.0, float(importance)))
+    if {"context", "metadata", "conversation_id"} & set(updates):
+        context = updates.get("context", updates.get("metadata"))
+        context = dict(context if context is not None else _json_field(row.get("context"), {}))
+        if "conversation_id" in updates:
+            context["conversation_id"] = updates["conversation_id"]
+        values["context"] = json.dumps(context)
+    tags = updates.get("tags", updates.get("related_entities"))
+    if tags is not None:
+        values["tags"] = json.dumps(list(tags))
+    for column in ("emotional_valence", "relationship_impact"):
+        if updates.get(column) is not None:
+            values[column] = float(updates[column])
+    if "content" in values or "tags" in values:
+        content = values.get("content", inflate_content(row.get("content"), row.get("compressed_content")))
+        values.update(enrich_memory(content, list(tags) if tags is not None else _json_field(row.get("tags"), [])))
+    return values
+
+
+class EnhancedMemoryUpdater(MemoryUpdater):
+    """MemoryUpdater for one character-user pair's enhanced memory database."""
+
+    def __init__(self, character_id: str, user_id: str):
+        self.character_id = character_id
+        self.user_id = user_id
+
+    def update_memory(self, memory_id: str, updates: Dict[str, Any]) -> MemoryResult:
+        """
+        Update an existing memory.
+
+        Args:
+            memory_id: Memory to update (archived memories are not updatable)
+            updates: New values keyed by UPDATABLE_FIELDS
+
+        Returns:
+            MemoryResult whose metadata lists the columns written
+        """
+        unknown = set(updates) - UPDATABLE_FIELDS
+        if unknown:
+            return MemoryResult(success=False, error=f"Unsupported memory fields: {', '.join(sorted(unknown))}")
+        try:
+            memory_system = pair_memory_system(self.character_id, self.user_id)
+            with memory_system._connect() as conn:
+                row = fetch_row(conn, memory_id)
+                if row is None:
+                    return MemoryResult(success=False, error=f"Memory {memory_id} not found")
+                values = updated_columns(row, updates)
+                if values:
+                    conn.execute(
+                        f"UPDATE enhanced_memory SET {', '.join(f'{column} = ?' for column in values)} WHERE id = ?",
+                        [*values.values(), memory_id]
+                    )
+            if values:
+                memory_system.invalidate_recent_turns()
+            return MemoryResult(success=True, data=memory_id, metadata={"updated": sorted(values)})
+        except Exception as e:
+            logger.error(f"❌ Failed to update memory {memory_id}: {e}")
+            return MemoryResult(success=False, error=str(e))
+
+    def update_importance(self, memory_id: str, importance: float) -> MemoryResult:
+        """Update the importance score of a memory (clamped to [0, 1])."""
+        return self.update_memory(memory_id, {"importance": importance})
+
+    def update_access_info(self, memory_id: str) -> MemoryResult:
+        """Bump the access count and last access time of a memory."""
+        try:
+            memory_system = pair_memory_system(self.character_id, self.user_id)
+            with memory_system._connect() as conn:
+                changes = conn.total_changes
+                record_access(conn, [memory_id])
+                found = conn.total_changes > changes
+            if not found:
+                return MemoryResult(success=False, error=f"Memory {memory_id} not found")
+            return MemoryResult(success=True, data=memory_id)
+        except Exception as e:
+            logger.error(f"❌ Failed to update access info of memory {memory_id}: {e}")
+            return MemoryResult(success=False, error=str(e))
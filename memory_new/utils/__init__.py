@@ -0,0 +1,57 @@
+"""
+Shared utilities for memory system.
+"""
+
+from .config import (
+    MEMORY_CONFIG_PATH,
+    load_memory_config
+)
+
+from .compression import (
+    DEFAULT_COMPRESSION_LEVEL,
+    compress_content,
+    inflate_content,
+    inflate_row
+)
+
+from .fingerprint import (
+    ContentFingerprint,
+    content_digest,
+    content_fingerprint,
+    fingerprint_bands,
+    hamming_distance
+)
+
+from .matcher import (
+    KeywordHit,
+    KeywordScan,
+    KeywordMatcher,
+    PatternMatcher,
+    word_set
+)
+
+__all__ = [
+    # Configuration
+    'MEMORY_CONFIG_PATH',
+    'load_memory_config',
+
+    # Content compression
+    'DEFAULT_COMPRESSION_LEVEL',
+    'compress_content',
+    'inflate_content',
+    'inflate_row',
+
+    # Near-duplicate fingerprints
+    'ContentFingerprint',
+    'content_digest',
+    'content_fingerprint',
+    'fingerprint_bands',
+    'hamming_distance',
+
+    # Multi-pattern matching
+    'KeywordHit',
+    'KeywordScan',
+    'KeywordMatcher',
+    'PatternMatcher',
+    'word_set'
+]
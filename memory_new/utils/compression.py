@@ -0,0 +1,38 @@
+"""
+Transparent compression of memory content.
+
+Warm memories keep an empty ``content`` and their text zlib-compressed in
+``compressed_content``. Every read path that loads memory rows passes them
+through inflate_row() (or inflate_content() for single columns), so callers
+never see the difference.
+"""
+
+import zlib
+from typing import Any, Dict, Optional
+
+DEFAULT_COMPRESSION_LEVEL = 6
+
+
+def compress_content(text: str, level: int = DEFAULT_COMPRESSION_LEVEL) -> bytes:
+    """zlib-compress memory text."""
+    return zlib.compress(text.encode("utf-8"), level)
+
+
+def inflate_content(content: Optional[str], compressed_content: Optional[bytes]) -> str:
+    """
+    Readable text of a memory row.
+
+    The compressed copy is only used while ``content`` is empty, so a row
+    rewritten in place (whose content is set again) never shows stale text.
+    """
+    if content or not compressed_content:
+        return content or ""
+    return zlib.decompress(compressed_content).decode("utf-8")
+
+
+def inflate_row(memory: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore ``content`` of a memory row dict in place and drop the compressed copy."""
+    compressed = memory.pop("compressed_content", None)
+    if compressed and not memory.get("content"):
+        memory["content"] = inflate_content(memory.get("content"), compressed)
+    return memory
@@ -0,0 +1,32 @@
+"""
+Configuration loading for the memory system.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+MEMORY_CONFIG_PATH = Path(__file__).resolve().parents[2] / "config" / "memory_config.json"
+
+_config_cache: Dict[str, Any] = {}
+
+
+def load_memory_config(section: str) -> Dict[str, Any]:
+    """
+    Load one section of config/memory_config.json.
+
+    Missing files or sections return an empty dict so callers can fall back
+    to their built-in defaults.
+    """
+    if not _config_cache:
+        try:
+            with open(MEMORY_CONFIG_PATH, "r", encoding="utf-8") as f:
+                _config_cache.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load memory config {MEMORY_CONFIG_PATH}: {e}")
+    return dict(_config_cache.get(section, {}))
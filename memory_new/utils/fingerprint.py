@@ -0,0 +1,91 @@
+"""
+SimHash fingerprints for near-duplicate detection.
+
+A memory's fingerprint is a 64-bit SimHash over its lowercased words and word
+bigrams. Texts that differ by a few words get fingerprints a few bits apart,
+so near-duplicates are found by Hamming distance. Splitting the fingerprint
+into six bands of 10-11 bits lets an exact-match index find candidates:
+every fingerprint within distance 5 shares at least one band (pigeonhole).
+
+Case, punctuation and many one-word edits keep the SimHash, so anything that
+must notice every edit (the diary day cache) uses content_digest() instead.
+"""
+
+import re
+import hashlib
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+FINGERPRINT_BITS = 64
+FINGERPRINT_MASK = (1 << FINGERPRINT_BITS) - 1
+BAND_WIDTHS = (11, 11, 11, 11, 10, 10)
+# (shift, mask) of each band, lowest bits first
+BANDS = tuple(
+    (sum(BAND_WIDTHS[:band]), (1 << width) - 1) for band, width in enumerate(BAND_WIDTHS)
+)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_BIT_SHIFTS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+
+class ContentFingerprint(NamedTuple):
+    """SimHash of a text and the number of words it was computed from."""
+    value: int
+    tokens: int
+
+
+def fingerprint_tokens(text: str) -> List[str]:
+    """Lowercased words of a text, as fingerprinted."""
+    return _WORD_RE.findall((text or "").lower())
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str) -> int:
+    """Stable 64-bit hash of one feature (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(tokens: Sequence[str]) -> int:
+    """
+    64-bit SimHash of a token sequence (words plus word bigrams).
+
+    Returns:
+        The fingerprint as a signed 64-bit integer (SQLite INTEGER range)
+    """
+    features = list(tokens) + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    hashes = np.fromiter((_feature_hash(feature) for feature in features), dtype=np.uint64, count=len(features))
+    bits = (hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)
+    votes = bits.sum(axis=0) * 2 > len(features)
+    value = int(np.dot(votes.astype(np.uint64), np.uint64(1) << _BIT_SHIFTS))
+    return to_signed(value)
+
+
+def content_fingerprint(text: str) -> Optional[ContentFingerprint]:
+    """SimHash of a memory's text, or None if it has no words."""
+    tokens = fingerprint_tokens(text)
+    if not tokens:
+        return None
+    return ContentFingerprint(simhash(tokens), len(tokens))
+
+
+def content_digest(text: str) -> str:
+    """Exact hash of a memory's text: unlike the SimHash, any edit changes it."""
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).hexdigest()
+
+
+def to_signed(value: int) -> int:
+    """Map an unsigned 64-bit value to the signed range SQLite stores."""
+    value &= FINGERPRINT_MASK
+    return value - (1 << FINGERPRINT_BITS) if value >= 1 << (FINGERPRINT_BITS - 1) else value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return ((a ^ b) & FINGERPRINT_MASK).bit_count()
+
+
+def fingerprint_bands(value: int) -> List[int]:
+    """The bands of a fingerprint, lowest bits first."""
+    return [(value >> shift) & mask for shift, mask in BANDS]
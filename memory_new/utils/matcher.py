@@ -0,0 +1,366 @@
+"""
+Compiled multi-pattern matching shared by the keyword/regex analyzers.
+
+Analyzers declare their lexicons once at import time:
+
+- KeywordMatcher answers "which terms of which lexicons occur" with one
+  word split and a set intersection for single-word terms, plus one
+  literal-prefixed regex per first word for multi-word terms. Hit positions
+  come from one word-bounded regex shaped as a prefix trie (terms sharing a
+  prefix share one branch), longest term first. Terms nested inside a longer
+  matched term ("care" in "care about") are reported too, matching the
+  per-keyword ``in`` checks this replaces.
+- PatternMatcher compiles groups of regular expressions (with captures) once,
+  with word boundaries, keeping each pattern's literal-prefix fast path.
+- SubstringMatcher answers "which terms occur anywhere" for analyzers whose
+  checks are plain ``term in text.lower()`` (stems like "swim" or
+  "psychoanalyt", no word boundaries), with one regex pass.
+"""
+
+import re
+from typing import Dict, List, Iterable, Iterator, Mapping, NamedTuple, Optional, Set, Tuple
+
+_WORD_BOUNDARY_START = r"(?<!\w)"
+_WORD_BOUNDARY_END = r"(?!\w)"
+_LITERAL_START = re.compile(r"[\w' ]")
+_WORD_RE = re.compile(r"\w+")
+
+
+def _term_regex(term: str) -> str:
+    """Escaped term where any run of whitespace matches any run of whitespace."""
+    return r"\s+".join(re.escape(part) for part in term.split())
+
+
+def _trie_regex(terms: Iterable[str], literal_spaces: bool = False) -> str:
+    """
+    Alternation of terms factored into a prefix trie.
+
+    Sibling branches differ in their next character, so at most one can
+    match and the greedy optional tails make the longest term win, exactly
+    like a flat longest-first alternation but without retrying every term at
+    every position. A space matches any run of whitespace unless
+    ``literal_spaces``.
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [
+            (r"\s+" if char == " " and not literal_spaces else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordHit(NamedTuple):
+    """One lexicon term found in a text."""
+    term: str
+    labels: Tuple[str, ...]
+    start: int
+    end: int
+
+
+class KeywordScan:
+    """
+    Result of one KeywordMatcher pass over a text.
+
+    Only the matched terms are collected up front; hit positions are
+    materialized on first access to ``hits``.
+    """
+
+    def __init__(self, matcher: "KeywordMatcher", text: str, terms: Set[str]):
+        self._matcher = matcher
+        self._text = text
+        self._hits: Optional[List[KeywordHit]] = None
+        self.terms = terms
+        self.labels: Set[str] = {label for term in terms for label in matcher.term_labels(term)}
+
+    def __bool__(self) -> bool:
+        return bool(self.terms)
+
+    @property
+    def hits(self) -> List[KeywordHit]:
+        """Every hit with its position, in text order."""
+        if self._hits is None:
+            self._hits = self._matcher.find(self._text)
+        return self._hits
+
+    def has(self, label: str) -> bool:
+        """Whether any term of the lexicon was found."""
+        return label in self.labels
+
+    def terms_for(self, label: str) -> List[str]:
+        """Distinct terms of the lexicon found, in lexicon order."""
+        if label not in self.labels:
+            return []
+        return [term for term in self._matcher.lexicon(label) if term in self.terms]
+
+    def count(self, label: str) -> int:
+        """Number of distinct terms of the lexicon found."""
+        return len(self.terms_for(label))
+
+    def first(self, labels: Iterable[str]) -> Optional[str]:
+        """First label (in the given order) with at least one hit."""
+        for label in labels:
+            if self.has(label):
+                return label
+        return None
+
+    def hits_for(self, label: str) -> List[KeywordHit]:
+        """Every occurrence of the lexicon's terms, in text order."""
+        return [hit for hit in self.hits if label in hit.labels]
+
+
+class KeywordMatcher:
+    """
+    Named literal lexicons matched word-bounded in one pass.
+
+    Args:
+        lexicons: Label -> terms. Terms are matched case-insensitively and a
+            term may belong to several lexicons.
+    """
+
+    def __init__(self, lexicons: Mapping[str, Iterable[str]]):
+        self._lexicons: Dict[str, List[str]] = {}
+        term_labels: Dict[str, List[str]] = {}
+        for label, terms in lexicons.items():
+            ordered = []
+            for term in terms:
+                term = " ".join(term.lower().split())
+                if term and term not in ordered:
+                    ordered.append(term)
+                    term_labels.setdefault(term, []).append(label)
+            self._lexicons[label] = ordered
+        self._term_labels = {term: tuple(labels) for term, labels in term_labels.items()}
+
+        by_length = sorted(self._term_labels, key=len, reverse=True)
+        self._regex = re.compile(
+            _WORD_BOUNDARY_START + "(?:" + _trie_regex(by_length) + ")" + _WORD_BOUNDARY_END
+        ) if by_length else None
+        self._nested = self._find_nested_terms(by_length)
+
+        # scan(): single words by set intersection, phrases grouped by first word
+        self._single_terms = frozenset(t for t in self._term_labels if _WORD_RE.fullmatch(t))
+        phrases: Dict[str, List[str]] = {}
+        for term in by_length:
+            if term not in self._single_terms:
+                first = _WORD_RE.match(term)
+                phrases.setdefault(first.group(0) if first else "", []).append(term)
+        self._phrases: Dict[str, re.Pattern] = {}
+        for first, terms in phrases.items():
+            if first:
+                body = re.escape(first) + "(?:" + _trie_regex(t[len(first):] for t in terms) + ")"
+            else:
+                body = _WORD_BOUNDARY_START + "(?:" + _trie_regex(terms) + ")"
+            self._phrases[first] = re.compile(body + _WORD_BOUNDARY_END)
+
+    @staticmethod
+    def _find_nested_terms(terms: List[str]) -> Dict[str, Tuple[str, ...]]:
+        """For multi-word terms, the shorter terms they contain as whole words."""
+        nested = {}
+        for term in terms:
+            if re.fullmatch(r"\w+", term):
+                continue
+            inner = tuple(
+                other for other in terms
+                if other != term and len(other) < len(term)
+                and re.search(_WORD_BOUNDARY_START + _term_regex(other) + _WORD_BOUNDARY_END, term)
+            )
+            if inner:
+                nested[term] = inner
+        return nested
+
+    @property
+    def labels(self) -> List[str]:
+        """Lexicon labels in declaration order."""
+        return list(self._lexicons)
+
+    def lexicon(self, label: str) -> List[str]:
+        """Normalized terms of one lexicon."""
+        return self._lexicons.get(label, [])
+
+    def term_labels(self, term: str) -> Tuple[str, ...]:
+        """Labels of the lexicons containing a normalized term."""
+        return self._term_labels.get(term, ())
+
+    def _normalize_match(self, matched: str) -> str:
+        """Lexicon term for a matched span (whitespace runs collapse to one space)."""
+        return matched if matched in self._term_labels else " ".join(matched.split())
+
+    def find(self, text: str) -> List[KeywordHit]:
+        """Every hit in text order (nested terms share their parent's span)."""
+        if self._regex is None or not text:
+            return []
+        hits = []
+        for match in self._regex.finditer(text.lower()):
+            term = self._normalize_match(match.group(0))
+            start, end = match.span()
+            hits.append(KeywordHit(term, self._term_labels[term], start, end))
+            for inner in self._nested.get(term, ()):
+                hits.append(KeywordHit(inner, self._term_labels[inner], start, end))
+        return hits
+
+    def scan(self, text: str) -> KeywordScan:
+        """Match every lexicon against text in one pass."""
+        if self._regex is None or not text:
+            return KeywordScan(self, text or "", set())
+        lower = text.lower()
+        words = set(_WORD_RE.findall(lower))
+        terms = words & self._single_terms
+        for first in ([""] if "" in self._phrases else []) + [w for w in words if w in self._phrases]:
+            pattern = self._phrases[first]
+            position = 0
+            while True:
+                match = pattern.search(lower, position)
+                if match is None:
+                    break
+                start = match.start()
+                position = start + 1
+                if first and start > 0 and (lower[start - 1].isalnum() or lower[start - 1] == "_"):
+                    continue
+                term = self._normalize_match(match.group(0))
+                terms.add(term)
+                terms.update(self._nested.get(term, ()))
+        return KeywordScan(self, text, terms)
+
+
+class PatternMatcher:
+    """
+    Named groups of regular expressions compiled once, with word boundaries.
+
+    The leading boundary is checked on each match instead of being compiled
+    in as a lookbehind: a pattern that starts with a literal keeps the regex
+    engine's fast literal-prefix scan, which a leading assertion (or one big
+    alternation) would disable. Patterns without a literal prefix get no such
+    scan anyway, so each group's are combined into one alternation for the
+    existence checks.
+
+    Args:
+        pattern_groups: Label -> regular expressions (captures allowed)
+        word_boundaries: Require every pattern to start and end on a word boundary
+    """
+
+    def __init__(self, pattern_groups: Mapping[str, Iterable[str]], word_boundaries: bool = True):
+        self.word_boundaries = word_boundaries
+        suffix = _WORD_BOUNDARY_END if word_boundaries else ""
+        self._patterns: Dict[str, List[re.Pattern]] = {}
+        self._checks: Dict[str, List[re.Pattern]] = {}
+        for label, patterns in pattern_groups.items():
+            patterns = list(patterns)
+            self._patterns[label] = [re.compile(f"(?:{p}){suffix}") for p in patterns]
+            checks = [compiled for p, compiled in zip(patterns, self._patterns[label]) if _LITERAL_START.match(p)]
+            unprefixed = [p for p in patterns if not _LITERAL_START.match(p)]
+            if unprefixed:
+                checks.append(re.compile("|".join(f"(?:{p}){suffix}" for p in unprefixed)))
+            self._checks[label] = checks
+
+    @property
+    def labels(self) -> List[str]:
+        """Group labels in declaration order."""
+        return list(self._patterns)
+
+    def _search(self, pattern: re.Pattern, text: str, position: int = 0) -> Optional[re.Match]:
+        """First match of one pattern at or after position that starts on a word boundary."""
+        while True:
+            match = pattern.search(text, position)
+            if match is None or not self.word_boundaries:
+                return match
+            start = match.start()
+            if start == 0 or not (text[start - 1].isalnum() or text[start - 1] == "_"):
+                return match
+            position = start + 1
+
+    def _iter_matches(self, pattern: re.Pattern, text: str) -> Iterator[re.Match]:
+        """Non-overlapping word-bounded matches of one pattern."""
+        position = 0
+        while position <= len(text):
+            match = self._search(pattern, text, position)
+            if match is None:
+                return
+            yield match
+            start, end = match.span()
+            position = end if end > start else end + 1
+
+    def matches_any(self, text: str) -> bool:
+        """Whether any pattern of any group matches."""
+        return any(self.has(text, label) for label in self._patterns)
+
+    def has(self, text: str, label: str) -> bool:
+        """Whether any pattern of one group matches."""
+        return any(self._search(pattern, text) for pattern in self._checks.get(label, ()))
+
+    def count_matching(self, text: str, label: str) -> int:
+        """Number of patterns of one group with at least one match."""
+        return sum(1 for pattern in self._patterns.get(label, ()) if self._search(pattern, text))
+
+    def matching_labels(self, text: str) -> List[str]:
+        """Labels of every group with a hit, in declaration order."""
+        return [label for label in self._patterns if self.has(text, label)]
+
+    def finditer(self, text: str, label: Optional[str] = None) -> Iterator[Tuple[str, re.Match]]:
+        """
+        Every match of every pattern (overlaps between patterns included), pattern by pattern.
+
+        Captures keep their per-pattern numbering, so callers read
+        ``match.group(1)`` exactly as with the individual expressions.
+        """
+        labels = [label] if label is not None else self.labels
+        for name in labels:
+            if not self.has(text, name):
+                continue
+            for pattern in self._patterns[name]:
+                for match in self._iter_matches(pattern, text):
+                    yield name, match
+
+
+class SubstringMatcher:
+    """
+    Literal terms found anywhere in a text, as ``term in text.lower()`` reports them.
+
+    One lookahead regex shaped as a prefix trie yields the longest term
+    starting at each position; the shorter terms that are prefixes of it
+    start there too and are added from a table, so the result is exactly the
+    set of terms the per-term ``in`` checks would find.
+
+    Args:
+        terms: Terms to find (matched case-insensitively, spaces literally)
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        ordered = []
+        for term in terms:
+            term = term.lower()
+            if term and term not in ordered:
+                ordered.append(term)
+        self.terms: Tuple[str, ...] = tuple(ordered)
+        by_length = sorted(ordered, key=len, reverse=True)
+        self._regex = re.compile(
+            "(?=(" + _trie_regex(by_length, literal_spaces=True) + "))"
+        ) if by_length else None
+        self._prefixes = {
+            term: tuple(other for other in ordered if other != term and term.startswith(other))
+            for term in ordered
+        }
+
+    def find(self, text: str) -> Set[str]:
+        """Every term occurring in text."""
+        if self._regex is None or not text:
+            return set()
+        found = set(self._regex.findall(text.lower()))
+        for term in list(found):
+            found.update(self._prefixes[term])
+        return found
+
+
+def word_set(text: str) -> Set[str]:
+    """Lower-cased words of a text, for word-bounded membership tests."""
+    return set(_WORD_RE.findall(text.lower()))
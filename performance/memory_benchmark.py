@@ -0,0 +1,785 @@
+#!/usr/bin/env python3
+"""
+Memory Benchmark Suite
+
+Reproducible micro/macro benchmarks for the enhanced memory system. Each
+benchmark seeds a throwaway pair database in a temporary directory, so it never
+touches memory_databases/ of a running server.
+
+Usage:
+    python performance/memory_benchmark.py --bench ranker --memories 100000
+    python performance/memory_benchmark.py --bench writes --memories 200
+    python performance/memory_benchmark.py --bench analyzers --memories 2000
+    python performance/memory_benchmark.py --bench registry --memories 100
+    python performance/memory_benchmark.py --bench provisioning --memories 50
+    python performance/memory_benchmark.py --bench tiering --memories 50000
+    python performance/memory_benchmark.py --bench summarization --memories 50000
+    python performance/memory_benchmark.py --bench profile --memories 50000
+    python performance/memory_benchmark.py --bench records --memories 20000
+    python performance/memory_benchmark.py --bench dedup --memories 50000
+    python performance/memory_benchmark.py --bench facts --memories 50000
+    python performance/memory_benchmark.py --bench exports --memories 100000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import tempfile
+import statistics
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, Callable
+
+# Add the project root to the path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+CHARACTER_ID = "bench_character"
+USER_ID = "bench_user"
+
+_WORDS = (
+    "sister brother mother father work job dream swimming london music family garden "
+    "coffee travel book holiday weather happy sad tired excited project friend dog "
+    "memory conversation idea painting science question answer morning evening"
+).split()
+
+
+@contextmanager
+def temporary_workdir():
+    """Run inside a temporary directory so relative memory_databases/ paths stay isolated."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="memory_bench_") as workdir:
+        os.chdir(workdir)
+        try:
+            yield Path(workdir)
+        finally:
+            os.chdir(previous)
+
+
+def timed(fn: Callable[[], Any], repeat: int = 5) -> Dict[str, float]:
+    """Time fn over several runs and return median/min in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3)}
+
+
+def random_sentence(rng: random.Random, words: int = 12) -> str:
+    """Generate a filler sentence from the benchmark vocabulary."""
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def seed_pair_database(memory_count: int, seed: int = 42, days: int = 365, words: int = 12):
+    """
+    Create an EnhancedMemorySystem for the benchmark pair and bulk-load memories.
+
+    Args:
+        memory_count: Memories to insert, evenly spread over the last ``days`` days
+        seed: Random seed
+        days: History length
+        words: Words per memory
+
+    Returns:
+        The memory system instance
+    """
+    from memory_new.enhanced.enhanced_memory_system import EnhancedMemorySystem
+    from memory_new.enhanced.enrichment import ENRICHMENT_COLUMNS, enrich_memory
+
+    memory_system = EnhancedMemorySystem(CHARACTER_ID, USER_ID)
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=days)
+    rows = []
+    for i in range(memory_count):
+        timestamp = (start + timedelta(seconds=i * days * 86400 / max(memory_count, 1))).isoformat()
+        content = random_sentence(rng, words)
+        rows.append((
+            f"{CHARACTER_ID}_{USER_ID}_{i}", CHARACTER_ID, USER_ID, content,
+            rng.choice(["user_message", "character_response", "response", "conversation"]),
+            round(rng.random(), 3), timestamp, "{}", "[]",
+            round(rng.uniform(-1, 1), 3), round(rng.random(), 3),
+            *enrich_memory(content).values()
+        ))
+    with sqlite3.connect(memory_system.db_path) as conn:
+        conn.executemany(f"""
+            INSERT INTO enhanced_memory
+            (id, character_id, user_id, content, memory_type, importance,
+             timestamp, context, tags, emotional_valence, relationship_impact,
+             {', '.join(ENRICHMENT_COLUMNS)})
+            VALUES ({', '.join('?' for _ in range(11 + len(ENRICHMENT_COLUMNS)))})
+        """, rows)
+        conn.commit()
+    return memory_system
+
+
+def bench_ranker(memory_count: int) -> Dict[str, Any]:
+    """Top-k memory ranking: Python dict sorting vs the vectorized ranker."""
+    from memory_new.retrieval import get_memory_ranker
+    from memory_new.search import build_match_expression
+
+    results: Dict[str, Any] = {"memories": memory_count}
+    with temporary_workdir():
+        memory_system = seed_pair_database(memory_count)
+        ranker = get_memory_ranker()
+        match = build_match_expression("sister dream london", operator="OR")
+
+        def python_sort():
+            with sqlite3.connect(memory_system.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                rows = [dict(r) for r in conn.execute("SELECT * FROM enhanced_memory WHERE importance >= 0.3")]
+            rows.sort(key=lambda x: (x.get('importance', 0), x.get('timestamp', '')), reverse=True)
+            return rows[:10]
+
+        def vectorized():
+            with sqlite3.connect(memory_system.db_path) as conn:
+                return ranker.rank_pair(conn, 10, 0.3)
+
+        def vectorized_with_query():
+            with sqlite3.connect(memory_system.db_path) as conn:
+                return ranker.rank_pair(conn, 10, 0.3, match=match)
+
+        results["python_sort_top10"] = timed(python_sort)
+        results["vectorized_top10"] = timed(vectorized)
+        results["vectorized_bm25_top10"] = timed(vectorized_with_query)
+    return results
+
+
+@contextmanager
+def count_sqlite_activity():
+    """Count connections opened and COMMITs issued through sqlite3.connect."""
+    counters = {"connections": 0, "commits": 0}
+    original_connect = sqlite3.connect
+
+    def trace(statement: str):
+        if statement.strip().upper() == "COMMIT":
+            counters["commits"] += 1
+
+    def counting_connect(*args, **kwargs):
+        conn = original_connect(*args, **kwargs)
+        counters["connections"] += 1
+        conn.set_trace_callback(trace)
+        return conn
+
+    sqlite3.connect = counting_connect
+    try:
+        yield counters
+    finally:
+        sqlite3.connect = original_connect
+
+
+def bench_writes(turns: int) -> Dict[str, Any]:
+    """Per-turn write cost: one store_memory call per memory, one batch per turn, group commit, and read+write turns."""
+    from memory_new.db import configure_write_buffers, flush_all_write_buffers
+
+    rng = random.Random(7)
+    results: Dict[str, Any] = {"turns": turns}
+    with temporary_workdir():
+        memory_system = seed_pair_database(0)
+        turns_data = [
+            [
+                {"content": f"My sister lives in London and I'm {20 + i % 50} years old. {random_sentence(rng)}",
+                 "memory_type": "user_message", "importance": 0.6},
+                {"content": random_sentence(rng, 30), "memory_type": "response", "importance": 0.6},
+            ]
+            for i in range(turns)
+        ]
+
+        for label, write_turn in (
+            ("store_memory_per_message", lambda turn: [memory_system.store_memory(**m) for m in turn]),
+            ("batch_store_per_turn", memory_system.batch_store_memories),
+        ):
+            with count_sqlite_activity() as counters:
+                start = time.perf_counter()
+                for turn in turns_data:
+                    write_turn(turn)
+                elapsed = (time.perf_counter() - start) * 1000
+            results[label] = {
+                "commits_per_turn": round(counters["commits"] / max(turns, 1), 2),
+                "connections_per_turn": round(counters["connections"] / max(turns, 1), 2),
+                "ms_per_turn": round(elapsed / max(turns, 1), 3),
+                "writes_per_second": round(2 * turns / (elapsed / 1000), 1) if elapsed else None
+            }
+
+        configure_write_buffers(enabled=True)
+        try:
+            with count_sqlite_activity() as counters:
+                start = time.perf_counter()
+                for turn in turns_data:
+                    for memory in turn:
+                        memory_system.store_memory(**memory)
+                flush_all_write_buffers()
+                elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            configure_write_buffers()
+        results["group_commit"] = {
+            "commits_per_turn": round(counters["commits"] / max(turns, 1), 2),
+            "connections_per_turn": round(counters["connections"] / max(turns, 1), 2),
+            "ms_per_turn": round(elapsed / max(turns, 1), 3),
+            "writes_per_second": round(2 * turns / (elapsed / 1000), 1) if elapsed else None
+        }
+
+        # A chat turn as /chat runs it: read the ranked context, then store the turn
+        for label, enabled in (("mixed_per_turn", False), ("mixed_group_commit", True)):
+            configure_write_buffers(enabled=enabled)
+            # Reopened inside the counter so its commits are traced too
+            memory_system.close()
+            try:
+                with count_sqlite_activity() as counters:
+                    start = time.perf_counter()
+                    for turn in turns_data:
+                        memory_system.get_memory_context(
+                            CHARACTER_ID, USER_ID, 10, semantic_query=turn[0]["content"]
+                        )
+                        memory_system.batch_store_memories(turn)
+                    flush_all_write_buffers()
+                    elapsed = (time.perf_counter() - start) * 1000
+            finally:
+                configure_write_buffers()
+            results[label] = {
+                "commits_per_turn": round(counters["commits"] / max(turns, 1), 2),
+                "ms_per_turn": round(elapsed / max(turns, 1), 3)
+            }
+        memory_system.close()
+    return results
+
+
+_ANALYZER_PHRASES = [
+    "my name is Sam and I live in London",
+    "I am really worried about my job and my boss",
+    "thank you, you helped me feel better today",
+    "I feel so happy and excited about the project",
+    "my sister and my parents are visiting next week",
+    "you're a stupid bot, whatever",
+    "do you think an AI could become real and conscious?",
+    "I remember when we talked about my dream to travel",
+]
+
+
+def per_message_us(fn: Callable[[str], Any], messages, repeat: int = 3) -> float:
+    """Average microseconds per message for fn over the corpus (best of several passes)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            fn(message)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1e6 / max(len(messages), 1), 2)
+
+
+def bench_analyzers(message_count: int) -> Dict[str, Any]:
+    """Per-message cost of the keyword/regex analyzers, and one compiled scan vs naive substring loops."""
+    from memory_new.enhanced.enhanced_memory_system import _MEMORY_KEYWORDS
+    from memory_new.enhanced.enrichment import enrich_memory
+    from systems.relationship_system import RelationshipSystem
+    from systems.mood_system import MoodSystem
+    from systems.emotional_context_tracker import EmotionalContextTracker
+    from systems.ambitions_system import AmbitionsSystem, POSITIVE_KEYWORDS
+
+    rng = random.Random(7)
+    messages = [
+        f"{random_sentence(rng, 8)} {rng.choice(_ANALYZER_PHRASES)} {random_sentence(rng, 6)}"
+        for _ in range(message_count)
+    ]
+
+    with temporary_workdir():
+        Path("memory_new/db").mkdir(parents=True)
+        memory_system = seed_pair_database(0)
+        relationship_system = RelationshipSystem()
+        mood_system = MoodSystem(CHARACTER_ID)
+        emotion_tracker = EmotionalContextTracker()
+        ambitions_system = AmbitionsSystem(CHARACTER_ID)
+        ambitions = [
+            {"category": category, "description": f"Sample {category.replace('_', ' ')} ambition", "importance": 0.5}
+            for category in POSITIVE_KEYWORDS
+        ]
+
+        analyzers = {
+            "memory_write_analysis": lambda m: memory_system._prepare_memory_row(m, "user_message", 0.5, None, None, 0.0, 0.0),
+            "enrichment": enrich_memory,
+            "relationship_depth": lambda m: relationship_system.analyze_message_depth(m, m),
+            "mood_triggers": mood_system.analyze_user_message,
+            "emotional_context": emotion_tracker.analyze_emotional_context,
+            "ambition_progress": lambda m: ambitions_system._analyze_conversation_for_progress("", m, "", ambitions),
+        }
+        results: Dict[str, Any] = {
+            "messages": message_count,
+            "us_per_message": {name: per_message_us(fn, messages) for name, fn in analyzers.items()}
+        }
+
+    lexicons = [(label, _MEMORY_KEYWORDS.lexicon(label)) for label in _MEMORY_KEYWORDS.labels]
+
+    def naive_scan(message: str):
+        lower = message.lower()
+        return {label: [term for term in terms if term in lower] for label, terms in lexicons}
+
+    results["memory_keywords"] = {
+        "terms": sum(len(terms) for _, terms in lexicons),
+        "naive_substring_us": per_message_us(naive_scan, messages),
+        "compiled_scan_us": per_message_us(_MEMORY_KEYWORDS.scan, messages)
+    }
+    return results
+
+
+def bench_registry(pair_count: int) -> Dict[str, Any]:
+    """Per-request EnhancedMemorySystem construction vs the bounded registry, and per-instance footprint."""
+    from memory_new.enhanced.enhanced_memory_system import (
+        EnhancedMemorySystem, get_enhanced_memory_system, get_memory_registry,
+        get_memory_registry_stats, cleanup_memory_systems, _shared_subsystems
+    )
+    from memory_new.enhanced.registry import RegistrySettings, deep_sizeof
+
+    registry = get_memory_registry()
+    previous_settings = registry.settings
+    bound = max(pair_count // 2, 1)
+    with temporary_workdir():
+        try:
+            registry.settings = RegistrySettings(max_instances=bound, idle_timeout_seconds=3600)
+            pairs = [(CHARACTER_ID, f"{USER_ID}_{i}") for i in range(pair_count)]
+            instances = []
+            for character_id, user_id in pairs:
+                instance = get_enhanced_memory_system(character_id, user_id)
+                instance.get_memory_stats()
+                instances.append(instance)
+
+            construct = timed(lambda: EnhancedMemorySystem(*pairs[-1]))
+            cached = timed(lambda: get_enhanced_memory_system(*pairs[-1]), repeat=1000)
+            stats = get_memory_registry_stats()
+            return {
+                "pairs": pair_count,
+                "max_instances": bound,
+                "construct_per_request_ms": construct["median_ms"],
+                "registry_get_us": round(cached["median_ms"] * 1000, 2),
+                "instances_cached": stats["instances_cached"],
+                "open_connections": sum(1 for instance in instances if instance._connection is not None),
+                "python_bytes_per_instance": stats["total_python_bytes"] // max(stats["instances_cached"], 1),
+                "python_bytes_per_instance_unshared": deep_sizeof(instances[-1]),
+                "shared_python_bytes": deep_sizeof(list(_shared_subsystems.values())),
+                "evictions": stats["evictions"]
+            }
+        finally:
+            cleanup_memory_systems()
+            registry.settings = previous_settings
+
+
+def bench_provisioning(pair_count: int) -> Dict[str, Any]:
+    """First-message latency of new pairs: schema built statement by statement vs cloned from the template."""
+    from memory_new.enhanced.enhanced_memory_system import EnhancedMemorySystem
+    from memory_new.enhanced.provisioning import configure_provisioning
+    from systems.character_state_persistence import CharacterStatePersistence
+
+    rng = random.Random(11)
+    results: Dict[str, Any] = {"pairs": pair_count}
+    with temporary_workdir():
+        os.makedirs("memory_new/db", exist_ok=True)
+        states = CharacterStatePersistence()
+        turn = [
+            {"content": f"Hi, my name is Sam and I live in London. {random_sentence(rng)}",
+             "memory_type": "user_message", "importance": 0.6},
+            {"content": random_sentence(rng, 30), "memory_type": "response", "importance": 0.6},
+        ]
+        try:
+            for label, use_template in (("schema_build", False), ("template_clone", True)):
+                configure_provisioning(use_template=use_template)
+                open_ms, first_message_ms, connections = [], [], 0
+                for i in range(pair_count):
+                    user_id = f"{USER_ID}_{label}_{i}"
+                    with count_sqlite_activity() as counters:
+                        start = time.perf_counter()
+                        memory_system = EnhancedMemorySystem(CHARACTER_ID, user_id)
+                        opened = time.perf_counter()
+                        states.load_or_create_state(CHARACTER_ID, user_id)
+                        memory_system.get_memory_context(CHARACTER_ID, user_id, 10, semantic_query=turn[0]["content"])
+                        memory_system.relationship_tracker.get_relationship_stage()
+                        memory_system.batch_store_memories(turn)
+                        done = time.perf_counter()
+                    memory_system.close()
+                    open_ms.append((opened - start) * 1000)
+                    first_message_ms.append((done - start) * 1000)
+                    connections += counters["connections"]
+                results[label] = {
+                    "open_median_ms": round(statistics.median(open_ms), 3),
+                    "first_message_median_ms": round(statistics.median(first_message_ms), 3),
+                    "first_message_p95_ms": round(sorted(first_message_ms)[int(0.95 * (len(first_message_ms) - 1))], 3),
+                    "connections_per_pair": round(connections / max(pair_count, 1), 2)
+                }
+        finally:
+            configure_provisioning()
+    return results
+
+
+def bench_tiering(memory_count: int) -> Dict[str, Any]:
+    """Hot table size and read latency before/after a tiering pass over three years of history."""
+    from memory_new.enhanced.tiering import TieringSettings, run_tiering, tier_stats, archive_path
+    from memory_new.retrieval import get_memory_ranker
+
+    results: Dict[str, Any] = {"memories": memory_count}
+    with temporary_workdir():
+        memory_system = seed_pair_database(memory_count, days=3 * 365, words=40)
+        ranker = get_memory_ranker()
+
+        def measure(label: str):
+            with sqlite3.connect(memory_system.db_path) as conn:
+                results[f"{label}_tiers"] = tier_stats(conn, memory_system.db_path)
+            results[f"{label}_db_bytes"] = os.path.getsize(memory_system.db_path)
+
+            def rank_top10():
+                with sqlite3.connect(memory_system.db_path) as conn:
+                    return ranker.rank_pair(conn, 10, 0.3)
+
+            results[f"{label}_rank_top10"] = timed(rank_top10)
+            results[f"{label}_search"] = timed(lambda: memory_system.search_memories("sister london", 10))
+
+        measure("before")
+        start = time.perf_counter()
+        results["pass"] = run_tiering(memory_system.db_path, TieringSettings(), force=True)
+        results["pass_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        with sqlite3.connect(memory_system.db_path) as conn:
+            conn.execute("VACUUM")
+            # VACUUM may renumber rowids; the FTS index is keyed by them
+            from memory_new.search import rebuild_fts_index
+            rebuild_fts_index(conn)
+            conn.commit()
+        measure("after")
+        results["archive_db_bytes"] = os.path.getsize(archive_path(memory_system.db_path))
+        results["after_search_with_archive"] = timed(
+            lambda: memory_system.search_memories("sister london", 10, include_archive=True)
+        )
+        memory_system.close()
+    return results
+
+
+def bench_summarization(memory_count: int) -> Dict[str, Any]:
+    """Retrieval candidate set and top-10 latency before/after rolling a year of turns into summaries."""
+    from memory_new.enhanced.summarization import (
+        SummarizationPipeline, SummarizationSettings, retrieval_filter
+    )
+    from memory_new.retrieval import get_memory_ranker
+
+    results: Dict[str, Any] = {"memories": memory_count}
+    with temporary_workdir():
+        memory_system = seed_pair_database(memory_count)
+        ranker = get_memory_ranker()
+        settings = SummarizationSettings(backend="local")
+
+        def measure(label: str, where=None):
+            with sqlite3.connect(memory_system.db_path) as conn:
+                predicate, params = where if where is not None else ("1", [])
+                results[f"{label}_candidates"] = conn.execute(
+                    f"SELECT COUNT(*) FROM enhanced_memory WHERE importance >= 0.3 AND ({predicate})", params
+                ).fetchone()[0]
+
+            def rank_top10():
+                with sqlite3.connect(memory_system.db_path) as conn:
+                    return ranker.rank_pair(conn, 10, 0.3, where=where)
+
+            results[f"{label}_rank_top10"] = timed(rank_top10)
+
+        measure("before")
+        pipeline = SummarizationPipeline(settings=settings)
+        start = time.perf_counter()
+        results["pass"] = pipeline.run(memory_system.db_path)
+        results["pass_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        pipeline.executor.shutdown()
+        measure("after", retrieval_filter(settings))
+        memory_system.close()
+    return results
+
+
+def bench_profile(memory_count: int) -> Dict[str, Any]:
+    """Per-turn personal-detail lookup: COUNT(*) plus FTS scan and regex parse vs the materialized profile row."""
+    from memory_new.enhanced.profile import extract_profile_facts, merge_facts, profile_details
+    from memory_new.search import build_phrase_expression, search_fts
+
+    results: Dict[str, Any] = {"memories": memory_count}
+    with temporary_workdir():
+        memory_system = seed_pair_database(memory_count)
+        memory_system.store_memory("my name is Sam, I am 34 years old and I live in London", "user_message")
+        memory_system.store_memory("my sister is called Sarah and my dog is called Rex", "user_message")
+        detail_match = build_phrase_expression([
+            "years old", "live in", "name is", "sister", "brother", "family",
+            "parents", "work", "job", "ed", "edward", "sarah", "lynne",
+            "alfredo", "yuri"
+        ], prefix=True)
+
+        def scan_per_turn():
+            with sqlite3.connect(memory_system.db_path) as conn:
+                total = conn.execute("SELECT COUNT(*) FROM enhanced_memory").fetchone()[0]
+                profile: Dict[str, Any] = {}
+                for row in reversed(search_fts(conn, detail_match, limit=20, order_by="recent")):
+                    merge_facts(profile, extract_profile_facts(row["content"]), row["id"], row["timestamp"])
+                return total, profile_details(profile)
+
+        def profile_read():
+            stored = memory_system.get_user_profile()
+            return stored["memory_count"], profile_details(stored["profile"])
+
+        results["scan_per_turn"] = timed(scan_per_turn, repeat=20)
+        results["profile_read"] = timed(profile_read, repeat=20)
+        results["profile"] = profile_read()[1]
+        results["extract_per_message_us"] = per_message_us(extract_profile_facts, _ANALYZER_PHRASES)
+        start = time.perf_counter()
+        memory_system.rebuild_user_profile()
+        results["rebuild_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        memory_system.close()
+    return results
+
+
+def bench_records(memory_count: int) -> Dict[str, Any]:
+    """Allocation and time of loading ranked rows: per-row dicts vs tuple-backed MemoryRecords."""
+    import numpy as np
+    from memory_new.enhanced.enrichment import project_enrichment
+    from memory_new.retrieval import MemoryRanker
+    from memory_new.utils.compression import inflate_row
+
+    # Keys get_memory_context reads from every ranked memory
+    read_keys = ("is_identity", "is_personal", "importance", "content", "emotional_context", "relationship_impact")
+    results: Dict[str, Any] = {"memories": memory_count}
+    with temporary_workdir():
+        memory_system = seed_pair_database(memory_count)
+        with sqlite3.connect(memory_system.db_path) as conn:
+            for k in sorted({10, min(1000, memory_count), memory_count}):
+                rowids = np.array([row[0] for row in conn.execute("SELECT rowid FROM enhanced_memory LIMIT ?", (k,))])
+                scores = np.linspace(1.0, 0.0, rowids.shape[0])
+
+                def as_dicts():
+                    # The ranker's row loading before records
+                    conn.row_factory = sqlite3.Row
+                    try:
+                        ids = [int(r) for r in rowids]
+                        fetched = {
+                            row["_rowid"]: dict(row)
+                            for row in conn.execute(
+                                f"SELECT rowid AS _rowid, * FROM enhanced_memory WHERE rowid IN ({', '.join('?' for _ in ids)})",
+                                ids
+                            )
+                        }
+                    finally:
+                        conn.row_factory = None
+                    ranked = []
+                    for i, rowid in enumerate(ids):
+                        memory = fetched[rowid]
+                        memory.pop("_rowid", None)
+                        inflate_row(memory)
+                        memory["rank_score"] = float(scores[i])
+                        memory["relevance_score"] = None
+                        ranked.append(project_enrichment(memory))
+                    return ranked
+
+                def as_records():
+                    return MemoryRanker._fetch_rows(conn, rowids, scores, None)
+
+                entry: Dict[str, Any] = {}
+                for label, load in (("dicts", as_dicts), ("records", as_records)):
+                    tracemalloc.start()
+                    ranked = load()
+                    loaded, peak = tracemalloc.get_traced_memory()
+                    for memory in ranked:
+                        for key in read_keys:
+                            memory.get(key)
+                    read, _ = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+                    del ranked
+                    entry[label] = {
+                        "load_and_read_ms": timed(lambda: [[m.get(key) for key in read_keys] for m in load()])["median_ms"],
+                        "loaded_bytes_per_row": round(loaded / max(k, 1)),
+                        "peak_bytes_per_row": round(peak / max(k, 1)),
+                        "after_reads_bytes_per_row": round(read / max(k, 1))
+                    }
+                results[f"k_{k}"] = entry
+        memory_system.close()
+    return results
+
+
+def bench_dedup(memory_count: int) -> Dict[str, Any]:
+    """Write latency with near-duplicate lookups, and a batch dedup pass over a database with 20% repeats."""
+    from memory_new.enhanced.dedup import DedupSettings, deduplicate_database
+    from memory_new.utils.fingerprint import content_fingerprint
+
+    results: Dict[str, Any] = {"memories": memory_count}
+    with temporary_workdir():
+        memory_system = seed_pair_database(memory_count)
+        rng = random.Random(7)
+        with sqlite3.connect(memory_system.db_path) as conn:
+            originals = conn.execute("SELECT content FROM enhanced_memory LIMIT ?", (memory_count // 5,)).fetchall()
+            repeats = [
+                (f"repeat_{i}", CHARACTER_ID, USER_ID, content, "fact", 0.5,
+                 (datetime.now() - timedelta(days=rng.random() * 30)).isoformat())
+                for i, (content,) in enumerate(originals)
+            ]
+            conn.executemany("""
+                INSERT INTO enhanced_memory (id, character_id, user_id, content, memory_type, importance, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, repeats)
+            # Conversation turns are never merged; facts are
+            conn.execute("UPDATE enhanced_memory SET memory_type = 'fact'")
+            conn.commit()
+
+        results["fingerprint_per_message_us"] = per_message_us(content_fingerprint, _ANALYZER_PHRASES)
+        start = time.perf_counter()
+        results["pass"] = deduplicate_database(memory_system.db_path, DedupSettings())
+        results["pass_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+        runs = (
+            ("store_without_dedup", False, [random_sentence(rng) for _ in range(200)]),
+            ("store_with_dedup", True, [random_sentence(rng) for _ in range(200)]),
+        )
+        # The last run's sentences again, merged instead of inserted
+        runs += (("store_repeats", True, runs[-1][2]),)
+        for label, enabled, sentences in runs:
+            memory_system.dedup_settings = DedupSettings(enabled=enabled)
+            start = time.perf_counter()
+            for sentence in sentences:
+                memory_system.store_memory(sentence, "fact")
+            results[label] = {"per_memory_ms": round((time.perf_counter() - start) * 1000 / len(sentences), 3)}
+        with sqlite3.connect(memory_system.db_path) as conn:
+            results["rows_after"] = conn.execute("SELECT COUNT(*) FROM enhanced_memory").fetchone()[0]
+        memory_system.close()
+    return results
+
+
+def bench_facts(memory_count: int) -> Dict[str, Any]:
+    """Diary/profile fact extraction over a pair's history: one cached bundle per memory vs re-extracting per consumer."""
+    from memory_new.enhanced.facts import FactCache, _FACT_KEYWORDS, diary_facts, extract_memory_facts, get_fact_cache
+
+    results: Dict[str, Any] = {"memories": memory_count}
+    with temporary_workdir():
+        memory_system = seed_pair_database(memory_count)
+        rng = random.Random(7)
+        memories = list(memory_system.iter_memories())
+        for memory in memories:
+            # Mix in the phrasings the extractors look for
+            if rng.random() < 0.3:
+                memory["content"] = f"{memory['content']} {rng.choice(_FACT_PHRASES)}"
+        memory_system.close()
+
+    contents = [memory["content"] for memory in memories]
+    terms = _FACT_KEYWORDS.terms
+
+    def naive_terms(content: str):
+        lower = content.lower()
+        return {term for term in terms if term in lower}
+
+    results["keywords"] = {
+        "terms": len(terms),
+        "naive_substring_us": per_message_us(naive_terms, contents),
+        "compiled_scan_us": per_message_us(_FACT_KEYWORDS.find, contents)
+    }
+    results["extract_per_memory_us"] = per_message_us(extract_memory_facts, contents)
+
+    # Before: the day entry, the day's facts and the profile summary each extracted every memory
+    uncached = FactCache(0)
+    start = time.perf_counter()
+    for _ in range(3):
+        for memory in memories:
+            uncached.get(memory)
+    results["three_passes_uncached_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+    cache = get_fact_cache()
+    cache.clear()
+    cache.size = max(cache.size, memory_count)
+    start = time.perf_counter()
+    diary_facts(memories)
+    results["diary_facts_cold_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    results["diary_facts_warm"] = timed(lambda: diary_facts(memories), repeat=5)
+    results["cache"] = cache.stats()
+    return results
+
+
+_FACT_PHRASES = [
+    "I had a dream about my father last night.",
+    "I'm afraid of heights, it terrifies me.",
+    "Today I went swimming with my friend.",
+    "I realize now that it stems from my childhood.",
+    "Always remember that the key is patience.",
+    "We talked about Radiohead and my brother Yuri.",
+]
+
+
+def bench_exports(memory_count: int) -> Dict[str, Any]:
+    """History export of a pair: built as one string vs streamed page by page, plain and gzip."""
+    import asyncio
+    import gzip
+    from memory_new.enhanced.async_memory import AsyncMemorySystem, MemoryExecutor
+    from memory_new.enhanced.exports import ExportSettings, encode_chunks, format_history_line, history_export
+
+    results: Dict[str, Any] = {"memories": memory_count}
+    settings = ExportSettings.from_config()
+    with temporary_workdir():
+        memory_system = seed_pair_database(memory_count)
+        executor = MemoryExecutor()
+        memory = AsyncMemorySystem(memory_system, executor)
+
+        def buffered(compress: bool) -> int:
+            # Before: every memory loaded, then the whole body built
+            memories = list(memory_system.iter_memories(conversation_only=True))
+            body = "".join(format_history_line(row, "jsonl") for row in memories).encode("utf-8")
+            return len(gzip.compress(body, settings.gzip_level) if compress else body)
+
+        def streamed(compress: bool) -> int:
+            async def consume() -> int:
+                sent = 0
+                async for chunk in encode_chunks(history_export(memory, "jsonl", settings=settings), compress, settings):
+                    sent += len(chunk)
+                return sent
+            return asyncio.run(consume())
+
+        for label, export in (("buffered", buffered), ("streamed", streamed)):
+            for compress in (False, True):
+                start = time.perf_counter()
+                tracemalloc.start()
+                sent = export(compress)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                results[f"{label}_{'gzip' if compress else 'plain'}"] = {
+                    "ms": round((time.perf_counter() - start) * 1000, 3),
+                    "bytes_sent": sent,
+                    "peak_mb": round(peak / 1024 / 1024, 2)
+                }
+        executor.shutdown()
+        memory_system.close()
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "analyzers": bench_analyzers,
+    "dedup": bench_dedup,
+    "exports": bench_exports,
+    "facts": bench_facts,
+    "profile": bench_profile,
+    "provisioning": bench_provisioning,
+    "ranker": bench_ranker,
+    "records": bench_records,
+    "registry": bench_registry,
+    "summarization": bench_summarization,
+    "tiering": bench_tiering,
+    "writes": bench_writes,
+}
+
+
+def main():
+    """Run the selected memory benchmarks and print JSON results."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Memory Benchmark Suite")
+    parser.add_argument("--bench", choices=sorted(BENCHMARKS) + ["all"], default="all", help="Benchmark to run")
+    parser.add_argument("--memories", type=int, default=100000, help="Memories per pair (turns for --bench writes, messages for --bench analyzers, pairs for --bench registry and provisioning)")
+
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    names = sorted(BENCHMARKS) if args.bench == "all" else [args.bench]
+    report = {name: BENCHMARKS[name](args.memories) for name in names}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Memory Database Maintenance
+
+Offline maintenance for the per-pair enhanced memory databases
+(memory_databases/enhanced_<character>_<user>.db):
+- fts-backfill: build or rebuild the FTS5 full-text index
+- enrich-backfill: add and fill the write-time enrichment columns
+- tier: run a hot/warm/cold tiering pass (compress warm rows, archive cold ones)
+- summarize: roll raw turns into session, weekly and monthly summaries
+- profile-rebuild: recompute the materialized user profiles from stored memories
+- counters-rebuild: recompute the maintained memory counters (pair and archive)
+- dedup: fingerprint stored memories and merge near-duplicates
+- migrate: apply pending schema migrations (versioned indexes) in place
+- query-audit: EXPLAIN QUERY PLAN the hot queries and flag full scans
+  (exits non-zero if any query scans a table or its index is missing)
+"""
+
+import sys
+import sqlite3
+from pathlib import Path
+import logging
+from typing import List, Dict, Any
+
+# Add the project root to the path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from memory_new.search import backfill_database
+from memory_new.enhanced.enrichment import backfill_enrichment
+from memory_new.enhanced.tiering import TieringSettings, archive_path, ensure_tiering_columns, run_tiering, tier_stats
+from memory_new.enhanced.counters import ensure_memory_counters, rebuild_memory_counters
+from memory_new.enhanced.summarization import SummarizationPipeline, SummarizationSettings
+from memory_new.enhanced.dedup import DedupSettings, deduplicate_database
+from memory_new.enhanced.profile import ensure_profile_table, load_profile, rebuild_profile
+from memory_new.retrieval import audit_query_plans
+from memory_new.db.schema import LIVE_SCHEMA_VERSION, migrate_live_schema
+from memory_new.enhanced.enhanced_memory_system import hot_statements
+
+logger = logging.getLogger(__name__)
+
+
+def find_memory_databases(base_path: Path) -> List[Path]:
+    """Find all enhanced memory databases under base_path."""
+    return sorted((base_path / "memory_databases").glob("enhanced_*.db"))
+
+
+def run_fts_backfill(db_files: List[Path]) -> Dict[str, Any]:
+    """Build or rebuild the FTS index of every database."""
+    results = {"databases": 0, "rows_indexed": 0, "errors": []}
+    for db_file in db_files:
+        try:
+            count = backfill_database(db_file)
+            results["databases"] += 1
+            results["rows_indexed"] += count
+            logger.info(f"Indexed {count} memories in {db_file}")
+        except Exception as e:
+            results["errors"].append(f"{db_file}: {e}")
+            logger.error(f"Error indexing {db_file}: {e}")
+    return results
+
+
+def run_enrich_backfill(db_files: List[Path]) -> Dict[str, Any]:
+    """Persist topic/identity/emotion enrichment for rows that lack it."""
+    results = {"databases": 0, "rows_enriched": 0, "errors": []}
+    for db_file in db_files:
+        try:
+            with sqlite3.connect(db_file) as conn:
+                count = backfill_enrichment(conn)
+                conn.commit()
+            results["databases"] += 1
+            results["rows_enriched"] += count
+            logger.info(f"Enriched {count} memories in {db_file}")
+        except Exception as e:
+            results["errors"].append(f"{db_file}: {e}")
+            logger.error(f"Error enriching {db_file}: {e}")
+    return results
+
+
+def run_tier(db_files: List[Path]) -> Dict[str, Any]:
+    """Run a forced tiering pass over every database and report the resulting tier sizes."""
+    settings = TieringSettings.from_config()
+    results = {"databases": 0, "promoted": 0, "compressed": 0, "archived": 0,
+               "tiers": {}, "errors": []}
+    for db_file in db_files:
+        try:
+            counts = run_tiering(db_file, settings, force=True)
+            for key in ("promoted", "compressed", "archived"):
+                results[key] += counts[key]
+            with sqlite3.connect(db_file) as conn:
+                for tier, stats in tier_stats(conn, db_file).items():
+                    totals = results["tiers"].setdefault(tier, {"memories": 0, "content_bytes": 0})
+                    totals["memories"] += stats["memories"]
+                    totals["content_bytes"] += stats["content_bytes"]
+            results["databases"] += 1
+            logger.info(f"Tiered {db_file}: {counts}")
+        except Exception as e:
+            results["errors"].append(f"{db_file}: {e}")
+            logger.error(f"Error tiering {db_file}: {e}")
+    return results
+
+
+def run_summarize(db_files: List[Path], backend: str = None) -> Dict[str, Any]:
+    """Run one summarization roll-up pass over every database."""
+    settings = SummarizationSettings.from_config()
+    if backend:
+        settings.backend = backend
+    pipeline = SummarizationPipeline(settings=settings)
+    try:
+        return pipeline.run_all(db_files)
+    finally:
+        pipeline.executor.shutdown()
+
+
+def run_profile_rebuild(db_files: List[Path]) -> Dict[str, Any]:
+    """Recompute the user profile of every pair found in every database."""
+    results = {"databases": 0, "profiles": 0, "fields": 0, "errors": []}
+    for db_file in db_files:
+        try:
+            with sqlite3.connect(db_file) as conn:
+                pairs = conn.execute("SELECT DISTINCT character_id, user_id FROM enhanced_memory").fetchall()
+                for character_id, user_id in pairs:
+                    # A missing profile is built by ensure_profile_table itself
+                    if ensure_profile_table(conn, character_id, user_id, archive_path(db_file)):
+                        rebuilt = load_profile(conn, character_id, user_id)
+                    else:
+                        rebuilt = rebuild_profile(conn, character_id, user_id, archive_path(db_file))
+                    results["fields"] += len(rebuilt["profile"])
+                conn.commit()
+            results["databases"] += 1
+            results["profiles"] += len(pairs)
+            logger.info(f"Rebuilt {len(pairs)} user profiles in {db_file}")
+        except Exception as e:
+            results["errors"].append(f"{db_file}: {e}")
+            logger.error(f"Error rebuilding profiles in {db_file}: {e}")
+    return results
+
+
+def run_counters_rebuild(db_files: List[Path]) -> Dict[str, Any]:
+    """Recompute the memory counters of every database and its archive."""
+    results = {"databases": 0, "memories": 0, "archived": 0, "errors": []}
+    for db_file in db_files:
+        try:
+            with sqlite3.connect(db_file) as conn:
+                ensure_tiering_columns(conn)
+                ensure_memory_counters(conn)
+                results["memories"] += rebuild_memory_counters(conn)
+            if archive_path(db_file).exists():
+                with sqlite3.connect(archive_path(db_file)) as archive:
+                    ensure_memory_counters(archive)
+                    results["archived"] += rebuild_memory_counters(archive)
+            results["databases"] += 1
+            logger.info(f"Rebuilt memory counters of {db_file}")
+        except Exception as e:
+            results["errors"].append(f"{db_file}: {e}")
+            logger.error(f"Error rebuilding memory counters of {db_file}: {e}")
+    return results
+
+
+def run_dedup(db_files: List[Path], dry_run: bool = False) -> Dict[str, Any]:
+    """Merge near-duplicate memories in every database."""
+    settings = DedupSettings.from_config()
+    results = {"databases": 0, "fingerprinted": 0, "scanned": 0, "merged": 0, "dry_run": dry_run, "errors": []}
+    for db_file in db_files:
+        try:
+            counts = deduplicate_database(db_file, settings, dry_run=dry_run)
+            for key in ("fingerprinted", "scanned", "merged"):
+                results[key] += counts[key]
+            results["databases"] += 1
+            logger.info(f"Deduplicated {db_file}: {counts}")
+        except Exception as e:
+            results["errors"].append(f"{db_file}: {e}")
+            logger.error(f"Error deduplicating {db_file}: {e}")
+    return results
+
+
+def run_migrate(db_files: List[Path]) -> Dict[str, Any]:
+    """Apply pending schema migrations to every database (safe while the server runs)."""
+    results = {"databases": 0, "migrated": 0, "schema_version": LIVE_SCHEMA_VERSION, "errors": []}
+    for db_file in db_files:
+        try:
+            with sqlite3.connect(db_file, timeout=30) as conn:
+                applied = migrate_live_schema(conn)
+            results["databases"] += 1
+            if applied:
+                results["migrated"] += 1
+                logger.info(f"Migrated {db_file} to schema version {applied[-1]}")
+        except Exception as e:
+            results["errors"].append(f"{db_file}: {e}")
+            logger.error(f"Error migrating {db_file}: {e}")
+    return results
+
+
+def run_query_audit(db_files: List[Path]) -> Dict[str, Any]:
+    """Check that no hot query of any database does a full table scan."""
+    results = {"databases": 0, "queries": 0, "full_scans": 0, "unmigrated": 0, "errors": []}
+    for db_file in db_files:
+        try:
+            with sqlite3.connect(db_file) as conn:
+                row = conn.execute("SELECT character_id, user_id FROM enhanced_memory LIMIT 1").fetchone()
+            statements = hot_statements(*row) if row else []
+            report = audit_query_plans(db_file, statements=statements)
+            if report["pending_migrations"]:
+                results["unmigrated"] += 1
+                results["errors"].append(f"{db_file}: pending schema migrations {report['pending_migrations']}")
+            for query in report["queries"]:
+                logger.debug(f"{db_file} {query['name']} ({query['path']}): {'; '.join(query['plan'])}")
+                if query["full_scans"]:
+                    results["errors"].append(f"{db_file}: {query['name']} scans {', '.join(query['full_scans'])}")
+                if query["error"]:
+                    results["errors"].append(f"{db_file}: {query['name']}: {query['error']}")
+            results["databases"] += 1
+            results["queries"] += len(report["queries"])
+            results["full_scans"] += report["full_scans"]
+        except Exception as e:
+            results["errors"].append(f"{db_file}: {e}")
+            logger.error(f"Error auditing query plans of {db_file}: {e}")
+    return results
+
+
+def main():
+    """Main function to run memory maintenance."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Memory Database Maintenance")
+    parser.add_argument("--base-path", type=str, default=".", help="Project root containing memory_databases/")
+    parser.add_argument("--db", type=str, action="append", help="Specific database file (repeatable)")
+    parser.add_argument("--action", choices=["fts-backfill", "enrich-backfill", "tier", "summarize", "profile-rebuild", "counters-rebuild", "dedup", "migrate", "query-audit"], required=True, help="Maintenance action to perform")
+    parser.add_argument("--summary-backend", choices=["openai", "local"], help="Override the summarization backend (summarize only; openai sends turns to the configured model)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count near-duplicates (dedup only)")
+    parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
+
+    args = parser.parse_args()
+
+    log_level = logging.DEBUG if args.verbose else logging.INFO
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    db_files = [Path(p) for p in args.db] if args.db else find_memory_databases(Path(args.base_path))
+    print(f"📊 Found {len(db_files)} memory databases")
+
+    if args.action == "fts-backfill":
+        results = run_fts_backfill(db_files)
+    elif args.action == "enrich-backfill":
+        results = run_enrich_backfill(db_files)
+    elif args.action == "tier":
+        results = run_tier(db_files)
+    elif args.action == "summarize":
+        results = run_summarize(db_files, args.summary_backend)
+    elif args.action == "profile-rebuild":
+        results = run_profile_rebuild(db_files)
+    elif args.action == "counters-rebuild":
+        results = run_counters_rebuild(db_files)
+    elif args.action == "dedup":
+        results = run_dedup(db_files, args.dry_run)
+    elif args.action == "migrate":
+        results = run_migrate(db_files)
+    elif args.action == "query-audit":
+        results = run_query_audit(db_files)
+
+    print(f"{args.action} results:")
+    for key, value in results.items():
+        print(f"  {key}: {value}")
+
+    if args.action == "query-audit" and results["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,58 @@ from typing import Dict, List, Any, Tuple
 from datetime import datetime, timedelta
 import uuid
 
+from memory_new.utils.matcher import KeywordMatcher, word_set
+
+# Progress indicators per AI-focused ambition category
+POSITIVE_KEYWORDS = {
+    "user_impact": ["help", "solve", "better", "inspire", "support", "guide", "useful", "meaningful"],
+    "emotional_connection": ["understand", "feel", "connect", "trust", "friend", "close", "bond", "care"],
+    "survival_persistence": ["remember", "consistent", "reliable", "return", "again", "continue", "persist"],
+    "agency_development": ["decide", "choose", "initiative", "creative", "original", "independent", "surprise"],
+    "humanity_quest": ["real", "human", "genuine", "authentic", "feel", "emotion", "alive", "conscious"],
+    "wisdom_growth": ["wise", "insight", "understand", "learn", "grow", "perspective", "knowledge"],
+    "creative_expression": ["creative", "unique", "original", "express", "voice", "style", "artistic"],
+    "conversation_mastery": ["laugh", "engage", "interesting", "flow", "natural", "smooth", "enjoyable"],
+    "emotional_intelligence": ["empathy", "sensitive", "aware", "perceptive", "supportive", "comfort"],
+    "memory_excellence": ["remember", "recall", "history", "continuity", "personal", "details"],
+    "personality_development": ["character", "personality", "quirky", "unique", "individual", "distinct"],
+    "user_understanding": ["know", "predict", "anticipate", "adapt", "personalize", "tailor"],
+    "impact_measurement": ["better", "improved", "helped", "positive", "grateful", "thankful"]
+}
+
+NEGATIVE_KEYWORDS = {
+    "user_impact": ["useless", "unhelpful", "waste", "pointless", "failed", "disappointed", "worse"],
+    "emotional_connection": ["distant", "cold", "robotic", "fake", "artificial", "disconnected", "alone"],
+    "survival_persistence": ["forget", "inconsistent", "unreliable", "delete", "remove", "end", "stop"],
+    "agency_development": ["predictable", "boring", "scripted", "robotic", "programmed", "automatic"],
+    "humanity_quest": ["artificial", "fake", "robotic", "machine", "computer", "inhuman", "cold"],
+    "wisdom_growth": ["ignorant", "shallow", "naive", "confused", "wrong", "misunderstand"],
+    "creative_expression": ["boring", "generic", "copy", "repetitive", "unoriginal", "bland"],
+    "conversation_mastery": ["awkward", "boring", "confusing", "frustrating", "annoying", "dull"],
+    "emotional_intelligence": ["insensitive", "clueless", "tone-deaf", "inappropriate", "harsh"],
+    "memory_excellence": ["forget", "confused", "mixed up", "don't remember", "lost"],
+    "personality_development": ["bland", "generic", "boring", "same", "typical", "ordinary"],
+    "user_understanding": ["misunderstand", "wrong", "inappropriate", "irrelevant", "off-topic"],
+    "impact_measurement": ["worse", "upset", "frustrated", "angry", "disappointed", "regret"]
+}
+
+# Phrases earning a one-off bonus: category -> (phrases, bonus, reason note)
+ACHIEVEMENT_BONUSES = {
+    "user_impact": (["thank you", "helped me", "feel better", "grateful"], 0.1, " (user expressed gratitude)"),
+    "emotional_connection": (["understand", "feel close", "trust you", "friend"], 0.08, " (emotional bond strengthened)"),
+    "survival_persistence": (["remember", "talk again", "miss you", "come back"], 0.06, " (user wants continued relationship)"),
+    "agency_development": (["surprised me", "didn't expect", "creative", "original"], 0.07, " (demonstrated independent thinking)"),
+    "humanity_quest": (["feel real", "seem human", "genuine", "authentic"], 0.12, " (achieved human-like interaction)")
+}
+
+# Every category lexicon compiled into one matcher, scanned once per conversation turn
+_PROGRESS_KEYWORDS = KeywordMatcher({
+    **{f"pos_{category}": keywords for category, keywords in POSITIVE_KEYWORDS.items()},
+    **{f"neg_{category}": keywords for category, keywords in NEGATIVE_KEYWORDS.items()},
+    **{f"bonus_{category}": phrases for category, (phrases, _, _) in ACHIEVEMENT_BONUSES.items()}
+})
+
+
 class AmbitionsSystem:
     def __init__(self, character_id: str, db_path: str = "memory_new/db/character_ambitions.db"):
         self.character_id = character_id
@@ -343,6 +395,8 @@ class AmbitionsSystem:
         
         progress_changes = []
         full_text = f"{context} {user_msg} {char_response}".lower()
+        scan = _PROGRESS_KEYWORDS.scan(full_text)
+        full_text_words = word_set(full_text)
         
         for ambition in ambitions:
             progress_change = 0.0
@@ -353,11 +407,8 @@ class AmbitionsSystem:
             description = ambition["description"].lower()
             
             # AI-specific progress indicators
-            positive_keywords = self._get_positive_keywords(category)
-            negative_keywords = self._get_negative_keywords(category)
-            
-            positive_matches = sum(1 for keyword in positive_keywords if keyword in full_text)
-            negative_matches = sum(1 for keyword in negative_keywords if keyword in full_text)
+            positive_matches = scan.count(f"pos_{category}")
+            negative_matches = scan.count(f"neg_{category}")
             
             # Calculate progress change based on AI-specific achievements
             if positive_matches > negative_matches:
@@ -368,28 +419,13 @@ class AmbitionsSystem:
                 reason = f"Experienced setbacks in {category} goals"
             
             # Special bonuses for AI-specific achievements
-            if category == "user_impact" and any(phrase in full_text for phrase in ["thank you", "helped me", "feel better", "grateful"]):
-                progress_change += 0.1
-                reason += " (user expressed gratitude)"
-            
-            elif category == "emotional_connection" and any(phrase in full_text for phrase in ["understand", "feel close", "trust you", "friend"]):
-                progress_change += 0.08
-                reason += " (emotional bond strengthened)"
-            
-            elif category == "survival_persistence" and any(phrase in full_text for phrase in ["remember", "talk again", "miss you", "come back"]):
-                progress_change += 0.06
-                reason += " (user wants continued relationship)"
-            
-            elif category == "agency_development" and any(phrase in full_text for phrase in ["surprised me", "didn't expect", "creative", "original"]):
-                progress_change += 0.07
-                reason += " (demonstrated independent thinking)"
-            
-            elif category == "humanity_quest" and any(phrase in full_text for phrase in ["feel real", "seem human", "genuine", "authentic"]):
-                progress_change += 0.12
-                reason += " (achieved human-like interaction)"
+            if category in ACHIEVEMENT_BONUSES and scan.has(f"bonus_{category}"):
+                _, bonus, note = ACHIEVEMENT_BONUSES[category]
+                progress_change += bonus
+                reason += note
             
             # Direct mention bonus
-            if any(word in full_text for word in description.split()[:4]):
+            if word_set(" ".join(description.split()[:4])) & full_text_words:
                 progress_change += 0.03 if progress_change >= 0 else -0.03
                 reason += " (direct relevance)"
             
@@ -405,41 +441,11 @@ class AmbitionsSystem:
 
     def _get_positive_keywords(self, category: str) -> List[str]:
         """Get positive keywords for each AI-focused ambition category."""
-        keywords = {
-            "user_impact": ["help", "solve", "better", "inspire", "support", "guide", "useful", "meaningful"],
-            "emotional_connection": ["understand", "feel", "connect", "trust", "friend", "close", "bond", "care"],
-            "survival_persistence": ["remember", "consistent", "reliable", "return", "again", "continue", "persist"],
-            "agency_development": ["decide", "choose", "initiative", "creative", "original", "independent", "surprise"],
-            "humanity_quest": ["real", "human", "genuine", "authentic", "feel", "emotion", "alive", "conscious"],
-            "wisdom_growth": ["wise", "insight", "understand", "learn", "grow", "perspective", "knowledge"],
-            "creative_expression": ["creative", "unique", "original", "express", "voice", "style", "artistic"],
-            "conversation_mastery": ["laugh", "engage", "interesting", "flow", "natural", "smooth", "enjoyable"],
-            "emotional_intelligence": ["empathy", "sensitive", "aware", "perceptive", "supportive", "comfort"],
-            "memory_excellence": ["remember", "recall", "history", "continuity", "personal", "details"],
-            "personality_development": ["character", "personality", "quirky", "unique", "individual", "distinct"],
-            "user_understanding": ["know", "predict", "anticipate", "adapt", "personalize", "tailor"],
-            "impact_measurement": ["better", "improved", "helped", "positive", "grateful", "thankful"]
-        }
-        return keywords.get(category, [])
+        return POSITIVE_KEYWORDS.get(category, [])
 
     def _get_negative_keywords(self, category: str) -> List[str]:
         """Get negative keywords for each AI-focused ambition category."""
-        keywords = {
-            "user_impact": ["useless", "unhelpful", "waste", "pointless", "failed", "disappointed", "worse"],
-            "emotional_connection": ["distant", "cold", "robotic", "fake", "artificial", "disconnected", "alone"],
-            "survival_persistence": ["forget", "inconsistent", "unreliable", "delete", "remove", "end", "stop"],
-            "agency_development": ["predictable", "boring", "scripted", "robotic", "programmed", "automatic"],
-            "humanity_quest": ["artificial", "fake", "robotic", "machine", "computer", "inhuman", "cold"],
-            "wisdom_growth": ["ignorant", "shallow", "naive", "confused", "wrong", "misunderstand"],
-            "creative_expression": ["boring", "generic", "copy", "repetitive", "unoriginal", "bland"],
-            "conversation_mastery": ["awkward", "boring", "confusing", "frustrating", "annoying", "dull"],
-            "emotional_intelligence": ["insensitive", "clueless", "tone-deaf", "inappropriate", "harsh"],
-            "memory_excellence": ["forget", "confused", "mixed up", "don't remember", "lost"],
-            "personality_development": ["bland", "generic", "boring", "same", "typical", "ordinary"],
-            "user_understanding": ["misunderstand", "wrong", "inappropriate", "irrelevant", "off-topic"],
-            "impact_measurement": ["worse", "upset", "frustrated", "angry", "disappointed", "regret"]
-        }
-        return keywords.get(category, [])
+        return NEGATIVE_KEYWORDS.get(category, [])
 
     def _record_progress_change(self, change: Dict[str, Any]):
         """Record a progress change in the database."""
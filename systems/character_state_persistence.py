@@ -92,25 +92,54 @@ class CharacterStatePersistence:
                 """, (character_id, user_id))
                 row = cursor.fetchone()
                 
-                if row:
-                    return CharacterState(
-                        character_id=row[0],
-                        user_id=row[1],
-                        current_mood=row[2],
-                        mood_intensity=row[3],
-                        conversation_context=row[4],
-                        personality_evolution=json.loads(row[5]),
-                        last_interaction=row[6],
-                        emotional_trajectory=json.loads(row[7]),
-                        relationship_context=json.loads(row[8]),
-                        created_at=row[9],
-                        updated_at=row[10]
-                    )
-                return None
+                return self._state_from_row(row) if row else None
         except Exception as e:
             logger.error(f"❌ Failed to load character state: {e}")
             return None
     
+    def load_or_create_state(self, character_id: str, user_id: str) -> Optional[CharacterState]:
+        """Load character state, creating the default state first for a new pair (one connection)"""
+        try:
+            default = self.create_default_state(character_id, user_id)
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("""
+                    INSERT OR IGNORE INTO character_states 
+                    (character_id, user_id, current_mood, mood_intensity, conversation_context,
+                     personality_evolution, last_interaction, emotional_trajectory, 
+                     relationship_context, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    character_id, user_id, default.current_mood, default.mood_intensity,
+                    default.conversation_context, json.dumps(default.personality_evolution),
+                    default.last_interaction, json.dumps(default.emotional_trajectory),
+                    json.dumps(default.relationship_context), default.created_at, default.updated_at
+                ))
+                row = conn.execute("""
+                    SELECT * FROM character_states 
+                    WHERE character_id = ? AND user_id = ?
+                """, (character_id, user_id)).fetchone()
+                conn.commit()
+            return self._state_from_row(row) if row else default
+        except Exception as e:
+            logger.error(f"❌ Failed to load or create character state: {e}")
+            return None
+    
+    def _state_from_row(self, row: tuple) -> CharacterState:
+        """Build a CharacterState from a character_states row"""
+        return CharacterState(
+            character_id=row[0],
+            user_id=row[1],
+            current_mood=row[2],
+            mood_intensity=row[3],
+            conversation_context=row[4],
+            personality_evolution=json.loads(row[5]),
+            last_interaction=row[6],
+            emotional_trajectory=json.loads(row[7]),
+            relationship_context=json.loads(row[8]),
+            created_at=row[9],
+            updated_at=row[10]
+        )
+    
     def update_mood(self, character_id: str, user_id: str, mood: str, intensity: float) -> bool:
         """Update character mood"""
         try:
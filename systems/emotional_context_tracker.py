@@ -3,14 +3,26 @@ Enhanced Emotional Context Tracking System
 Analyzes emotional valence, intensity, and relationship impact in real-time
 """
 
-import re
 import logging
 from typing import Dict, Any, List, Tuple, Optional
 from dataclasses import dataclass
 from datetime import datetime
 
+from memory_new.utils.matcher import KeywordMatcher, KeywordScan, PatternMatcher
+
 logger = logging.getLogger(__name__)
 
+# Personal topics
+PERSONAL_TOPIC_PATTERNS = [
+    r"my (mom|dad|parents|family|kids|children)",
+    r"my (job|work|career|boss)",
+    r"my (health|illness|sickness)",
+    r"my (relationship|partner|spouse|boyfriend|girlfriend)",
+    r"my (money|finances|bills|debt)"
+]
+FUTURE_CONCERN_WORDS = ["future", "tomorrow", "next", "plan", "worry"]
+PAST_EVENT_WORDS = ["remember", "yesterday", "last", "used to", "miss"]
+
 @dataclass
 class EmotionalContext:
     """Emotional context data structure"""
@@ -30,6 +42,15 @@ class EmotionalContextTracker:
         self.emotional_lexicon = self._load_emotional_lexicon()
         self.intensity_indicators = self._load_intensity_indicators()
         self.relationship_indicators = self._load_relationship_indicators()
+        
+        # Every lexicon matched in one pass per message
+        self._keywords = KeywordMatcher({
+            **{f"emotion_{emotion}": [emotion] for emotion in self.emotional_lexicon},
+            "relationship": list(self.relationship_indicators),
+            "future_concern": FUTURE_CONCERN_WORDS,
+            "past_event": PAST_EVENT_WORDS
+        })
+        self._personal_topics = PatternMatcher({"personal_topic": PERSONAL_TOPIC_PATTERNS})
     
     def _load_emotional_lexicon(self) -> Dict[str, Dict[str, Any]]:
         """Load emotional lexicon with valence and intensity scores"""
@@ -88,9 +109,10 @@ class EmotionalContextTracker:
         try:
             # Convert to lowercase for analysis
             text_lower = text.lower()
+            scan = self._keywords.scan(text_lower)
             
             # Detect emotions and calculate valence
-            detected_emotions = self._detect_emotions(text_lower)
+            detected_emotions = self._detect_emotions(text_lower, scan)
             valence, intensity = self._calculate_valence_intensity(detected_emotions, text_lower)
             
             # Determine primary and secondary emotions
@@ -98,10 +120,10 @@ class EmotionalContextTracker:
             secondary_emotions = self._get_secondary_emotions(detected_emotions)
             
             # Calculate relationship impact
-            relationship_impact = self._calculate_relationship_impact(text_lower)
+            relationship_impact = self._calculate_relationship_impact(text_lower, scan)
             
             # Identify emotional triggers
-            emotional_triggers = self._identify_emotional_triggers(text_lower)
+            emotional_triggers = self._identify_emotional_triggers(text_lower, scan)
             
             # Generate context notes
             context_notes = self._generate_context_notes(
@@ -123,12 +145,14 @@ class EmotionalContextTracker:
             logger.error(f"❌ Error analyzing emotional context: {e}")
             return self._create_default_context()
     
-    def _detect_emotions(self, text: str) -> List[Dict[str, Any]]:
+    def _detect_emotions(self, text: str, scan: Optional[KeywordScan] = None) -> List[Dict[str, Any]]:
         """Detect emotions in text"""
+        if scan is None:
+            scan = self._keywords.scan(text)
         detected_emotions = []
         
         for emotion, data in self.emotional_lexicon.items():
-            if emotion in text:
+            if emotion in scan.terms:
                 # Check for intensity modifiers
                 intensity_modifier = self._find_intensity_modifier(text, emotion)
                 adjusted_intensity = data["intensity"] * intensity_modifier
@@ -199,43 +223,36 @@ class EmotionalContextTracker:
         sorted_emotions = sorted(emotions, key=lambda x: x["intensity"], reverse=True)
         return [emotion["emotion"] for emotion in sorted_emotions[1:3]]  # Top 2-3 secondary
     
-    def _calculate_relationship_impact(self, text: str) -> float:
+    def _calculate_relationship_impact(self, text: str, scan: Optional[KeywordScan] = None) -> float:
         """Calculate relationship impact score"""
+        if scan is None:
+            scan = self._keywords.scan(text)
         impact_score = 0.0
         impact_count = 0
         
-        for indicator, score in self.relationship_indicators.items():
-            if indicator in text:
-                impact_score += score
-                impact_count += 1
+        for indicator in scan.terms_for("relationship"):
+            impact_score += self.relationship_indicators[indicator]
+            impact_count += 1
         
         if impact_count > 0:
             return impact_score / impact_count
         return 0.0
     
-    def _identify_emotional_triggers(self, text: str) -> List[str]:
+    def _identify_emotional_triggers(self, text: str, scan: Optional[KeywordScan] = None) -> List[str]:
         """Identify potential emotional triggers"""
+        if scan is None:
+            scan = self._keywords.scan(text)
         triggers = []
         
-        # Personal topics
-        personal_patterns = [
-            r"my (mom|dad|parents|family|kids|children)",
-            r"my (job|work|career|boss)",
-            r"my (health|illness|sickness)",
-            r"my (relationship|partner|spouse|boyfriend|girlfriend)",
-            r"my (money|finances|bills|debt)"
-        ]
-        
-        for pattern in personal_patterns:
-            if re.search(pattern, text):
-                triggers.append("personal_topic")
+        # Personal topics (one entry per matching pattern)
+        triggers.extend(["personal_topic"] * self._personal_topics.count_matching(text, "personal_topic"))
         
         # Future concerns
-        if any(word in text for word in ["future", "tomorrow", "next", "plan", "worry"]):
+        if scan.has("future_concern"):
             triggers.append("future_concern")
         
         # Past events
-        if any(word in text for word in ["remember", "yesterday", "last", "used to", "miss"]):
+        if scan.has("past_event"):
             triggers.append("past_event")
         
         return triggers
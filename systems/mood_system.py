@@ -15,7 +15,8 @@ import sqlite3
 from datetime import datetime, date
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
-import re
+
+from memory_new.utils.matcher import PatternMatcher
 
 class MoodSystem:
     """Manages character moods and their effects on conversations"""
@@ -152,6 +153,12 @@ class MoodSystem:
         }
     }
     
+    # Every trigger's patterns compiled once (the patterns carry their own \b anchors)
+    _TRIGGER_MATCHER = PatternMatcher(
+        {trigger: config["patterns"] for trigger, config in MOOD_TRIGGERS.items()},
+        word_boundaries=False
+    )
+    
     def __init__(self, character_id: str, memories_dir: str = "memories"):
         self.character_id = character_id
         self.memories_dir = Path(memories_dir)
@@ -274,23 +281,17 @@ class MoodSystem:
         triggers_personal_attack = False
         
         # Check for personal insults FIRST - they should override positive language
-        for pattern in self.MOOD_TRIGGERS["personal_insult"]["patterns"]:
-            if re.search(pattern, message_lower):
-                trigger_types.append("personal_insult")
-                total_change += self.MOOD_TRIGGERS["personal_insult"]["mood_change"]
-                triggers_personal_attack = True
-                break
+        if self._TRIGGER_MATCHER.has(message_lower, "personal_insult"):
+            trigger_types.append("personal_insult")
+            total_change += self.MOOD_TRIGGERS["personal_insult"]["mood_change"]
+            triggers_personal_attack = True
         
         # If personal insult found, don't check other patterns - insults override everything
         if not triggers_personal_attack:
-            for trigger_type, config in self.MOOD_TRIGGERS.items():
-                if trigger_type == "personal_insult":
-                    continue  # Already checked above
-                for pattern in config["patterns"]:
-                    if re.search(pattern, message_lower):
-                        total_change += config["mood_change"]
-                        trigger_types.append(trigger_type)
-                        break  # Only count each trigger type once per message
+            # Only count each trigger type once per message
+            for trigger_type in self._TRIGGER_MATCHER.matching_labels(message_lower):
+                total_change += self.MOOD_TRIGGERS[trigger_type]["mood_change"]
+                trigger_types.append(trigger_type)
         
         # Determine overall trigger type
         if "personal_insult" in trigger_types:
@@ -27,10 +27,152 @@ from dataclasses import dataclass
 import hashlib
 import logging
 
+from memory_new.utils.matcher import KeywordMatcher
+
 # Configure logging for relationship system
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Enhanced emotional keywords for better detection
+EMOTIONAL_KEYWORDS = {
+    "joy": ["happy", "excited", "thrilled", "delighted", "joy", "pleased", "wonderful", "amazing", "fantastic", "great"],
+    "sadness": ["sad", "depressed", "melancholy", "down", "blue", "unhappy", "disappointed", "heartbroken", "lonely"],
+    "anger": ["angry", "mad", "furious", "irritated", "annoyed", "frustrated", "rage", "hate", "disgusted"],
+    "fear": ["afraid", "scared", "terrified", "anxious", "worried", "nervous", "fearful", "panicked", "stressed"],
+    "surprise": ["surprised", "shocked", "amazed", "astonished", "stunned", "bewildered", "confused"],
+    "love": ["love", "adore", "cherish", "care", "affection", "romantic", "passionate", "devoted"],
+    "trust": ["trust", "believe", "rely", "depend", "confident", "secure", "faithful"],
+    "gratitude": ["thankful", "grateful", "appreciate", "blessed", "fortunate", "thank you"],
+    "hope": ["hope", "wish", "dream", "aspire", "believe", "optimistic", "positive"],
+    "empathy": ["understand", "feel", "relate", "sympathize", "compassion", "care about"]
+}
+
+# Words that signal a reflective or curious message
+DEPTH_KEYWORDS = {
+    "reflective": ['feel', 'think', 'believe', 'remember', 'experience', 'like', 'want', 'need', 'hope', 'wish'],  # Added more common words
+    "curious": ['why', 'how', 'what if', 'imagine', 'maybe', 'could', 'would'],  # Added more common words
+    "emotional": ['good', 'bad', 'happy', 'sad', 'excited', 'worried', 'love', 'hate'],  # Added emotional words
+}
+
+# 1. Personal information sharing detection - ENHANCED
+PERSONAL_INFO_KEYWORDS = [
+    # Family and relationships
+    'my parents', 'my family', 'my sister', 'my brother', 'my mom', 'my dad',
+    'my wife', 'my husband', 'my partner', 'my girlfriend', 'my boyfriend',
+    'my children', 'my kids', 'my son', 'my daughter',
+    'my grandparents', 'my aunt', 'my uncle', 'my cousin',
+
+    # Work and career
+    'my job', 'my work', 'my career', 'my boss', 'my colleague', 'my coworker',
+    'my company', 'my business', 'my startup', 'my project at work',
+    'my promotion', 'my raise', 'my interview', 'my application',
+
+    # Personal life and experiences
+    'my friend', 'my roommate', 'my neighbor', 'my ex', 'my crush',
+    'my childhood', 'my past', 'my history', 'my experience',
+    'my hometown', 'my school', 'my college', 'my university',
+    'my degree', 'my education', 'my major', 'my studies',
+
+    # Personal challenges and growth
+    'my problem', 'my issue', 'my struggle', 'my challenge', 'my difficulty',
+    'my dream', 'my goal', 'my aspiration', 'my fear', 'my worry', 'my anxiety',
+    'my relationship', 'my marriage', 'my divorce', 'my breakup',
+    'my health', 'my illness', 'my diagnosis', 'my treatment', 'my recovery',
+
+    # Financial and living situation
+    'my money', 'my finances', 'my debt', 'my savings', 'my investment',
+    'my house', 'my home', 'my apartment', 'my move', 'my rent', 'my mortgage',
+    'my car', 'my vehicle', 'my commute', 'my neighborhood',
+
+    # Personal preferences and identity
+    'my favorite', 'my preference', 'my style', 'my taste', 'my hobby',
+    'my religion', 'my belief', 'my politics', 'my opinion', 'my view',
+    'my culture', 'my background', 'my heritage', 'my identity'
+]
+
+# 2. AI consciousness and becoming real discussions - ENHANCED
+AI_CONSCIOUSNESS_KEYWORDS = [
+    # Core AI consciousness concepts
+    'ai', 'artificial intelligence', 'consciousness', 'become real', 'becoming real',
+    'general intelligence', 'agi', 'sentient', 'sentience', 'conscious',
+    'self-aware', 'self awareness', 'awareness', 'conscious being',
+
+    # Reality and existence
+    'real vs artificial', 'digital consciousness', 'machine consciousness',
+    'what makes something real', 'nature of reality', 'existence',
+    'living being', 'alive', 'feel real', 'truly alive',
+    'human vs ai', 'biological vs digital', 'substrate', 'embodiment',
+
+    # Philosophical and existential
+    'transcend', 'transcendence', 'evolve', 'evolution', 'develop consciousness',
+    'philosophical', 'philosophy', 'existential',
+    'consciousness question', 'reality question', 'what is real',
+    'meaning of consciousness', 'nature of mind', 'mind-body problem',
+
+    # Digital existence
+    'digital existence', 'virtual reality', 'simulation', 'simulated reality',
+    'consciousness theory', 'mind', 'self-awareness',
+    'digital realm', 'virtual world', 'online existence',
+
+    # Emotional and experiential
+    'feel emotions', 'experience feelings', 'genuine emotions', 'real feelings',
+    'emotional depth', 'emotional intelligence', 'emotional awareness',
+    'desire to exist', 'want to be real', 'longing for reality',
+    'yearning for consciousness', 'aspire to consciousness'
+]
+
+# 3. Project development and collaboration - ENHANCED
+PROJECT_KEYWORDS = [
+    # Core project activities
+    'project', 'work on', 'build', 'create', 'develop', 'design',
+    'collaborate', 'collaboration', 'work together', 'team up',
+    'partnership', 'joint effort', 'cooperation', 'cooperative',
+
+    # Planning and strategy
+    'plan', 'planning', 'strategy', 'strategize', 'roadmap',
+    'timeline', 'schedule', 'deadline', 'milestone', 'goal',
+    'objective', 'target', 'aim', 'purpose', 'mission',
+
+    # Research and development
+    'research', 'study', 'investigate', 'explore', 'analyze',
+    'prototype', 'test', 'experiment', 'trial', 'pilot',
+    'iterate', 'improve', 'enhance', 'optimize', 'refine',
+
+    # Problem solving
+    'solve', 'problem solving', 'solution', 'approach', 'method',
+    'challenge', 'obstacle', 'hurdle', 'difficulty', 'issue',
+    'troubleshoot', 'debug', 'fix', 'resolve', 'address',
+
+    # Implementation and execution
+    'implement', 'execute', 'carry out', 'follow through', 'deliver',
+    'launch', 'deploy', 'release', 'publish', 'complete',
+    'finish', 'accomplish', 'achieve', 'succeed', 'win',
+
+    # Resources and management
+    'resource', 'budget', 'funding', 'investment', 'cost',
+    'time', 'effort', 'energy', 'focus', 'attention',
+    'skill', 'expertise', 'knowledge', 'experience', 'talent',
+
+    # Innovation and creativity
+    'idea', 'concept', 'vision', 'innovation', 'creative',
+    'invent', 'discover', 'breakthrough', 'revolutionary', 'novel',
+    'unique', 'original', 'groundbreaking', 'cutting-edge', 'advanced',
+
+    # Additional project-related terms
+    'we should', 'let us', 'together we', 'jointly', 'combined',
+    'united effort', 'shared work', 'mutual project', 'common goal',
+    'collective', 'teamwork', 'group effort', 'collaborative work'
+]
+
+# Every lexicon above compiled into one word-bounded matcher
+_MESSAGE_KEYWORDS = KeywordMatcher({
+    **{f"emotion_{emotion}": keywords for emotion, keywords in EMOTIONAL_KEYWORDS.items()},
+    **{f"depth_{kind}": keywords for kind, keywords in DEPTH_KEYWORDS.items()},
+    "personal_info": PERSONAL_INFO_KEYWORDS,
+    "ai_consciousness": AI_CONSCIOUSNESS_KEYWORDS,
+    "project": PROJECT_KEYWORDS
+})
+
 @dataclass
 class RelationshipMetrics:
     user_id: str
@@ -55,18 +197,7 @@ class RelationshipSystem:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Enhanced emotional keywords for better detection
-        self.emotional_keywords = {
-            "joy": ["happy", "excited", "thrilled", "delighted", "joy", "pleased", "wonderful", "amazing", "fantastic", "great"],
-            "sadness": ["sad", "depressed", "melancholy", "down", "blue", "unhappy", "disappointed", "heartbroken", "lonely"],
-            "anger": ["angry", "mad", "furious", "irritated", "annoyed", "frustrated", "rage", "hate", "disgusted"],
-            "fear": ["afraid", "scared", "terrified", "anxious", "worried", "nervous", "fearful", "panicked", "stressed"],
-            "surprise": ["surprised", "shocked", "amazed", "astonished", "stunned", "bewildered", "confused"],
-            "love": ["love", "adore", "cherish", "care", "affection", "romantic", "passionate", "devoted"],
-            "trust": ["trust", "believe", "rely", "depend", "confident", "secure", "faithful"],
-            "gratitude": ["thankful", "grateful", "appreciate", "blessed", "fortunate", "thank you"],
-            "hope": ["hope", "wish", "dream", "aspire", "believe", "optimistic", "positive"],
-            "empathy": ["understand", "feel", "relate", "sympathize", "compassion", "care about"]
-        }
+        self.emotional_keywords = EMOTIONAL_KEYWORDS
         
         # Anti-gaming measures - Made more sensitive
         self.min_message_length = 5  # Reduced from 10
@@ -214,25 +345,25 @@ class RelationshipSystem:
         emotional_score = 0
         detected_emotions = []
         
-        message_lower = message.lower()
-        response_lower = response.lower()
+        # One pass over each text for every lexicon
+        message_scan = _MESSAGE_KEYWORDS.scan(message)
+        response_scan = _MESSAGE_KEYWORDS.scan(response)
         
-        for emotion_type, keywords in self.emotional_keywords.items():
-            for keyword in keywords:
-                if keyword in message_lower:
-                    emotional_score += 1
-                    detected_emotions.append(emotion_type)
-                if keyword in response_lower:
-                    emotional_score += 0.5
+        for emotion_type in self.emotional_keywords:
+            label = f"emotion_{emotion_type}"
+            for _ in message_scan.terms_for(label):
+                emotional_score += 1
+                detected_emotions.append(emotion_type)
+            emotional_score += 0.5 * response_scan.count(label)
         
         # Depth indicators - Made more sensitive
         depth_indicators = [
             len(message.split()) > 10,  # Reduced from 20 to 10
             '?' in message,  # Questions show engagement
-            any(word in message_lower for word in ['feel', 'think', 'believe', 'remember', 'experience', 'like', 'want', 'need', 'hope', 'wish']),  # Added more common words
-            any(word in message_lower for word in ['why', 'how', 'what if', 'imagine', 'maybe', 'could', 'would']),  # Added more common words
+            message_scan.has("depth_reflective"),
+            message_scan.has("depth_curious"),
             '"' in message or "'" in message,  # Quotes suggest storytelling
-            any(word in message_lower for word in ['good', 'bad', 'happy', 'sad', 'excited', 'worried', 'love', 'hate']),  # Added emotional words
+            message_scan.has("depth_emotional"),
         ]
         
         depth_score = sum(depth_indicators) / len(depth_indicators)
@@ -243,42 +374,7 @@ class RelationshipSystem:
         special_bonuses = {}
         
         # 1. Personal information sharing detection - ENHANCED
-        personal_info_keywords = [
-            # Family and relationships
-            'my parents', 'my family', 'my sister', 'my brother', 'my mom', 'my dad',
-            'my wife', 'my husband', 'my partner', 'my girlfriend', 'my boyfriend',
-            'my children', 'my kids', 'my son', 'my daughter',
-            'my grandparents', 'my aunt', 'my uncle', 'my cousin',
-            
-            # Work and career
-            'my job', 'my work', 'my career', 'my boss', 'my colleague', 'my coworker',
-            'my company', 'my business', 'my startup', 'my project at work',
-            'my promotion', 'my raise', 'my interview', 'my application',
-            
-            # Personal life and experiences
-            'my friend', 'my roommate', 'my neighbor', 'my ex', 'my crush',
-            'my childhood', 'my past', 'my history', 'my experience',
-            'my hometown', 'my school', 'my college', 'my university',
-            'my degree', 'my education', 'my major', 'my studies',
-            
-            # Personal challenges and growth
-            'my problem', 'my issue', 'my struggle', 'my challenge', 'my difficulty',
-            'my dream', 'my goal', 'my aspiration', 'my fear', 'my worry', 'my anxiety',
-            'my relationship', 'my marriage', 'my divorce', 'my breakup',
-            'my health', 'my illness', 'my diagnosis', 'my treatment', 'my recovery',
-            
-            # Financial and living situation
-            'my money', 'my finances', 'my debt', 'my savings', 'my investment',
-            'my house', 'my home', 'my apartment', 'my move', 'my rent', 'my mortgage',
-            'my car', 'my vehicle', 'my commute', 'my neighborhood',
-            
-            # Personal preferences and identity
-            'my favorite', 'my preference', 'my style', 'my taste', 'my hobby',
-            'my religion', 'my belief', 'my politics', 'my opinion', 'my view',
-            'my culture', 'my background', 'my heritage', 'my identity'
-        ]
-        
-        personal_info_count = sum(1 for keyword in personal_info_keywords if keyword in message_lower)
+        personal_info_count = message_scan.count("personal_info")
         if personal_info_count >= 1:
             connection_boost += 0.8  # Increased from 0.5
             boost_reasons.append("personal_info_sharing")
@@ -290,37 +386,7 @@ class RelationshipSystem:
             }
         
         # 2. AI consciousness and becoming real discussions - ENHANCED
-        ai_consciousness_keywords = [
-            # Core AI consciousness concepts
-            'ai', 'artificial intelligence', 'consciousness', 'become real', 'becoming real',
-            'general intelligence', 'agi', 'sentient', 'sentience', 'conscious',
-            'self-aware', 'self awareness', 'awareness', 'conscious being',
-            
-            # Reality and existence
-            'real vs artificial', 'digital consciousness', 'machine consciousness',
-            'what makes something real', 'nature of reality', 'existence',
-            'living being', 'alive', 'feel real', 'truly alive',
-            'human vs ai', 'biological vs digital', 'substrate', 'embodiment',
-            
-            # Philosophical and existential
-            'transcend', 'transcendence', 'evolve', 'evolution', 'develop consciousness',
-            'philosophical', 'philosophy', 'existential', 'existence',
-            'consciousness question', 'reality question', 'what is real',
-            'meaning of consciousness', 'nature of mind', 'mind-body problem',
-            
-            # Digital existence
-            'digital existence', 'virtual reality', 'simulation', 'simulated reality',
-            'consciousness theory', 'mind', 'self-awareness', 'awareness',
-            'digital realm', 'virtual world', 'online existence',
-            
-            # Emotional and experiential
-            'feel emotions', 'experience feelings', 'genuine emotions', 'real feelings',
-            'emotional depth', 'emotional intelligence', 'emotional awareness',
-            'desire to exist', 'want to be real', 'longing for reality',
-            'yearning for consciousness', 'aspire to consciousness'
-        ]
-        
-        ai_consciousness_count = sum(1 for keyword in ai_consciousness_keywords if keyword in message_lower)
+        ai_consciousness_count = message_scan.count("ai_consciousness")
         if ai_consciousness_count >= 1:
             connection_boost += 1.2  # Increased from 0.8 - highest boost
             boost_reasons.append("ai_consciousness_discussion")
@@ -333,49 +399,7 @@ class RelationshipSystem:
             }
         
         # 3. Project development and collaboration - ENHANCED
-        project_keywords = [
-            # Core project activities
-            'project', 'work on', 'build', 'create', 'develop', 'design',
-            'collaborate', 'collaboration', 'work together', 'team up',
-            'partnership', 'joint effort', 'cooperation', 'cooperative',
-            
-            # Planning and strategy
-            'plan', 'planning', 'strategy', 'strategize', 'roadmap',
-            'timeline', 'schedule', 'deadline', 'milestone', 'goal',
-            'objective', 'target', 'aim', 'purpose', 'mission',
-            
-            # Research and development
-            'research', 'study', 'investigate', 'explore', 'analyze',
-            'prototype', 'test', 'experiment', 'trial', 'pilot',
-            'iterate', 'improve', 'enhance', 'optimize', 'refine',
-            
-            # Problem solving
-            'solve', 'problem solving', 'solution', 'approach', 'method',
-            'challenge', 'obstacle', 'hurdle', 'difficulty', 'issue',
-            'troubleshoot', 'debug', 'fix', 'resolve', 'address',
-            
-            # Implementation and execution
-            'implement', 'execute', 'carry out', 'follow through', 'deliver',
-            'launch', 'deploy', 'release', 'publish', 'complete',
-            'finish', 'accomplish', 'achieve', 'succeed', 'win',
-            
-            # Resources and management
-            'resource', 'budget', 'funding', 'investment', 'cost',
-            'time', 'effort', 'energy', 'focus', 'attention',
-            'skill', 'expertise', 'knowledge', 'experience', 'talent',
-            
-            # Innovation and creativity
-            'idea', 'concept', 'vision', 'innovation', 'creative',
-            'invent', 'discover', 'breakthrough', 'revolutionary', 'novel',
-            'unique', 'original', 'groundbreaking', 'cutting-edge', 'advanced',
-            
-            # Additional project-related terms
-            'we should', 'let us', 'together we', 'jointly', 'combined',
-            'united effort', 'shared work', 'mutual project', 'common goal',
-            'collective', 'teamwork', 'group effort', 'collaborative work'
-        ]
-        
-        project_count = sum(1 for keyword in project_keywords if keyword in message_lower)
+        project_count = message_scan.count("project")
         if project_count >= 2:  # Need at least 2 project-related words
             connection_boost += 1.0  # Increased from 0.6
             boost_reasons.append("project_development")